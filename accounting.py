@@ -0,0 +1,143 @@
+import logging
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+
+from flask import Flask, Response, g, request
+
+from metrics import Metrics
+
+BUDGET_MODES = ('log', 'reject')
+
+
+class ReadBudgetExceededError(Exception):
+    def __init__(self, endpoint: str, reads: int, budget: int) -> None:
+        super().__init__(f'{endpoint} read {reads} documents, over its budget of {budget}')
+        self.endpoint = endpoint
+        self.reads = reads
+        self.budget = budget
+
+
+@dataclass
+class OperationCounts:
+    reads: int = 0
+    writes: int = 0
+    deletes: int = 0
+    round_trips: int = 0
+
+
+@dataclass
+class RequestOperations:
+    endpoint: str
+    counts: OperationCounts
+    budget: int | None
+    reject: bool
+    over_budget: bool = False
+
+
+current_operations: ContextVar[RequestOperations | None] = ContextVar('current_operations', default=None)
+
+
+def record_operations(*, reads: int = 0, writes: int = 0, deletes: int = 0, round_trips: int = 0) -> None:
+    """
+    Add Firestore operations to the request being served, checking its read budget.
+
+    Outside a request, or in a thread started by the request, this does nothing. Reads are counted as Firestore bills
+    them: one per document returned, a get of a missing document and a query without results count as one read. Round
+    trips are the RPCs made, whatever they do.
+    """
+    record = current_operations.get()
+    if record is None:
+        return
+
+    counts = record.counts
+    counts.reads += reads
+    counts.writes += writes
+    counts.deletes += deletes
+    counts.round_trips += round_trips
+
+    if record.budget is not None and counts.reads > record.budget and not record.over_budget:
+        record.over_budget = True
+        if record.reject:
+            raise ReadBudgetExceededError(record.endpoint, counts.reads, record.budget)
+
+
+def query_reads(results: int) -> int:
+    return max(results, 1)
+
+
+class OperationAccounting:
+    """
+    Counts the Firestore operations of every request, logged per request and added to per endpoint metrics.
+
+    A request reading more than `read_budget` documents is logged as a warning, and with `budget_mode` 'reject' it is
+    also stopped at the read that goes over the budget. A budget of 0 disables the check.
+    """
+
+    def __init__(self, metrics: Metrics, read_budget: int, budget_mode: str) -> None:
+        if budget_mode not in BUDGET_MODES:
+            raise ValueError(budget_mode)
+
+        self.metrics = metrics
+        self.read_budget = read_budget or None
+        self.reject = budget_mode == 'reject'
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def begin_request(self, endpoint: str) -> RequestOperations:
+        record = RequestOperations(endpoint=endpoint, counts=OperationCounts(), budget=self.read_budget, reject=self.reject)
+        current_operations.set(record)
+        return record
+
+    def end_request(self, record: RequestOperations, status: int | None, client_id: str | None) -> None:
+        current_operations.set(None)
+
+        counts = asdict(record.counts)
+        self.metrics.increment(f'firestore.{record.endpoint}.requests')
+        for name, value in counts.items():
+            self.metrics.increment(f'firestore.{record.endpoint}.{name}', value)
+
+        if not any(counts.values()):
+            return
+
+        level = logging.INFO
+        if record.over_budget:
+            self.metrics.increment(f'firestore.{record.endpoint}.over_budget')
+            level = logging.WARNING
+
+        # json_fields is picked up as structured payload by the Cloud Logging handler
+        self.logger.log(
+            level,
+            'Firestore operations %s client=%s reads=%d writes=%d',
+            record.endpoint,
+            client_id,
+            record.counts.reads,
+            record.counts.writes,
+            extra={
+                'json_fields': {
+                    'endpoint': record.endpoint,
+                    'status': status,
+                    'client_id': client_id,
+                    'read_budget': record.budget,
+                    'over_budget': record.over_budget,
+                    **counts,
+                }
+            },
+        )
+
+
+def install_operation_accounting(app: Flask, accounting: OperationAccounting) -> None:
+    def before_request() -> None:
+        g.operations = accounting.begin_request(request.endpoint or 'unknown')
+
+    def after_request(response: Response) -> Response:
+        g.operations_status = response.status_code
+        return response
+
+    def teardown_request(_: BaseException | None) -> None:
+        record: RequestOperations | None = g.pop('operations', None)
+        if record is not None:
+            user_token = getattr(request, 'user_token', None) or {}
+            accounting.end_request(record, g.pop('operations_status', None), user_token.get('cid'))
+
+    app.before_request(before_request)
+    app.after_request(after_request)
+    app.teardown_request(teardown_request)
@@ -0,0 +1,86 @@
+import logging
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+
+from metrics import Metrics
+
+
+class AdmissionRejectedError(Exception):
+    def __init__(self, pool: str, retry_after: int) -> None:
+        super().__init__(f'Admission to {pool} rejected')
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class AdmissionPool:
+    """
+    Bounds how many requests run an expensive section at once.
+
+    Up to `max_concurrency` requests run the section and up to `max_queue` more wait for a slot, for at most
+    `queue_timeout` seconds. Anything beyond that is rejected straight away, so that worker threads stay available for
+    cheap requests (cached invoice reads, health checks) instead of piling up behind the expensive ones.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        name: str,
+        metrics: Metrics,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int,
+    ) -> None:
+        self.name = name
+        self.metrics = metrics
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.waiting = 0
+        self.running = 0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def reject(self, reason: str) -> AdmissionRejectedError:
+        self.logger.warning('Rejected request for %s: %s', self.name, reason)
+        self.metrics.increment(f'admission.{self.name}.rejected.{reason}')
+        return AdmissionRejectedError(self.name, self.retry_after)
+
+    def acquire(self) -> None:
+        if self.semaphore.acquire(blocking=False):
+            self.metrics.observe(f'admission.{self.name}.queue_wait_seconds', 0.0)
+            return
+
+        with self.lock:
+            if self.waiting >= self.max_queue:
+                raise self.reject('queue_full')
+            self.waiting += 1
+            self.metrics.set_gauge(f'admission.{self.name}.waiting', self.waiting)
+
+        start = time.perf_counter()
+        try:
+            acquired = self.semaphore.acquire(timeout=self.queue_timeout)
+        finally:
+            with self.lock:
+                self.waiting -= 1
+                self.metrics.set_gauge(f'admission.{self.name}.waiting', self.waiting)
+
+        self.metrics.observe(f'admission.{self.name}.queue_wait_seconds', time.perf_counter() - start)
+        if not acquired:
+            raise self.reject('queue_timeout')
+
+    @contextmanager
+    def slot(self) -> Generator[None, None, None]:
+        self.acquire()
+        with self.lock:
+            self.running += 1
+            self.metrics.set_gauge(f'admission.{self.name}.running', self.running)
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.running -= 1
+                self.metrics.set_gauge(f'admission.{self.name}.running', self.running)
+            self.semaphore.release()
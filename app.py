@@ -1,51 +1,201 @@
 import os
-
-from flask import Flask
-from gcp_microservice_utils import GcpAuthToken, setup_apigateway, setup_cloud_logging, setup_cloud_trace
-
-from blueprints import BlueprintBackup, BlueprintHealth, BlueprintInvoice, BlueprintReset
+import threading
+from functools import partial
+
+from flask import Flask, request
+
+from accounting import ReadBudgetExceededError, install_operation_accounting
+from admission import AdmissionRejectedError
+from blueprints import (
+    BlueprintBackup,
+    BlueprintEvents,
+    BlueprintHealth,
+    BlueprintInvoice,
+    BlueprintMemory,
+    BlueprintMetrics,
+    BlueprintProfiling,
+    BlueprintReconciliation,
+    BlueprintReset,
+    BlueprintRevenue,
+    BlueprintSimulation,
+    BlueprintUsage,
+)
+from blueprints.util import admission_rejected_response, read_budget_exceeded_response
 from containers import Container
+from memory import install_memory_tracing
+from profiling import install_request_profiler
+from repositories.rest import LazyTokenProvider, TokenProvider
+from warmup import warmup_steps
 
 
 class FlaskMicroservice(Flask):
     container: Container
 
 
-def create_app() -> FlaskMicroservice:
-    if os.getenv('ENABLE_CLOUD_LOGGING') == '1':  # pragma: no cover
-        setup_cloud_logging()
-
-    app = FlaskMicroservice(__name__)
-    app.container = Container()
-
-    app.container.config.firestore.database.from_env('FIRESTORE_DATABASE', '(default)')
+def gcp_auth_token(audience: str) -> TokenProvider:  # pragma: no cover
+    from gcp_microservice_utils import GcpAuthToken
+
+    return GcpAuthToken(audience)
+
+
+def setup_cloud_logging() -> None:  # pragma: no cover
+    from gcp_microservice_utils import setup_cloud_logging as gcp_setup_cloud_logging
+
+    gcp_setup_cloud_logging()
+
+
+def api_gateway_before_request() -> None:
+    # Only requests coming through the API gateway carry user info, so health checks and scheduler
+    # jobs are served without importing gcp_microservice_utils (and the google-cloud stack behind it).
+    if 'X-Apigateway-Api-Userinfo' not in request.headers:
+        request.user_token = None  # type: ignore[attr-defined]
+        return
+
+    from gcp_microservice_utils.apigateway import _api_gateway_before_request
+
+    _api_gateway_before_request()
+
+
+def load_config(container: Container) -> None:  # noqa: PLR0915
+    container.config.storage.backend.from_env('STORAGE_BACKEND', default='firestore')
+    container.config.firestore.database.from_env('FIRESTORE_DATABASE', '(default)')
+    container.config.firestore.read_budget.from_env('FIRESTORE_READ_BUDGET', as_=int, default=0)
+    container.config.firestore.read_budget_mode.from_env('FIRESTORE_READ_BUDGET_MODE', default='log')
+    container.config.sqlite.path.from_env('SQLITE_PATH', default='service-invoice.db')
+    container.config.storage.writes.from_env('STORAGE_WRITES', default='direct')
+    container.config.write_behind.directory.from_env('WRITE_BEHIND_DIRECTORY', default='write-behind')
+    container.config.write_behind.max_log_bytes.from_env('WRITE_BEHIND_MAX_LOG_BYTES', as_=int, default=16 * 1024 * 1024)
+    # A batch holds up to two writes per entry, below Firestore's limit of 500 writes per batch
+    container.config.write_behind.batch_size.from_env('WRITE_BEHIND_BATCH_SIZE', as_=int, default=200)
+    container.config.write_behind.flush_interval.from_env('WRITE_BEHIND_FLUSH_INTERVAL', as_=float, default=1.0)
+    container.config.write_behind.retry_interval.from_env('WRITE_BEHIND_RETRY_INTERVAL', as_=float, default=1.0)
+    container.config.write_behind.max_retry_interval.from_env('WRITE_BEHIND_MAX_RETRY_INTERVAL', as_=float, default=60.0)
+    container.config.backup.api_url.from_env('BACKUP_API_URL', default='https://firestore.googleapis.com')
+    container.config.backup.poll_interval.from_env('BACKUP_POLL_INTERVAL', as_=float, default=10.0)
+    container.config.backup.max_poll_interval.from_env('BACKUP_MAX_POLL_INTERVAL', as_=float, default=120.0)
+    container.config.backup.poll_deadline.from_env('BACKUP_POLL_DEADLINE', as_=float, default=4 * 3600.0)
+    container.config.backup.max_operations.from_env('BACKUP_MAX_OPERATIONS', as_=int, default=20)
+    container.config.cache.backend.from_env('CACHE_BACKEND', default='local')
+    container.config.cache.sqlite_path.from_env('CACHE_SQLITE_PATH', default='/dev/shm/service-invoice-cache.db')  # noqa: S108
+    container.config.cache.redis_url.from_env('CACHE_REDIS_URL', default='redis://localhost:6379/0')
+    container.config.cache.redis_timeout.from_env('CACHE_REDIS_TIMEOUT', as_=float, default=0.1)
+    container.config.cache.redis_retry_interval.from_env('CACHE_REDIS_RETRY_INTERVAL', as_=float, default=30.0)
+    container.config.cache.max_entries.from_env('CACHE_MAX_ENTRIES', as_=int, default=100000)
+    container.config.cache.rate_ttl.from_env('RATE_CACHE_TTL', as_=float, default=3600.0)
+    # Events and reconciliations evict entries from the cache they reach, which is shared by every instance only with
+    # redis, otherwise the TTL bounds how long the other workers and instances keep serving the evicted entries
+    evicted_ttl = 86400.0 if container.config.cache.backend() == 'redis' else 300.0
+    container.config.cache.client_ttl.from_env('CLIENT_CACHE_TTL', as_=float, default=evicted_ttl)
+    container.config.cache.invoice_ttl.from_env('INVOICE_CACHE_TTL', as_=float, default=evicted_ttl)
+    container.config.incident_store.full_resync_interval.from_env('INCIDENT_FULL_RESYNC_INTERVAL', as_=float, default=3600.0)
+    container.config.admission.generation.max_concurrency.from_env('ADMISSION_GENERATION_CONCURRENCY', as_=int, default=4)
+    container.config.admission.generation.max_queue.from_env('ADMISSION_GENERATION_QUEUE', as_=int, default=2)
+    container.config.admission.queue_timeout.from_env('ADMISSION_QUEUE_TIMEOUT', as_=float, default=10.0)
+    container.config.admission.retry_after.from_env('ADMISSION_RETRY_AFTER', as_=int, default=5)
+    container.config.reconciliation.batch_size.from_env('RECONCILIATION_BATCH_SIZE', as_=int, default=100)
+    container.config.reconciliation.max_workers.from_env('RECONCILIATION_WORKERS', as_=int, default=8)
+    container.config.reconciliation.max_staleness.from_env('RECONCILIATION_MAX_STALENESS', as_=float, default=300.0)
+    container.config.simulation.max_workers.from_env('SIMULATION_WORKERS', as_=int, default=4)
+    container.config.incident_store.max_incidents.from_env('INCIDENT_STORE_MAX_INCIDENTS', as_=int, default=1_000_000)
+    container.config.profiling.enabled.from_env('ENABLE_PROFILING', as_=lambda value: value == '1', default='0')
+    container.config.profiling.directory.from_env('PROFILING_DIRECTORY', default='/tmp/profiles')  # noqa: S108
+    container.config.profiling.token.from_env('PROFILING_TOKEN', default=None)
+    container.config.profiling.sample_rate.from_env('PROFILING_SAMPLE_RATE', as_=float, default=0.0)
+    container.config.memory.frames.from_env('MEMORY_TRACE_FRAMES', as_=int, default=1)
+    container.config.memory.snapshot_interval.from_env('MEMORY_SNAPSHOT_INTERVAL', as_=float, default=60.0)
+    container.config.memory.snapshot_history.from_env('MEMORY_SNAPSHOT_HISTORY', as_=int, default=60)
+    container.config.memory.large_request_bytes.from_env('MEMORY_LARGE_REQUEST_BYTES', as_=int, default=64 * 1024 * 1024)
+    container.config.profiling.max_profiles.from_env('PROFILING_MAX_PROFILES', as_=int, default=20)
 
     if 'K_SERVICE' in os.environ:  # pragma: no cover
         import google.auth
 
         _, project_id = google.auth.default()  # type: ignore[no-untyped-call]
-        app.container.config.project_id.from_value(project_id)
+        container.config.project_id.from_value(project_id)
 
     if 'CLIENT_SVC_URL' in os.environ:  # pragma: no cover
-        app.container.config.svc.client.url.from_env('CLIENT_SVC_URL')
+        container.config.svc.client.url.from_env('CLIENT_SVC_URL')
 
         if 'USE_CLOUD_TOKEN_PROVIDER' in os.environ:
-            app.container.config.svc.client.token_provider.from_value(GcpAuthToken(os.environ['CLIENT_SVC_URL']))
+            token_provider = LazyTokenProvider(partial(gcp_auth_token, os.environ['CLIENT_SVC_URL']))
+            container.config.svc.client.token_provider.from_value(token_provider)
 
     if 'INCIDENTQUERY_SVC_URL' in os.environ:  # pragma: no cover
-        app.container.config.svc.incidentquery.url.from_env('INCIDENTQUERY_SVC_URL')
+        container.config.svc.incidentquery.url.from_env('INCIDENTQUERY_SVC_URL')
 
         if 'USE_CLOUD_TOKEN_PROVIDER' in os.environ:
-            app.container.config.svc.incidentquery.token_provider.from_value(GcpAuthToken(os.environ['INCIDENTQUERY_SVC_URL']))
+            token_provider = LazyTokenProvider(partial(gcp_auth_token, os.environ['INCIDENTQUERY_SVC_URL']))
+            container.config.svc.incidentquery.token_provider.from_value(token_provider)
+
+
+def start_background_tasks(app: FlaskMicroservice) -> None:
+    """Start the threads of the app, in the process that serves the requests since threads do not survive a fork."""
+    if os.getenv('ENABLE_MEMORY_TRACING') == '1':  # pragma: no cover
+        app.container.memory_tracer().start()
+
+    # Generated invoices are only logged by the requests, the flusher stores them and the writes left by a previous
+    # process are replayed
+    if app.container.config.storage.writes() == 'write_behind':  # pragma: no cover
+        app.container.write_behind_queue().start()
+
+    if os.getenv('ENABLE_WARMUP') == '1':  # pragma: no cover
+        preload_rates = int(os.getenv('WARMUP_PRELOAD_RATES', '0'))
+        app.container.warmup().start(warmup_steps(app.container, preload_rates=preload_rates))
+    else:
+        app.container.warmup().start({})
+
+
+def create_app(*, start_background: bool = True) -> FlaskMicroservice:
+    """
+    Build the app, and start its background tasks unless `start_background` is false.
+
+    An app loaded before gunicorn forks its workers is built without them, each worker starts its own after the fork.
+    """
+    if os.getenv('ENABLE_CLOUD_LOGGING') == '1':  # pragma: no cover
+        if os.getenv('FAST_STARTUP') == '1':
+            # Log records emitted before the handler is installed still reach stderr, which Cloud Run collects.
+            threading.Thread(target=setup_cloud_logging, name='setup-cloud-logging', daemon=True).start()
+        else:
+            setup_cloud_logging()
+
+    app = FlaskMicroservice(__name__)
+    app.container = Container()
+
+    load_config(app.container)
 
     if os.getenv('ENABLE_CLOUD_TRACE') == '1':  # pragma: no cover
+        from gcp_microservice_utils import setup_cloud_trace
+
         setup_cloud_trace(app)
 
-    setup_apigateway(app)
+    # Requests are only checked for a profiling trigger when profiling is enabled, otherwise no hook is registered
+    if app.container.config.profiling.enabled():  # pragma: no cover
+        install_request_profiler(app, app.container.profiler())
+
+    if os.getenv('ENABLE_MEMORY_TRACING') == '1':  # pragma: no cover
+        install_memory_tracing(app, app.container.memory_tracer())
+
+    if app.container.config.storage.backend() == 'firestore':
+        install_operation_accounting(app, app.container.operation_accounting())
+
+    app.before_request(api_gateway_before_request)
+    app.register_error_handler(AdmissionRejectedError, admission_rejected_response)
+    app.register_error_handler(ReadBudgetExceededError, read_budget_exceeded_response)
 
     app.register_blueprint(BlueprintBackup)
+    app.register_blueprint(BlueprintEvents)
     app.register_blueprint(BlueprintHealth)
+    app.register_blueprint(BlueprintMemory)
+    app.register_blueprint(BlueprintMetrics)
+    app.register_blueprint(BlueprintProfiling)
+    app.register_blueprint(BlueprintReconciliation)
     app.register_blueprint(BlueprintReset)
+    app.register_blueprint(BlueprintRevenue)
     app.register_blueprint(BlueprintInvoice)
+    app.register_blueprint(BlueprintUsage)
+    app.register_blueprint(BlueprintSimulation)
+
+    if start_background:
+        start_background_tasks(app)
 
     return app
@@ -0,0 +1,269 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, cast
+
+import requests
+
+PENDING = 'PENDING'
+RUNNING = 'RUNNING'
+SUCCEEDED = 'SUCCEEDED'
+FAILED = 'FAILED'
+# Polling stopped at the deadline, the export itself may still finish
+TIMED_OUT = 'TIMED_OUT'
+
+REQUEST_TIMEOUT = 10
+SNAPSHOT_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+# Operation ids are the snapshot time without separators, the same in every process
+OPERATION_ID_FORMAT = '%Y%m%dT%H%M%SZ'
+
+
+def operation_id(snapshot_time: str) -> str:
+    return datetime.strptime(snapshot_time, SNAPSHOT_TIME_FORMAT).strftime(OPERATION_ID_FORMAT)  # noqa: DTZ007
+
+
+def snapshot_time_of(operation_id: str) -> str | None:
+    try:
+        return datetime.strptime(operation_id, OPERATION_ID_FORMAT).strftime(SNAPSHOT_TIME_FORMAT)  # noqa: DTZ007
+    except ValueError:
+        return None
+
+
+class ExportRejectedError(Exception):
+    def __init__(self, snapshot_time: str, error: str) -> None:
+        super().__init__(f'Export at {snapshot_time} rejected: {error}')
+        self.error = error
+
+
+@dataclass
+class BackupOperation:
+    id: str
+    snapshot_time: str
+    output_uri_prefix: str
+    state: str = PENDING
+    # Name of the Firestore long-running operation, known once the export has been started or found
+    name: str | None = None
+    error: str | None = None
+    progress: dict[str, Any] = field(default_factory=dict)
+    polls: int = 0
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in {SUCCEEDED, FAILED, TIMED_OUT}
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class BackupManager:
+    """
+    Starts Firestore exports in the background and tracks their long-running operations.
+
+    A trigger returns at once with the operation, identified by its snapshot time, which a thread then starts, unless
+    another process already started an export of the snapshot that has not failed, and polls every `poll_interval`
+    seconds, doubling up to `max_poll_interval`, until it is done or `poll_deadline` seconds have passed. Triggers for
+    a snapshot time that already has an operation in this process that has not failed get that operation back. The
+    last `max_operations` operations are kept in this process, the others are looked up in Firestore by their snapshot
+    time. Where CPU is only allocated during requests, as on Cloud Run by default, polling only advances while the
+    instance serves requests; the export itself is not affected.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        api_url: str,
+        project_id: str,
+        database: str,
+        access_token: Callable[[], str],
+        poll_interval: float,
+        max_poll_interval: float,
+        poll_deadline: float,
+        max_operations: int,
+    ) -> None:
+        self.api_url = api_url.rstrip('/')
+        self.project_id = project_id
+        self.database = database
+        self.access_token = access_token
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.poll_deadline = poll_deadline
+        self.max_operations = max_operations
+        self.operations: OrderedDict[str, BackupOperation] = OrderedDict()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @property
+    def database_path(self) -> str:
+        return f'projects/{self.project_id}/databases/{self.database}'
+
+    def headers(self) -> dict[str, str]:
+        return {'Authorization': f'Bearer {self.access_token()}'}
+
+    def output_uri_prefix(self, snapshot_time: str) -> str:
+        return f'gs://{self.project_id}-backup/firestore/{self.database}/{snapshot_time}'
+
+    def trigger(self, snapshot_time: str) -> tuple[BackupOperation, bool]:
+        """Start an export of the database at `snapshot_time`, returning its operation and whether it was new."""
+        with self.lock:
+            operation = self.operations.get(operation_id(snapshot_time))
+            if operation is not None and operation.state != FAILED:
+                return operation, False
+
+            operation = BackupOperation(
+                id=operation_id(snapshot_time),
+                snapshot_time=snapshot_time,
+                output_uri_prefix=self.output_uri_prefix(snapshot_time),
+            )
+            self.operations.pop(operation.id, None)
+            self.operations[operation.id] = operation
+            while len(self.operations) > self.max_operations:
+                self.operations.popitem(last=False)
+
+        threading.Thread(target=self.run, args=(operation,), name=f'backup-{operation.id}', daemon=True).start()
+        return operation, True
+
+    def get(self, operation_id: str) -> BackupOperation | None:
+        with self.lock:
+            operation = self.operations.get(operation_id)
+
+        if operation is not None:
+            return operation
+
+        return self.lookup(operation_id)
+
+    def find(self, snapshot_time: str) -> dict[str, Any] | None:
+        """Find an export at `snapshot_time` among the operations of the database in Firestore, preferring one not failed."""
+        output_uri_prefix = self.output_uri_prefix(snapshot_time)
+        params = {'filter': f'metadata.outputUriPrefix="{output_uri_prefix}"'}
+        found = None
+        while True:
+            resp = requests.get(
+                f'{self.api_url}/v1/{self.database_path}/operations',
+                params=params,
+                headers=self.headers(),
+                timeout=REQUEST_TIMEOUT,
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            # Checked again in case the filter is not applied, which only costs the pages of the other operations
+            for operation_data in data.get('operations', []):
+                if operation_data.get('metadata', {}).get('outputUriPrefix') != output_uri_prefix:
+                    continue
+                if not operation_data.get('error'):
+                    return cast(dict[str, Any], operation_data)
+                found = operation_data
+
+            if not data.get('nextPageToken'):
+                return found
+            params['pageToken'] = data['nextPageToken']
+
+    def lookup(self, operation_id: str) -> BackupOperation | None:
+        """Read an export operation of the database from Firestore, for operations this process does not keep."""
+        snapshot_time = snapshot_time_of(operation_id)
+        if snapshot_time is None:
+            return None
+
+        data = self.find(snapshot_time)
+        if data is None:
+            return None
+
+        operation = BackupOperation(
+            id=operation_id,
+            snapshot_time=snapshot_time,
+            output_uri_prefix=self.output_uri_prefix(snapshot_time),
+            name=data['name'],
+        )
+        self.update(operation, data)
+        return operation
+
+    def update(self, operation: BackupOperation, data: dict[str, Any]) -> None:
+        metadata = data.get('metadata', {})
+        operation.progress = {
+            key: metadata[key] for key in ('operationState', 'progressDocuments', 'progressBytes') if key in metadata
+        }
+        if data.get('done'):
+            error = data.get('error')
+            operation.state = FAILED if error else SUCCEEDED
+            operation.error = error.get('message', str(error)) if error else None
+        else:
+            operation.state = RUNNING
+        operation.updated_at = time.time()
+
+    def fail(self, operation: BackupOperation, error: str) -> None:
+        operation.state = FAILED
+        operation.error = error
+        operation.updated_at = time.time()
+
+    def start_export(self, operation: BackupOperation) -> None:
+        resp = requests.post(
+            f'{self.api_url}/v1/{self.database_path}:exportDocuments',
+            json={'outputUriPrefix': operation.output_uri_prefix, 'snapshotTime': operation.snapshot_time},
+            headers=self.headers(),
+            timeout=REQUEST_TIMEOUT,
+        )
+        if resp.status_code != requests.codes.ok:
+            raise ExportRejectedError(operation.snapshot_time, resp.text)
+
+        data = resp.json()
+        operation.name = data['name']
+        self.update(operation, data)
+        self.logger.info('Backup %s started as %s', operation.id, operation.name)
+
+    def poll(self, operation: BackupOperation) -> None:
+        deadline = time.monotonic() + self.poll_deadline
+        interval = self.poll_interval
+        while not operation.finished:
+            if time.monotonic() + interval > deadline:
+                operation.state = TIMED_OUT
+                operation.updated_at = time.time()
+                self.logger.warning('Stopped polling backup %s after %d polls', operation.id, operation.polls)
+                return
+
+            if self.stopped.wait(interval):
+                return
+            interval = min(interval * 2, self.max_poll_interval)
+
+            operation.polls += 1
+            try:
+                resp = requests.get(f'{self.api_url}/v1/{operation.name}', headers=self.headers(), timeout=REQUEST_TIMEOUT)
+                resp.raise_for_status()
+            except requests.RequestException:
+                # The export goes on without us, a failed poll is retried until the deadline
+                self.logger.warning('Polling backup %s failed', operation.id, exc_info=True)
+                continue
+
+            self.update(operation, resp.json())
+
+    def run(self, operation: BackupOperation) -> None:
+        try:
+            found = self.find(operation.snapshot_time)
+            if found is not None and not found.get('error'):
+                # Started by another process, this one only polls it
+                operation.name = found['name']
+                self.update(operation, found)
+                self.logger.info('Backup %s already started as %s', operation.id, operation.name)
+            else:
+                self.start_export(operation)
+            self.poll(operation)
+        except ExportRejectedError as err:
+            self.logger.error('Backup %s rejected: %s', operation.id, err.error)  # noqa: TRY400
+            self.fail(operation, err.error)
+            return
+        except Exception as err:
+            self.logger.exception('Backup %s at %s failed', operation.id, operation.snapshot_time)
+            self.fail(operation, repr(err))
+            return
+
+        if operation.state == SUCCEEDED:
+            self.logger.info('Backup %s at %s finished after %d polls', operation.id, operation.snapshot_time, operation.polls)
+        elif operation.state == FAILED:
+            self.logger.error('Backup %s at %s failed: %s', operation.id, operation.snapshot_time, operation.error)
+
+    def stop(self) -> None:
+        self.stopped.set()
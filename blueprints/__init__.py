@@ -1,8 +1,29 @@
 # ruff: noqa: N812
 
 from .backup import blp as BlueprintBackup
+from .events import blp as BlueprintEvents
 from .health import blp as BlueprintHealth
 from .invoice import blp as BlueprintInvoice
+from .memory import blp as BlueprintMemory
+from .metrics import blp as BlueprintMetrics
+from .profiling import blp as BlueprintProfiling
+from .reconciliation import blp as BlueprintReconciliation
 from .reset import blp as BlueprintReset
+from .revenue import blp as BlueprintRevenue
+from .simulation import blp as BlueprintSimulation
+from .usage import blp as BlueprintUsage
 
-__all__ = ['BlueprintBackup', 'BlueprintHealth', 'BlueprintReset', 'BlueprintInvoice']
+__all__ = [
+    'BlueprintBackup',
+    'BlueprintEvents',
+    'BlueprintHealth',
+    'BlueprintMemory',
+    'BlueprintMetrics',
+    'BlueprintProfiling',
+    'BlueprintReconciliation',
+    'BlueprintReset',
+    'BlueprintRevenue',
+    'BlueprintInvoice',
+    'BlueprintUsage',
+    'BlueprintSimulation',
+]
@@ -2,12 +2,13 @@ from datetime import UTC, datetime
 
 import requests
 from dependency_injector.wiring import Provide
-from flask import Blueprint, Response, current_app
+from flask import Blueprint, Response, current_app, url_for
 from flask.views import MethodView
 
+from backup import BackupManager
 from containers import Container
 
-from .util import class_route, json_response
+from .util import class_route, error_response, json_response
 
 blp = Blueprint('Backup', __name__)
 
@@ -16,28 +17,29 @@ blp = Blueprint('Backup', __name__)
 class Backup(MethodView):
     init_every_request = False
 
-    def post(
-        self,
-        project_id: str = Provide[Container.config.project_id],
-        database: str = Provide[Container.config.firestore.database],
-        access_token: str = Provide[Container.access_token],
-    ) -> Response:
+    def post(self, backup_manager: BackupManager = Provide[Container.backup_manager]) -> Response:
         timestamp = datetime.now(UTC).replace(hour=7, minute=0, second=0, microsecond=0).isoformat().replace('+00:00', 'Z')
 
-        res = requests.post(
-            f'https://firestore.googleapis.com/v1/projects/{project_id}/databases/{database}:exportDocuments',
-            json={
-                'outputUriPrefix': f'gs://{project_id}-backup/firestore/{database}/{timestamp}',
-                'snapshotTime': timestamp,
-            },
-            headers={
-                'Authorization': f'Bearer {access_token}',
-            },
-            timeout=10,
-        )
-
-        if res.status_code != requests.codes.ok:
-            current_app.logger.error(res.json())
-            return json_response({'status': 'Error'}, 500)
-
-        return json_response({'status': 'Ok'}, 200)
+        # The export runs in the background, a retried trigger for the same snapshot gets the operation already started
+        operation, started = backup_manager.trigger(timestamp)
+
+        resp = json_response({'status': 'Accepted', 'started': started, 'operation': operation.to_dict()}, 202)
+        resp.headers['Location'] = url_for('Backup.BackupStatus', operation_id=operation.id)
+        return resp
+
+
+@class_route(blp, '/api/v1/backup/user/operations/<operation_id>')
+class BackupStatus(MethodView):
+    init_every_request = False
+
+    def get(self, operation_id: str, backup_manager: BackupManager = Provide[Container.backup_manager]) -> Response:
+        try:
+            operation = backup_manager.get(operation_id)
+        except requests.RequestException:
+            current_app.logger.exception('Looking up backup operation %s failed', operation_id)
+            return error_response('Backup operation could not be looked up', 502)
+
+        if operation is None:
+            return error_response('Backup operation not found', 404)
+
+        return json_response(operation.to_dict(), 200)
@@ -0,0 +1,65 @@
+import base64
+import binascii
+import json
+from typing import Any
+
+from dependency_injector.wiring import Provide
+from flask import Blueprint, Response, current_app, request
+from flask.views import MethodView
+
+from cache import Cache
+from containers import Container
+from models import Client
+from repositories.cached import CachedRateRepository
+
+from .invoice import get_billing_period, invoice_cache_key
+from .util import class_route, error_response, json_response
+
+blp = Blueprint('Events', __name__)
+
+CLIENT_EVENTS = ('client-updated', 'plan-changed')
+
+
+def parse_push_message(body: Any) -> dict[str, Any] | None:  # noqa: ANN401
+    """Decode the event carried by a Pub/Sub push request, whose message data is base64 encoded JSON."""
+    if not isinstance(body, dict) or not isinstance(body.get('message'), dict):
+        return None
+
+    try:
+        event = json.loads(base64.b64decode(body['message'].get('data', ''), validate=True))
+    except (binascii.Error, ValueError):
+        return None
+
+    if not isinstance(event, dict) or not isinstance(event.get('event'), str) or not isinstance(event.get('client_id'), str):
+        return None
+
+    return event
+
+
+@class_route(blp, '/api/v1/events/invoice')
+class ClientEvents(MethodView):
+    init_every_request = False
+
+    def post(
+        self,
+        client_cache: Cache[Client] = Provide[Container.client_cache],
+        rate_repo: CachedRateRepository = Provide[Container.rate_repo],
+        invoice_cache: Cache[dict[str, Any]] = Provide[Container.invoice_cache],
+    ) -> Response:
+        event = parse_push_message(request.get_json(silent=True))
+        if event is None:
+            return error_response('Invalid event, expected a Pub/Sub push message with an event and a client_id.', 400)
+
+        # Other events are acknowledged, so that Pub/Sub does not redeliver them
+        if event['event'] not in CLIENT_EVENTS:
+            return json_response({'status': 'Ignored'}, 200)
+
+        client_id = event['client_id']
+        billing_month, billing_year = get_billing_period()
+
+        client_cache.delete(client_id)
+        rate_repo.evict_client(client_id)
+        invoice_cache.delete(invoice_cache_key(client_id, billing_month, billing_year))
+        current_app.logger.info('Evicted cached data of client %s after %s', client_id, event['event'])
+
+        return json_response({'status': 'Ok'}, 200)
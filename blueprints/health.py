@@ -1,6 +1,10 @@
+from dependency_injector.wiring import Provide
 from flask import Blueprint, Response
 from flask.views import MethodView
 
+from containers import Container
+from warmup import WarmUp
+
 from .util import class_route, json_response
 
 blp = Blueprint('Health Check', __name__)
@@ -12,3 +16,14 @@ class HealthCheck(MethodView):
 
     def get(self) -> Response:
         return json_response({'status': 'Ok'}, 200)
+
+
+@class_route(blp, '/api/v1/health/invoice/ready')
+class ReadinessCheck(MethodView):
+    init_every_request = False
+
+    def get(self, warmup: WarmUp = Provide[Container.warmup]) -> Response:
+        if not warmup.ready:
+            return json_response({'status': 'Warming up'}, 503)
+
+        return json_response({'status': 'Ok'}, 200)
@@ -1,19 +1,25 @@
+from collections.abc import Callable
 from datetime import UTC, datetime, timedelta
 from typing import Any
-from uuid import uuid4
+from uuid import UUID, uuid4, uuid5
 
 from dependency_injector.wiring import Provide
 from flask import Blueprint, Response
 from flask.views import MethodView
 
+from admission import AdmissionPool
+from cache import Cache
 from containers import Container
-from models import Channel, Client, Incident, Invoice, Month, PlanCost, Rate, Role
-from repositories import ClientRepository, IncidentRepository, InvoiceRepository, RateRepository
+from memory import memory_stage
+from models import Channel, Client, IncidentBatch, Invoice, Month, PlanCost, Rate, RevenueRollup, Role
+from repositories import ClientRepository, IncidentRepository, InvoiceRepository, RateRepository, UnitOfWork
 
-from .util import class_route, error_response, json_response, requires_token
+from .util import class_route, error_response, negotiated_response, requires_token
 
 blp = Blueprint('Invoice', __name__)
 
+INVOICE_NAMESPACE = UUID('bbb6aedd-d1a1-48a4-87cd-1378669337a8')
+
 
 def get_billing_period() -> tuple[Month, int]:
     now = datetime.now(UTC)
@@ -23,51 +29,56 @@ def get_billing_period() -> tuple[Month, int]:
     return billing_month, billing_year
 
 
+def invoice_cache_key(client_id: str, month: Month, year: int) -> str:
+    return f'{client_id}:{year}-{month.to_int():02d}'
+
+
+def invoice_id(client_id: str, month: Month, year: int) -> str:
+    # Every instance generating the invoice of a period gives it the same id, so it is stored as one document
+    return str(uuid5(INVOICE_NAMESPACE, invoice_cache_key(client_id, month, year)))
+
+
 def create_invoice(
     month_year: tuple[Month, int],
     client_id: str,
     rate: Rate,
     incident_repo: IncidentRepository,
-    invoice_repo: InvoiceRepository,
+    unit_of_work: UnitOfWork,
 ) -> Invoice:
     incidents = get_incidents_by_client_and_month(client_id, month_year[0], month_year[1], incident_repo)
-    total_web = sum(1 for incident in incidents if incident.channel == Channel.WEB.value)
-    total_mobile = sum(1 for incident in incidents if incident.channel == Channel.MOBILE.value)
-    total_email = sum(1 for incident in incidents if incident.channel == Channel.EMAIL.value)
+    counts = incidents.count_by_channel()
 
     invoice = Invoice(
-        id=str(uuid4()),
+        id=invoice_id(client_id, month_year[0], month_year[1]),
         client_id=client_id,
         rate_id=rate.id,
         generation_date=datetime.now(UTC),
         billing_month=month_year[0],
         billing_year=month_year[1],
         payment_due_date=datetime(month_year[1], month_year[0].to_int(), 15, tzinfo=UTC) + timedelta(days=30),
-        total_incidents_web=total_web,
-        total_incidents_mobile=total_mobile,
-        total_incidents_email=total_email,
+        total_incidents_web=counts[Channel.WEB],
+        total_incidents_mobile=counts[Channel.MOBILE],
+        total_incidents_email=counts[Channel.EMAIL],
     )
 
-    invoice_repo.create(invoice)
+    # Staged with the invoice, the rollup of its period and plan changes if and only if the invoice is stored
+    unit_of_work.create_invoice(invoice)
+    unit_of_work.add_revenue(RevenueRollup.of_invoice(invoice, rate))
 
     return invoice
 
 
 def get_incidents_by_client_and_month(
     client_id: str, month: Month, year: int, incident_repo: IncidentRepository
-) -> list[Incident]:
-    incidents = incident_repo.get_incidents_by_client_id(client_id=client_id) or []
-    filtered_incidents = []
-    for incident in incidents:
-        created_date = incident.history[0].date
-        if created_date.month == month.to_int() and created_date.year == year:
-            filtered_incidents.append(incident)
-    return filtered_incidents
+) -> IncidentBatch:
+    incidents = incident_repo.get_incident_batch_by_client_id(client_id=client_id)
+    with memory_stage('filter'):
+        return incidents.created_in_month(month.to_int(), year)
 
 
-def create_rate(client: Client, rate_repo: RateRepository) -> Rate:
+def build_rate(client: Client) -> Rate:
     plan_cost = PlanCost.get_costs(client.plan)
-    rate = Rate(
+    return Rate(
         id=str(uuid4()),
         plan=client.plan,
         client_id=client.id,
@@ -77,7 +88,10 @@ def create_rate(client: Client, rate_repo: RateRepository) -> Rate:
         cost_per_incident_email=plan_cost.email_incident_cost,
     )
 
-    rate_repo.create(rate)
+
+def create_rate(client: Client, unit_of_work: UnitOfWork) -> Rate:
+    rate = build_rate(client)
+    unit_of_work.create_rate(rate)
     return rate
 
 
@@ -120,13 +134,16 @@ class GetInvoice(MethodView):
     init_every_request = False
 
     @requires_token
-    def get(
+    def get(  # noqa: PLR0913
         self,
         token: dict[str, Any],
         rate_repo: RateRepository = Provide[Container.rate_repo],
         invoice_repo: InvoiceRepository = Provide[Container.invoice_repo],
         incident_repo: IncidentRepository = Provide[Container.incidentquery_repo],
         client_repo: ClientRepository = Provide[Container.client_repo],
+        unit_of_work_factory: Callable[[], UnitOfWork] = Provide[Container.unit_of_work.provider],
+        generation_pool: AdmissionPool = Provide[Container.generation_pool],
+        invoice_cache: Cache[dict[str, Any]] = Provide[Container.invoice_cache],
     ) -> Response:
         # 1. Validate token role is ADMIN and get client_id
         if token['role'] != Role.ADMIN.value:
@@ -137,6 +154,13 @@ class GetInvoice(MethodView):
         # 2. Obtain month and year for the invoice (last month)
         billing_month, billing_year = get_billing_period()
 
+        # Once generated an invoice does not change, and client changes evict its rendered response through the
+        # client events endpoint, so a cached response is served without looking the client up again
+        cache_key = invoice_cache_key(client_id, billing_month, billing_year)
+        cached = invoice_cache.get(cache_key)
+        if cached is not None:
+            return negotiated_response(cached, 200)
+
         # 3. Validate client exists
         client = client_repo.get(client_id)
         if client is None:
@@ -144,23 +168,39 @@ class GetInvoice(MethodView):
 
         # 4. Get rate for client and plan
         rate = rate_repo.get_by_client_and_plan(client_id, client.plan)
-        if rate is None:
-            rate = create_rate(client, rate_repo)
 
         # 5. Get invoice for client and month
         invoice = invoice_repo.get_by_client_and_month(client_id=client_id, month=billing_month, year=billing_year)
         if invoice is not None:
-            rate = rate_repo.get_by_id(invoice.rate_id)
+            # The invoice keeps the rate it was billed with, which is only re-read if the client changed plans since
+            if rate is None or rate.id != invoice.rate_id:
+                rate = rate_repo.get_by_id(invoice.rate_id)
         else:
-            invoice = create_invoice(
-                month_year=(billing_month, billing_year),
-                client_id=client_id,
-                rate=rate,
-                incident_repo=incident_repo,
-                invoice_repo=invoice_repo,
-            )
+            # A new rate and its invoice are written together, the response is built from the objects in memory
+            with generation_pool.slot():
+                unit_of_work = unit_of_work_factory()
+                if rate is None:
+                    rate = create_rate(client, unit_of_work)
+
+                invoice = create_invoice(
+                    month_year=(billing_month, billing_year),
+                    client_id=client_id,
+                    rate=rate,
+                    incident_repo=incident_repo,
+                    unit_of_work=unit_of_work,
+                )
+                try:
+                    unit_of_work.commit()
+                except Exception:
+                    # Generated concurrently by another request, whose invoice and rate are returned instead
+                    stored = invoice_repo.get(invoice.id)
+                    if stored is None:
+                        raise
+                    invoice, rate = stored, rate_repo.get_by_id(stored.rate_id)
 
         if rate is None:
             return error_response('Rate could not be determined', 500)
         # 6. Return invoice data
-        return json_response(invoice_result_to_dict(invoice, rate, client), 200)
+        result = invoice_result_to_dict(invoice, rate, client)
+        invoice_cache.set(cache_key, result)
+        return negotiated_response(result, 200)
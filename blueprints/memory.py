@@ -0,0 +1,18 @@
+from dependency_injector.wiring import Provide
+from flask import Blueprint, Response
+from flask.views import MethodView
+
+from containers import Container
+from memory import MemoryTracer
+
+from .util import class_route, json_response
+
+blp = Blueprint('Memory', __name__)
+
+
+@class_route(blp, '/api/v1/memory/invoice')
+class MemorySnapshot(MethodView):
+    init_every_request = False
+
+    def get(self, tracer: MemoryTracer = Provide[Container.memory_tracer]) -> Response:
+        return json_response({'current': tracer.snapshot(top_allocations=True), 'history': list(tracer.snapshots)}, 200)
@@ -0,0 +1,18 @@
+from dependency_injector.wiring import Provide
+from flask import Blueprint, Response
+from flask.views import MethodView
+
+from containers import Container
+from metrics import Metrics
+
+from .util import class_route, json_response
+
+blp = Blueprint('Metrics', __name__)
+
+
+@class_route(blp, '/api/v1/metrics/invoice')
+class MetricsSnapshot(MethodView):
+    init_every_request = False
+
+    def get(self, metrics: Metrics = Provide[Container.metrics]) -> Response:
+        return json_response(metrics.snapshot(), 200)
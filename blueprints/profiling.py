@@ -0,0 +1,60 @@
+from dataclasses import asdict
+
+from dependency_injector.wiring import Provide
+from flask import Blueprint, Response, request, send_file
+from flask.views import MethodView
+
+from containers import Container
+from profiling import RequestProfiler
+
+from .util import class_route, error_response, json_response
+
+blp = Blueprint('Profiling', __name__)
+
+SUMMARY_LINES = 50
+
+# Profiles show the code and the data of requests, so they are only served while profiling is enabled
+PROFILING_DISABLED = 'Profiling is not enabled'
+
+
+@class_route(blp, '/api/v1/profiles/invoice')
+class ListProfiles(MethodView):
+    init_every_request = False
+
+    def get(
+        self,
+        profiler: RequestProfiler = Provide[Container.profiler],
+        enabled: bool = Provide[Container.config.profiling.enabled],  # noqa: FBT001
+    ) -> Response:
+        if not enabled:
+            return error_response(PROFILING_DISABLED, 404)
+
+        return json_response({'profiles': [asdict(info) for info in profiler.list()]}, 200)
+
+
+@class_route(blp, '/api/v1/profiles/invoice/<string:name>')
+class GetProfile(MethodView):
+    init_every_request = False
+
+    def get(
+        self,
+        name: str,
+        profiler: RequestProfiler = Provide[Container.profiler],
+        enabled: bool = Provide[Container.config.profiling.enabled],  # noqa: FBT001
+    ) -> Response:
+        if not enabled:
+            return error_response(PROFILING_DISABLED, 404)
+
+        try:
+            path = profiler.path(name)
+        except ValueError:
+            return error_response('Invalid profile name', 400)
+
+        if not path.exists():
+            return error_response('Profile not found', 404)
+
+        # The raw profile can be loaded with pstats or snakeviz, the text summary is for a quick look
+        if request.args.get('format') == 'text':
+            return Response(profiler.summary(name, SUMMARY_LINES), status=200, mimetype='text/plain')
+
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=name)
@@ -0,0 +1,45 @@
+from datetime import UTC, datetime
+from typing import Any
+
+from dependency_injector.wiring import Provide
+from flask import Blueprint, Response, request
+from flask.views import MethodView
+
+from cache import Cache
+from containers import Container
+from models import Invoice, Month
+from reconciliation import InvoiceReconciler
+
+from .invoice import get_billing_period, invoice_cache_key
+from .util import class_route, error_response, json_response
+
+blp = Blueprint('Reconciliation', __name__)
+
+
+@class_route(blp, '/api/v1/reconcile/invoice')
+class ReconcileInvoices(MethodView):
+    init_every_request = False
+
+    def post(
+        self,
+        reconciler: InvoiceReconciler = Provide[Container.invoice_reconciler],
+        invoice_cache: Cache[dict[str, Any]] = Provide[Container.invoice_cache],
+    ) -> Response:
+        # The scheduler job reconciles the last billing period, any other one is given as `period=YYYY-MM`
+        if 'period' in request.args:
+            try:
+                parsed = datetime.strptime(request.args['period'], '%Y-%m').replace(tzinfo=UTC)
+            except ValueError:
+                return error_response('Invalid period, expected YYYY-MM.', 400)
+            billing_month, billing_year = Month.from_int(parsed.month), parsed.year
+        else:
+            billing_month, billing_year = get_billing_period()
+
+        # Only reaches the cache of this process, unless it is shared, the other caches keep the old invoice for the
+        # invoice TTL, which is short for caches that are not shared by every instance
+        def evict(invoice: Invoice) -> None:
+            invoice_cache.delete(invoice_cache_key(invoice.client_id, billing_month, billing_year))
+
+        report = reconciler.reconcile(billing_month, billing_year, on_update=evict)
+
+        return json_response({'status': 'Ok', **report.to_dict()}, 200)
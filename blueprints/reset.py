@@ -1,9 +1,13 @@
+from typing import Any
+
 from dependency_injector.wiring import Provide, inject
 from flask import Blueprint, Response
 from flask.views import MethodView
 
+from cache import Cache
 from containers import Container
-from repositories import InvoiceRepository
+from models import Client, Rate
+from repositories import InvoiceRepository, RevenueRepository
 
 from .util import class_route, json_response
 
@@ -15,7 +19,19 @@ class ResetDB(MethodView):
     init_every_request = False
 
     @inject
-    def post(self, invoice_repo: InvoiceRepository = Provide[Container.invoice_repo]) -> Response:
+    def post(
+        self,
+        invoice_repo: InvoiceRepository = Provide[Container.invoice_repo],
+        revenue_repo: RevenueRepository = Provide[Container.revenue_repo],
+        invoice_cache: Cache[dict[str, Any]] = Provide[Container.invoice_cache],
+        client_cache: Cache[Client] = Provide[Container.client_cache],
+        rate_cache: Cache[Rate] = Provide[Container.rate_cache],
+    ) -> Response:
         invoice_repo.delete_all()
+        revenue_repo.delete_all()
+        # Otherwise the deleted invoices keep being served from the cache until they expire
+        invoice_cache.clear()
+        client_cache.clear()
+        rate_cache.clear()
 
         return json_response({'status': 'Ok'}, 200)
@@ -0,0 +1,41 @@
+from datetime import UTC, datetime
+
+from dependency_injector.wiring import Provide
+from flask import Blueprint, Response, request
+from flask.views import MethodView
+
+from containers import Container
+from repositories import RevenueRepository
+from revenue import period_name, revenue_report
+
+from .usage import MAX_REPORT_MONTHS, from_period, parse_period, to_period
+from .util import class_route, error_response, json_response
+
+blp = Blueprint('Revenue', __name__)
+
+
+# The report spans every client, so it is served under an internal route that the gateway does not expose
+@class_route(blp, '/api/v1/revenue/invoice')
+class RevenueReport(MethodView):
+    init_every_request = False
+
+    def get(self, revenue_repo: RevenueRepository = Provide[Container.revenue_repo]) -> Response:
+        # Defaults to the last 12 months, including the current one
+        now = datetime.now(UTC)
+        try:
+            last = parse_period(request.args['to']) if 'to' in request.args else to_period(now.year, now.month)
+            first = parse_period(request.args['from']) if 'from' in request.args else last - 11
+        except ValueError:
+            return error_response('Invalid period, expected YYYY-MM.', 400)
+
+        if first > last:
+            return error_response('Invalid period, from must not be after to.', 400)
+
+        if last - first + 1 > MAX_REPORT_MONTHS:
+            return error_response(f'Invalid period, at most {MAX_REPORT_MONTHS} months can be requested.', 400)
+
+        # Only the rollups of the periods are read, whatever the number of invoices in them
+        periods = [from_period(period) for period in range(first, last + 1)]
+        rollups = revenue_repo.get_range(period_name(*periods[0]), period_name(*periods[-1]))
+
+        return json_response(revenue_report(rollups, periods), 200)
@@ -0,0 +1,231 @@
+from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from dependency_injector.wiring import Provide
+from flask import Blueprint, Response, request
+from flask.views import MethodView
+
+from admission import AdmissionPool
+from containers import Container
+from models import Invoice, Month, Plan, PlanCost, Role
+from repositories import ClientRepository, InvoiceRepository
+from repositories.cached import IncidentSummaryStore
+
+from .invoice import get_billing_period
+from .usage import MAX_REPORT_MONTHS, count_by_period_and_channel, from_period, per_channel, summaries_to_arrays, to_period
+from .util import class_route, error_response, json_response, requires_token
+
+blp = Blueprint('Plan simulation', __name__)
+
+PLANS: list[Plan] = list(Plan)
+DEFAULT_PERIODS = 12
+
+
+def plan_costs() -> list[tuple[float, tuple[float, float, float]]]:
+    """Return the fixed cost and the per channel unit costs of every plan, in `PLANS` order."""
+    costs = [PlanCost.get_costs(plan) for plan in PLANS]
+    return [(cost.fixed_cost, (cost.web_incident_cost, cost.mobile_incident_cost, cost.email_incident_cost)) for cost in costs]
+
+
+def simulate_plans(counts: list[list[int]]) -> list[list[float]]:
+    """
+    Price a (period x channel) count matrix under every plan at once.
+
+    The result is a (period x plan) cost matrix: the count matrix times the transposed unit cost matrix, plus each
+    plan's fixed cost.
+    """
+    costs = plan_costs()
+    return [
+        [
+            fixed_cost + sum(unit_cost * count for unit_cost, count in zip(unit_costs, row, strict=True))
+            for fixed_cost, unit_costs in costs
+        ]
+        for row in counts
+    ]
+
+
+def cheapest_plan(costs: list[float]) -> Plan:
+    return PLANS[min(range(len(costs)), key=costs.__getitem__)]
+
+
+def per_plan(values: list[float]) -> dict[str, float]:
+    return {plan.value: value for plan, value in zip(PLANS, values, strict=True)}
+
+
+def invoice_period(invoice: Invoice) -> int:
+    return to_period(invoice.billing_year, Month(invoice.billing_month).to_int())
+
+
+def invoice_counts(invoice: Invoice) -> list[int]:
+    return [invoice.total_incidents_web, invoice.total_incidents_mobile, invoice.total_incidents_email]
+
+
+def stored_counts(invoices: Iterable[Invoice], first: int, last: int) -> dict[int, list[int]]:
+    return {
+        invoice_period(invoice): invoice_counts(invoice) for invoice in invoices if first <= invoice_period(invoice) <= last
+    }
+
+
+def period_counts(
+    client_id: str, stored: dict[int, list[int]], first: int, last: int, incident_store: IncidentSummaryStore
+) -> list[list[int]]:
+    """Return the counts of every period, the billed ones of invoiced periods and the rest from the incident history."""
+    if len(stored) == last - first + 1:
+        return [stored[period] for period in range(first, last + 1)]
+
+    periods, channels = summaries_to_arrays(incident_store.get_summaries(client_id))
+    counted = count_by_period_and_channel(periods, channels, first, last)
+    return [stored.get(first + offset, row) for offset, row in enumerate(counted)]
+
+
+def simulation_result(counts: list[list[int]], sources: list[str], first: int) -> dict[str, Any]:
+    costs = simulate_plans(counts)
+    totals = [sum(column) for column in zip(*costs, strict=True)] if costs else [0.0] * len(PLANS)
+
+    periods = []
+    for offset, (row_counts, row_costs, source) in enumerate(zip(counts, costs, sources, strict=True)):
+        month, year = from_period(first + offset)
+        periods.append(
+            {
+                'billing_month': month,
+                'billing_year': year,
+                'source': source,
+                'total_incidents': per_channel(row_counts),
+                'total_cost': per_plan(row_costs),
+                'cheapest_plan': cheapest_plan(row_costs),
+            }
+        )
+
+    return {
+        'periods': periods,
+        'total_cost': per_plan(totals),
+        'cheapest_plan': cheapest_plan(totals),
+    }
+
+
+def parse_periods() -> int:
+    periods = int(request.args.get('periods', DEFAULT_PERIODS))
+    if not (1 <= periods <= MAX_REPORT_MONTHS):
+        raise ValueError(periods)
+
+    return periods
+
+
+def last_billing_period() -> int:
+    billing_month, billing_year = get_billing_period()
+    return to_period(billing_year, billing_month.to_int())
+
+
+@class_route(blp, '/api/v1/invoice/simulation')
+class PlanSimulation(MethodView):
+    init_every_request = False
+
+    @requires_token
+    def get(
+        self,
+        token: dict[str, Any],
+        invoice_repo: InvoiceRepository = Provide[Container.invoice_repo],
+        incident_store: IncidentSummaryStore = Provide[Container.incident_store],
+        client_repo: ClientRepository = Provide[Container.client_repo],
+        generation_pool: AdmissionPool = Provide[Container.generation_pool],
+    ) -> Response:
+        if token['role'] != Role.ADMIN.value:
+            return error_response('Forbidden: You do not have access to this resource.', 403)
+
+        try:
+            n_periods = parse_periods()
+        except ValueError:
+            return error_response(f'Invalid periods, expected a number between 1 and {MAX_REPORT_MONTHS}.', 400)
+
+        client = client_repo.get(token['cid'])
+        if client is None:
+            return error_response('Client not found', 404)
+
+        last = last_billing_period()
+        first = last - n_periods + 1
+
+        # Invoiced periods use the counts that were billed, the rest are counted from the incident history
+        stored = stored_counts(invoice_repo.get_by_client(client.id), first, last)
+        sources = ['invoice' if period in stored else 'incidents' for period in range(first, last + 1)]
+        with generation_pool.slot():
+            counts = period_counts(client.id, stored, first, last, incident_store)
+
+        return json_response(
+            {
+                'client_id': client.id,
+                'client_name': client.name,
+                'client_plan': client.plan,
+                **simulation_result(counts, sources, first),
+            },
+            200,
+        )
+
+
+# The report spans every client, so it is served under an internal route that the gateway does not expose
+@class_route(blp, '/api/v1/simulation/invoice')
+class PlanSimulationAllClients(MethodView):
+    """
+    Simulates every plan for the clients invoiced in at least one of the requested periods.
+
+    Clients without an invoice in the periods are not listed, there being no listing of clients to find them in. Their
+    incidents are fetched by `max_workers` threads of the request's own, outside the admission pool of single reports,
+    so a large report does not crowd them out nor get turned away halfway through.
+    """
+
+    init_every_request = False
+
+    def get(
+        self,
+        invoice_repo: InvoiceRepository = Provide[Container.invoice_repo],
+        incident_store: IncidentSummaryStore = Provide[Container.incident_store],
+        max_workers: int = Provide[Container.config.simulation.max_workers],
+    ) -> Response:
+        try:
+            n_periods = parse_periods()
+        except ValueError:
+            return error_response(f'Invalid periods, expected a number between 1 and {MAX_REPORT_MONTHS}.', 400)
+
+        last = last_billing_period()
+        first = last - n_periods + 1
+
+        # The clients invoiced in the requested periods, whose other periods are counted like a single client's
+        stored_by_client: dict[str, dict[int, list[int]]] = defaultdict(dict)
+        for period in range(first, last + 1):
+            month, year = from_period(period)
+            for invoice in invoice_repo.get_by_month(month, year):
+                stored_by_client[invoice.client_id][period] = invoice_counts(invoice)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='simulation') as executor:
+            all_counts = list(
+                executor.map(
+                    lambda item: period_counts(item[0], item[1], first, last, incident_store), stored_by_client.items()
+                )
+            )
+
+        clients = []
+        plan_count = dict.fromkeys(PLANS, 0)
+        for (client_id, stored), counts in zip(stored_by_client.items(), all_counts, strict=True):
+            totals = [sum(column) for column in zip(*simulate_plans(counts), strict=True)]
+            plan = cheapest_plan(totals)
+            plan_count[plan] += 1
+            clients.append(
+                {
+                    'client_id': client_id,
+                    'periods': len(counts),
+                    'invoiced_periods': len(stored),
+                    'total_cost': per_plan(totals),
+                    'cheapest_plan': plan,
+                }
+            )
+
+        return json_response(
+            {
+                'first_period': {'billing_month': from_period(first)[0], 'billing_year': from_period(first)[1]},
+                'last_period': {'billing_month': from_period(last)[0], 'billing_year': from_period(last)[1]},
+                'clients': clients,
+                'cheapest_plan_count': {plan.value: count for plan, count in plan_count.items()},
+            },
+            200,
+        )
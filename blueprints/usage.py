@@ -0,0 +1,196 @@
+from array import array
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from typing import Any
+
+from dependency_injector.wiring import Provide
+from flask import Blueprint, Response, request
+from flask.views import MethodView
+
+from admission import AdmissionPool
+from containers import Container
+from models import Channel, Client, IncidentSummary, Month, Rate, Role
+from repositories import ClientRepository, RateRepository
+from repositories.cached import IncidentSummaryStore
+
+from .invoice import build_rate
+from .util import class_route, error_response, json_response, requires_token
+
+blp = Blueprint('Usage', __name__)
+
+CHANNELS: list[Channel] = list(Channel)
+CHANNEL_CODES = {channel.value: code for code, channel in enumerate(CHANNELS)}
+MAX_REPORT_MONTHS = 120
+
+
+def to_period(year: int, month: int) -> int:
+    """Map a month to a consecutive index, so that a date range becomes a contiguous integer range."""
+    return year * 12 + month - 1
+
+
+def from_period(period: int) -> tuple[Month, int]:
+    return Month.from_int(period % 12 + 1), period // 12
+
+
+def parse_period(value: str) -> int:
+    """Parse a `YYYY-MM` query parameter."""
+    parsed = datetime.strptime(value, '%Y-%m').replace(tzinfo=UTC)
+    return to_period(parsed.year, parsed.month)
+
+
+def summaries_to_arrays(incidents: Iterable[IncidentSummary]) -> tuple['array[int]', 'array[int]']:
+    """Reduce incidents to the two columns the report needs: creation period and channel code."""
+    periods: array[int] = array('l')
+    channels: array[int] = array('B')
+    for incident in incidents:
+        periods.append(to_period(incident.created.year, incident.created.month))
+        channels.append(CHANNEL_CODES[incident.channel])
+
+    return periods, channels
+
+
+def count_by_period_and_channel(periods: 'array[int]', channels: 'array[int]', first: int, last: int) -> list[list[int]]:
+    """
+    Group incidents into a (month x channel) count matrix in a single pass.
+
+    The cost of the pass depends on the number of incidents only, so any number of months is counted at once.
+    """
+    n_channels = len(CHANNELS)
+    counts = [0] * ((last - first + 1) * n_channels)
+    for period, channel in zip(periods, channels, strict=True):
+        if first <= period <= last:
+            counts[(period - first) * n_channels + channel] += 1
+
+    return [counts[row : row + n_channels] for row in range(0, len(counts), n_channels)]
+
+
+def costs_by_period(counts: list[list[int]], rate: Rate) -> list[list[float]]:
+    unit_costs = (rate.cost_per_incident_web, rate.cost_per_incident_mobile, rate.cost_per_incident_email)
+    return [[unit_cost * count for unit_cost, count in zip(unit_costs, row, strict=True)] for row in counts]
+
+
+def per_channel(values: list[int] | list[float]) -> dict[str, Any]:
+    return {channel.value: value for channel, value in zip(CHANNELS, values, strict=True)}
+
+
+def usage_report(incidents: Iterable[IncidentSummary], rate: Rate, first: int, last: int) -> dict[str, Any]:
+    periods, channels = summaries_to_arrays(incidents)
+    counts = count_by_period_and_channel(periods, channels, first, last)
+    costs = costs_by_period(counts, rate)
+
+    report_periods = []
+    for offset, (row_counts, row_costs) in enumerate(zip(counts, costs, strict=True)):
+        month, year = from_period(first + offset)
+        report_periods.append(
+            {
+                'billing_month': month,
+                'billing_year': year,
+                'total_incidents': per_channel(row_counts),
+                'total_cost_per_incident': per_channel(row_costs),
+                'total_cost': rate.fixed_cost + sum(row_costs),
+            }
+        )
+
+    return {
+        'client_plan': rate.plan,
+        'fixed_cost': rate.fixed_cost,
+        'unit_cost_per_incident': per_channel(
+            [rate.cost_per_incident_web, rate.cost_per_incident_mobile, rate.cost_per_incident_email]
+        ),
+        'periods': report_periods,
+        'total_incidents': per_channel([sum(column) for column in zip(*counts, strict=True)]),
+        'total_cost': sum(period['total_cost'] for period in report_periods),
+    }
+
+
+def client_rate(client: Client, rate_repo: RateRepository) -> Rate:
+    # Reports are read-only, so a client without a stored rate is priced with its plan's current costs
+    return rate_repo.get_by_client_and_plan(client.id, client.plan) or build_rate(client)
+
+
+@class_route(blp, '/api/v1/invoice/usage')
+class UsageReport(MethodView):
+    init_every_request = False
+
+    @requires_token
+    def get(
+        self,
+        token: dict[str, Any],
+        rate_repo: RateRepository = Provide[Container.rate_repo],
+        incident_store: IncidentSummaryStore = Provide[Container.incident_store],
+        client_repo: ClientRepository = Provide[Container.client_repo],
+        generation_pool: AdmissionPool = Provide[Container.generation_pool],
+    ) -> Response:
+        if token['role'] != Role.ADMIN.value:
+            return error_response('Forbidden: You do not have access to this resource.', 403)
+
+        # Defaults to the last 12 months, including the current one
+        now = datetime.now(UTC)
+        try:
+            last = parse_period(request.args['to']) if 'to' in request.args else to_period(now.year, now.month)
+            first = parse_period(request.args['from']) if 'from' in request.args else last - 11
+        except ValueError:
+            return error_response('Invalid period, expected YYYY-MM.', 400)
+
+        if first > last:
+            return error_response('Invalid period, from must not be after to.', 400)
+
+        if last - first + 1 > MAX_REPORT_MONTHS:
+            return error_response(f'Invalid period, at most {MAX_REPORT_MONTHS} months can be requested.', 400)
+
+        client = client_repo.get(token['cid'])
+        if client is None:
+            return error_response('Client not found', 404)
+
+        with generation_pool.slot():
+            incidents = incident_store.get_summaries(client.id)
+
+        return json_response(
+            {
+                'client_id': client.id,
+                'client_name': client.name,
+                **usage_report(incidents, client_rate(client, rate_repo), first, last),
+            },
+            200,
+        )
+
+
+@class_route(blp, '/api/v1/invoice/usage/current')
+class CurrentUsage(MethodView):
+    init_every_request = False
+
+    @requires_token
+    def get(
+        self,
+        token: dict[str, Any],
+        rate_repo: RateRepository = Provide[Container.rate_repo],
+        incident_store: IncidentSummaryStore = Provide[Container.incident_store],
+        client_repo: ClientRepository = Provide[Container.client_repo],
+        generation_pool: AdmissionPool = Provide[Container.generation_pool],
+    ) -> Response:
+        if token['role'] != Role.ADMIN.value:
+            return error_response('Forbidden: You do not have access to this resource.', 403)
+
+        client = client_repo.get(token['cid'])
+        if client is None:
+            return error_response('Client not found', 404)
+
+        # Only incidents created since the previous poll are downloaded
+        now = datetime.now(UTC)
+        current = to_period(now.year, now.month)
+        with generation_pool.slot():
+            incidents = incident_store.get_summaries(client.id)
+        report = usage_report(incidents, client_rate(client, rate_repo), current, current)
+
+        return json_response(
+            {
+                'client_id': client.id,
+                'client_name': client.name,
+                'client_plan': report['client_plan'],
+                'as_of': now.isoformat(),
+                'fixed_cost': report['fixed_cost'],
+                'unit_cost_per_incident': report['unit_cost_per_incident'],
+                **report['periods'][0],
+            },
+            200,
+        )
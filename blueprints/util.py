@@ -1,10 +1,45 @@
 import json
 from collections.abc import Callable
+from functools import lru_cache
 from typing import Any, cast
 
+import msgpack  # type: ignore[import-untyped]
 from flask import Blueprint, Request, Response, request
 from flask.views import MethodView
 from tightwrap import wraps
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from accounting import ReadBudgetExceededError
+from admission import AdmissionRejectedError
+from memory import memory_stage
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+
+def encode_json(data: dict[str, Any]) -> bytes:
+    return json.dumps(data).encode()
+
+
+def encode_msgpack(data: dict[str, Any]) -> bytes:
+    return cast(bytes, msgpack.packb(data))
+
+
+# Encodings of the same response dict a client can ask for in its Accept header, JSON first so that it wins whenever
+# the client accepts several equally, e.g. */*
+RESPONSE_ENCODERS: dict[str, Callable[[dict[str, Any]], bytes]] = {
+    JSON_MIMETYPE: encode_json,
+    MSGPACK_MIMETYPE: encode_msgpack,
+    'application/x-msgpack': encode_msgpack,
+    'application/vnd.msgpack': encode_msgpack,
+}
+
+
+# Callers send a handful of distinct Accept headers, parsing and matching one costs more than encoding an invoice
+@lru_cache(maxsize=256)
+def negotiate_mimetype(accept: str) -> str:
+    return parse_accept_header(accept, MIMEAccept).best_match(RESPONSE_ENCODERS, default=JSON_MIMETYPE) or JSON_MIMETYPE
 
 
 class APIGatewayRequest(Request):
@@ -20,13 +55,33 @@ def class_route(blueprint: Blueprint, rule: str, **options: Any) -> Callable[[ty
 
 
 def json_response(data: dict[str, Any], status: int) -> Response:
-    return Response(json.dumps(data), status=status, mimetype='application/json')
+    with memory_stage('serialize'):
+        body = encode_json(data)
+    return Response(body, status=status, mimetype=JSON_MIMETYPE)
+
+
+def negotiated_response(data: dict[str, Any], status: int) -> Response:
+    """Encode the response in the format preferred by the Accept header, or as JSON when no known format is accepted."""
+    mimetype = negotiate_mimetype(request.headers.get('Accept', ''))
+    with memory_stage('serialize'):
+        body = RESPONSE_ENCODERS[mimetype](data)
+    return Response(body, status=status, mimetype=mimetype, headers={'Vary': 'Accept'})
 
 
 def error_response(msg: str, code: int) -> Response:
     return json_response({'message': msg, 'code': code}, code)
 
 
+def admission_rejected_response(err: AdmissionRejectedError) -> Response:
+    resp = error_response('The service is busy, please retry later.', 503)
+    resp.headers['Retry-After'] = str(err.retry_after)
+    return resp
+
+
+def read_budget_exceeded_response(_: ReadBudgetExceededError) -> Response:
+    return error_response('The request exceeded its read budget.', 500)
+
+
 def requires_token(f: Callable[..., Response]) -> Callable[..., Response]:
     @wraps(f)
     def decorated_function(*args, **kwargs) -> Response:  # type: ignore[no-untyped-def] # noqa: ANN002, ANN003
@@ -0,0 +1,17 @@
+from .backend import CacheBackend
+from .cache import Cache
+from .codec import Codec, MsgpackCodec, MsgpackDictCodec
+from .local import LocalCacheBackend
+from .redis import RedisCacheBackend
+from .sqlite import SqliteCacheBackend
+
+__all__ = [
+    'Cache',
+    'CacheBackend',
+    'Codec',
+    'LocalCacheBackend',
+    'MsgpackCodec',
+    'MsgpackDictCodec',
+    'RedisCacheBackend',
+    'SqliteCacheBackend',
+]
@@ -0,0 +1,23 @@
+class CacheBackend:
+    """Byte store with per-entry expiration shared by the typed caches, see `Cache`."""
+
+    def get_many(self, keys: list[str]) -> list[bytes | None]:
+        raise NotImplementedError  # pragma: no cover
+
+    def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def delete_many(self, keys: list[str]) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def delete_prefix(self, prefix: str) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def get(self, key: str) -> bytes | None:
+        return self.get_many([key])[0]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.set_many({key: value}, ttl)
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
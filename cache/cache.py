@@ -0,0 +1,45 @@
+from typing import Generic, TypeVar
+
+from .backend import CacheBackend
+from .codec import Codec
+
+T = TypeVar('T')
+
+
+class Cache(Generic[T]):
+    """
+    Typed view over a backend: values are encoded with `codec` and keys are prefixed with `namespace` and `version`.
+
+    Bumping the version when the encoded layout changes makes every instance ignore the entries written in the old
+    layout, which expire on their own.
+    """
+
+    def __init__(self, backend: CacheBackend, codec: Codec[T], namespace: str, version: int, ttl: float) -> None:
+        self.backend = backend
+        self.codec = codec
+        self.prefix = f'{namespace}:v{version}:'
+        self.ttl = ttl
+
+    def get(self, key: str) -> T | None:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: list[str]) -> list[T | None]:
+        values = self.backend.get_many([self.prefix + key for key in keys])
+        return [None if value is None else self.codec.decode(value) for value in values]
+
+    def set(self, key: str, value: T) -> None:
+        self.set_many({key: value})
+
+    def set_many(self, items: dict[str, T]) -> None:
+        if items:
+            self.backend.set_many({self.prefix + key: self.codec.encode(value) for key, value in items.items()}, self.ttl)
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
+
+    def delete_many(self, keys: list[str]) -> None:
+        if keys:
+            self.backend.delete_many([self.prefix + key for key in keys])
+
+    def clear(self) -> None:
+        self.backend.delete_prefix(self.prefix)
@@ -0,0 +1,52 @@
+from dataclasses import fields
+from enum import Enum
+from typing import Any, Generic, TypeVar, cast, get_type_hints
+
+import msgpack  # type: ignore[import-untyped]
+
+T = TypeVar('T')
+
+
+class Codec(Generic[T]):
+    def encode(self, value: T) -> bytes:
+        raise NotImplementedError  # pragma: no cover
+
+    def decode(self, data: bytes) -> T:
+        raise NotImplementedError  # pragma: no cover
+
+
+class MsgpackDictCodec(Codec[dict[str, Any]]):
+    """Encode a JSON-like dict as a MessagePack map, smaller and faster to encode and decode than JSON."""
+
+    def encode(self, value: dict[str, Any]) -> bytes:
+        return cast(bytes, msgpack.packb(value))
+
+    def decode(self, data: bytes) -> dict[str, Any]:
+        return dict(msgpack.unpackb(data))
+
+
+class MsgpackCodec(Codec[T]):
+    """
+    Encode a dataclass as a MessagePack array of its field values, in declaration order and without field names.
+
+    Datetimes are stored as MessagePack timestamps and enum fields are restored from their values. Since the layout
+    follows the fields, a change to the dataclass must come with a new cache key version.
+    """
+
+    def __init__(self, data_class: type[T]) -> None:
+        self.data_class = data_class
+        hints = get_type_hints(data_class)
+        self.fields = [(item.name, hints[item.name]) for item in fields(data_class)]  # type: ignore[arg-type]
+        self.enums = {name: hint for name, hint in self.fields if isinstance(hint, type) and issubclass(hint, Enum)}
+
+    def encode(self, value: T) -> bytes:
+        return cast(bytes, msgpack.packb([getattr(value, name) for name, _ in self.fields], datetime=True))
+
+    def decode(self, data: bytes) -> T:
+        values = msgpack.unpackb(data, timestamp=3)
+        kwargs = {}
+        for (name, _), item in zip(self.fields, values, strict=True):
+            enum = self.enums.get(name)
+            kwargs[name] = item if enum is None else enum(item)
+
+        return self.data_class(**kwargs)
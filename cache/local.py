@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+
+from .backend import CacheBackend
+
+
+class LocalCacheBackend(CacheBackend):
+    """In-process backend, private to each worker. At most `max_entries` are kept, evicting the least recently used."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, keys: list[str]) -> list[bytes | None]:
+        now = time.time()
+        values: list[bytes | None] = []
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is None or entry[0] < now:
+                    values.append(None)
+                else:
+                    self.entries.move_to_end(key)
+                    values.append(entry[1])
+
+        return values
+
+    def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        expires_at = time.time() + ttl
+        with self.lock:
+            for key, value in items.items():
+                self.entries[key] = (expires_at, value)
+                self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete_many(self, keys: list[str]) -> None:
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self.lock:
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                del self.entries[key]
@@ -0,0 +1,98 @@
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from .backend import CacheBackend
+
+if TYPE_CHECKING:
+    from redis import Redis
+
+# Keys deleted per command when a whole namespace is cleared
+DELETE_BATCH_SIZE = 500
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend shared by every instance of the service through a Redis-protocol server.
+
+    When the server cannot be reached the cache falls back to `fallback`, a backend local to the instance, and the
+    server is not tried again for `retry_interval` seconds, so an outage costs one timeout per interval rather than
+    one per request.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        fallback: CacheBackend,
+        retry_interval: float,
+        socket_timeout: float,
+        client: 'Redis | None' = None,
+    ) -> None:
+        # redis is only imported when this backend is selected
+        import redis
+
+        self.client = client or redis.Redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+        self.errors = (redis.RedisError,)
+        self.fallback = fallback
+        self.retry_interval = retry_interval
+        self.unavailable_until = 0.0
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.unavailable_until
+
+    def mark_unavailable(self) -> None:
+        self.logger.warning('Cache server unreachable, using the local cache for %s seconds', self.retry_interval)
+        self.unavailable_until = time.monotonic() + self.retry_interval
+
+    def get_many(self, keys: list[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+
+        if self.available:
+            try:
+                return list(self.client.mget(keys))  # type: ignore[arg-type]
+            except self.errors:
+                self.mark_unavailable()
+
+        return self.fallback.get_many(keys)
+
+    def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        if self.available:
+            try:
+                # One round trip for all the keys, each SET carries its own expiration
+                pipeline = self.client.pipeline(transaction=False)
+                for key, value in items.items():
+                    pipeline.set(key, value, px=max(int(ttl * 1000), 1))
+                pipeline.execute()  # type: ignore[no-untyped-call]
+            except self.errors:
+                self.mark_unavailable()
+            else:
+                return
+
+        self.fallback.set_many(items, ttl)
+
+    def delete_many(self, keys: list[str]) -> None:
+        # The local cache may hold entries written during an outage, they are dropped as well
+        self.fallback.delete_many(keys)
+        if self.available:
+            try:
+                self.client.delete(*keys)
+            except self.errors:
+                self.mark_unavailable()
+
+    def delete_prefix(self, prefix: str) -> None:
+        self.fallback.delete_prefix(prefix)
+        if self.available:
+            try:
+                batch = []
+                for key in self.client.scan_iter(match=f'{prefix}*', count=DELETE_BATCH_SIZE):
+                    batch.append(key)
+                    if len(batch) == DELETE_BATCH_SIZE:
+                        self.client.unlink(*batch)
+                        batch = []
+                if batch:
+                    self.client.unlink(*batch)
+            except self.errors:
+                self.mark_unavailable()
@@ -0,0 +1,89 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .backend import CacheBackend
+
+# Expired and excess entries are removed every that many writes of a process
+PRUNE_EVERY = 100
+
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    Backend shared by every worker process on the same host, stored in a SQLite database.
+
+    Placed on a tmpfs such as /dev/shm the database lives in memory, and SQLite's locking makes it safe to read and
+    write from several processes at once. Each thread of each process opens its own connection. The database is kept
+    below `max_entries` by removing expired entries first and then those closest to expiring.
+    """
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.local = threading.local()
+        self.writes = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        with self.connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)')
+
+    def connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so a worker forked after the first use opens its own
+        conn: sqlite3.Connection | None = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+
+        return conn
+
+    def get_many(self, keys: list[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+
+        placeholders = ','.join('?' * len(keys))
+        rows = self.connection().execute(
+            f'SELECT key, value FROM cache WHERE key IN ({placeholders}) AND expires_at >= ?',  # noqa: S608
+            [*keys, time.time()],
+        )
+        values = dict(rows.fetchall())
+        return [values.get(key) for key in keys]
+
+    def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        expires_at = time.time() + ttl
+        with self.connection() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                [(key, value, expires_at) for key, value in items.items()],
+            )
+
+        self.writes += 1
+        if self.writes % PRUNE_EVERY == 0:
+            self.prune()
+
+    def delete_many(self, keys: list[str]) -> None:
+        with self.connection() as conn:
+            conn.executemany('DELETE FROM cache WHERE key = ?', [(key,) for key in keys])
+
+    def delete_prefix(self, prefix: str) -> None:
+        # A range scan on the primary key, unlike LIKE it needs no escaping of the prefix
+        with self.connection() as conn:
+            conn.execute('DELETE FROM cache WHERE key >= ? AND key < ?', (prefix, prefix + '\uffff'))
+
+    def prune(self) -> None:
+        with self.connection() as conn:
+            conn.execute('DELETE FROM cache WHERE expires_at < ?', (time.time(),))
+            (count,) = conn.execute('SELECT COUNT(*) FROM cache').fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at LIMIT ?)',
+                    (count - self.max_entries,),
+                )
+                self.logger.info('Evicted %d cache entries', count - self.max_entries)
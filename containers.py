@@ -1,9 +1,50 @@
 from dependency_injector import providers
 from dependency_injector.containers import DeclarativeContainer, WiringConfiguration
-from gcp_microservice_utils import access_token_provider
 
-from repositories.firestore import FirestoreInvoiceRepository, FirestoreRateRepository
+from accounting import OperationAccounting
+from admission import AdmissionPool
+from backup import BackupManager
+from cache import Cache, LocalCacheBackend, MsgpackCodec, MsgpackDictCodec, RedisCacheBackend, SqliteCacheBackend
+from memory import MemoryTracer
+from metrics import Metrics
+from models import Client, Rate
+from profiling import RequestProfiler
+from reconciliation import InvoiceReconciler
+from repositories.cached import CachedClientRepository, CachedRateRepository, IncidentSummaryStore
+from repositories.firestore import (
+    FirestoreInvoiceRepository,
+    FirestoreRateRepository,
+    FirestoreRevenueRepository,
+    FirestoreUnitOfWork,
+    create_firestore_client,
+)
 from repositories.rest import RestClientRepository, RestIncidentRepository
+from repositories.sqlite import (
+    SqliteDatabase,
+    SqliteInvoiceRepository,
+    SqliteRateRepository,
+    SqliteRevenueRepository,
+    SqliteUnitOfWork,
+)
+from repositories.writebehind import (
+    WriteBehindInvoiceRepository,
+    WriteBehindLog,
+    WriteBehindQueue,
+    WriteBehindRateRepository,
+    WriteBehindRevenueRepository,
+    WriteBehindUnitOfWork,
+)
+from warmup import WarmUp
+
+# Singletons holding a gRPC channel or a pooled HTTP session, which must not be shared with a forked process
+FORK_UNSAFE = ('firestore_client', 'rest_client_repo', 'incidentquery_repo')
+
+
+def access_token_provider() -> str:
+    # gcp_microservice_utils imports the whole google-cloud logging and trace stack, so defer it to the first backup.
+    from gcp_microservice_utils import access_token_provider as gcp_access_token_provider
+
+    return gcp_access_token_provider()
 
 
 class Container(DeclarativeContainer):
@@ -12,17 +53,234 @@ class Container(DeclarativeContainer):
 
     access_token = providers.Callable(access_token_provider)
 
-    rate_repo = providers.ThreadSafeSingleton(FirestoreRateRepository, database=config.firestore.database)
-    invoice_repo = providers.ThreadSafeSingleton(FirestoreInvoiceRepository, database=config.firestore.database)
+    metrics = providers.ThreadSafeSingleton(Metrics)
+
+    backup_manager = providers.ThreadSafeSingleton(
+        BackupManager,
+        api_url=config.backup.api_url,
+        project_id=config.project_id,
+        database=config.firestore.database,
+        access_token=access_token.provider,
+        poll_interval=config.backup.poll_interval,
+        max_poll_interval=config.backup.max_poll_interval,
+        poll_deadline=config.backup.poll_deadline,
+        max_operations=config.backup.max_operations,
+    )
+
+    operation_accounting = providers.ThreadSafeSingleton(
+        OperationAccounting,
+        metrics=metrics,
+        read_budget=config.firestore.read_budget,
+        budget_mode=config.firestore.read_budget_mode,
+    )
+
+    # Invoice generation and reports download whole incident histories, they share a bounded pool
+    generation_pool = providers.ThreadSafeSingleton(
+        AdmissionPool,
+        name='generation',
+        metrics=metrics,
+        max_concurrency=config.admission.generation.max_concurrency,
+        max_queue=config.admission.generation.max_queue,
+        queue_timeout=config.admission.queue_timeout,
+        retry_after=config.admission.retry_after,
+    )
+
+    profiler = providers.ThreadSafeSingleton(
+        RequestProfiler,
+        directory=config.profiling.directory,
+        token=config.profiling.token,
+        sample_rate=config.profiling.sample_rate,
+        max_profiles=config.profiling.max_profiles,
+    )
+
+    memory_tracer = providers.ThreadSafeSingleton(
+        MemoryTracer,
+        frames=config.memory.frames,
+        snapshot_interval=config.memory.snapshot_interval,
+        snapshot_history=config.memory.snapshot_history,
+        large_request_bytes=config.memory.large_request_bytes,
+    )
+
+    # 'local' keeps a cache per worker process, 'sqlite' shares one between the workers of an instance and 'redis'
+    # between all instances, falling back to the local cache while the server is unreachable
+    local_cache_backend = providers.ThreadSafeSingleton(LocalCacheBackend, max_entries=config.cache.max_entries)
+    cache_backend = providers.Selector(
+        config.cache.backend,
+        local=local_cache_backend,
+        sqlite=providers.ThreadSafeSingleton(
+            SqliteCacheBackend,
+            path=config.cache.sqlite_path,
+            max_entries=config.cache.max_entries,
+        ),
+        redis=providers.ThreadSafeSingleton(
+            RedisCacheBackend,
+            url=config.cache.redis_url,
+            fallback=local_cache_backend,
+            retry_interval=config.cache.redis_retry_interval,
+            socket_timeout=config.cache.redis_timeout,
+        ),
+    )
+
+    firestore_client = providers.ThreadSafeSingleton(create_firestore_client, database=config.firestore.database)
+
+    firestore_rate_repo = providers.ThreadSafeSingleton(
+        FirestoreRateRepository,
+        database=config.firestore.database,
+        client=firestore_client,
+    )
+
+    # Self-hosted deployments without Firestore keep rates and invoices in a local SQLite database
+    sqlite_db = providers.ThreadSafeSingleton(SqliteDatabase, path=config.sqlite.path)
+
+    # Rates and invoices are stored in 'firestore' or 'sqlite'
+    storage_rate_repo = providers.Selector(
+        config.storage.backend,
+        firestore=firestore_rate_repo,
+        sqlite=providers.ThreadSafeSingleton(SqliteRateRepository, path=config.sqlite.path, db=sqlite_db),
+    )
+    storage_invoice_repo = providers.Selector(
+        config.storage.backend,
+        firestore=providers.ThreadSafeSingleton(
+            FirestoreInvoiceRepository,
+            database=config.firestore.database,
+            client=firestore_client,
+        ),
+        sqlite=providers.ThreadSafeSingleton(SqliteInvoiceRepository, path=config.sqlite.path, db=sqlite_db),
+    )
+    storage_revenue_repo = providers.Selector(
+        config.storage.backend,
+        firestore=providers.ThreadSafeSingleton(
+            FirestoreRevenueRepository,
+            database=config.firestore.database,
+            client=firestore_client,
+        ),
+        sqlite=providers.ThreadSafeSingleton(SqliteRevenueRepository, path=config.sqlite.path, db=sqlite_db),
+    )
+    storage_unit_of_work = providers.Selector(
+        config.storage.backend,
+        firestore=providers.Factory(FirestoreUnitOfWork, database=config.firestore.database, client=firestore_client),
+        sqlite=providers.Factory(SqliteUnitOfWork, path=config.sqlite.path, db=sqlite_db),
+    )
+
+    # With 'write_behind' writes are acknowledged once logged locally, and stored in the background
+    write_behind_queue = providers.ThreadSafeSingleton(
+        WriteBehindQueue,
+        log=providers.ThreadSafeSingleton(
+            WriteBehindLog,
+            directory=config.write_behind.directory,
+            max_bytes=config.write_behind.max_log_bytes,
+        ),
+        unit_of_work_factory=storage_unit_of_work.provider,
+        invoice_repo=storage_invoice_repo,
+        batch_size=config.write_behind.batch_size,
+        flush_interval=config.write_behind.flush_interval,
+        retry_interval=config.write_behind.retry_interval,
+        max_retry_interval=config.write_behind.max_retry_interval,
+    )
 
-    client_repo = providers.ThreadSafeSingleton(
+    rate_cache = providers.ThreadSafeSingleton(
+        Cache,
+        backend=cache_backend,
+        codec=providers.Factory(MsgpackCodec, data_class=Rate),
+        namespace='rate',
+        version=1,
+        ttl=config.cache.rate_ttl,
+    )
+    rate_repo = providers.ThreadSafeSingleton(
+        CachedRateRepository,
+        repo=providers.Selector(
+            config.storage.writes,
+            direct=storage_rate_repo,
+            write_behind=providers.ThreadSafeSingleton(
+                WriteBehindRateRepository,
+                repo=storage_rate_repo,
+                queue=write_behind_queue,
+            ),
+        ),
+        cache=rate_cache,
+    )
+    invoice_repo = providers.Selector(
+        config.storage.writes,
+        direct=storage_invoice_repo,
+        write_behind=providers.ThreadSafeSingleton(
+            WriteBehindInvoiceRepository,
+            repo=storage_invoice_repo,
+            queue=write_behind_queue,
+        ),
+    )
+    revenue_repo = providers.Selector(
+        config.storage.writes,
+        direct=storage_revenue_repo,
+        write_behind=providers.ThreadSafeSingleton(
+            WriteBehindRevenueRepository,
+            repo=storage_revenue_repo,
+            queue=write_behind_queue,
+        ),
+    )
+    # A new unit of work for every request that injects it
+    unit_of_work = providers.Selector(
+        config.storage.writes,
+        direct=storage_unit_of_work,
+        write_behind=providers.Factory(WriteBehindUnitOfWork, queue=write_behind_queue),
+    )
+
+    rest_client_repo = providers.ThreadSafeSingleton(
         RestClientRepository,
         base_url=config.svc.client.url,
         token_provider=config.svc.client.token_provider,
     )
+    client_cache = providers.ThreadSafeSingleton(
+        Cache,
+        backend=cache_backend,
+        codec=providers.Factory(MsgpackCodec, data_class=Client),
+        namespace='client',
+        version=1,
+        ttl=config.cache.client_ttl,
+    )
+    client_repo = providers.ThreadSafeSingleton(CachedClientRepository, repo=rest_client_repo, cache=client_cache)
+
+    # Rendered invoice responses, keyed by client and billing period
+    invoice_cache = providers.ThreadSafeSingleton(
+        Cache,
+        backend=cache_backend,
+        codec=providers.Factory(MsgpackDictCodec),
+        namespace='invoice',
+        version=2,
+        ttl=config.cache.invoice_ttl,
+    )
 
     incidentquery_repo = providers.ThreadSafeSingleton(
         RestIncidentRepository,
         base_url=config.svc.incidentquery.url,
         token_provider=config.svc.incidentquery.token_provider,
     )
+    incident_store = providers.ThreadSafeSingleton(
+        IncidentSummaryStore,
+        repo=incidentquery_repo,
+        full_resync_interval=config.incident_store.full_resync_interval,
+        max_incidents=config.incident_store.max_incidents,
+    )
+
+    invoice_reconciler = providers.ThreadSafeSingleton(
+        InvoiceReconciler,
+        invoice_repo=invoice_repo,
+        rate_repo=rate_repo,
+        # Conditional updates are checked against the store, they do not go through the write-behind log
+        unit_of_work_factory=storage_unit_of_work.provider,
+        incident_repo=incidentquery_repo,
+        incident_store=incident_store,
+        metrics=metrics,
+        batch_size=config.reconciliation.batch_size,
+        max_workers=config.reconciliation.max_workers,
+        max_staleness=config.reconciliation.max_staleness,
+    )
+
+    warmup = providers.ThreadSafeSingleton(WarmUp)
+
+
+def reset_fork_unsafe(container: Container) -> None:
+    """Drop the fork-unsafe singletons and every singleton built on them, so a forked worker creates its own."""
+    unsafe = {getattr(container, name) for name in FORK_UNSAFE}
+    for provider in container.traverse(types=[providers.BaseSingleton]):
+        if provider in unsafe or not unsafe.isdisjoint(provider.traverse()):
+            provider.reset()
@@ -0,0 +1,76 @@
+# ruff: noqa: T201
+"""
+Generates a synthetic dataset and loads it or serves it.
+
+    python -m demo stats --clients 1000 --incidents 1000000
+    STORAGE_BACKEND=firestore FIRESTORE_EMULATOR_HOST=localhost:8081 python -m demo load --processes 8
+    python -m demo serve --port 8081
+    python -m demo clients > clients.txt
+
+The same seed and sizes always give the same dataset, so a load and a server started with the same arguments agree, and
+the service pointed at the server (CLIENT_SVC_URL and INCIDENTQUERY_SVC_URL) finds the rates and invoices it expects.
+"""
+
+import argparse
+import logging
+import os
+import time
+
+from .data import Dataset
+from .load import BATCH_WRITES, load
+from .server import INCIDENT_CACHE_CLIENTS, create_server
+
+
+def stats(dataset: Dataset) -> None:
+    started = time.perf_counter()
+    incidents = invoices = 0
+    for index in range(dataset.client_count):
+        records = dataset.incidents(index)
+        incidents += len(records)
+        invoices += len(dataset.invoices(index, records))
+
+    elapsed = time.perf_counter() - started
+    counts = sorted(dataset.incident_counts, reverse=True)
+    top = max(1, len(counts) // 100)
+    print(f'{dataset.client_count} clients, {incidents} incidents, {invoices} invoices, generated in {elapsed:.1f}s')
+    print(f'from {dataset.start:%Y-%m-%d} to {dataset.end:%Y-%m-%d}, largest client {counts[0]}, smallest {counts[-1]}')
+    print(f'the top {top} clients hold {sum(counts[:top]) / max(1, incidents):.0%} of the incidents')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog='python -m demo', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--incidents', type=int, default=1_000_000)
+    parser.add_argument('--years', type=int, default=3, help='years of incident history before the current month')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('stats', help='generate every incident and print the shape of the dataset')
+    commands.add_parser('clients', help='print the client ids, one per line')
+    load_parser = commands.add_parser('load', help='write the rates and invoices to the configured storage backend')
+    load_parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    load_parser.add_argument('--batch-writes', type=int, default=BATCH_WRITES)
+    serve_parser = commands.add_parser('serve', help='serve the clients and incidents as the client and incidentquery APIs')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8081)
+    serve_parser.add_argument('--cache-clients', type=int, default=INCIDENT_CACHE_CLIENTS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    dataset = Dataset(seed=args.seed, client_count=args.clients, incident_count=args.incidents, years=args.years)
+
+    if args.command == 'stats':
+        stats(dataset)
+    elif args.command == 'clients':
+        print('\n'.join(client.id for client in dataset.clients))
+    elif args.command == 'load':
+        started = time.perf_counter()
+        written = load(dataset, args.processes, args.batch_writes)
+        print(f'{written} documents written in {time.perf_counter() - started:.1f}s')
+    else:
+        create_server(dataset, args.cache_clients).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
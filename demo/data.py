@@ -0,0 +1,215 @@
+"""
+Deterministic synthetic dataset for load tests: clients, their incident histories and existing rates and invoices.
+
+Everything is derived from the seed. Clients are generated up front, while the incidents of a client are generated on
+demand from a random generator seeded with the seed and the client's position, so any client can be produced on its
+own, in any order or process, with the same result.
+"""
+
+import random
+import uuid
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from functools import cached_property
+from typing import Any
+
+from faker import Faker
+
+from models import Action, Channel, Client, Invoice, Month, Plan, PlanCost, Rate
+
+PLANS: tuple[Plan, ...] = tuple(Plan)
+PLAN_WEIGHTS = (0.5, 0.35, 0.15)
+CHANNELS: tuple[Channel, ...] = tuple(Channel)
+# Exponent of the Zipf distribution of incidents across clients, a few large tenants hold most of them
+CLIENT_SKEW = 1.1
+# Pools of generated text that incidents draw from, calling Faker for each incident would be far too slow
+TEXT_POOL_SIZE = 512
+
+
+def first_of_month(date: datetime) -> datetime:
+    return date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(date: datetime, months: int) -> datetime:
+    index = date.year * 12 + date.month - 1 + months
+    return date.replace(year=index // 12, month=index % 12 + 1)
+
+
+def seeded_random(*parts: object) -> random.Random:
+    # Reproducible pseudo-random data, not secrets
+    return random.Random(':'.join(map(str, parts)))  # noqa: S311
+
+
+def random_uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def allocate(total: int, weights: list[float]) -> list[int]:
+    """Split `total` proportionally to `weights`, giving the remainder to the largest fractional parts."""
+    weight_sum = sum(weights)
+    shares = [total * weight / weight_sum for weight in weights]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda index: counts[index] - shares[index])
+    for index in by_remainder[: total - sum(counts)]:
+        counts[index] += 1
+
+    return counts
+
+
+def history_entry(seq: int, date: datetime, action: Action, description: str) -> dict[str, Any]:
+    return {'seq': seq, 'date': date.isoformat(), 'action': action, 'description': description}
+
+
+@dataclass(frozen=True)
+class IncidentRecord:
+    """An incident in the wire format of the incidentquery service, with its creation date kept for billing."""
+
+    created: datetime
+    channel: Channel
+    data: dict[str, Any]
+
+
+@dataclass
+class Dataset:
+    seed: int
+    client_count: int
+    incident_count: int
+    years: int = 3
+    # Incidents are created before this date, which defaults to the start of the current month
+    end: datetime = field(default_factory=lambda: first_of_month(datetime.now(UTC)))
+
+    @cached_property
+    def start(self) -> datetime:
+        return self.end.replace(year=self.end.year - self.years)
+
+    @cached_property
+    def text(self) -> dict[str, list[str]]:
+        faker = Faker()
+        faker.seed_instance(self.seed)
+        return {
+            'names': [faker.catch_phrase() for _ in range(TEXT_POOL_SIZE)],
+            'people': [faker.email() for _ in range(TEXT_POOL_SIZE)],
+            'descriptions': [faker.sentence(nb_words=12) for _ in range(TEXT_POOL_SIZE)],
+        }
+
+    @cached_property
+    def clients(self) -> list[Client]:
+        faker = Faker()
+        faker.seed_instance(self.seed)
+        rng = seeded_random(self.seed, 'clients')
+        plans = rng.choices(PLANS, weights=PLAN_WEIGHTS, k=self.client_count)
+        return [Client(id=random_uuid(rng), name=faker.company(), plan=plan) for plan in plans]
+
+    @cached_property
+    def client_index(self) -> dict[str, int]:
+        return {client.id: index for index, client in enumerate(self.clients)}
+
+    @cached_property
+    def incident_counts(self) -> list[int]:
+        # The ranks are shuffled so the largest tenants are spread across the clients and plans
+        ranks = list(range(1, self.client_count + 1))
+        seeded_random(self.seed, 'ranks').shuffle(ranks)
+        return allocate(self.incident_count, [1 / rank**CLIENT_SKEW for rank in ranks])
+
+    def incidents(self, index: int) -> list[IncidentRecord]:
+        """Generate the incidents of the client at `index`, ordered by creation date."""
+        rng = seeded_random(self.seed, 'incidents', index)
+        names, people, descriptions = self.text['names'], self.text['people'], self.text['descriptions']
+        channel_weights = [rng.random() + 0.1 for _ in CHANNELS]
+        span = (self.end - self.start).total_seconds()
+
+        # Recent incidents are more frequent, like a growing tenant
+        created_dates = sorted(
+            self.end - timedelta(seconds=span * (1 - rng.random() ** 0.7)) for _ in range(self.incident_counts[index])
+        )
+        channels = rng.choices(CHANNELS, weights=channel_weights, k=len(created_dates))
+
+        records = []
+        for created, channel in zip(created_dates, channels, strict=True):
+            history = [
+                {'seq': 0, 'date': created.isoformat(), 'action': Action.CREATED, 'description': rng.choice(descriptions)}
+            ]
+            date = created
+            # Some incidents are escalated or answered, and most get closed, days to months later
+            for action in (Action.AI_RESPONSE, Action.ESCALATED, Action.CLOSED):
+                if rng.random() < (0.8 if action == Action.CLOSED else 0.3):
+                    date += timedelta(hours=rng.expovariate(1 / 72))
+                    history.append(
+                        {
+                            'seq': len(history),
+                            'date': date.isoformat(),
+                            'action': action,
+                            'description': rng.choice(descriptions),
+                        }
+                    )
+
+            data = {
+                'id': random_uuid(rng),
+                'name': rng.choice(names),
+                'channel': channel,
+                'reported_by': rng.choice(people),
+                'created_by': rng.choice(people),
+                'assigned_to': rng.choice(people),
+                'history': history,
+            }
+            records.append(IncidentRecord(created=created, channel=channel, data=data))
+
+        return records
+
+    def rate(self, index: int) -> Rate:
+        client = self.clients[index]
+        costs = PlanCost.get_costs(client.plan)
+        return Rate(
+            id=random_uuid(seeded_random(self.seed, 'rate', index)),
+            plan=client.plan,
+            client_id=client.id,
+            fixed_cost=costs.fixed_cost,
+            cost_per_incident_web=costs.web_incident_cost,
+            cost_per_incident_mobile=costs.mobile_incident_cost,
+            cost_per_incident_email=costs.email_incident_cost,
+        )
+
+    def invoices(self, index: int, incidents: list[IncidentRecord] | None = None) -> list[Invoice]:
+        """
+        Invoice every month of the client's history except the last one, which the service still has to generate.
+
+        The counts are taken from the client's incidents, which are generated again unless they are given.
+        """
+        if incidents is None:
+            incidents = self.incidents(index)
+
+        counts: dict[datetime, dict[Channel, int]] = {}
+        for incident in incidents:
+            month_counts = counts.setdefault(first_of_month(incident.created), dict.fromkeys(CHANNELS, 0))
+            month_counts[incident.channel] += 1
+
+        client = self.clients[index]
+        rate = self.rate(index)
+        rng = seeded_random(self.seed, 'invoices', index)
+        invoices = []
+        month = self.start
+        last_billed = add_months(self.end, -1)
+        while month < last_billed:
+            month_counts = counts.get(month, dict.fromkeys(CHANNELS, 0))
+            invoices.append(
+                Invoice(
+                    id=random_uuid(rng),
+                    client_id=client.id,
+                    rate_id=rate.id,
+                    generation_date=add_months(month, 1) + timedelta(minutes=rng.randrange(24 * 60)),
+                    billing_month=Month.from_int(month.month).value,
+                    billing_year=month.year,
+                    payment_due_date=month.replace(day=15) + timedelta(days=30),
+                    total_incidents_web=month_counts[Channel.WEB],
+                    total_incidents_mobile=month_counts[Channel.MOBILE],
+                    total_incidents_email=month_counts[Channel.EMAIL],
+                )
+            )
+            month = add_months(month, 1)
+
+        return invoices
+
+    def documents(self) -> Iterator[tuple[Rate, list[Invoice]]]:
+        for index in range(self.client_count):
+            yield self.rate(index), self.invoices(index)
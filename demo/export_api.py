@@ -0,0 +1,85 @@
+"""Stand-in for the Firestore export API, whose long-running operations finish after a number of polls."""
+
+import itertools
+import threading
+from typing import Any
+
+from flask import Flask, Response, jsonify, request
+
+METADATA_TYPE = 'type.googleapis.com/google.firestore.admin.v1.ExportDocumentsMetadata'
+
+
+def create_export_api(polls_until_done: int = 2, error: str | None = None, *, rejected: bool = False) -> Flask:
+    """
+    Build an app answering exportDocuments, operation lists and polls like the Firestore admin API.
+
+    Every export finishes on its `polls_until_done`-th poll, failing with `error` when it is given, or is refused
+    upfront when `rejected`. The requests received are kept in `app.config['EXPORT_REQUESTS']` for tests to check.
+    """
+    app = Flask(__name__)
+    operations: dict[str, dict[str, Any]] = {}
+    polls: dict[str, int] = {}
+    ids = itertools.count(1)
+    lock = threading.Lock()
+    app.config['EXPORT_REQUESTS'] = requests_received = []
+
+    @app.post('/v1/projects/<project_id>/databases/<database>:exportDocuments')
+    def export_documents(project_id: str, database: str) -> Response | tuple[Response, int]:
+        body = request.get_json()
+        requests_received.append({'headers': dict(request.headers), 'body': body})
+        if rejected:
+            return jsonify({'error': {'code': 403, 'message': 'Permission denied', 'status': 'PERMISSION_DENIED'}}), 403
+
+        with lock:
+            name = f'projects/{project_id}/databases/{database}/operations/op{next(ids)}'
+            operations[name] = {
+                'name': name,
+                'metadata': {
+                    '@type': METADATA_TYPE,
+                    'operationState': 'PROCESSING',
+                    'outputUriPrefix': body['outputUriPrefix'],
+                    'snapshotTime': body.get('snapshotTime'),
+                },
+            }
+            polls[name] = 0
+            return jsonify(operations[name])
+
+    @app.get('/v1/projects/<project_id>/databases/<database>/operations')
+    def list_operations(project_id: str, database: str) -> Response:
+        prefix = f'projects/{project_id}/databases/{database}/operations/'
+        # Only the outputUriPrefix filter used by the backups is understood
+        filter_prefix = request.args.get('filter', '').removeprefix('metadata.outputUriPrefix=').strip('"')
+        with lock:
+            return jsonify(
+                {
+                    'operations': [
+                        operation
+                        for name, operation in operations.items()
+                        if name.startswith(prefix)
+                        and (not filter_prefix or operation['metadata']['outputUriPrefix'] == filter_prefix)
+                    ]
+                }
+            )
+
+    @app.get('/v1/projects/<project_id>/databases/<database>/operations/<operation_id>')
+    def get_operation(project_id: str, database: str, operation_id: str) -> Response | tuple[Response, int]:
+        name = f'projects/{project_id}/databases/{database}/operations/{operation_id}'
+        with lock:
+            operation = operations.get(name)
+            if operation is None:
+                return jsonify({'error': {'code': 404, 'message': 'Operation not found', 'status': 'NOT_FOUND'}}), 404
+
+            polls[name] += 1
+            operation['metadata']['progressDocuments'] = {'completedWork': str(polls[name] * 100)}
+            if polls[name] >= polls_until_done:
+                operation['done'] = True
+                if error is None:
+                    operation['metadata']['operationState'] = 'SUCCESSFUL'
+                    operation['response'] = {'outputUriPrefix': operation['metadata']['outputUriPrefix']}
+                else:
+                    operation['metadata']['operationState'] = 'FAILED'
+                    operation['error'] = {'code': 13, 'message': error}
+
+            return jsonify(operation)
+
+    return app
@@ -0,0 +1,87 @@
+"""Bulk load of the rates and invoices of a dataset, sharded across processes and written in batches."""
+
+import logging
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+
+from app import load_config
+from containers import Container
+from repositories import UnitOfWork
+
+from .data import Dataset
+
+# Firestore commits at most 500 writes in a batch
+BATCH_WRITES = 500
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """Stages saves in units of work that are committed every `batch_writes` writes."""
+
+    def __init__(self, unit_of_work_factory: Callable[[], UnitOfWork], batch_writes: int = BATCH_WRITES) -> None:
+        self.unit_of_work_factory = unit_of_work_factory
+        self.batch_writes = batch_writes
+        self.unit_of_work = unit_of_work_factory()
+        self.pending = 0
+        self.written = 0
+
+    def staged(self) -> UnitOfWork:
+        if self.pending == self.batch_writes:
+            self.flush()
+
+        self.pending += 1
+        return self.unit_of_work
+
+    def flush(self) -> None:
+        if self.pending:
+            self.unit_of_work.commit()
+            self.written += self.pending
+            self.pending = 0
+            self.unit_of_work = self.unit_of_work_factory()
+
+
+def write_documents(
+    dataset: Dataset,
+    indices: Iterable[int],
+    unit_of_work_factory: Callable[[], UnitOfWork],
+    batch_writes: int = BATCH_WRITES,
+) -> int:
+    """
+    Write the rate and invoices of the clients at `indices` and return the number of documents written.
+
+    Documents are saved rather than created, so a load that was interrupted can simply be run again.
+    """
+    writer = BatchWriter(unit_of_work_factory, batch_writes)
+    for index in indices:
+        writer.staged().save_rate(dataset.rate(index))
+        for invoice in dataset.invoices(index):
+            writer.staged().save_invoice(invoice)
+
+    writer.flush()
+    return writer.written
+
+
+def load_shard(dataset: Dataset, shard: int, shards: int, batch_writes: int) -> int:
+    """Load every `shards`-th client starting at `shard`, with a container of its own configured from the environment."""
+    container = Container()
+    load_config(container)
+    started = time.perf_counter()
+    written = write_documents(
+        dataset, range(shard, dataset.client_count, shards), container.storage_unit_of_work, batch_writes
+    )
+    logger.info('Shard %d/%d wrote %d documents in %.1fs', shard + 1, shards, written, time.perf_counter() - started)
+    return written
+
+
+def load(dataset: Dataset, processes: int, batch_writes: int = BATCH_WRITES) -> int:
+    """
+    Load the dataset into the storage backend configured in the environment, `STORAGE_BACKEND` and its settings.
+
+    Generating the invoices means generating every incident, which is CPU bound, so the clients are split across
+    processes. Each one opens its own database client, which must not be shared across a fork.
+    """
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(load_shard, dataset, shard, processes, batch_writes) for shard in range(processes)]
+        return sum(future.result() for future in futures)
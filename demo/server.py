@@ -0,0 +1,75 @@
+"""Stand-in for the client and incidentquery services that serves a generated dataset."""
+
+import bisect
+import json
+from datetime import UTC, datetime
+from functools import lru_cache
+
+from flask import Flask, Response, abort, request
+
+from .data import Dataset
+
+# Clients whose encoded incidents are kept, the largest ones take seconds to generate
+INCIDENT_CACHE_CLIENTS = 64
+
+
+class EncodedIncidents:
+    """The incidents of a client encoded one by one, so the ones created since a date are served without encoding."""
+
+    def __init__(self, dataset: Dataset, index: int) -> None:
+        records = dataset.incidents(index)
+        self.created = [record.created for record in records]
+        self.encoded = [json.dumps(record.data) for record in records]
+
+    def since(self, date: datetime | None) -> str:
+        start = 0 if date is None else bisect.bisect_left(self.created, date)
+        return '[' + ','.join(self.encoded[start:]) + ']'
+
+
+def parse_since(value: str | None) -> datetime | None:
+    if value is None:
+        return None
+
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        abort(400)
+
+    return date if date.tzinfo is not None else date.replace(tzinfo=UTC)
+
+
+def create_server(dataset: Dataset, cache_clients: int = INCIDENT_CACHE_CLIENTS) -> Flask:
+    """
+    Build an app answering the requests the service sends to the client and incidentquery services.
+
+    Both services can point at the same server, the routes do not overlap.
+    """
+    app = Flask(__name__)
+
+    @lru_cache(maxsize=cache_clients)
+    def encoded_incidents(index: int) -> EncodedIncidents:
+        return EncodedIncidents(dataset, index)
+
+    def client_index(client_id: str) -> int:
+        index = dataset.client_index.get(client_id)
+        if index is None:
+            abort(404)
+
+        return index
+
+    @app.get('/api/v1/health/client')
+    @app.get('/api/v1/health/incidentquery')
+    def health() -> Response:
+        return Response('{"status": "ok"}', mimetype='application/json')
+
+    @app.get('/api/v1/clients/<client_id>')
+    def client(client_id: str) -> Response:
+        data = dataset.clients[client_index(client_id)]
+        return Response(json.dumps({'id': data.id, 'name': data.name, 'plan': data.plan}), mimetype='application/json')
+
+    @app.get('/api/v1/clients/<client_id>/incidents')
+    def incidents(client_id: str) -> Response:
+        since = parse_since(request.args.get('since'))
+        return Response(encoded_incidents(client_index(client_id)).since(since), mimetype='application/json')
+
+    return app
@@ -0,0 +1,73 @@
+# ruff: noqa: T201
+"""
+Renders the invoice documents of a billing period into a sharded archive.
+
+    python -m documents --period 2024-05 --output gs://my-project-invoices/documents --processes 8
+    STORAGE_BACKEND=sqlite python -m documents --output ./documents
+
+Invoices, rates and clients are read from the backends configured in the environment, as in the service. The archive
+is written under the output, a local directory or a `gs://bucket/prefix`, in a directory per period: zip shards of
+HTML documents named after the invoice ids, each with a JSON manifest. Running again for the same period and output
+resumes an interrupted run. Without a period, the last billing period is rendered.
+"""
+
+import argparse
+import json
+import logging
+import os
+from datetime import UTC, datetime
+
+from app import load_config
+from blueprints.invoice import get_billing_period
+from containers import Container
+from models import Month
+
+from .archive import ShardedArchive, open_storage
+from .pipeline import InvoiceDocumentPipeline
+
+
+def parse_period(value: str) -> tuple[Month, int]:
+    try:
+        parsed = datetime.strptime(value, '%Y-%m').replace(tzinfo=UTC)
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected YYYY-MM') from None
+    return Month.from_int(parsed.month), parsed.year
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog='python -m documents', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--period', type=parse_period, help='billing period as YYYY-MM, the last one by default')
+    parser.add_argument('--output', required=True, help='local directory or gs://bucket/prefix')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=200, help='invoices joined and rendered together')
+    parser.add_argument('--shard-size', type=int, default=1000, help='documents per shard')
+    parser.add_argument(
+        '--client-workers', type=int, default=8, help='threads fetching clients, at most the 10 pooled connections'
+    )
+    parser.add_argument('--storage-api-url', default='https://storage.googleapis.com')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    container = Container()
+    load_config(container)
+
+    month, year = args.period or get_billing_period()
+    storage = open_storage(args.output, args.storage_api_url, container.access_token.provider)
+    archive = ShardedArchive(storage, f'{year}-{month.to_int():02d}')
+    pipeline = InvoiceDocumentPipeline(
+        invoice_repo=container.invoice_repo(),
+        rate_repo=container.rate_repo(),
+        client_repo=container.client_repo(),
+        processes=args.processes,
+        batch_size=args.batch_size,
+        shard_size=args.shard_size,
+        client_workers=args.client_workers,
+    )
+    report = pipeline.run(archive, month, year)
+    print(json.dumps(report.to_dict(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
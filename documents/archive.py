@@ -0,0 +1,156 @@
+import io
+import json
+import re
+import zipfile
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote
+
+import requests
+
+REQUEST_TIMEOUT = 60
+
+MANIFEST_PATTERN = re.compile(r'/shard-\d+\.json$')
+
+
+class ArchiveStorage:
+    def list(self, prefix: str) -> list[str]:
+        raise NotImplementedError  # pragma: no cover
+
+    def read(self, name: str) -> bytes:
+        raise NotImplementedError  # pragma: no cover
+
+    def write(self, name: str, data: bytes) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+
+class LocalArchiveStorage(ArchiveStorage):
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def list(self, prefix: str) -> list[str]:
+        directory = self.root / prefix
+        if not directory.is_dir():
+            return []
+        return sorted(f'{prefix}/{path.name}' for path in directory.iterdir() if path.is_file())
+
+    def read(self, name: str) -> bytes:
+        return (self.root / name).read_bytes()
+
+    def write(self, name: str, data: bytes) -> None:
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, so an interrupted write never leaves a truncated file under the final name
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+
+
+class BucketArchiveStorage(ArchiveStorage):
+    """Objects in a Cloud Storage bucket, or any service implementing its JSON API, under `prefix`."""
+
+    def __init__(self, api_url: str, bucket: str, prefix: str, access_token: Callable[[], str]) -> None:
+        self.api_url = api_url.rstrip('/')
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.access_token = access_token
+        self.session = requests.Session()
+
+    def headers(self) -> dict[str, str]:
+        return {'Authorization': f'Bearer {self.access_token()}'}
+
+    def object_name(self, name: str) -> str:
+        return f'{self.prefix}/{name}' if self.prefix else name
+
+    def list(self, prefix: str) -> list[str]:
+        names: list[str] = []
+        params = {'prefix': self.object_name(prefix) + '/', 'fields': 'items(name),nextPageToken'}
+        while True:
+            resp = self.session.get(
+                f'{self.api_url}/storage/v1/b/{self.bucket}/o', params=params, headers=self.headers(), timeout=REQUEST_TIMEOUT
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            names.extend(item['name'].removeprefix(f'{self.prefix}/') for item in data.get('items', []))
+            if 'nextPageToken' not in data:
+                return sorted(names)
+            params['pageToken'] = data['nextPageToken']
+
+    def read(self, name: str) -> bytes:
+        resp = self.session.get(
+            f'{self.api_url}/storage/v1/b/{self.bucket}/o/{quote(self.object_name(name), safe="")}',
+            params={'alt': 'media'},
+            headers=self.headers(),
+            timeout=REQUEST_TIMEOUT,
+        )
+        resp.raise_for_status()
+        return resp.content
+
+    def write(self, name: str, data: bytes) -> None:
+        # Uploads are atomic, an object is either complete or absent
+        resp = self.session.post(
+            f'{self.api_url}/upload/storage/v1/b/{self.bucket}/o',
+            params={'uploadType': 'media', 'name': self.object_name(name)},
+            data=data,
+            headers=self.headers(),
+            timeout=REQUEST_TIMEOUT,
+        )
+        resp.raise_for_status()
+
+
+def open_storage(location: str, api_url: str, access_token: Callable[[], str]) -> ArchiveStorage:
+    """Storage for a `gs://bucket/prefix` location, or a local directory for any other one."""
+    if location.startswith('gs://'):
+        bucket, _, prefix = location.removeprefix('gs://').partition('/')
+        return BucketArchiveStorage(api_url, bucket, prefix, access_token)
+    return LocalArchiveStorage(Path(location))
+
+
+class ShardedArchive:
+    """
+    Documents of a billing period in zip shards, each followed by a manifest listing the invoices in it.
+
+    A manifest is only written once its shard is complete, so the invoices of the manifests found are the ones already
+    archived and an interrupted run resumes with the others, in new shards.
+    """
+
+    def __init__(self, storage: ArchiveStorage, period: str) -> None:
+        self.storage = storage
+        self.period = period
+
+    def shard_name(self, index: int, extension: str) -> str:
+        return f'{self.period}/shard-{index:05d}.{extension}'
+
+    def manifests(self) -> list[dict[str, Any]]:
+        return [
+            json.loads(self.storage.read(name))
+            for name in self.storage.list(self.period)
+            if MANIFEST_PATTERN.search(name) is not None
+        ]
+
+    def completed(self) -> tuple[set[str], int]:
+        """Return the ids of the invoices already archived and the index of the next shard."""
+        manifests = self.manifests()
+        invoice_ids = {invoice_id for manifest in manifests for invoice_id in manifest['invoices']}
+        return invoice_ids, max((manifest['shard'] + 1 for manifest in manifests), default=0)
+
+    def write_shard(self, index: int, documents: list[tuple[str, bytes]]) -> int:
+        """Write a shard with the documents given as (invoice id, document) and return its size in bytes."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for invoice_id, document in documents:
+                archive.writestr(f'{invoice_id}.html', document)
+
+        data = buffer.getvalue()
+        self.storage.write(self.shard_name(index, 'zip'), data)
+        manifest = {
+            'shard': index,
+            'period': self.period,
+            'invoices': [invoice_id for invoice_id, _ in documents],
+            'bytes': len(data),
+            'created': datetime.now(UTC).isoformat(),
+        }
+        self.storage.write(self.shard_name(index, 'json'), json.dumps(manifest).encode())
+        return len(data)
@@ -0,0 +1,179 @@
+"""Batch rendering of the invoice documents of a billing period into a sharded archive."""
+
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from blueprints.invoice import invoice_result_to_dict
+from models import Invoice, Month
+from reconciliation import batched
+from repositories import ClientRepository, InvoiceRepository, RateRepository
+
+from .archive import ShardedArchive
+from .render import render_batch
+
+# (invoice id, generation date, invoice result) of a document to render
+Document = tuple[str, str, dict[str, Any]]
+
+
+@dataclass
+class RenderReport:
+    period: str
+    invoices: int = 0
+    # Skipped, found in the shards of an earlier run
+    archived: int = 0
+    # Skipped, their rate or client no longer exists
+    missing: int = 0
+    rendered: int = 0
+    shards: int = 0
+    bytes: int = 0
+    duration: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.rendered / self.duration if self.duration else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), 'throughput': round(self.throughput, 1)}
+
+
+class ShardWriter:
+    """Collects rendered documents and writes them to the archive `shard_size` at a time."""
+
+    def __init__(self, archive: ShardedArchive, shard_size: int, next_shard: int, report: RenderReport) -> None:
+        self.archive = archive
+        self.shard_size = shard_size
+        self.next_shard = next_shard
+        self.report = report
+        self.documents: list[tuple[str, bytes]] = []
+        self.started = time.perf_counter()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def add(self, documents: list[tuple[str, bytes]]) -> None:
+        self.documents.extend(documents)
+        while len(self.documents) >= self.shard_size:
+            self.write(self.documents[: self.shard_size])
+            del self.documents[: self.shard_size]
+
+    def flush(self) -> None:
+        if self.documents:
+            self.write(self.documents)
+            self.documents = []
+
+    def write(self, documents: list[tuple[str, bytes]]) -> None:
+        size = self.archive.write_shard(self.next_shard, documents)
+        self.next_shard += 1
+        self.report.shards += 1
+        self.report.rendered += len(documents)
+        self.report.bytes += size
+        elapsed = time.perf_counter() - self.started
+        self.logger.info(
+            'Wrote shard %d of %s with %d documents (%d bytes), %d rendered at %.0f documents/s',
+            self.next_shard - 1,
+            self.archive.period,
+            len(documents),
+            size,
+            self.report.rendered,
+            self.report.rendered / elapsed if elapsed else 0.0,
+        )
+
+
+class InvoiceDocumentPipeline:
+    """
+    Renders a document for every invoice of a billing period and archives them in shards.
+
+    The invoices are streamed in batches of `batch_size`, whose rates are read at once and whose clients are fetched by
+    `client_workers` threads. Batches are rendered by `processes` worker processes while the next ones are read, with
+    at most two batches per process in flight, and the documents are written in shards of `shard_size` as they come
+    back. Invoices already in the archive are skipped, so a run that was interrupted resumes where its last complete
+    shard ended.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        invoice_repo: InvoiceRepository,
+        rate_repo: RateRepository,
+        client_repo: ClientRepository,
+        processes: int,
+        batch_size: int,
+        shard_size: int,
+        client_workers: int,
+    ) -> None:
+        self.invoice_repo = invoice_repo
+        self.rate_repo = rate_repo
+        self.client_repo = client_repo
+        self.processes = processes
+        self.batch_size = batch_size
+        self.shard_size = shard_size
+        self.client_workers = client_workers
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def join(self, invoices: list[Invoice], fetcher: Executor) -> tuple[list[Document], int]:
+        """Join the rates and clients of the invoices, returning their documents and the number of invoices missing one."""
+        rate_ids = list(dict.fromkeys(invoice.rate_id for invoice in invoices))
+        rates = dict(zip(rate_ids, self.rate_repo.get_many(rate_ids), strict=True))
+        client_ids = list(dict.fromkeys(invoice.client_id for invoice in invoices))
+        clients = dict(zip(client_ids, fetcher.map(self.client_repo.get, client_ids), strict=True))
+
+        documents = []
+        missing = 0
+        for invoice in invoices:
+            rate = rates[invoice.rate_id]
+            client = clients[invoice.client_id]
+            if rate is None or client is None:
+                self.logger.warning('Invoice %s has no rate %s or client %s', invoice.id, invoice.rate_id, invoice.client_id)
+                missing += 1
+                continue
+            documents.append((invoice.id, invoice.generation_date.isoformat(), invoice_result_to_dict(invoice, rate, client)))
+
+        return documents, missing
+
+    def run(self, archive: ShardedArchive, month: Month, year: int) -> RenderReport:
+        started = time.perf_counter()
+        report = RenderReport(period=archive.period)
+        archived, next_shard = archive.completed()
+        writer = ShardWriter(archive, self.shard_size, next_shard, report)
+
+        # Spawned rather than forked, the repositories hold database clients and threads that must not cross a fork
+        with (
+            ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context('spawn')) as renderer,
+            ThreadPoolExecutor(max_workers=self.client_workers, thread_name_prefix='documents') as fetcher,
+        ):
+            pending: set[Future[list[tuple[str, bytes]]]] = set()
+            for batch in batched(self.invoice_repo.get_by_month(month, year), self.batch_size):
+                report.invoices += len(batch)
+                invoices = [invoice for invoice in batch if invoice.id not in archived]
+                report.archived += len(batch) - len(invoices)
+                if not invoices:
+                    continue
+
+                documents, missing = self.join(invoices, fetcher)
+                report.missing += missing
+                if not documents:
+                    continue
+
+                if len(pending) >= 2 * self.processes:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        writer.add(future.result())
+                pending.add(renderer.submit(render_batch, documents))
+
+            for future in pending:
+                writer.add(future.result())
+            writer.flush()
+
+        report.duration = time.perf_counter() - started
+        # json_fields is picked up as structured payload by the Cloud Logging handler
+        self.logger.info(
+            'Rendered %d of %d invoices of %s into %d shards, %.0f documents/s',
+            report.rendered,
+            report.invoices,
+            report.period,
+            report.shards,
+            report.throughput,
+            extra={'json_fields': report.to_dict()},
+        )
+        return report
@@ -0,0 +1,69 @@
+"""Rendering of invoice documents, run in the worker processes of the pipeline."""
+
+from functools import cache
+from typing import Any
+
+import jinja2
+
+# Self-contained: styles are inline and nothing is loaded from elsewhere, so a document prints the same anywhere
+TEMPLATE = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Factura {{ invoice_id }}</title>
+<style>
+  @page { size: A4; margin: 20mm; }
+  body { font-family: Helvetica, Arial, sans-serif; color: #222; font-size: 11pt; }
+  h1 { font-size: 18pt; margin-bottom: 0; }
+  .meta { color: #666; margin-top: 4px; }
+  table { width: 100%; border-collapse: collapse; margin-top: 24px; }
+  th, td { padding: 6px 8px; border-bottom: 1px solid #ddd; text-align: left; }
+  td.amount, th.amount { text-align: right; }
+  tfoot td { font-weight: bold; border-top: 2px solid #222; border-bottom: none; }
+</style>
+</head>
+<body>
+<h1>Factura {{ billing_month }} {{ billing_year }}</h1>
+<p class="meta">N.º {{ invoice_id }} &middot; Emitida el {{ generation_date[:10] }} &middot; Vence el {{ due_date[:10] }}</p>
+<p><strong>{{ client_name }}</strong><br>Cliente {{ client_id }}<br>Plan {{ client_plan }}</p>
+<table>
+<thead>
+<tr><th>Concepto</th><th class="amount">Cantidad</th><th class="amount">Precio unitario</th>
+<th class="amount">Importe</th></tr>
+</thead>
+<tbody>
+<tr><td>Cargo fijo</td><td class="amount">1</td><td class="amount">{{ '%.2f' % fixed_cost }}</td>
+<td class="amount">{{ '%.2f' % fixed_cost }}</td></tr>
+{% for channel, label in channels %}
+<tr><td>Incidentes {{ label }}</td><td class="amount">{{ total_incidents[channel] }}</td>
+<td class="amount">{{ '%.2f' % unit_cost_per_incident[channel] }}</td>
+<td class="amount">{{ '%.2f' % (total_incidents[channel] * unit_cost_per_incident[channel]) }}</td></tr>
+{% endfor %}
+</tbody>
+<tfoot>
+<tr><td colspan="3">Total</td><td class="amount">{{ '%.2f' % total_cost }}</td></tr>
+</tfoot>
+</table>
+</body>
+</html>
+"""
+
+CHANNELS = (('web', 'web'), ('mobile', 'móvil'), ('email', 'correo'))
+
+
+@cache
+def template() -> jinja2.Template:
+    # Compiled once per worker process
+    return jinja2.Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True).from_string(TEMPLATE)
+
+
+def render_document(invoice_id: str, generation_date: str, result: dict[str, Any]) -> bytes:
+    """Render the document of an invoice from its result, as returned by the invoice endpoint."""
+    return template().render(invoice_id=invoice_id, generation_date=generation_date, channels=CHANNELS, **result).encode()
+
+
+def render_batch(documents: list[tuple[str, str, dict[str, Any]]]) -> list[tuple[str, bytes]]:
+    """Render the documents of a batch, so that a batch makes a single round trip to a worker process."""
+    return [
+        (invoice_id, render_document(invoice_id, generation_date, result)) for invoice_id, generation_date, result in documents
+    ]
@@ -0,0 +1,46 @@
+# ruff: noqa: INP001
+"""
+Gunicorn settings, read from the working directory when gunicorn starts.
+
+Workers default to the CPUs available to the container and threads to 8 per worker, both can be set with
+GUNICORN_WORKERS and GUNICORN_THREADS. The app is loaded once before forking, so the imports and the container are
+shared copy-on-write by the workers, unless GUNICORN_PRELOAD is 0.
+"""
+
+import math
+import os
+from pathlib import Path
+from typing import Any
+
+
+def available_cpus() -> int:
+    cpus = len(os.sched_getaffinity(0))
+    try:
+        # A container limited by a CFS quota sees every CPU of the host but only runs quota / period of them at once
+        quota, period = Path('/sys/fs/cgroup/cpu.max').read_text(encoding='ascii').split()
+    except (OSError, ValueError):
+        return cpus
+
+    if quota == 'max':
+        return cpus
+
+    return max(1, min(cpus, math.ceil(int(quota) / int(period))))
+
+
+wsgi_app = 'app:create_app(start_background=False)'
+bind = f'0.0.0.0:{os.getenv("PORT", "8080")}'
+workers = int(os.getenv('GUNICORN_WORKERS') or available_cpus())
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+# The heartbeat file of the workers is kept in memory, a disk backed /tmp can block them on slow IO
+worker_tmp_dir = '/dev/shm'  # noqa: S108
+
+
+def post_fork(_: Any, worker: Any) -> None:  # noqa: ANN401
+    from app import start_background_tasks
+    from containers import reset_fork_unsafe
+
+    # With preload this is the app built before the fork, otherwise the worker builds it here
+    app = worker.app.wsgi()
+    reset_fork_unsafe(app.container)
+    start_background_tasks(app)
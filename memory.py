@@ -0,0 +1,194 @@
+import gc
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from flask import Flask, Response, g, request
+
+TOP_ALLOCATIONS = 10
+
+
+@dataclass
+class StageMemory:
+    calls: int = 0
+    peak_bytes: int = 0
+    net_bytes: int = 0
+    net_blocks: int = 0
+
+
+@dataclass
+class RequestMemory:
+    endpoint: str
+    start_bytes: int
+    start_blocks: int
+    peak_bytes: int = 0
+    stages: dict[str, StageMemory] = field(default_factory=dict)
+
+    def update_peak(self, peak: int) -> None:
+        self.peak_bytes = max(self.peak_bytes, peak - self.start_bytes)
+
+
+current_request: ContextVar[RequestMemory | None] = ContextVar('current_request', default=None)
+
+
+@contextmanager
+def memory_stage(name: str) -> Iterator[None]:
+    """
+    Attribute the memory allocated inside the block to a stage of the request being traced.
+
+    Outside a traced request this does nothing. Stages must not be nested, each one resets the tracemalloc peak.
+    """
+    record = current_request.get()
+    if record is None:
+        yield
+        return
+
+    before, _ = tracemalloc.get_traced_memory()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        stage = record.stages.setdefault(name, StageMemory())
+        stage.calls += 1
+        stage.peak_bytes = max(stage.peak_bytes, peak - before)
+        stage.net_bytes += after - before
+        stage.net_blocks += sys.getallocatedblocks() - blocks
+        record.update_peak(peak)
+
+
+def process_rss() -> int:
+    try:
+        statm = Path('/proc/self/statm').read_text(encoding='ascii')
+        return int(statm.split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:  # pragma: no cover
+        # Not on Linux, fall back to the peak RSS, which getrusage reports in KiB on Linux and bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+class MemoryTracer:
+    """
+    Traces the memory of requests with tracemalloc and keeps periodic snapshots of the process memory.
+
+    tracemalloc counts the allocations of the whole process, so only one request is traced at a time and the figures
+    of a request served concurrently with others also include theirs. Requests whose peak is above
+    `large_request_bytes` are logged as warnings so they stand out.
+    """
+
+    def __init__(self, frames: int, snapshot_interval: float, snapshot_history: int, large_request_bytes: int) -> None:
+        self.frames = frames
+        self.snapshot_interval = snapshot_interval
+        self.large_request_bytes = large_request_bytes
+        self.snapshots: deque[dict[str, Any]] = deque(maxlen=snapshot_history)
+        self.request_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+        threading.Thread(target=self.run_snapshots, name='memory-snapshots', daemon=True).start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        tracemalloc.stop()
+
+    def run_snapshots(self) -> None:
+        while not self.stopped.wait(self.snapshot_interval):
+            self.snapshots.append(self.snapshot())
+
+    def snapshot(self, *, top_allocations: bool = False) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            'timestamp': time.time(),
+            'rss_bytes': process_rss(),
+            'allocated_blocks': sys.getallocatedblocks(),
+            'gc_counts': list(gc.get_count()),
+        }
+
+        if tracemalloc.is_tracing():
+            traced, peak = tracemalloc.get_traced_memory()
+            data['traced_bytes'] = traced
+            data['traced_peak_bytes'] = peak
+
+            # Walking every traced block is slow on a large heap, so only on-demand snapshots include it
+            if top_allocations:
+                stats = tracemalloc.take_snapshot().statistics('lineno')[:TOP_ALLOCATIONS]
+                data['top_allocations'] = [
+                    {'location': str(stat.traceback), 'size_bytes': stat.size, 'count': stat.count} for stat in stats
+                ]
+
+        return data
+
+    def begin_request(self, endpoint: str) -> RequestMemory | None:
+        if not tracemalloc.is_tracing() or not self.request_lock.acquire(blocking=False):
+            return None
+
+        tracemalloc.reset_peak()
+        traced, _ = tracemalloc.get_traced_memory()
+        record = RequestMemory(endpoint=endpoint, start_bytes=traced, start_blocks=sys.getallocatedblocks())
+        current_request.set(record)
+        return record
+
+    def end_request(self, record: RequestMemory, status: int | None, client_id: str | None) -> None:
+        try:
+            current_request.set(None)
+            traced, peak = tracemalloc.get_traced_memory()
+            record.update_peak(peak)
+        finally:
+            self.request_lock.release()
+
+        fields = {
+            'endpoint': record.endpoint,
+            'status': status,
+            'client_id': client_id,
+            'peak_bytes': record.peak_bytes,
+            'net_bytes': traced - record.start_bytes,
+            'net_blocks': sys.getallocatedblocks() - record.start_blocks,
+            'rss_bytes': process_rss(),
+            'stages': {name: asdict(stage) for name, stage in record.stages.items()},
+        }
+        level = logging.WARNING if record.peak_bytes >= self.large_request_bytes else logging.INFO
+        # json_fields is picked up as structured payload by the Cloud Logging handler
+        self.logger.log(
+            level,
+            'Request memory %s client=%s peak=%d bytes',
+            record.endpoint,
+            client_id,
+            record.peak_bytes,
+            extra={'json_fields': fields},
+        )
+
+
+def install_memory_tracing(app: Flask, tracer: MemoryTracer) -> None:
+    """Register the request hooks, which are only installed when memory tracing is enabled and trace once started."""
+
+    def before_request() -> None:
+        g.memory = tracer.begin_request(request.endpoint or 'unknown')
+
+    def after_request(response: Response) -> Response:
+        g.memory_status = response.status_code
+        return response
+
+    def teardown_request(_: BaseException | None) -> None:
+        record: RequestMemory | None = g.pop('memory', None)
+        if record is not None:
+            user_token = getattr(request, 'user_token', None) or {}
+            tracer.end_request(record, g.pop('memory_status', None), user_token.get('cid'))
+
+    app.before_request(before_request)
+    app.after_request(after_request)
+    app.teardown_request(teardown_request)
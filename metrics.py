@@ -0,0 +1,62 @@
+import bisect
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+# Upper bounds, in seconds, of the histogram buckets kept for every observed value
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, float('inf'))
+
+
+@dataclass
+class Histogram:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * len(BUCKETS))
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'max': self.max,
+            'buckets': {str(bound): count for bound, count in zip(BUCKETS, self.buckets, strict=True)},
+        }
+
+
+class Metrics:
+    """In-process counters and histograms, read through the metrics endpoint."""
+
+    def __init__(self) -> None:
+        self.counters: dict[str, int] = {}
+        self.gauges: dict[str, float] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self.lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self.lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'histograms': {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            }
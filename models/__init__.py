@@ -3,11 +3,30 @@ from .channel import Channel
 from .client import Client
 from .history_entry import HistoryEntry
 from .incident import Incident
+from .incident_batch import IncidentBatch
+from .incident_summary import IncidentSummary
 from .invoice import Invoice
 from .month import Month
 from .plan import Plan
 from .plan_cost import PlanCost
 from .rate import Rate
+from .revenue_rollup import RevenueRollup, merge_rollups
 from .role import Role
 
-__all__ = ['Client', 'Plan', 'Channel', 'Action', 'HistoryEntry', 'Incident', 'Month', 'Invoice', 'Rate', 'PlanCost', 'Role']
+__all__ = [
+    'Client',
+    'Plan',
+    'Channel',
+    'Action',
+    'HistoryEntry',
+    'Incident',
+    'IncidentBatch',
+    'IncidentSummary',
+    'Month',
+    'Invoice',
+    'Rate',
+    'RevenueRollup',
+    'merge_rollups',
+    'PlanCost',
+    'Role',
+]
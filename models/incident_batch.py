@@ -0,0 +1,122 @@
+import sys
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from datetime import UTC, datetime, timedelta, timezone
+from functools import cache
+
+from .channel import Channel
+from .history_entry import HistoryEntry
+from .incident import Incident
+from .incident_summary import IncidentSummary
+
+CHANNELS: tuple[Channel, ...] = tuple(Channel)
+CHANNEL_CODES = {channel.value: code for code, channel in enumerate(CHANNELS)}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def to_micros(date: datetime) -> int:
+    # Dates without an offset are taken as UTC
+    delta = (date if date.tzinfo is not None else date.replace(tzinfo=UTC)) - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_micros(micros: int) -> datetime:
+    return datetime.fromtimestamp(micros // 1_000_000, tz=UTC).replace(microsecond=micros % 1_000_000)
+
+
+def utc_offset(date: datetime) -> int:
+    offset = date.utcoffset()
+    return 0 if offset is None else offset // timedelta(seconds=1)
+
+
+@cache
+def offset_timezone(seconds: int) -> timezone:
+    return timezone(timedelta(seconds=seconds))
+
+
+class IncidentBatch:
+    """
+    Array-backed batch of the incident fields used for billing: id, channel and creation date.
+
+    Ids are interned strings, channels are stored as one byte codes and creation dates as int64 microseconds since the
+    epoch with their UTC offset in seconds, so a batch costs a few dozen bytes per incident instead of a dataclass per
+    incident and history entry. The full history is not kept, it is fetched through `history_loader` when asked for.
+    """
+
+    __slots__ = ('channels', 'created', 'history_loader', 'ids', 'offsets')
+
+    def __init__(self, history_loader: Callable[[str], list[HistoryEntry]] | None = None) -> None:
+        self.ids: list[str] = []
+        self.channels: array[int] = array('B')
+        self.created: array[int] = array('q')
+        self.offsets: array[int] = array('i')
+        self.history_loader = history_loader
+
+    @classmethod
+    def from_incidents(
+        cls, incidents: Iterable[Incident], history_loader: Callable[[str], list[HistoryEntry]] | None = None
+    ) -> 'IncidentBatch':
+        """Build a batch of the billing fields of `incidents`, their histories are dropped and left to `history_loader`."""
+        batch = cls(history_loader=history_loader)
+        for incident in incidents:
+            batch.append(incident.id, incident.channel, incident.history[0].date)
+
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, incident_id: str, channel: str, created: datetime) -> None:
+        self.ids.append(sys.intern(incident_id))
+        self.channels.append(CHANNEL_CODES[channel])
+        self.created.append(to_micros(created))
+        self.offsets.append(utc_offset(created))
+
+    def channel(self, index: int) -> Channel:
+        return CHANNELS[self.channels[index]]
+
+    def created_at(self, index: int) -> datetime:
+        return from_micros(self.created[index]).astimezone(offset_timezone(self.offsets[index]))
+
+    def history(self, index: int) -> list[HistoryEntry]:
+        if self.history_loader is None:
+            raise LookupError(self.ids[index])
+
+        return self.history_loader(self.ids[index])
+
+    def summaries(self) -> Iterator[IncidentSummary]:
+        for index in range(len(self)):
+            yield IncidentSummary(id=self.ids[index], channel=self.channel(index), created=self.created_at(index))
+
+    def select(self, indices: Iterable[int]) -> 'IncidentBatch':
+        batch = IncidentBatch(history_loader=self.history_loader)
+        for index in indices:
+            batch.ids.append(self.ids[index])
+            batch.channels.append(self.channels[index])
+            batch.created.append(self.created[index])
+            batch.offsets.append(self.offsets[index])
+
+        return batch
+
+    def created_between(self, start: datetime, end: datetime) -> 'IncidentBatch':
+        """Return the incidents created in [start, end), comparing the raw timestamps without building datetimes."""
+        low, high = to_micros(start), to_micros(end)
+        return self.select(index for index, created in enumerate(self.created) if low <= created < high)
+
+    def created_in_month(self, month: int, year: int) -> 'IncidentBatch':
+        """Return the incidents created in a month of the calendar of their own UTC offset, the month billed for them."""
+        low = to_micros(datetime(year, month, 1, tzinfo=UTC))
+        high = to_micros(datetime(year + month // 12, month % 12 + 1, 1, tzinfo=UTC))
+        return self.select(
+            index
+            for index, (created, offset) in enumerate(zip(self.created, self.offsets, strict=True))
+            if low <= created + offset * 1_000_000 < high
+        )
+
+    def count_by_channel(self) -> dict[Channel, int]:
+        counts = [0] * len(CHANNELS)
+        for code in self.channels:
+            counts[code] += 1
+
+        return dict(zip(CHANNELS, counts, strict=True))
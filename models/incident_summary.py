@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+from .channel import Channel
+
+
+@dataclass(frozen=True, slots=True)
+class IncidentSummary:
+    id: str
+    channel: Channel
+    created: datetime
@@ -0,0 +1,86 @@
+from collections.abc import Iterable
+from dataclasses import dataclass, replace
+
+from .invoice import Invoice
+from .month import Month
+from .plan import Plan
+from .rate import Rate
+
+# Fields of a rollup that are added up, the others identify it
+COUNTERS = (
+    'invoices',
+    'total_incidents_web',
+    'total_incidents_mobile',
+    'total_incidents_email',
+    'fixed_revenue',
+    'variable_revenue',
+)
+
+
+@dataclass
+class RevenueRollup:
+    """Totals of the invoices of a billing period and plan, or a change to add to them."""
+
+    billing_year: int
+    billing_month: str
+    plan: Plan
+    invoices: int = 0
+    total_incidents_web: int = 0
+    total_incidents_mobile: int = 0
+    total_incidents_email: int = 0
+    fixed_revenue: float = 0.0
+    variable_revenue: float = 0.0
+
+    @property
+    def period(self) -> str:
+        return f'{self.billing_year}-{Month(self.billing_month).to_int():02d}'
+
+    @property
+    def key(self) -> tuple[str, Plan]:
+        return self.period, self.plan
+
+    @property
+    def counters(self) -> dict[str, int | float]:
+        return {name: getattr(self, name) for name in COUNTERS}
+
+    @classmethod
+    def of_invoice(cls, invoice: Invoice, rate: Rate) -> 'RevenueRollup':
+        """Return the contribution of an invoice billed with `rate` to the rollup of its period and plan."""
+        return cls(
+            billing_year=invoice.billing_year,
+            billing_month=invoice.billing_month,
+            plan=rate.plan,
+            invoices=1,
+            total_incidents_web=invoice.total_incidents_web,
+            total_incidents_mobile=invoice.total_incidents_mobile,
+            total_incidents_email=invoice.total_incidents_email,
+            fixed_revenue=rate.fixed_cost,
+            variable_revenue=(
+                rate.cost_per_incident_web * invoice.total_incidents_web
+                + rate.cost_per_incident_mobile * invoice.total_incidents_mobile
+                + rate.cost_per_incident_email * invoice.total_incidents_email
+            ),
+        )
+
+    @classmethod
+    def change(cls, before: Invoice, after: Invoice, rate: Rate) -> 'RevenueRollup':
+        """Return the change to the rollup of an invoice updated from `before` to `after`, both billed with `rate`."""
+        rollup = cls.of_invoice(after, rate)
+        rollup.add(cls.of_invoice(before, rate), sign=-1)
+        return rollup
+
+    def add(self, other: 'RevenueRollup', sign: int = 1) -> None:
+        for name in COUNTERS:
+            setattr(self, name, getattr(self, name) + sign * getattr(other, name))
+
+
+def merge_rollups(rollups: Iterable[RevenueRollup]) -> list[RevenueRollup]:
+    """Add up the rollups of the same period and plan, e.g. the shards of a counter, ordered by period and plan."""
+    merged: dict[tuple[str, Plan], RevenueRollup] = {}
+    for rollup in rollups:
+        if rollup.key in merged:
+            merged[rollup.key].add(rollup)
+        else:
+            merged[rollup.key] = replace(rollup)
+
+    return [merged[key] for key in sorted(merged)]
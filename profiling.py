@@ -0,0 +1,137 @@
+import contextlib
+import cProfile
+import hmac
+import io
+import logging
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from flask import Flask, Response, g, request
+
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_SUFFIX = '.prof'
+PROFILE_NAME_RE = re.compile(r'^[0-9]+-[A-Za-z0-9_.]+-[0-9a-f]{8}\.prof$')
+UNSAFE_CHARS_RE = re.compile(r'[^A-Za-z0-9_.]')
+
+
+@dataclass(frozen=True)
+class ProfileInfo:
+    name: str
+    size: int
+    created: float
+
+
+class RequestProfiler:
+    """
+    Runs selected requests under cProfile and keeps the most recent profiles in a local directory.
+
+    A request is profiled when it carries the configured token in the profile header, or when it is picked by the
+    sampling rate. Only one request is profiled at a time, others are served normally while a profile is running.
+    """
+
+    def __init__(self, directory: str, token: str | None, sample_rate: float, max_profiles: int) -> None:
+        self.directory = Path(directory)
+        self.token = token
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def triggered(self, header: str | None) -> bool:
+        if header is not None and self.token and hmac.compare_digest(header, self.token):
+            return True
+
+        return self.sample_rate > 0 and random.random() < self.sample_rate  # noqa: S311
+
+    def start(self) -> cProfile.Profile | None:
+        # cProfile only supports one active profiler per process, a concurrent request is not profiled
+        if not self.lock.acquire(blocking=False):
+            return None
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiling tool is active
+            self.lock.release()
+            return None
+
+        return profile
+
+    def stop(self, profile: cProfile.Profile, endpoint: str) -> str:
+        try:
+            profile.disable()
+        finally:
+            self.lock.release()
+
+        safe_endpoint = UNSAFE_CHARS_RE.sub('_', endpoint)
+        name = f'{time.time_ns()}-{safe_endpoint}-{uuid.uuid4().hex[:8]}{PROFILE_SUFFIX}'
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(self.directory / name)
+        self.prune()
+
+        self.logger.info('Saved profile %s', name)
+        return name
+
+    def prune(self) -> None:
+        for info in self.list()[self.max_profiles :]:
+            with contextlib.suppress(FileNotFoundError):
+                self.path(info.name).unlink()
+
+    def list(self) -> list[ProfileInfo]:
+        """Return the stored profiles, newest first."""
+        try:
+            entries = list(self.directory.iterdir())
+        except FileNotFoundError:
+            return []
+
+        profiles = []
+        for entry in entries:
+            if PROFILE_NAME_RE.match(entry.name):
+                stat = entry.stat()
+                profiles.append(ProfileInfo(name=entry.name, size=stat.st_size, created=stat.st_mtime))
+
+        return sorted(profiles, key=lambda info: info.name, reverse=True)
+
+    def path(self, name: str) -> Path:
+        if not PROFILE_NAME_RE.match(name):
+            raise ValueError(name)
+
+        return self.directory / name
+
+    def summary(self, name: str, limit: int) -> str:
+        """Render the functions with the highest cumulative time of a stored profile."""
+        out = io.StringIO()
+        stats = pstats.Stats(str(self.path(name)), stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return out.getvalue()
+
+
+def install_request_profiler(app: Flask, profiler: RequestProfiler) -> None:
+    """Register the request hooks, which are only installed when profiling is enabled."""
+
+    def before_request() -> None:
+        if profiler.triggered(request.headers.get(PROFILE_HEADER)):
+            g.profile = profiler.start()
+
+    def after_request(response: Response) -> Response:
+        profile: cProfile.Profile | None = g.pop('profile', None)
+        if profile is not None:
+            response.headers['X-Profile-Name'] = profiler.stop(profile, request.endpoint or 'unknown')
+        return response
+
+    def teardown_request(_: BaseException | None) -> None:
+        # after_request is skipped when the view raises, make sure the profiler is released anyway
+        profile: cProfile.Profile | None = g.pop('profile', None)
+        if profile is not None:
+            profiler.stop(profile, request.endpoint or 'unknown')
+
+    app.before_request(before_request)
+    app.after_request(after_request)
+    app.teardown_request(teardown_request)
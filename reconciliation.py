@@ -0,0 +1,198 @@
+import logging
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field, replace
+from datetime import UTC, datetime, timedelta
+from itertools import islice
+from typing import Any
+
+from metrics import Metrics
+from models import Channel, Invoice, Month, RevenueRollup
+from repositories import ConditionalUnitOfWork, IncidentRepository, InvoiceRepository, RateRepository, StaleWriteError
+from repositories.cached import IncidentSummaryStore
+
+CHANNELS: tuple[Channel, ...] = tuple(Channel)
+# Incidents are billed in the month of their own offset, which starts up to this much before the month in UTC
+MAX_UTC_OFFSET = timedelta(hours=14)
+
+
+@dataclass
+class ReconciliationReport:
+    billing_month: str
+    billing_year: int
+    invoices: int = 0
+    changed: int = 0
+    failed: int = 0
+    # Where the incidents of the invoices were counted from, 'store' or 'download'
+    sources: Counter[str] = field(default_factory=Counter)
+    duration: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), 'sources': dict(self.sources)}
+
+
+def invoice_counts(invoice: Invoice) -> dict[Channel, int]:
+    return {
+        Channel.WEB: invoice.total_incidents_web,
+        Channel.MOBILE: invoice.total_incidents_mobile,
+        Channel.EMAIL: invoice.total_incidents_email,
+    }
+
+
+def month_bounds(month: Month, year: int) -> tuple[datetime, datetime]:
+    number = month.to_int()
+    return datetime(year, number, 1, tzinfo=UTC), datetime(year + number // 12, number % 12 + 1, 1, tzinfo=UTC)
+
+
+def batched(items: Iterable[Invoice], size: int) -> Iterator[list[Invoice]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class InvoiceReconciler:
+    """
+    Recounts the incidents of the invoices of a billing period and updates the invoices whose counts changed.
+
+    An invoice freezes the counts of the moment it was generated, so incidents backdated into its period afterwards are
+    missing from it. The incidents are counted from the cheapest source that sees backdated ones: the summaries of the
+    incident store when the client was fully synced in the last `max_staleness` seconds, otherwise a download of the
+    incidents created since the start of the period, which skips the client's older history. Invoices are processed in
+    batches of `batch_size` by `max_workers` threads, and `on_update` is called with every updated invoice. An invoice
+    is updated together with the revenue rollup of its period and plan, and only if it was not updated since it was
+    read, so overlapping runs never add the same change to the rollup twice. The units of work write to the store
+    directly, as the condition cannot be checked through the write-behind log.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        invoice_repo: InvoiceRepository,
+        rate_repo: RateRepository,
+        unit_of_work_factory: Callable[[], ConditionalUnitOfWork],
+        incident_repo: IncidentRepository,
+        incident_store: IncidentSummaryStore,
+        metrics: Metrics,
+        batch_size: int,
+        max_workers: int,
+        max_staleness: float,
+    ) -> None:
+        self.invoice_repo = invoice_repo
+        self.rate_repo = rate_repo
+        self.unit_of_work_factory = unit_of_work_factory
+        self.incident_repo = incident_repo
+        self.incident_store = incident_store
+        self.metrics = metrics
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_staleness = max_staleness
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def count_incidents(self, client_id: str, month: Month, year: int) -> tuple[dict[Channel, int], str]:
+        # Counted like invoice generation counts them, by the month of the incident's own offset
+        number = month.to_int()
+        summaries = self.incident_store.fully_synced_summaries(client_id, self.max_staleness)
+        if summaries is not None:
+            counts = dict.fromkeys(CHANNELS, 0)
+            for summary in summaries:
+                if summary.created.month == number and summary.created.year == year:
+                    counts[summary.channel] += 1
+            return counts, 'store'
+
+        start, _ = month_bounds(month, year)
+        incidents = self.incident_repo.get_incident_batch_by_client_id(client_id=client_id, since=start - MAX_UTC_OFFSET)
+        return incidents.created_in_month(number, year).count_by_channel(), 'download'
+
+    def update(self, invoice: Invoice, updated: Invoice) -> None:
+        rate = self.rate_repo.get_by_id(invoice.rate_id)
+        if rate is None:
+            raise LookupError(f'Rate {invoice.rate_id} of invoice {invoice.id} not found')
+
+        unit_of_work = self.unit_of_work_factory()
+        unit_of_work.update_invoice(invoice, updated)
+        unit_of_work.add_revenue(RevenueRollup.change(invoice, updated, rate))
+        unit_of_work.commit()
+
+    def reconcile_batch(
+        self,
+        invoices: list[Invoice],
+        report: ReconciliationReport,
+        lock: threading.Lock,
+        on_update: Callable[[Invoice], None] | None,
+    ) -> None:
+        month = Month(report.billing_month)
+        for invoice in invoices:
+            try:
+                counts, source = self.count_incidents(invoice.client_id, month, report.billing_year)
+                changed = counts != invoice_counts(invoice)
+                if changed:
+                    updated = replace(
+                        invoice,
+                        total_incidents_web=counts[Channel.WEB],
+                        total_incidents_mobile=counts[Channel.MOBILE],
+                        total_incidents_email=counts[Channel.EMAIL],
+                    )
+                    self.update(invoice, updated)
+                    self.logger.info(
+                        'Invoice %s of client %s recounted from %s to %s',
+                        invoice.id,
+                        invoice.client_id,
+                        [invoice_counts(invoice)[channel] for channel in CHANNELS],
+                        [counts[channel] for channel in CHANNELS],
+                    )
+                    if on_update is not None:
+                        on_update(updated)
+            except StaleWriteError:
+                # Updated by an overlapping run, the next run recounts it from the stored invoice
+                self.logger.warning('Invoice %s changed while being reconciled, left unchanged', invoice.id)
+                with lock:
+                    report.failed += 1
+                continue
+            except Exception:
+                self.logger.exception('Reconciliation of invoice %s failed', invoice.id)
+                with lock:
+                    report.failed += 1
+                continue
+
+            with lock:
+                report.sources[source] += 1
+                report.changed += changed
+
+    def reconcile(self, month: Month, year: int, on_update: Callable[[Invoice], None] | None = None) -> ReconciliationReport:
+        # Checked upfront, so a misconfigured factory fails the run before any invoice is recounted
+        if not isinstance(self.unit_of_work_factory(), ConditionalUnitOfWork):
+            raise TypeError('Reconciliation requires units of work that support conditional updates')
+
+        started = time.perf_counter()
+        report = ReconciliationReport(billing_month=month.value, billing_year=year)
+        lock = threading.Lock()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='reconcile') as executor:
+            pending: set[Future[None]] = set()
+            for batch in batched(self.invoice_repo.get_by_month(month, year), self.batch_size):
+                report.invoices += len(batch)
+                # The invoices are streamed, at most two batches per thread are held in memory at once
+                if len(pending) >= 2 * self.max_workers:
+                    _, pending = wait(pending, return_when='FIRST_COMPLETED')
+                pending.add(executor.submit(self.reconcile_batch, batch, report, lock, on_update))
+
+            for future in pending:
+                future.result()
+
+        report.duration = time.perf_counter() - started
+        self.metrics.increment('reconciliation.invoices', report.invoices)
+        self.metrics.increment('reconciliation.changed', report.changed)
+        self.metrics.increment('reconciliation.failed', report.failed)
+        # json_fields is picked up as structured payload by the Cloud Logging handler
+        self.logger.info(
+            'Reconciled %d invoices of %s %d, %d changed, %d failed',
+            report.invoices,
+            month,
+            year,
+            report.changed,
+            report.failed,
+            extra={'json_fields': report.to_dict()},
+        )
+        return report
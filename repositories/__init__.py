@@ -2,5 +2,16 @@ from .client import ClientRepository
 from .incident import IncidentRepository
 from .invoice import InvoiceRepository
 from .rate import RateRepository
+from .revenue import RevenueRepository
+from .unit_of_work import ConditionalUnitOfWork, StaleWriteError, UnitOfWork
 
-__all__ = ['ClientRepository', 'IncidentRepository', 'InvoiceRepository', 'RateRepository']
+__all__ = [
+    'ClientRepository',
+    'ConditionalUnitOfWork',
+    'IncidentRepository',
+    'InvoiceRepository',
+    'RateRepository',
+    'RevenueRepository',
+    'StaleWriteError',
+    'UnitOfWork',
+]
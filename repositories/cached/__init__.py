@@ -0,0 +1,5 @@
+from .client import CachedClientRepository
+from .incident import IncidentSummaryStore
+from .rate import CachedRateRepository
+
+__all__ = ['CachedClientRepository', 'CachedRateRepository', 'IncidentSummaryStore']
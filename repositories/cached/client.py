@@ -0,0 +1,26 @@
+from cache import Cache
+from models import Client
+from repositories import ClientRepository
+
+
+class CachedClientRepository(ClientRepository):
+    """
+    Read-through cache in front of the client service.
+
+    Clients are owned by another service and may change plan at any time. Changes are announced through client events,
+    which evict the entry from the cache of the process receiving them, so the TTL bounds the staleness in the caches
+    the eviction does not reach, and when an event is lost. Missing clients are not cached.
+    """
+
+    def __init__(self, repo: ClientRepository, cache: Cache[Client]) -> None:
+        self.repo = repo
+        self.cache = cache
+
+    def get(self, client_id: str) -> Client | None:
+        client = self.cache.get(client_id)
+        if client is None:
+            client = self.repo.get(client_id)
+            if client is not None:
+                self.cache.set(client_id, client)
+
+        return client
@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from memory import memory_stage
+from models import Incident, IncidentBatch, IncidentSummary
+from repositories import IncidentRepository
+
+
+@dataclass
+class ClientIncidents:
+    incidents: IncidentBatch = field(default_factory=IncidentBatch)
+    watermark: datetime | None = None
+    last_full_sync: float = 0.0
+    # Number of incidents counted towards the store's bound, only read and written under the store's lock
+    size: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class IncidentSummaryStore:
+    """
+    Keeps the id, channel and creation date of every incident of recently seen clients, as one batch per client.
+
+    After the first full download only incidents created since the newest one seen (the watermark) are requested. A
+    full resync happens every `full_resync_interval` seconds, which also picks up backdated incidents, and whenever an
+    incremental sync fails. Once the clients hold more than `max_incidents` incidents together, the least recently used
+    clients are evicted; the client just synced is always kept, however many incidents it has.
+    """
+
+    def __init__(self, repo: IncidentRepository, full_resync_interval: float, max_incidents: int) -> None:
+        self.repo = repo
+        self.full_resync_interval = full_resync_interval
+        self.max_incidents = max_incidents
+        self.clients: OrderedDict[str, ClientIncidents] = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def client_state(self, client_id: str) -> ClientIncidents:
+        with self.lock:
+            state = self.clients.get(client_id)
+            if state is None:
+                state = self.clients[client_id] = ClientIncidents()
+            else:
+                self.clients.move_to_end(client_id)
+
+            return state
+
+    def resize(self, client_id: str, state: ClientIncidents) -> None:
+        """Account for the incidents of a client after a sync, evicting least recently used clients over the bound."""
+        with self.lock:
+            # Evicted while it was syncing, it is no longer counted
+            if self.clients.get(client_id) is not state:
+                return
+
+            self.size += len(state.incidents) - state.size
+            state.size = len(state.incidents)
+            for other_id in list(self.clients):
+                if self.size <= self.max_incidents:
+                    break
+                if other_id != client_id:
+                    self.size -= self.clients.pop(other_id).size
+
+    def merge(self, state: ClientIncidents, incidents: list[Incident]) -> None:
+        if not incidents:
+            return
+
+        # Incidents seen again replace their earlier copy
+        seen = {incident.id for incident in incidents}
+        batch = state.incidents.select(
+            index for index, incident_id in enumerate(state.incidents.ids) if incident_id not in seen
+        )
+        for incident in incidents:
+            created = incident.history[0].date
+            batch.append(incident.id, incident.channel, created)
+            if state.watermark is None or created > state.watermark:
+                state.watermark = created
+
+        state.incidents = batch
+
+    def full_sync(self, client_id: str, state: ClientIncidents) -> None:
+        incidents = self.repo.get_incidents_by_client_id(client_id=client_id) or []
+
+        state.incidents = IncidentBatch()
+        state.watermark = None
+        with memory_stage('filter'):
+            self.merge(state, incidents)
+        state.last_full_sync = time.monotonic()
+
+    def sync(self, client_id: str, state: ClientIncidents) -> None:
+        if state.watermark is None or time.monotonic() - state.last_full_sync > self.full_resync_interval:
+            self.full_sync(client_id, state)
+            return
+
+        try:
+            incidents = self.repo.get_incidents_by_client_id(client_id=client_id, since=state.watermark) or []
+        except Exception:
+            self.logger.exception('Incremental incident sync failed for client %s, doing a full resync', client_id)
+            self.full_sync(client_id, state)
+            return
+
+        with memory_stage('filter'):
+            self.merge(state, incidents)
+
+    def fully_synced_summaries(self, client_id: str, max_age: float) -> list[IncidentSummary] | None:
+        """
+        Return the summaries of a client fully synced less than `max_age` seconds ago, without syncing or reordering.
+
+        Incremental syncs do not see backdated incidents, so only a recent full sync is as complete as a new download.
+        """
+        with self.lock:
+            state = self.clients.get(client_id)
+        if state is None:
+            return None
+
+        with state.lock:
+            if state.watermark is None or time.monotonic() - state.last_full_sync > max_age:
+                return None
+
+            return list(state.incidents.summaries())
+
+    def get_summaries(self, client_id: str) -> list[IncidentSummary]:
+        state = self.client_state(client_id)
+        with state.lock:
+            self.sync(client_id, state)
+            self.resize(client_id, state)
+            return list(state.incidents.summaries())
@@ -0,0 +1,94 @@
+from collections.abc import Generator, Iterable
+
+from cache import Cache
+from models import Plan, Rate
+from repositories import RateRepository
+
+
+class CachedRateRepository(RateRepository):
+    """
+    Read-through cache in front of another rate repository.
+
+    Rates are only ever created by this service and are never modified once an invoice references them, so lookups by
+    id and by (client, plan) can be served from the cache until their TTL expires. Missing rates are not cached.
+    """
+
+    def __init__(self, repo: RateRepository, cache: Cache[Rate]) -> None:
+        self.repo = repo
+        self.cache = cache
+
+    @staticmethod
+    def id_key(rate_id: str) -> str:
+        return f'id:{rate_id}'
+
+    @staticmethod
+    def client_and_plan_key(client_id: str, plan: str) -> str:
+        return f'client:{client_id}:{plan}'
+
+    def evict_client(self, client_id: str) -> None:
+        """Forget which rate a client has for each plan, the rates themselves never change and stay cached by id."""
+        self.cache.delete_many([self.client_and_plan_key(client_id, plan) for plan in Plan])
+
+    def lookup(self, key: str) -> Rate | None:
+        return self.cache.get(key)
+
+    def store_many(self, rates: Iterable[Rate]) -> None:
+        entries = {}
+        for rate in rates:
+            entries[self.id_key(rate.id)] = rate
+            entries[self.client_and_plan_key(rate.client_id, rate.plan)] = rate
+
+        self.cache.set_many(entries)
+
+    def store(self, rate: Rate) -> None:
+        self.store_many([rate])
+
+    def preload(self, rates: Iterable[Rate]) -> int:
+        loaded = list(rates)
+        self.store_many(loaded)
+        return len(loaded)
+
+    def get_by_id(self, rate_id: str) -> Rate | None:
+        rate = self.lookup(self.id_key(rate_id))
+        if rate is None:
+            rate = self.repo.get_by_id(rate_id)
+            if rate is not None:
+                self.store(rate)
+
+        return rate
+
+    def get_many(self, rate_ids: list[str]) -> list[Rate | None]:
+        cached = self.cache.get_many([self.id_key(rate_id) for rate_id in rate_ids])
+        rates = dict(zip(rate_ids, cached, strict=True))
+
+        missing = [rate_id for rate_id, rate in rates.items() if rate is None]
+        if missing:
+            fetched = self.repo.get_many(missing)
+            self.store_many(rate for rate in fetched if rate is not None)
+            rates.update(zip(missing, fetched, strict=True))
+
+        return [rates[rate_id] for rate_id in rate_ids]
+
+    def get_by_client_and_plan(self, client_id: str, plan: str) -> Rate | None:
+        rate = self.lookup(self.client_and_plan_key(client_id, plan))
+        if rate is None:
+            rate = self.repo.get_by_client_and_plan(client_id, plan)
+            if rate is not None:
+                self.store(rate)
+
+        return rate
+
+    def create(self, rate: Rate) -> None:
+        self.repo.create(rate)
+        self.store(rate)
+
+    def update(self, rate: Rate) -> None:
+        self.repo.update(rate)
+        self.store(rate)
+
+    def get_all(self) -> Generator[Rate, None, None]:
+        yield from self.repo.get_all()
+
+    def delete_all(self) -> None:
+        self.repo.delete_all()
+        self.cache.clear()
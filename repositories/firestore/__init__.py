@@ -1,4 +1,13 @@
+from .client import create_firestore_client
 from .invoice import FirestoreInvoiceRepository
 from .rate import FirestoreRateRepository
+from .revenue import FirestoreRevenueRepository
+from .unit_of_work import FirestoreUnitOfWork
 
-__all__ = ['FirestoreInvoiceRepository', 'FirestoreRateRepository']
+__all__ = [
+    'create_firestore_client',
+    'FirestoreInvoiceRepository',
+    'FirestoreRateRepository',
+    'FirestoreRevenueRepository',
+    'FirestoreUnitOfWork',
+]
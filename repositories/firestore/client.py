@@ -0,0 +1,11 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from google.cloud.firestore import Client as FirestoreClient  # type: ignore[import-untyped]
+
+
+def create_firestore_client(database: str) -> 'FirestoreClient':
+    # google-cloud-firestore pulls in grpc and protobuf, so it is only imported once a client is actually needed.
+    from google.cloud.firestore import Client as FirestoreClient
+
+    return FirestoreClient(database=database)
@@ -1,40 +1,61 @@
 import logging
-from collections.abc import Generator
+from collections import defaultdict
+from collections.abc import Generator, Sequence
 from dataclasses import asdict
 from enum import Enum
-from typing import Any, cast
+from typing import TYPE_CHECKING, Any, cast
 
 import dacite
-from google.cloud.firestore import Client as FirestoreClient  # type: ignore[import-untyped]
-from google.cloud.firestore_v1 import DocumentSnapshot
 
+from accounting import query_reads, record_operations
 from models import Invoice, Month
 from repositories import InvoiceRepository
 
+from .client import create_firestore_client
+from .util import BATCH_GET_CHUNK_SIZE, IN_QUERY_CHUNK_SIZE, chunked, fetch_chunks
+
+if TYPE_CHECKING:
+    from google.cloud.firestore import Client as FirestoreClient  # type: ignore[import-untyped]
+    from google.cloud.firestore_v1 import DocumentSnapshot
+
 
 class FirestoreInvoiceRepository(InvoiceRepository):
-    def __init__(self, database: str) -> None:
-        self.db = FirestoreClient(database=database)
+    def __init__(self, database: str, client: 'FirestoreClient | None' = None) -> None:
+        self.db = client if client is not None else create_firestore_client(database)
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def doc_to_invoice(self, doc: DocumentSnapshot) -> Invoice:
+    def doc_to_invoice(self, doc: 'DocumentSnapshot') -> Invoice:
+        data = cast(dict[str, Any], doc.to_dict())
         return dacite.from_dict(
             data_class=Invoice,
             data={
-                **cast(dict[str, Any], doc.to_dict()),
+                **data,
                 'id': doc.id,
+                'billing_month': Month(data['billing_month']),
             },
             config=dacite.Config(cast=[Enum]),
         )
 
     def get(self, invoice_id: str) -> Invoice | None:
         doc = self.db.collection('invoices').document(invoice_id).get()
+        record_operations(reads=1, round_trips=1)
 
         if not doc.exists:
             return None
 
         return self.doc_to_invoice(doc)
 
+    def get_many(self, invoice_ids: list[str]) -> list[Invoice | None]:
+        def fetch(chunk: Sequence[str]) -> list['DocumentSnapshot']:
+            return list(self.db.get_all([self.db.collection('invoices').document(invoice_id) for invoice_id in chunk]))
+
+        unique_ids = list(dict.fromkeys(invoice_ids))
+        docs = {doc.id: doc for doc in fetch_chunks(fetch, unique_ids, BATCH_GET_CHUNK_SIZE) if doc.exists}
+        # The chunks are fetched in other threads, their operations are recorded here
+        record_operations(reads=len(unique_ids), round_trips=len(chunked(unique_ids, BATCH_GET_CHUNK_SIZE)))
+
+        return [self.doc_to_invoice(docs[invoice_id]) if invoice_id in docs else None for invoice_id in invoice_ids]
+
     def get_by_client_and_month(self, client_id: str, month: Month, year: int) -> Invoice | None:
         docs = (
             self.db.collection('invoices')
@@ -43,6 +64,7 @@ class FirestoreInvoiceRepository(InvoiceRepository):
             .where('billing_year', '==', year)
             .get()
         )
+        record_operations(reads=query_reads(len(docs)), round_trips=1)
 
         if len(docs) == 0:
             return None
@@ -51,7 +73,57 @@ class FirestoreInvoiceRepository(InvoiceRepository):
             self.logger.error('Multiple invoices found for client %s for %s %d', client_id, month, year)
             return None
 
-        return self.doc_to_invoice(cast(DocumentSnapshot, docs[0]))
+        return self.doc_to_invoice(cast('DocumentSnapshot', docs[0]))
+
+    def get_by_clients_and_month(self, client_ids: list[str], month: Month, year: int) -> list[Invoice | None]:
+        def fetch(chunk: Sequence[str]) -> list['DocumentSnapshot']:
+            return cast(
+                list['DocumentSnapshot'],
+                self.db.collection('invoices')
+                .where('client_id', 'in', list(chunk))
+                .where('billing_month', '==', month.value)
+                .where('billing_year', '==', year)
+                .get(),
+            )
+
+        unique_ids = list(dict.fromkeys(client_ids))
+        found = fetch_chunks(fetch, unique_ids, IN_QUERY_CHUNK_SIZE)
+        # Every query is billed at least one read, which is approximated across the chunks
+        round_trips = len(chunked(unique_ids, IN_QUERY_CHUNK_SIZE))
+        record_operations(reads=max(len(found), round_trips), round_trips=round_trips)
+
+        docs_by_client: dict[str, list[DocumentSnapshot]] = defaultdict(list)
+        for doc in found:
+            docs_by_client[cast(dict[str, Any], doc.to_dict())['client_id']].append(doc)
+
+        invoices: list[Invoice | None] = []
+        for client_id in client_ids:
+            docs = docs_by_client.get(client_id, [])
+            if len(docs) > 1:
+                self.logger.error('Multiple invoices found for client %s for %s %d', client_id, month, year)
+            invoices.append(self.doc_to_invoice(docs[0]) if len(docs) == 1 else None)
+
+        return invoices
+
+    def get_by_client(self, client_id: str) -> list[Invoice]:
+        docs = self.db.collection('invoices').where('client_id', '==', client_id).get()
+        record_operations(reads=query_reads(len(docs)), round_trips=1)
+
+        return [self.doc_to_invoice(cast('DocumentSnapshot', doc)) for doc in docs]
+
+    def get_by_month(self, month: Month, year: int) -> Generator[Invoice, None, None]:
+        stream: Generator[DocumentSnapshot, None, None] = (
+            self.db.collection('invoices').where('billing_month', '==', month.value).where('billing_year', '==', year).stream()
+        )
+        record_operations(round_trips=1)
+        reads = 0
+        for doc in stream:
+            reads += 1
+            record_operations(reads=1)
+            yield self.doc_to_invoice(doc)
+
+        if reads == 0:
+            record_operations(reads=1)
 
     def create(self, invoice: Invoice) -> None:
         invoice_dict = asdict(invoice)
@@ -59,6 +131,7 @@ class FirestoreInvoiceRepository(InvoiceRepository):
 
         invoice_ref = self.db.collection('invoices').document(invoice.id)
         invoice_ref.set(invoice_dict)
+        record_operations(writes=1, round_trips=1)
 
     def update(self, invoice: Invoice) -> None:
         invoice_dict = asdict(invoice)
@@ -66,11 +139,22 @@ class FirestoreInvoiceRepository(InvoiceRepository):
         del invoice_dict['id']
 
         self.db.collection('invoices').document(invoice.id).set(invoice_dict)
+        record_operations(writes=1, round_trips=1)
 
     def get_all(self) -> Generator[Invoice, None, None]:
         stream: Generator[DocumentSnapshot, None, None] = self.db.collection('invoices').stream()
+        record_operations(round_trips=1)
+        reads = 0
         for doc in stream:
+            # Counted as they arrive, so a request going over its read budget is stopped in the middle of the stream
+            reads += 1
+            record_operations(reads=1)
             yield self.doc_to_invoice(doc)
 
+        if reads == 0:
+            record_operations(reads=1)
+
     def delete_all(self) -> None:
-        self.db.recursive_delete(self.db.collection('invoices'))
+        deleted = self.db.recursive_delete(self.db.collection('invoices'))
+        # The documents are listed and deleted in pages, which are not counted as separate round trips
+        record_operations(reads=query_reads(deleted), deletes=deleted, round_trips=1)
@@ -1,23 +1,29 @@
 import logging
+from collections.abc import Generator, Sequence
 from dataclasses import asdict
 from enum import Enum
-from typing import Any, cast
+from typing import TYPE_CHECKING, Any, cast
 
 import dacite
-from google.cloud.firestore import Client as FirestoreClient  # type: ignore[import-untyped]
-from google.cloud.firestore_v1 import DocumentSnapshot, Query
-from google.cloud.firestore_v1.base_query import FieldFilter
 
+from accounting import query_reads, record_operations
 from models import Rate
 from repositories import RateRepository
 
+from .client import create_firestore_client
+from .util import BATCH_GET_CHUNK_SIZE, chunked, fetch_chunks
+
+if TYPE_CHECKING:
+    from google.cloud.firestore import Client as FirestoreClient  # type: ignore[import-untyped]
+    from google.cloud.firestore_v1 import DocumentSnapshot, Query
+
 
 class FirestoreRateRepository(RateRepository):
-    def __init__(self, database: str) -> None:
-        self.db = FirestoreClient(database=database)
+    def __init__(self, database: str, client: 'FirestoreClient | None' = None) -> None:
+        self.db = client if client is not None else create_firestore_client(database)
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def doc_to_rate(self, doc: DocumentSnapshot) -> Rate:
+    def doc_to_rate(self, doc: 'DocumentSnapshot') -> Rate:
         return dacite.from_dict(
             data_class=Rate,
             data={
@@ -29,13 +35,27 @@ class FirestoreRateRepository(RateRepository):
 
     def get_by_id(self, rate_id: str) -> Rate | None:
         rate_doc = self.db.collection('rates').document(rate_id).get()
+        record_operations(reads=1, round_trips=1)
 
         if not rate_doc.exists:
             return None
 
         return self.doc_to_rate(rate_doc)
 
+    def get_many(self, rate_ids: list[str]) -> list[Rate | None]:
+        def fetch(chunk: Sequence[str]) -> list['DocumentSnapshot']:
+            return list(self.db.get_all([self.db.collection('rates').document(rate_id) for rate_id in chunk]))
+
+        unique_ids = list(dict.fromkeys(rate_ids))
+        docs = {doc.id: doc for doc in fetch_chunks(fetch, unique_ids, BATCH_GET_CHUNK_SIZE) if doc.exists}
+        # The chunks are fetched in other threads, their operations are recorded here
+        record_operations(reads=len(unique_ids), round_trips=len(chunked(unique_ids, BATCH_GET_CHUNK_SIZE)))
+
+        return [self.doc_to_rate(docs[rate_id]) if rate_id in docs else None for rate_id in rate_ids]
+
     def get_by_client_and_plan(self, client_id: str, plan: str) -> Rate | None:
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
         query: Query = (
             self.db.collection('rates')
             .where(filter=FieldFilter('client_id', '==', client_id))  # type: ignore[no-untyped-call]
@@ -43,6 +63,7 @@ class FirestoreRateRepository(RateRepository):
         )
 
         docs = query.get()
+        record_operations(reads=query_reads(len(docs)), round_trips=1)
 
         if len(docs) == 0:
             return None
@@ -58,9 +79,24 @@ class FirestoreRateRepository(RateRepository):
         del rate_dict['id']
 
         self.db.collection('rates').document(rate.id).create(rate_dict)
+        record_operations(writes=1, round_trips=1)
 
     def update(self, rate: Rate) -> None:
         rate_dict = asdict(rate)
         del rate_dict['id']
 
         self.db.collection('rates').document(rate.id).set(rate_dict)
+        record_operations(writes=1, round_trips=1)
+
+    def get_all(self) -> Generator[Rate, None, None]:
+        stream: Generator[DocumentSnapshot, None, None] = self.db.collection('rates').stream()
+        record_operations(round_trips=1)
+        reads = 0
+        for doc in stream:
+            # Counted as they arrive, so a request going over its read budget is stopped in the middle of the stream
+            reads += 1
+            record_operations(reads=1)
+            yield self.doc_to_rate(doc)
+
+        if reads == 0:
+            record_operations(reads=1)
@@ -0,0 +1,92 @@
+import logging
+import random
+from typing import TYPE_CHECKING, Any, cast
+
+from accounting import query_reads, record_operations
+from models import Plan, RevenueRollup, merge_rollups
+from models.revenue_rollup import COUNTERS
+from repositories import RevenueRepository
+
+from .client import create_firestore_client
+
+if TYPE_CHECKING:
+    from google.cloud.firestore import Client as FirestoreClient  # type: ignore[import-untyped]
+    from google.cloud.firestore_v1 import DocumentSnapshot
+
+COLLECTION = 'revenue_rollups'
+# Every rollup is a counter split across shards, a document sustains about one write per second and the invoices of a
+# period are generated in bursts
+REVENUE_SHARDS = 8
+# Firestore commits at most 500 writes in a batch
+MAX_BATCH_WRITES = 500
+
+
+def rollup_document(rollup: RevenueRollup, shard: int) -> tuple[str, dict[str, Any]]:
+    """Return the id of the document of a shard of the rollup and the fields that identify it."""
+    return f'{rollup.period}-{rollup.plan}-{shard}', {
+        'period': rollup.period,
+        'plan': rollup.plan.value,
+        'billing_year': rollup.billing_year,
+        'billing_month': rollup.billing_month,
+        'shard': shard,
+    }
+
+
+def increment_write(rollup: RevenueRollup) -> tuple[str, dict[str, Any]]:
+    """Return the document of a random shard of the rollup and the fields of a write adding the counters to it."""
+    # Imported here like the client, so that the google-cloud stack is only loaded once Firestore is used
+    from google.cloud.firestore import Increment
+
+    doc_id, fields = rollup_document(rollup, random.randrange(REVENUE_SHARDS))  # noqa: S311
+    return doc_id, {**fields, **{name: Increment(value) for name, value in rollup.counters.items()}}
+
+
+class FirestoreRevenueRepository(RevenueRepository):
+    def __init__(self, database: str, client: 'FirestoreClient | None' = None) -> None:
+        self.db = client if client is not None else create_firestore_client(database)
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def doc_to_rollup(self, doc: 'DocumentSnapshot') -> RevenueRollup:
+        data = cast(dict[str, Any], doc.to_dict())
+        return RevenueRollup(
+            billing_year=data['billing_year'],
+            billing_month=data['billing_month'],
+            plan=Plan(data['plan']),
+            **{name: data.get(name, 0) for name in COUNTERS},
+        )
+
+    def range_query(self, first: str | None, last: str | None) -> list['DocumentSnapshot']:
+        query = self.db.collection(COLLECTION)
+        if first is not None and last is not None:
+            query = query.where('period', '>=', first).where('period', '<=', last)
+        docs = cast(list['DocumentSnapshot'], query.get())
+        record_operations(reads=query_reads(len(docs)), round_trips=1)
+        return docs
+
+    def get_range(self, first: str, last: str) -> list[RevenueRollup]:
+        return merge_rollups(self.doc_to_rollup(doc) for doc in self.range_query(first, last))
+
+    def replace(self, rollups: list[RevenueRollup], first: str | None = None, last: str | None = None) -> None:
+        # Every rollup is written whole to its first shard, replacing it, and the other shards found are deleted
+        writes: dict[str, dict[str, Any] | None] = dict.fromkeys((doc.id for doc in self.range_query(first, last)), None)
+        for rollup in rollups:
+            doc_id, fields = rollup_document(rollup, 0)
+            writes[doc_id] = {**fields, **rollup.counters}
+
+        items = list(writes.items())
+        for start in range(0, len(items), MAX_BATCH_WRITES):
+            batch = self.db.batch()
+            deletes = 0
+            for doc_id, write in items[start : start + MAX_BATCH_WRITES]:
+                ref = self.db.collection(COLLECTION).document(doc_id)
+                if write is None:
+                    batch.delete(ref)
+                    deletes += 1
+                else:
+                    batch.set(ref, write)
+            batch.commit()
+            record_operations(writes=len(batch) - deletes, deletes=deletes, round_trips=1)
+
+    def delete_all(self) -> None:
+        deleted = self.db.recursive_delete(self.db.collection(COLLECTION))
+        record_operations(reads=query_reads(deleted), deletes=deleted, round_trips=1)
@@ -0,0 +1,82 @@
+import logging
+from dataclasses import asdict
+from typing import TYPE_CHECKING
+
+from accounting import record_operations
+from models import Invoice, Rate, RevenueRollup
+from repositories import ConditionalUnitOfWork, StaleWriteError
+
+from .client import create_firestore_client
+from .revenue import COLLECTION as REVENUE_COLLECTION
+from .revenue import increment_write
+
+if TYPE_CHECKING:
+    from google.cloud.firestore import Client as FirestoreClient  # type: ignore[import-untyped]
+
+
+class FirestoreUnitOfWork(ConditionalUnitOfWork):
+    def __init__(self, database: str, client: 'FirestoreClient | None' = None) -> None:
+        self.db = client if client is not None else create_firestore_client(database)
+        self.batch = self.db.batch()
+        # Invoices found changed when a conditional update was staged, the commit fails without writing
+        self.stale: list[str] = []
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def create_rate(self, rate: Rate) -> None:
+        rate_dict = asdict(rate)
+        del rate_dict['id']
+
+        self.batch.create(self.db.collection('rates').document(rate.id), rate_dict)
+
+    def create_invoice(self, invoice: Invoice) -> None:
+        invoice_dict = asdict(invoice)
+        del invoice_dict['id']
+
+        self.batch.create(self.db.collection('invoices').document(invoice.id), invoice_dict)
+
+    def save_rate(self, rate: Rate) -> None:
+        rate_dict = asdict(rate)
+        del rate_dict['id']
+
+        self.batch.set(self.db.collection('rates').document(rate.id), rate_dict)
+
+    def save_invoice(self, invoice: Invoice) -> None:
+        invoice_dict = asdict(invoice)
+        del invoice_dict['id']
+
+        self.batch.set(self.db.collection('invoices').document(invoice.id), invoice_dict)
+
+    def update_invoice(self, invoice: Invoice, updated: Invoice) -> None:
+        ref = self.db.collection('invoices').document(invoice.id)
+        snapshot = ref.get()
+        record_operations(reads=1, round_trips=1)
+        counts = ('total_incidents_web', 'total_incidents_mobile', 'total_incidents_email')
+        if not snapshot.exists or any(snapshot.get(name) != getattr(invoice, name) for name in counts):
+            self.stale.append(invoice.id)
+            return
+
+        invoice_dict = asdict(updated)
+        del invoice_dict['id']
+        # Fails the commit if the invoice is written again after it was read here
+        self.batch.update(ref, invoice_dict, option=self.db.write_option(last_update_time=snapshot.update_time))
+
+    def add_revenue(self, rollup: RevenueRollup) -> None:
+        # Merged increments are applied by the server, adding to the rollup without reading it first
+        doc_id, fields = increment_write(rollup)
+        self.batch.set(self.db.collection(REVENUE_COLLECTION).document(doc_id), fields, merge=True)
+
+    def commit(self) -> None:
+        if self.stale:
+            raise StaleWriteError(f'Invoices {", ".join(self.stale)} changed since they were read')
+
+        writes = len(self.batch)
+        if writes == 0:
+            return
+
+        from google.api_core.exceptions import FailedPrecondition
+
+        try:
+            self.batch.commit()
+        except FailedPrecondition as e:
+            raise StaleWriteError(str(e)) from e
+        record_operations(writes=writes, round_trips=1)
@@ -0,0 +1,26 @@
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# Firestore accepts at most 30 values in an `in` filter, batched gets are kept to a size that fits in one response
+BATCH_GET_CHUNK_SIZE = 100
+IN_QUERY_CHUNK_SIZE = 30
+MAX_CONCURRENT_CHUNKS = 8
+
+
+def chunked(items: Sequence[T], size: int) -> list[Sequence[T]]:
+    return [items[start : start + size] for start in range(0, len(items), size)]
+
+
+def fetch_chunks(fetch: Callable[[Sequence[T]], list[R]], items: Sequence[T], size: int) -> list[R]:
+    """Split `items` into chunks of `size`, fetch them concurrently and return the concatenated results."""
+    chunks = chunked(items, size)
+    if len(chunks) <= 1:
+        return list(chain.from_iterable(fetch(chunk) for chunk in chunks))
+
+    with ThreadPoolExecutor(max_workers=min(len(chunks), MAX_CONCURRENT_CHUNKS)) as executor:
+        return list(chain.from_iterable(executor.map(fetch, chunks)))
@@ -1,6 +1,43 @@
-from models import Incident
+import threading
+from datetime import datetime
+
+from models import HistoryEntry, Incident, IncidentBatch
+
+
+class IncidentHistoryLoader:
+    """Histories of the incidents of a client, fetched all together the first time one is asked for."""
+
+    def __init__(self, repo: 'IncidentRepository', client_id: str) -> None:
+        self.repo = repo
+        self.client_id = client_id
+        self.histories: dict[str, list[HistoryEntry]] | None = None
+        self.lock = threading.Lock()
+
+    def __call__(self, incident_id: str) -> list[HistoryEntry]:
+        with self.lock:
+            if self.histories is None:
+                incidents = self.repo.get_incidents_by_client_id(client_id=self.client_id) or []
+                self.histories = {incident.id: incident.history for incident in incidents}
+
+        history = self.histories.get(incident_id)
+        if history is None:
+            raise LookupError(incident_id)
+
+        return history
 
 
 class IncidentRepository:
-    def get_incidents_by_client_id(self, client_id: str) -> list[Incident] | None:
+    def get_incidents_by_client_id(self, client_id: str, since: datetime | None = None) -> list[Incident] | None:
+        """
+        Return the incidents of a client.
+
+        With `since`, only incidents created at or after that moment are required; implementations that cannot filter
+        may return more, so callers must merge by id.
+        """
         raise NotImplementedError  # pragma: no cover
+
+    def get_incident_batch_by_client_id(self, client_id: str, since: datetime | None = None) -> IncidentBatch:
+        """Return the incidents of a client as a compact batch, see `get_incidents_by_client_id` for `since`."""
+        incidents = self.get_incidents_by_client_id(client_id=client_id, since=since) or []
+        # The histories are dropped with the incidents, and fetched again if one is ever needed
+        return IncidentBatch.from_incidents(incidents, history_loader=IncidentHistoryLoader(self, client_id))
@@ -7,9 +7,22 @@ class InvoiceRepository:
     def get(self, invoice_id: str) -> Invoice | None:
         raise NotImplementedError  # pragma: no cover
 
+    def get_many(self, invoice_ids: list[str]) -> list[Invoice | None]:
+        raise NotImplementedError  # pragma: no cover
+
     def get_by_client_and_month(self, client_id: str, month: Month, year: int) -> Invoice | None:
         raise NotImplementedError  # pragma: no cover
 
+    def get_by_clients_and_month(self, client_ids: list[str], month: Month, year: int) -> list[Invoice | None]:
+        raise NotImplementedError  # pragma: no cover
+
+    def get_by_client(self, client_id: str) -> list[Invoice]:
+        raise NotImplementedError  # pragma: no cover
+
+    def get_by_month(self, month: Month, year: int) -> Generator[Invoice, None, None]:
+        """Stream the invoices of every client for a billing period."""
+        raise NotImplementedError  # pragma: no cover
+
     def create(self, invoice: Invoice) -> None:
         raise NotImplementedError  # pragma: no cover
 
@@ -1,3 +1,5 @@
+from collections.abc import Generator
+
 from models import Rate
 
 
@@ -5,6 +7,9 @@ class RateRepository:
     def get_by_id(self, rate_id: str) -> Rate | None:
         raise NotImplementedError  # pragma: no cover
 
+    def get_many(self, rate_ids: list[str]) -> list[Rate | None]:
+        raise NotImplementedError  # pragma: no cover
+
     def get_by_client_and_plan(self, client_id: str, plan: str) -> Rate | None:
         raise NotImplementedError  # pragma: no cover
 
@@ -14,5 +19,8 @@ class RateRepository:
     def update(self, rate: Rate) -> None:
         raise NotImplementedError  # pragma: no cover
 
+    def get_all(self) -> Generator[Rate, None, None]:
+        raise NotImplementedError  # pragma: no cover
+
     def delete_all(self) -> None:
         raise NotImplementedError  # pragma: no cover
@@ -1,5 +1,5 @@
 from .client import RestClientRepository
 from .incident import RestIncidentRepository
-from .util import TokenProvider
+from .util import LazyTokenProvider, TokenProvider
 
-__all__ = ['TokenProvider', 'RestClientRepository', 'RestIncidentRepository']
+__all__ = ['LazyTokenProvider', 'TokenProvider', 'RestClientRepository', 'RestIncidentRepository']
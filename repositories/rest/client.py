@@ -13,6 +13,7 @@ class RestClientRepository(ClientRepository):
     def __init__(self, base_url: str, token_provider: TokenProvider | None) -> None:
         self.base_url = base_url
         self.token_provider = token_provider
+        self.session = requests.Session()
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def authenticated_get(self, url: str) -> requests.Response:
@@ -22,7 +23,11 @@ class RestClientRepository(ClientRepository):
             id_token = self.token_provider.get_token()
             headers = {'Authorization': f'Bearer {id_token}'}
 
-        return requests.get(url, timeout=2, headers=headers)
+        return self.session.get(url, timeout=2, headers=headers)
+
+    def warm_up(self) -> None:
+        # Any response will do: the point is to fetch a token and leave a pooled connection behind.
+        self.authenticated_get(url=f'{self.base_url}/api/v1/health/client')
 
     def get(self, client_id: str) -> Client | None:
         url = f'{self.base_url}/api/v1/clients/{client_id}?include_plan=true'
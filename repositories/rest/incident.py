@@ -1,19 +1,52 @@
 import logging
+import threading
 from datetime import datetime
+from typing import Any, cast
+from urllib.parse import urlencode
 
 import requests
 from dacite import Config, from_dict
 
-from models import Action, Channel, HistoryEntry, Incident
+from memory import memory_stage
+from models import Action, Channel, HistoryEntry, Incident, IncidentBatch
 from repositories import IncidentRepository
 
 from .util import TokenProvider
 
 
+def parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class IncidentHistoryLoader:
+    """Histories of the incidents of a client, downloaded all together the first time one is asked for."""
+
+    def __init__(self, repo: 'RestIncidentRepository', client_id: str) -> None:
+        self.repo = repo
+        self.client_id = client_id
+        self.histories: dict[str, list[dict[str, Any]]] | None = None
+        self.lock = threading.Lock()
+
+    def __call__(self, incident_id: str) -> list[HistoryEntry]:
+        with self.lock:
+            if self.histories is None:
+                self.histories = {
+                    incident_data['id']: incident_data['history']
+                    for incident_data in self.repo.fetch_incidents(self.client_id)
+                }
+
+        history = self.histories.get(incident_id)
+        if history is None:
+            raise LookupError(incident_id)
+
+        return [self.repo.decode_history_entry(dict(entry)) for entry in history]
+
+
 class RestIncidentRepository(IncidentRepository):
     def __init__(self, base_url: str, token_provider: TokenProvider | None) -> None:
         self.base_url = base_url
         self.token_provider = token_provider
+        self.session = requests.Session()
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def authenticated_get(self, url: str) -> requests.Response:
@@ -23,35 +56,70 @@ class RestIncidentRepository(IncidentRepository):
             id_token = self.token_provider.get_token()
             headers = {'Authorization': f'Bearer {id_token}'}
 
-        return requests.get(url, timeout=3, headers=headers)
+        return self.session.get(url, timeout=3, headers=headers)
+
+    def warm_up(self) -> None:
+        # Any response will do: the point is to fetch a token and leave a pooled connection behind.
+        self.authenticated_get(url=f'{self.base_url}/api/v1/health/incidentquery')
 
-    def get_incidents_by_client_id(self, client_id: str) -> list[Incident]:
+    def fetch_incidents(self, client_id: str, since: datetime | None = None) -> list[dict[str, Any]]:
         url = f'{self.base_url}/api/v1/clients/{client_id}/incidents'
-        resp = self.authenticated_get(url=url)
+        if since is not None:
+            url += '?' + urlencode({'since': since.isoformat()})
+
+        with memory_stage('download'):
+            resp = self.authenticated_get(url=url)
 
         if resp.status_code == requests.codes.ok:
-            data = resp.json()
-            incidents = []
+            return cast(list[dict[str, Any]], resp.json())
+
+        if resp.status_code == requests.codes.not_found:
+            return []
 
+        resp.raise_for_status()
+        raise requests.HTTPError('Unexpected response from server', response=resp)
+
+    def get_incidents_by_client_id(self, client_id: str, since: datetime | None = None) -> list[Incident]:
+        data = self.fetch_incidents(client_id, since)
+        with memory_stage('decode'):
+            return self.decode_incidents(data)
+
+    def get_incident_batch_by_client_id(self, client_id: str, since: datetime | None = None) -> IncidentBatch:
+        data = self.fetch_incidents(client_id, since)
+        with memory_stage('decode'):
+            # Only the fields used for billing are kept, the histories are downloaded again if one is ever needed
+            batch = IncidentBatch(history_loader=IncidentHistoryLoader(self, client_id))
             for incident_data in data:
-                # Convert 'history' entries to HistoryEntry objects
-                history_entries = []
-                for history_entry_data in incident_data['history']:
-                    history_entry_data['date'] = datetime.fromisoformat(history_entry_data['date'].replace('Z', '+00:00'))
-                    history_entry = from_dict(data_class=HistoryEntry, data=history_entry_data, config=Config(cast=[Action]))
-                    history_entries.append(history_entry)
+                batch.append(incident_data['id'], incident_data['channel'], parse_date(incident_data['history'][0]['date']))
 
-                # Add 'history' to incident_data
-                incident_data['history'] = history_entries
+            return batch
 
-                # Convert the incident data to an Incident object
-                incident = from_dict(data_class=Incident, data=incident_data, config=Config(cast=[Channel]))
-                incidents.append(incident)
+    def get_incident_history(self, client_id: str, incident_id: str) -> list[HistoryEntry]:
+        for incident_data in self.fetch_incidents(client_id):
+            if incident_data['id'] == incident_id:
+                return [self.decode_history_entry(entry) for entry in incident_data['history']]
 
-            return incidents
+        raise LookupError(incident_id)
 
-        if resp.status_code == requests.codes.not_found:
-            return []
+    @staticmethod
+    def decode_history_entry(history_entry_data: dict[str, Any]) -> HistoryEntry:
+        history_entry_data['date'] = parse_date(history_entry_data['date'])
+        return from_dict(data_class=HistoryEntry, data=history_entry_data, config=Config(cast=[Action]))
 
-        resp.raise_for_status()
-        raise requests.HTTPError('Unexpected response from server', response=resp)
+    def decode_incidents(self, data: list[dict[str, Any]]) -> list[Incident]:
+        incidents = []
+
+        for incident_data in data:
+            # Convert 'history' entries to HistoryEntry objects
+            history_entries = [
+                self.decode_history_entry(history_entry_data) for history_entry_data in incident_data['history']
+            ]
+
+            # Add 'history' to incident_data
+            incident_data['history'] = history_entries
+
+            # Convert the incident data to an Incident object
+            incident = from_dict(data_class=Incident, data=incident_data, config=Config(cast=[Channel]))
+            incidents.append(incident)
+
+        return incidents
@@ -1,5 +1,24 @@
+import threading
+from collections.abc import Callable
 from typing import Protocol
 
 
 class TokenProvider(Protocol):
     def get_token(self) -> str: ...  # pragma: no cover
+
+
+class LazyTokenProvider:
+    """Builds the wrapped token provider on the first `get_token` call instead of at startup."""
+
+    def __init__(self, factory: Callable[[], TokenProvider]) -> None:
+        self.factory = factory
+        self.provider: TokenProvider | None = None
+        self.lock = threading.Lock()
+
+    def get_token(self) -> str:
+        if self.provider is None:
+            with self.lock:
+                if self.provider is None:
+                    self.provider = self.factory()
+
+        return self.provider.get_token()
@@ -0,0 +1,16 @@
+from models import RevenueRollup
+
+
+class RevenueRepository:
+    """Revenue rollups per billing period and plan, periods are given as `YYYY-MM`."""
+
+    def get_range(self, first: str, last: str) -> list[RevenueRollup]:
+        """Return the rollups of the periods from `first` to `last`, one per period and plan, ordered by period and plan."""
+        raise NotImplementedError  # pragma: no cover
+
+    def replace(self, rollups: list[RevenueRollup], first: str | None = None, last: str | None = None) -> None:
+        """Replace the rollups of the periods from `first` to `last`, of every period when not given, by `rollups`."""
+        raise NotImplementedError  # pragma: no cover
+
+    def delete_all(self) -> None:
+        raise NotImplementedError  # pragma: no cover
@@ -0,0 +1,7 @@
+from .db import SqliteDatabase
+from .invoice import SqliteInvoiceRepository
+from .rate import SqliteRateRepository
+from .revenue import SqliteRevenueRepository
+from .unit_of_work import SqliteUnitOfWork
+
+__all__ = ['SqliteDatabase', 'SqliteInvoiceRepository', 'SqliteRateRepository', 'SqliteRevenueRepository', 'SqliteUnitOfWork']
@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS rates (
+        id TEXT PRIMARY KEY,
+        plan TEXT NOT NULL,
+        client_id TEXT NOT NULL,
+        fixed_cost REAL NOT NULL,
+        cost_per_incident_web REAL NOT NULL,
+        cost_per_incident_mobile REAL NOT NULL,
+        cost_per_incident_email REAL NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS rates_client_id_plan ON rates (client_id, plan)',
+    """
+    CREATE TABLE IF NOT EXISTS invoices (
+        id TEXT PRIMARY KEY,
+        client_id TEXT NOT NULL,
+        rate_id TEXT NOT NULL,
+        generation_date TEXT NOT NULL,
+        billing_month TEXT NOT NULL,
+        billing_year INTEGER NOT NULL,
+        payment_due_date TEXT NOT NULL,
+        total_incidents_web INTEGER NOT NULL,
+        total_incidents_mobile INTEGER NOT NULL,
+        total_incidents_email INTEGER NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS invoices_client_id_billing ON invoices (client_id, billing_year, billing_month)',
+    'CREATE INDEX IF NOT EXISTS invoices_billing ON invoices (billing_year, billing_month)',
+    """
+    CREATE TABLE IF NOT EXISTS revenue_rollups (
+        period TEXT NOT NULL,
+        plan TEXT NOT NULL,
+        billing_year INTEGER NOT NULL,
+        billing_month TEXT NOT NULL,
+        invoices INTEGER NOT NULL,
+        total_incidents_web INTEGER NOT NULL,
+        total_incidents_mobile INTEGER NOT NULL,
+        total_incidents_email INTEGER NOT NULL,
+        fixed_revenue REAL NOT NULL,
+        variable_revenue REAL NOT NULL,
+        PRIMARY KEY (period, plan)
+    )
+    """,
+)
+
+# Rows fetched at a time when streaming a whole table
+STREAM_BATCH_SIZE = 500
+# Ids bound per IN (...) query, below SQLite's limit on host parameters
+IN_QUERY_CHUNK_SIZE = 500
+
+
+def to_db_datetime(value: datetime) -> str:
+    """Store datetimes as UTC ISO 8601 text, naive datetimes are taken as UTC like Firestore does."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.astimezone(UTC).isoformat()
+
+
+def from_db_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+class SqliteDatabase:
+    """
+    SQLite database shared by the SQLite repositories, with the schema created on first use.
+
+    Every thread gets its own connection, reopened after a fork, and the database runs in WAL mode so readers do not
+    block the writer.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.local = threading.local()
+
+        with self.transaction() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def connection(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so a transaction never fails half way on a busy database
+        conn = self.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def stream(self, query: str, params: tuple[object, ...] = ()) -> Iterator[sqlite3.Row]:
+        """Iterate over the rows of a query, fetching them in batches instead of loading the whole result."""
+        cursor = self.connection().execute(query, params)
+        try:
+            while rows := cursor.fetchmany(STREAM_BATCH_SIZE):
+                yield from rows
+        finally:
+            cursor.close()
@@ -0,0 +1,131 @@
+import logging
+import sqlite3
+from collections import defaultdict
+from collections.abc import Generator
+
+from models import Invoice, Month
+from repositories import InvoiceRepository
+
+from .db import IN_QUERY_CHUNK_SIZE, SqliteDatabase, from_db_datetime, to_db_datetime
+
+COLUMNS = (
+    'id, client_id, rate_id, generation_date, billing_month, billing_year, payment_due_date, '
+    'total_incidents_web, total_incidents_mobile, total_incidents_email'
+)
+PLACEHOLDERS = '?, ?, ?, ?, ?, ?, ?, ?, ?, ?'
+
+
+def row_to_invoice(row: sqlite3.Row) -> Invoice:
+    return Invoice(
+        id=row['id'],
+        client_id=row['client_id'],
+        rate_id=row['rate_id'],
+        generation_date=from_db_datetime(row['generation_date']),
+        billing_month=Month(row['billing_month']),
+        billing_year=row['billing_year'],
+        payment_due_date=from_db_datetime(row['payment_due_date']),
+        total_incidents_web=row['total_incidents_web'],
+        total_incidents_mobile=row['total_incidents_mobile'],
+        total_incidents_email=row['total_incidents_email'],
+    )
+
+
+def invoice_to_row(invoice: Invoice) -> tuple[object, ...]:
+    return (
+        invoice.id,
+        invoice.client_id,
+        invoice.rate_id,
+        to_db_datetime(invoice.generation_date),
+        invoice.billing_month,
+        invoice.billing_year,
+        to_db_datetime(invoice.payment_due_date),
+        invoice.total_incidents_web,
+        invoice.total_incidents_mobile,
+        invoice.total_incidents_email,
+    )
+
+
+class SqliteInvoiceRepository(InvoiceRepository):
+    def __init__(self, path: str, db: SqliteDatabase | None = None) -> None:
+        self.db = db if db is not None else SqliteDatabase(path)
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def get(self, invoice_id: str) -> Invoice | None:
+        row = self.db.connection().execute(f'SELECT {COLUMNS} FROM invoices WHERE id = ?', (invoice_id,)).fetchone()  # noqa: S608
+
+        return None if row is None else row_to_invoice(row)
+
+    def select_in(self, column: str, values: list[str], where: str = '', params: tuple[object, ...] = ()) -> list[sqlite3.Row]:
+        unique_values = list(dict.fromkeys(values))
+        rows: list[sqlite3.Row] = []
+        for start in range(0, len(unique_values), IN_QUERY_CHUNK_SIZE):
+            chunk = unique_values[start : start + IN_QUERY_CHUNK_SIZE]
+            rows += self.db.connection().execute(
+                f'SELECT {COLUMNS} FROM invoices WHERE {column} IN ({",".join("?" * len(chunk))}){where}',  # noqa: S608
+                [*chunk, *params],
+            )
+
+        return rows
+
+    def get_many(self, invoice_ids: list[str]) -> list[Invoice | None]:
+        invoices = {row['id']: row_to_invoice(row) for row in self.select_in('id', invoice_ids)}
+
+        return [invoices.get(invoice_id) for invoice_id in invoice_ids]
+
+    def get_by_client_and_month(self, client_id: str, month: Month, year: int) -> Invoice | None:
+        rows = (
+            self.db.connection()
+            .execute(
+                f'SELECT {COLUMNS} FROM invoices WHERE client_id = ? AND billing_year = ? AND billing_month = ?',  # noqa: S608
+                (client_id, year, month.value),
+            )
+            .fetchall()
+        )
+
+        if len(rows) == 0:
+            return None
+
+        if len(rows) > 1:
+            self.logger.error('Multiple invoices found for client %s for %s %d', client_id, month, year)
+            return None
+
+        return row_to_invoice(rows[0])
+
+    def get_by_clients_and_month(self, client_ids: list[str], month: Month, year: int) -> list[Invoice | None]:
+        rows_by_client: dict[str, list[sqlite3.Row]] = defaultdict(list)
+        for row in self.select_in('client_id', client_ids, ' AND billing_year = ? AND billing_month = ?', (year, month.value)):
+            rows_by_client[row['client_id']].append(row)
+
+        invoices: list[Invoice | None] = []
+        for client_id in client_ids:
+            rows = rows_by_client.get(client_id, [])
+            if len(rows) > 1:
+                self.logger.error('Multiple invoices found for client %s for %s %d', client_id, month, year)
+            invoices.append(row_to_invoice(rows[0]) if len(rows) == 1 else None)
+
+        return invoices
+
+    def get_by_client(self, client_id: str) -> list[Invoice]:
+        rows = self.db.connection().execute(f'SELECT {COLUMNS} FROM invoices WHERE client_id = ?', (client_id,))  # noqa: S608
+
+        return [row_to_invoice(row) for row in rows]
+
+    def get_by_month(self, month: Month, year: int) -> Generator[Invoice, None, None]:
+        query = f'SELECT {COLUMNS} FROM invoices WHERE billing_year = ? AND billing_month = ?'  # noqa: S608
+        for row in self.db.stream(query, (year, month.value)):
+            yield row_to_invoice(row)
+
+    def create(self, invoice: Invoice) -> None:
+        self.update(invoice)
+
+    def update(self, invoice: Invoice) -> None:
+        with self.db.transaction() as conn:
+            conn.execute(f'INSERT OR REPLACE INTO invoices ({COLUMNS}) VALUES ({PLACEHOLDERS})', invoice_to_row(invoice))  # noqa: S608
+
+    def get_all(self) -> Generator[Invoice, None, None]:
+        for row in self.db.stream(f'SELECT {COLUMNS} FROM invoices'):  # noqa: S608
+            yield row_to_invoice(row)
+
+    def delete_all(self) -> None:
+        with self.db.transaction() as conn:
+            conn.execute('DELETE FROM invoices')
@@ -0,0 +1,84 @@
+import logging
+import sqlite3
+from collections.abc import Generator
+from dataclasses import astuple
+
+from models import Plan, Rate
+from repositories import RateRepository
+
+from .db import IN_QUERY_CHUNK_SIZE, SqliteDatabase
+
+COLUMNS = 'id, plan, client_id, fixed_cost, cost_per_incident_web, cost_per_incident_mobile, cost_per_incident_email'
+PLACEHOLDERS = '?, ?, ?, ?, ?, ?, ?'
+
+
+def row_to_rate(row: sqlite3.Row) -> Rate:
+    return Rate(
+        id=row['id'],
+        plan=Plan(row['plan']),
+        client_id=row['client_id'],
+        fixed_cost=row['fixed_cost'],
+        cost_per_incident_web=row['cost_per_incident_web'],
+        cost_per_incident_mobile=row['cost_per_incident_mobile'],
+        cost_per_incident_email=row['cost_per_incident_email'],
+    )
+
+
+def rate_to_row(rate: Rate) -> tuple[object, ...]:
+    return astuple(rate)
+
+
+class SqliteRateRepository(RateRepository):
+    def __init__(self, path: str, db: SqliteDatabase | None = None) -> None:
+        self.db = db if db is not None else SqliteDatabase(path)
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def get_by_id(self, rate_id: str) -> Rate | None:
+        row = self.db.connection().execute(f'SELECT {COLUMNS} FROM rates WHERE id = ?', (rate_id,)).fetchone()  # noqa: S608
+
+        return None if row is None else row_to_rate(row)
+
+    def get_many(self, rate_ids: list[str]) -> list[Rate | None]:
+        unique_ids = list(dict.fromkeys(rate_ids))
+        rates: dict[str, Rate] = {}
+        for start in range(0, len(unique_ids), IN_QUERY_CHUNK_SIZE):
+            chunk = unique_ids[start : start + IN_QUERY_CHUNK_SIZE]
+            rows = self.db.connection().execute(
+                f'SELECT {COLUMNS} FROM rates WHERE id IN ({",".join("?" * len(chunk))})',  # noqa: S608
+                chunk,
+            )
+            rates.update((row['id'], row_to_rate(row)) for row in rows)
+
+        return [rates.get(rate_id) for rate_id in rate_ids]
+
+    def get_by_client_and_plan(self, client_id: str, plan: str) -> Rate | None:
+        rows = (
+            self.db.connection()
+            .execute(f'SELECT {COLUMNS} FROM rates WHERE client_id = ? AND plan = ?', (client_id, plan))  # noqa: S608
+            .fetchall()
+        )
+
+        if len(rows) == 0:
+            return None
+
+        if len(rows) > 1:
+            self.logger.error('Multiple rates found with client_id %s and plan %s', client_id, plan)
+            return None
+
+        return row_to_rate(rows[0])
+
+    def create(self, rate: Rate) -> None:
+        with self.db.transaction() as conn:
+            conn.execute(f'INSERT INTO rates ({COLUMNS}) VALUES ({PLACEHOLDERS})', rate_to_row(rate))  # noqa: S608
+
+    def update(self, rate: Rate) -> None:
+        with self.db.transaction() as conn:
+            conn.execute(f'INSERT OR REPLACE INTO rates ({COLUMNS}) VALUES ({PLACEHOLDERS})', rate_to_row(rate))  # noqa: S608
+
+    def get_all(self) -> Generator[Rate, None, None]:
+        for row in self.db.stream(f'SELECT {COLUMNS} FROM rates'):  # noqa: S608
+            yield row_to_rate(row)
+
+    def delete_all(self) -> None:
+        with self.db.transaction() as conn:
+            conn.execute('DELETE FROM rates')
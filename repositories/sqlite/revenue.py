@@ -0,0 +1,51 @@
+import sqlite3
+
+from models import Plan, RevenueRollup
+from models.revenue_rollup import COUNTERS
+from repositories import RevenueRepository
+
+from .db import SqliteDatabase
+
+COLUMNS = f'period, plan, billing_year, billing_month, {", ".join(COUNTERS)}'
+PLACEHOLDERS = ', '.join('?' * (4 + len(COUNTERS)))
+
+
+def row_to_rollup(row: sqlite3.Row) -> RevenueRollup:
+    return RevenueRollup(
+        billing_year=row['billing_year'],
+        billing_month=row['billing_month'],
+        plan=Plan(row['plan']),
+        **{name: row[name] for name in COUNTERS},
+    )
+
+
+def rollup_to_row(rollup: RevenueRollup) -> tuple[object, ...]:
+    return (rollup.period, rollup.plan, rollup.billing_year, rollup.billing_month, *rollup.counters.values())
+
+
+class SqliteRevenueRepository(RevenueRepository):
+    def __init__(self, path: str, db: SqliteDatabase | None = None) -> None:
+        self.db = db if db is not None else SqliteDatabase(path)
+
+    def get_range(self, first: str, last: str) -> list[RevenueRollup]:
+        rows = self.db.connection().execute(
+            f'SELECT {COLUMNS} FROM revenue_rollups WHERE period BETWEEN ? AND ? ORDER BY period, plan',  # noqa: S608
+            (first, last),
+        )
+
+        return [row_to_rollup(row) for row in rows]
+
+    def replace(self, rollups: list[RevenueRollup], first: str | None = None, last: str | None = None) -> None:
+        with self.db.transaction() as conn:
+            if first is None or last is None:
+                conn.execute('DELETE FROM revenue_rollups')
+            else:
+                conn.execute('DELETE FROM revenue_rollups WHERE period BETWEEN ? AND ?', (first, last))
+            conn.executemany(
+                f'INSERT INTO revenue_rollups ({COLUMNS}) VALUES ({PLACEHOLDERS})',  # noqa: S608
+                [rollup_to_row(rollup) for rollup in rollups],
+            )
+
+    def delete_all(self) -> None:
+        with self.db.transaction() as conn:
+            conn.execute('DELETE FROM revenue_rollups')
@@ -0,0 +1,69 @@
+from models import Invoice, Rate, RevenueRollup
+from models.revenue_rollup import COUNTERS
+from repositories import ConditionalUnitOfWork, StaleWriteError
+
+from .db import SqliteDatabase
+from .invoice import COLUMNS as INVOICE_COLUMNS
+from .invoice import PLACEHOLDERS as INVOICE_PLACEHOLDERS
+from .invoice import invoice_to_row
+from .rate import COLUMNS as RATE_COLUMNS
+from .rate import PLACEHOLDERS as RATE_PLACEHOLDERS
+from .rate import rate_to_row
+from .revenue import COLUMNS as REVENUE_COLUMNS
+from .revenue import PLACEHOLDERS as REVENUE_PLACEHOLDERS
+from .revenue import rollup_to_row
+
+INSERT_RATE = f'INSERT INTO rates ({RATE_COLUMNS}) VALUES ({RATE_PLACEHOLDERS})'  # noqa: S608
+INSERT_INVOICE = f'INSERT INTO invoices ({INVOICE_COLUMNS}) VALUES ({INVOICE_PLACEHOLDERS})'  # noqa: S608
+SAVE_RATE = f'INSERT OR REPLACE INTO rates ({RATE_COLUMNS}) VALUES ({RATE_PLACEHOLDERS})'  # noqa: S608
+SAVE_INVOICE = f'INSERT OR REPLACE INTO invoices ({INVOICE_COLUMNS}) VALUES ({INVOICE_PLACEHOLDERS})'  # noqa: S608
+INVOICE_COUNTS = ('total_incidents_web', 'total_incidents_mobile', 'total_incidents_email')
+UPDATE_INVOICE = (
+    f'UPDATE invoices SET {", ".join(f"{name} = ?" for name in INVOICE_COLUMNS.split(", ")[1:])} '  # noqa: S608
+    f'WHERE id = ? AND {" AND ".join(f"{name} = ?" for name in INVOICE_COUNTS)}'
+)
+ADD_REVENUE = (
+    f'INSERT INTO revenue_rollups ({REVENUE_COLUMNS}) VALUES ({REVENUE_PLACEHOLDERS}) '  # noqa: S608
+    f'ON CONFLICT (period, plan) DO UPDATE SET {", ".join(f"{name} = {name} + excluded.{name}" for name in COUNTERS)}'
+)
+
+
+class SqliteUnitOfWork(ConditionalUnitOfWork):
+    def __init__(self, path: str, db: SqliteDatabase | None = None) -> None:
+        self.db = db if db is not None else SqliteDatabase(path)
+        # Writes conditioned on the stored data come with the error raised when they change no row
+        self.statements: list[tuple[str, tuple[object, ...], str | None]] = []
+
+    def create_rate(self, rate: Rate) -> None:
+        self.statements.append((INSERT_RATE, rate_to_row(rate), None))
+
+    def create_invoice(self, invoice: Invoice) -> None:
+        self.statements.append((INSERT_INVOICE, invoice_to_row(invoice), None))
+
+    def save_rate(self, rate: Rate) -> None:
+        self.statements.append((SAVE_RATE, rate_to_row(rate), None))
+
+    def save_invoice(self, invoice: Invoice) -> None:
+        self.statements.append((SAVE_INVOICE, invoice_to_row(invoice), None))
+
+    def update_invoice(self, invoice: Invoice, updated: Invoice) -> None:
+        _, *values = invoice_to_row(updated)
+        counts = (invoice.total_incidents_web, invoice.total_incidents_mobile, invoice.total_incidents_email)
+        self.statements.append(
+            (UPDATE_INVOICE, (*values, invoice.id, *counts), f'Invoice {invoice.id} changed since it was read')
+        )
+
+    def add_revenue(self, rollup: RevenueRollup) -> None:
+        self.statements.append((ADD_REVENUE, rollup_to_row(rollup), None))
+
+    def commit(self) -> None:
+        if not self.statements:
+            return
+
+        # Like a Firestore batch, the writes either all succeed or none does
+        with self.db.transaction() as conn:
+            for statement, params, stale_error in self.statements:
+                if conn.execute(statement, params).rowcount == 0 and stale_error is not None:
+                    raise StaleWriteError(stale_error)
+
+        self.statements = []
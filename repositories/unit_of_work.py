@@ -0,0 +1,43 @@
+from models import Invoice, Rate, RevenueRollup
+
+
+class StaleWriteError(Exception):
+    """Raised by a commit when a stored document no longer is the one a staged write was computed from."""
+
+
+class UnitOfWork:
+    """Stages the writes of a request so they are committed together, atomically and in a single round trip."""
+
+    def create_rate(self, rate: Rate) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def create_invoice(self, invoice: Invoice) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def save_rate(self, rate: Rate) -> None:
+        """Stage a write of the rate that creates it or overwrites the stored one, so it can be safely repeated."""
+        raise NotImplementedError  # pragma: no cover
+
+    def save_invoice(self, invoice: Invoice) -> None:
+        """Stage a write of the invoice that creates it or overwrites the stored one, so it can be safely repeated."""
+        raise NotImplementedError  # pragma: no cover
+
+    def add_revenue(self, rollup: RevenueRollup) -> None:
+        """Stage adding the counters of `rollup` to the revenue rollup of its period and plan."""
+        raise NotImplementedError  # pragma: no cover
+
+    def commit(self) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+
+class ConditionalUnitOfWork(UnitOfWork):
+    """Unit of work of a store that checks conditions on the stored documents when it commits."""
+
+    def update_invoice(self, invoice: Invoice, updated: Invoice) -> None:
+        """
+        Stage overwriting the stored `invoice` with `updated`, only if it still has the incident counts of `invoice`.
+
+        Otherwise the commit raises StaleWriteError and stores none of the staged writes, so a change derived from the
+        invoice as it was read, e.g. to its revenue rollup, is never applied twice.
+        """
+        raise NotImplementedError  # pragma: no cover
@@ -0,0 +1,18 @@
+from .log import PendingWrite, WriteBehindLog
+from .queue import WriteBehindQueue
+from .repositories import (
+    WriteBehindInvoiceRepository,
+    WriteBehindRateRepository,
+    WriteBehindRevenueRepository,
+    WriteBehindUnitOfWork,
+)
+
+__all__ = [
+    'PendingWrite',
+    'WriteBehindInvoiceRepository',
+    'WriteBehindLog',
+    'WriteBehindQueue',
+    'WriteBehindRateRepository',
+    'WriteBehindRevenueRepository',
+    'WriteBehindUnitOfWork',
+]
@@ -0,0 +1,181 @@
+import fcntl
+import itertools
+import logging
+import os
+import struct
+import threading
+import zlib
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, cast
+
+import msgpack  # type: ignore[import-untyped]
+
+from cache import MsgpackCodec
+from models import Invoice, Rate, RevenueRollup
+
+# Every record is framed by the length and the CRC32 of its payload, so a record torn by a crash is detected
+HEADER = struct.Struct('>II')
+
+WRITE = 0
+ACK = 1
+
+
+@dataclass
+class PendingWrite:
+    seq: int
+    rates: list[Rate] = field(default_factory=list)
+    invoices: list[Invoice] = field(default_factory=list)
+    # Unlike the other writes, rollup changes would be added again if a write that was already stored were replayed
+    revenue: list[RevenueRollup] = field(default_factory=list)
+
+
+class WriteBehindLog:
+    """
+    Append-only log of the writes acknowledged to clients but not stored yet.
+
+    A write is fsync'd before it is acknowledged. Once stored it is marked done with an ack record, only fsync'd for
+    writes carrying revenue rollup changes: losing it stores the write again, which is idempotent for rates and
+    invoices, and rollup changes are skipped by the queue when their invoices are already stored. The file is
+    truncated when nothing is pending and rewritten with only the pending writes when it grows past `max_bytes`.
+
+    Every process claims its own log file in `directory` by locking it, and a process started after another exited
+    takes over its file, so the writes left pending by a crash are replayed by the next process.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.rate_codec = MsgpackCodec(Rate)
+        self.invoice_codec = MsgpackCodec(Invoice)
+        self.revenue_codec = MsgpackCodec(RevenueRollup)
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.lock_fd, self.path = self.claim()
+        self.next_seq = 1
+        self.pending = self.read()
+        self.file: BinaryIO = self.path.open('ab')
+
+    def claim(self) -> tuple[int, Path]:
+        for slot in itertools.count():
+            fd = os.open(self.directory / f'writes-{slot}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+
+            return fd, self.directory / f'writes-{slot}.log'
+
+        raise AssertionError  # pragma: no cover
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+
+        self.file.close()
+        os.close(self.lock_fd)
+
+    def read(self) -> dict[int, PendingWrite]:
+        pending: dict[int, PendingWrite] = {}
+        if not self.path.exists():
+            return pending
+
+        data = self.path.read_bytes()
+        offset = 0
+        while offset + HEADER.size <= len(data):
+            length, crc = HEADER.unpack_from(data, offset)
+            payload = data[offset + HEADER.size : offset + HEADER.size + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+
+            record = msgpack.unpackb(payload)
+            if record[0] == WRITE:
+                # Records logged before revenue rollups were maintained have no revenue
+                _, seq, rates, invoices, *revenue = record
+                self.next_seq = max(self.next_seq, seq + 1)
+                pending[seq] = PendingWrite(
+                    seq=seq,
+                    rates=[self.rate_codec.decode(rate) for rate in rates],
+                    invoices=[self.invoice_codec.decode(invoice) for invoice in invoices],
+                    revenue=[self.revenue_codec.decode(rollup) for rollup in revenue[0]] if revenue else [],
+                )
+            else:
+                for seq in record[1]:
+                    pending.pop(seq, None)
+            offset += HEADER.size + length
+
+        if offset < len(data):
+            # The last record was being written when the process died, it was never acknowledged
+            self.logger.warning('Discarding %d bytes of incomplete record at the end of %s', len(data) - offset, self.path)
+            with self.path.open('r+b') as file:
+                file.truncate(offset)
+
+        if pending:
+            self.logger.info('Replaying %d pending writes from %s', len(pending), self.path)
+
+        return pending
+
+    def encode_write(self, write: PendingWrite) -> bytes:
+        rates = [self.rate_codec.encode(rate) for rate in write.rates]
+        invoices = [self.invoice_codec.encode(invoice) for invoice in write.invoices]
+        revenue = [self.revenue_codec.encode(rollup) for rollup in write.revenue]
+        return self.frame([WRITE, write.seq, rates, invoices, revenue])
+
+    @staticmethod
+    def frame(record: list[object]) -> bytes:
+        payload = cast(bytes, msgpack.packb(record))
+        return HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+    def oldest(self, limit: int) -> list[PendingWrite]:
+        with self.lock:
+            return list(islice(self.pending.values(), limit))
+
+    def append(self, rates: list[Rate], invoices: list[Invoice], revenue: list[RevenueRollup] | None = None) -> PendingWrite:
+        """Durably record a write, when this returns the write survives a crash of the process or the host."""
+        with self.lock:
+            write = PendingWrite(seq=self.next_seq, rates=rates, invoices=invoices, revenue=revenue or [])
+            self.file.write(self.encode_write(write))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.next_seq += 1
+            self.pending[write.seq] = write
+
+        return write
+
+    def ack(self, seqs: list[int], *, durable: bool = False) -> None:
+        """Mark writes as stored, `durable` ones survive a crash of the host like the writes themselves."""
+        with self.lock:
+            for seq in seqs:
+                self.pending.pop(seq, None)
+
+            if not self.pending:
+                self.file.truncate(0)
+            else:
+                self.file.write(self.frame([ACK, seqs]))
+            self.file.flush()
+            if durable:
+                os.fsync(self.file.fileno())
+            if self.pending and self.file.tell() > self.max_bytes:
+                self.compact()
+
+    def compact(self) -> None:
+        tmp_path = self.path.with_suffix('.tmp')
+        with tmp_path.open('wb') as file:
+            for write in self.pending.values():
+                file.write(self.encode_write(write))
+            file.flush()
+            os.fsync(file.fileno())
+
+        tmp_path.replace(self.path)
+        # The rename itself must reach the disk before the old file's records are forgotten
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        self.file.close()
+        self.file = self.path.open('ab')
@@ -0,0 +1,166 @@
+import logging
+import threading
+from collections.abc import Callable
+
+from models import Invoice, Rate, RevenueRollup
+from repositories import InvoiceRepository, UnitOfWork
+
+from .log import PendingWrite, WriteBehindLog
+
+
+class WriteBehindQueue:
+    """
+    Writes that are acknowledged once logged, and stored in batches by a background flusher.
+
+    Pending rates and invoices are indexed so the repositories can serve them before they are stored. A failed batch is
+    retried with a backoff doubling from `retry_interval` up to `max_retry_interval`. The writes left pending in the log
+    by a previous process are stored by the first flush.
+
+    A write whose invoices are all found in `invoice_repo`, the store, was already stored with its rollup changes,
+    e.g. by a process that died before its ack reached the disk, and is skipped so they are not added twice.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        log: WriteBehindLog,
+        unit_of_work_factory: Callable[[], UnitOfWork],
+        invoice_repo: InvoiceRepository,
+        batch_size: int,
+        flush_interval: float,
+        retry_interval: float,
+        max_retry_interval: float,
+    ) -> None:
+        self.log = log
+        self.unit_of_work_factory = unit_of_work_factory
+        self.invoice_repo = invoice_repo
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+
+        self.index_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.rates: dict[str, Rate] = {}
+        self.rates_by_client_and_plan: dict[tuple[str, str], Rate] = {}
+        self.invoices: dict[str, Invoice] = {}
+        self.invoices_by_period: dict[tuple[str, int, str], Invoice] = {}
+        for write in log.pending.values():
+            self.index(write)
+
+    @property
+    def pending(self) -> int:
+        return len(self.log.pending)
+
+    def index(self, write: PendingWrite) -> None:
+        with self.index_lock:
+            for rate in write.rates:
+                self.rates[rate.id] = rate
+                self.rates_by_client_and_plan[rate.client_id, rate.plan] = rate
+            for invoice in write.invoices:
+                self.invoices[invoice.id] = invoice
+                self.invoices_by_period[invoice.client_id, invoice.billing_year, invoice.billing_month] = invoice
+
+    def unindex(self, write: PendingWrite) -> None:
+        with self.index_lock:
+            for rate in write.rates:
+                self.rates.pop(rate.id, None)
+                if self.rates_by_client_and_plan.get((rate.client_id, rate.plan)) is rate:
+                    del self.rates_by_client_and_plan[rate.client_id, rate.plan]
+            for invoice in write.invoices:
+                self.invoices.pop(invoice.id, None)
+                period = (invoice.client_id, invoice.billing_year, invoice.billing_month)
+                if self.invoices_by_period.get(period) is invoice:
+                    del self.invoices_by_period[period]
+
+    def submit(self, rates: list[Rate], invoices: list[Invoice], revenue: list[RevenueRollup] | None = None) -> None:
+        write = self.log.append(rates, invoices, revenue)
+        self.index(write)
+        self.wake.set()
+
+    def rate(self, rate_id: str) -> Rate | None:
+        return self.rates.get(rate_id)
+
+    def rate_for(self, client_id: str, plan: str) -> Rate | None:
+        return self.rates_by_client_and_plan.get((client_id, plan))
+
+    def invoice(self, invoice_id: str) -> Invoice | None:
+        return self.invoices.get(invoice_id)
+
+    def invoice_for(self, client_id: str, month: str, year: int) -> Invoice | None:
+        return self.invoices_by_period.get((client_id, year, month))
+
+    def pending_rates(self) -> list[Rate]:
+        with self.index_lock:
+            return list(self.rates.values())
+
+    def pending_invoices(self) -> list[Invoice]:
+        with self.index_lock:
+            return list(self.invoices.values())
+
+    def pending_revenue(self) -> list[RevenueRollup]:
+        with self.log.lock:
+            return [rollup for write in self.log.pending.values() for rollup in write.revenue]
+
+    def flush(self) -> int:
+        """Store the oldest batch of pending writes, returning how many writes were stored."""
+        with self.flush_lock:
+            batch = self.log.oldest(self.batch_size)
+            if not batch:
+                return 0
+
+            invoice_ids = [invoice.id for write in batch for invoice in write.invoices]
+            stored = {invoice.id for invoice in self.invoice_repo.get_many(invoice_ids) if invoice is not None}
+            unit_of_work = self.unit_of_work_factory()
+            for write in batch:
+                if write.invoices and all(invoice.id in stored for invoice in write.invoices):
+                    self.logger.info('Skipping write %d, its invoices are already stored', write.seq)
+                    continue
+                stored.update(invoice.id for invoice in write.invoices)
+                for rate in write.rates:
+                    unit_of_work.save_rate(rate)
+                for invoice in write.invoices:
+                    unit_of_work.save_invoice(invoice)
+                for rollup in write.revenue:
+                    unit_of_work.add_revenue(rollup)
+            unit_of_work.commit()
+
+            self.log.ack([write.seq for write in batch], durable=any(write.revenue for write in batch))
+            for write in batch:
+                self.unindex(write)
+
+            return len(batch)
+
+    def flush_all(self) -> None:
+        while self.flush():
+            pass
+
+    def run(self) -> None:
+        delay = self.retry_interval
+        while not self.stopped.is_set():
+            try:
+                while self.flush() == self.batch_size:
+                    pass
+            except Exception:
+                self.logger.exception('Failed to store %d pending writes, retrying in %.1fs', self.pending, delay)
+                self.stopped.wait(delay)
+                delay = min(delay * 2, self.max_retry_interval)
+                continue
+
+            delay = self.retry_interval
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.run, name='write-behind', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self.stopped.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
@@ -0,0 +1,179 @@
+from collections.abc import Generator
+
+from models import Invoice, Month, Rate, RevenueRollup, merge_rollups
+from repositories import InvoiceRepository, RateRepository, RevenueRepository, UnitOfWork
+
+from .queue import WriteBehindQueue
+
+
+class WriteBehindRateRepository(RateRepository):
+    """Rate repository that also finds the rates still waiting in the write-behind queue."""
+
+    def __init__(self, repo: RateRepository, queue: WriteBehindQueue) -> None:
+        self.repo = repo
+        self.queue = queue
+
+    def get_by_id(self, rate_id: str) -> Rate | None:
+        return self.queue.rate(rate_id) or self.repo.get_by_id(rate_id)
+
+    def get_many(self, rate_ids: list[str]) -> list[Rate | None]:
+        rates = {rate_id: self.queue.rate(rate_id) for rate_id in rate_ids}
+
+        missing = [rate_id for rate_id, rate in rates.items() if rate is None]
+        if missing:
+            rates.update(zip(missing, self.repo.get_many(missing), strict=True))
+
+        return [rates[rate_id] for rate_id in rate_ids]
+
+    def get_by_client_and_plan(self, client_id: str, plan: str) -> Rate | None:
+        return self.queue.rate_for(client_id, plan) or self.repo.get_by_client_and_plan(client_id, plan)
+
+    def create(self, rate: Rate) -> None:
+        self.repo.create(rate)
+
+    def update(self, rate: Rate) -> None:
+        self.repo.update(rate)
+
+    def get_all(self) -> Generator[Rate, None, None]:
+        pending = self.queue.pending_rates()
+        yield from pending
+
+        pending_ids = {rate.id for rate in pending}
+        yield from (rate for rate in self.repo.get_all() if rate.id not in pending_ids)
+
+    def delete_all(self) -> None:
+        self.queue.flush_all()
+        self.repo.delete_all()
+
+
+class WriteBehindInvoiceRepository(InvoiceRepository):
+    """Invoice repository that also finds the invoices still waiting in the write-behind queue."""
+
+    def __init__(self, repo: InvoiceRepository, queue: WriteBehindQueue) -> None:
+        self.repo = repo
+        self.queue = queue
+
+    def get(self, invoice_id: str) -> Invoice | None:
+        return self.queue.invoice(invoice_id) or self.repo.get(invoice_id)
+
+    def get_many(self, invoice_ids: list[str]) -> list[Invoice | None]:
+        invoices = {invoice_id: self.queue.invoice(invoice_id) for invoice_id in invoice_ids}
+
+        missing = [invoice_id for invoice_id, invoice in invoices.items() if invoice is None]
+        if missing:
+            invoices.update(zip(missing, self.repo.get_many(missing), strict=True))
+
+        return [invoices[invoice_id] for invoice_id in invoice_ids]
+
+    def get_by_client_and_month(self, client_id: str, month: Month, year: int) -> Invoice | None:
+        pending = self.queue.invoice_for(client_id, month.value, year)
+        if pending is not None:
+            return pending
+
+        return self.repo.get_by_client_and_month(client_id, month, year)
+
+    def get_by_clients_and_month(self, client_ids: list[str], month: Month, year: int) -> list[Invoice | None]:
+        invoices = {client_id: self.queue.invoice_for(client_id, month.value, year) for client_id in client_ids}
+
+        missing = [client_id for client_id, invoice in invoices.items() if invoice is None]
+        if missing:
+            invoices.update(zip(missing, self.repo.get_by_clients_and_month(missing, month, year), strict=True))
+
+        return [invoices[client_id] for client_id in client_ids]
+
+    def get_by_client(self, client_id: str) -> list[Invoice]:
+        pending = [invoice for invoice in self.queue.pending_invoices() if invoice.client_id == client_id]
+        pending_ids = {invoice.id for invoice in pending}
+
+        return pending + [invoice for invoice in self.repo.get_by_client(client_id) if invoice.id not in pending_ids]
+
+    def get_by_month(self, month: Month, year: int) -> Generator[Invoice, None, None]:
+        pending = [
+            invoice
+            for invoice in self.queue.pending_invoices()
+            if invoice.billing_month == month.value and invoice.billing_year == year
+        ]
+        yield from pending
+
+        pending_ids = {invoice.id for invoice in pending}
+        yield from (invoice for invoice in self.repo.get_by_month(month, year) if invoice.id not in pending_ids)
+
+    def create(self, invoice: Invoice) -> None:
+        self.repo.create(invoice)
+
+    def update(self, invoice: Invoice) -> None:
+        self.repo.update(invoice)
+
+    def get_all(self) -> Generator[Invoice, None, None]:
+        pending = self.queue.pending_invoices()
+        yield from pending
+
+        pending_ids = {invoice.id for invoice in pending}
+        yield from (invoice for invoice in self.repo.get_all() if invoice.id not in pending_ids)
+
+    def delete_all(self) -> None:
+        # Pending invoices are stored first, otherwise the flusher would bring them back after the reset
+        self.queue.flush_all()
+        self.repo.delete_all()
+
+
+class WriteBehindRevenueRepository(RevenueRepository):
+    """Revenue repository that also adds the rollup changes still waiting in the write-behind queue."""
+
+    def __init__(self, repo: RevenueRepository, queue: WriteBehindQueue) -> None:
+        self.repo = repo
+        self.queue = queue
+
+    def get_range(self, first: str, last: str) -> list[RevenueRollup]:
+        pending = [rollup for rollup in self.queue.pending_revenue() if first <= rollup.period <= last]
+        if not pending:
+            return self.repo.get_range(first, last)
+
+        return merge_rollups([*self.repo.get_range(first, last), *pending])
+
+    def replace(self, rollups: list[RevenueRollup], first: str | None = None, last: str | None = None) -> None:
+        # Pending changes are stored first, otherwise the flusher would add them to the replaced rollups
+        self.queue.flush_all()
+        self.repo.replace(rollups, first, last)
+
+    def delete_all(self) -> None:
+        self.queue.flush_all()
+        self.repo.delete_all()
+
+
+class WriteBehindUnitOfWork(UnitOfWork):
+    """
+    Unit of work committed to the write-behind log, leaving the store to the background flusher.
+
+    It is not a ConditionalUnitOfWork: the stored invoices are only written long after the commit has returned.
+    """
+
+    def __init__(self, queue: WriteBehindQueue) -> None:
+        self.queue = queue
+        self.rates: list[Rate] = []
+        self.invoices: list[Invoice] = []
+        self.revenue: list[RevenueRollup] = []
+
+    def create_rate(self, rate: Rate) -> None:
+        self.rates.append(rate)
+
+    def create_invoice(self, invoice: Invoice) -> None:
+        self.invoices.append(invoice)
+
+    def save_rate(self, rate: Rate) -> None:
+        self.rates.append(rate)
+
+    def save_invoice(self, invoice: Invoice) -> None:
+        self.invoices.append(invoice)
+
+    def add_revenue(self, rollup: RevenueRollup) -> None:
+        self.revenue.append(rollup)
+
+    def commit(self) -> None:
+        if not self.rates and not self.invoices and not self.revenue:
+            return
+
+        self.queue.submit(self.rates, self.invoices, self.revenue)
+        self.rates = []
+        self.invoices = []
+        self.revenue = []
@@ -0,0 +1,136 @@
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from itertools import chain
+from typing import Any
+
+from models import Invoice, Month, Plan, RevenueRollup, merge_rollups
+from models.revenue_rollup import COUNTERS
+from reconciliation import batched
+from repositories import InvoiceRepository, RateRepository, RevenueRepository
+
+logger = logging.getLogger(__name__)
+
+
+def period_name(month: Month, year: int) -> str:
+    return f'{year}-{month.to_int():02d}'
+
+
+def summarize(counters: dict[str, int | float]) -> dict[str, Any]:
+    return {
+        'invoices': counters['invoices'],
+        'total_incidents': {
+            'web': counters['total_incidents_web'],
+            'mobile': counters['total_incidents_mobile'],
+            'email': counters['total_incidents_email'],
+        },
+        'fixed_revenue': counters['fixed_revenue'],
+        'variable_revenue': counters['variable_revenue'],
+        'total_revenue': counters['fixed_revenue'] + counters['variable_revenue'],
+    }
+
+
+def add_counters(rollups: Iterable[RevenueRollup]) -> dict[str, int | float]:
+    totals: dict[str, int | float] = dict.fromkeys(COUNTERS, 0)
+    for rollup in rollups:
+        for name, value in rollup.counters.items():
+            totals[name] += value
+    return totals
+
+
+def revenue_report(rollups: list[RevenueRollup], periods: list[tuple[Month, int]]) -> dict[str, Any]:
+    """Report the revenue of every period, per plan and in total, from the rollups of the periods."""
+    by_period: dict[str, list[RevenueRollup]] = {}
+    for rollup in rollups:
+        by_period.setdefault(rollup.period, []).append(rollup)
+
+    report_periods = []
+    for month, year in periods:
+        period_rollups = by_period.get(period_name(month, year), [])
+        report_periods.append(
+            {
+                'billing_month': month,
+                'billing_year': year,
+                'plans': {rollup.plan.value: summarize(rollup.counters) for rollup in period_rollups},
+                **summarize(add_counters(period_rollups)),
+            }
+        )
+
+    return {'periods': report_periods, **summarize(add_counters(rollups))}
+
+
+@dataclass
+class RebuildReport:
+    invoices: int = 0
+    # Invoices whose rate no longer exists, left out of the rollups
+    missing: int = 0
+    rollups: int = 0
+    duration: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def build_rollups(
+    invoices: Iterable[Invoice], rate_repo: RateRepository, batch_size: int, report: RebuildReport
+) -> list[RevenueRollup]:
+    """Add up the invoices into rollups, reading the rates of every batch of `batch_size` invoices at once."""
+    rollups: dict[tuple[str, Plan], RevenueRollup] = {}
+    for batch in batched(invoices, batch_size):
+        report.invoices += len(batch)
+        rate_ids = list(dict.fromkeys(invoice.rate_id for invoice in batch))
+        rates = dict(zip(rate_ids, rate_repo.get_many(rate_ids), strict=True))
+        contributions = []
+        for invoice in batch:
+            rate = rates[invoice.rate_id]
+            if rate is None:
+                logger.warning('Rate %s of invoice %s not found', invoice.rate_id, invoice.id)
+                report.missing += 1
+                continue
+            contributions.append(RevenueRollup.of_invoice(invoice, rate))
+        for rollup in merge_rollups(chain(rollups.values(), contributions)):
+            rollups[rollup.key] = rollup
+
+    return [rollups[key] for key in sorted(rollups)]
+
+
+def rebuild_rollups(
+    invoice_repo: InvoiceRepository,
+    rate_repo: RateRepository,
+    revenue_repo: RevenueRepository,
+    periods: list[tuple[Month, int]] | None = None,
+    batch_size: int = 500,
+) -> RebuildReport:
+    """
+    Recompute the revenue rollups of `periods`, of every period when not given, from their invoices.
+
+    Used to backfill the rollups of invoices stored before they were maintained, or to correct them. Invoices created
+    or reconciled while a period is being rebuilt may be left out of its rollups, so a rebuild is best run while no
+    invoices are being generated.
+    """
+    started = time.perf_counter()
+    report = RebuildReport()
+    if periods is None:
+        invoices: Iterable[Invoice] = invoice_repo.get_all()
+    else:
+        invoices = chain.from_iterable(invoice_repo.get_by_month(month, year) for month, year in periods)
+
+    rollups = build_rollups(invoices, rate_repo, batch_size, report)
+    if periods is None:
+        revenue_repo.replace(rollups)
+    else:
+        names = [period_name(month, year) for month, year in periods]
+        revenue_repo.replace(rollups, min(names), max(names))
+
+    report.rollups = len(rollups)
+    report.duration = time.perf_counter() - started
+    # json_fields is picked up as structured payload by the Cloud Logging handler
+    logger.info(
+        'Rebuilt %d revenue rollups from %d invoices, %d without a rate',
+        report.rollups,
+        report.invoices,
+        report.missing,
+        extra={'json_fields': report.to_dict()},
+    )
+    return report
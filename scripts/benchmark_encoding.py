@@ -0,0 +1,116 @@
+# ruff: noqa: INP001, T201
+"""
+Compares the size and encoding time of JSON and MessagePack invoice responses.
+
+Invoices of the synthetic demo dataset are converted with `invoice_result_to_dict`, the schema of the invoice endpoint,
+and every one is encoded into a full response by `json_response` and by `negotiated_response` asking for MessagePack,
+inside a request context as in the service. A second round encodes the whole invoice history of the clients in one
+body, as a bulk caller would read it. Decoding is timed with the standard json module and msgpack. Run from the
+repository root so the service modules can be imported:
+
+    python -m scripts.benchmark_encoding --clients 200 --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+import msgpack  # type: ignore[import-untyped]
+from flask import Flask, Response
+
+from blueprints.invoice import invoice_result_to_dict
+from blueprints.util import JSON_MIMETYPE, MSGPACK_MIMETYPE, json_response, negotiated_response
+from demo.data import Dataset
+
+
+def sample_results(dataset: Dataset) -> list[list[dict[str, Any]]]:
+    """Invoice responses of every client of the dataset, one list per client."""
+    return [
+        [invoice_result_to_dict(invoice, dataset.rate(index), client) for invoice in dataset.invoices(index)]
+        for index, client in enumerate(dataset.clients)
+    ]
+
+
+def time_per_call(func: Callable[[], object], repeat: int) -> float:
+    """Best of `repeat` rounds of the mean time of one call, in microseconds."""
+    rounds = []
+    for _ in range(repeat):
+        calls = 0
+        started = time.perf_counter()
+        while not calls or time.perf_counter() - started < 0.2:  # noqa: PLR2004
+            func()
+            calls += 1
+        rounds.append((time.perf_counter() - started) / calls * 1e6)
+    return min(rounds)
+
+
+def measure(  # noqa: PLR0913
+    app: Flask,
+    payloads: list[dict[str, Any]],
+    encode: Callable[[dict[str, Any]], Response],
+    decode: Callable[[bytes], object],
+    accept: str,
+    repeat: int,
+) -> dict[str, float]:
+    with app.test_request_context(headers={'Accept': accept}):
+        bodies = [encode(payload).get_data() for payload in payloads]
+
+        def encode_all() -> None:
+            for payload in payloads:
+                encode(payload)
+
+        encode_us = time_per_call(encode_all, repeat) / len(payloads)
+
+    def decode_all() -> None:
+        for body in bodies:
+            decode(body)
+
+    return {
+        'bytes': statistics.mean(len(body) for body in bodies),
+        'encode_us': encode_us,
+        'decode_us': time_per_call(decode_all, repeat) / len(bodies),
+    }
+
+
+def print_rows(title: str, results: dict[str, dict[str, float]]) -> None:
+    baseline = results['json']
+    print(f'\n{title}')
+    print(f'{"format":<10}{"bytes":>12}{"size":>8}{"encode µs":>12}{"decode µs":>12}')
+    for name, result in results.items():
+        print(
+            f'{name:<10}{result["bytes"]:>12.0f}{result["bytes"] / baseline["bytes"]:>8.0%}'
+            f'{result["encode_us"]:>12.1f}{result["decode_us"]:>12.1f}'
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    dataset = Dataset(seed=args.seed, client_count=args.clients, incident_count=0)
+    results = sample_results(dataset)
+    single = [result for client_results in results for result in client_results]
+    history = [{'invoices': client_results} for client_results in results]
+
+    app = Flask(__name__)
+    print(f'{len(single)} invoices of {len(results)} clients')
+    for title, payloads in (('single invoice', single), ('invoice history per client', history)):
+        print_rows(
+            title,
+            {
+                'json': measure(app, payloads, lambda data: json_response(data, 200), json.loads, JSON_MIMETYPE, args.repeat),
+                'msgpack': measure(
+                    app, payloads, lambda data: negotiated_response(data, 200), msgpack.unpackb, MSGPACK_MIMETYPE, args.repeat
+                ),
+            },
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+# ruff: noqa: INP001, T201, S603
+"""
+Compares the invoice generation throughput of gunicorn worker and thread combinations.
+
+For every combination the service is started with gunicorn.conf.py, against a SQLite store and a stand-in for the
+client and incident services that answers after a configurable latency. Load generator processes then request
+invoices for new clients in a closed loop, so every request fetches the client and its incidents, decodes and counts
+them and stores a rate and an invoice.
+
+    python scripts/benchmark_workers.py --combos 1x8,2x4,4x2 --duration 20
+"""
+
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def incidents_payload(count: int) -> bytes:
+    start = datetime.now(UTC).replace(day=1) - timedelta(days=20)
+    incidents = [
+        {
+            'id': str(uuid.UUID(int=index)),
+            'name': f'Incident {index}',
+            'channel': ('web', 'mobile', 'email')[index % 3],
+            'reported_by': 'user',
+            'created_by': 'agent',
+            'assigned_to': 'agent',
+            'history': [
+                {
+                    'seq': 0,
+                    'date': (start + timedelta(minutes=index)).isoformat(),
+                    'action': 'created',
+                    'description': 'Created',
+                }
+            ],
+        }
+        for index in range(count)
+    ]
+    return json.dumps(incidents).encode()
+
+
+def start_upstream(incidents: int, latency: float) -> ThreadingHTTPServer:
+    """Serve the client and incident service endpoints used by invoice generation, each answer delayed by `latency`."""
+    payload = incidents_payload(incidents)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self) -> None:  # noqa: N802
+            time.sleep(latency)
+            parts = self.path.split('?')[0].strip('/').split('/')
+            if parts[-1] == 'incidents':
+                body = payload
+            else:
+                body = json.dumps({'id': parts[-1], 'name': 'Benchmark', 'plan': 'empresario'}).encode()
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_service(workers: int, threads: int, port: int, upstream: str, directory: str) -> subprocess.Popen[bytes]:
+    env = {
+        **os.environ,
+        'PORT': str(port),
+        'GUNICORN_WORKERS': str(workers),
+        'GUNICORN_THREADS': str(threads),
+        'CLIENT_SVC_URL': upstream,
+        'INCIDENTQUERY_SVC_URL': upstream,
+        'STORAGE_BACKEND': 'sqlite',
+        'SQLITE_PATH': str(Path(directory) / f'benchmark-{workers}x{threads}.db'),
+        'ADMISSION_GENERATION_CONCURRENCY': str(threads),
+        'ADMISSION_GENERATION_QUEUE': str(threads),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn'], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/api/v1/health/invoice/ready', timeout=1).ok:
+                return proc
+        except requests.ConnectionError:
+            time.sleep(0.2)
+
+    proc.terminate()
+    raise RuntimeError(f'gunicorn with {workers}x{threads} did not become ready')
+
+
+def run_client(url: str, duration: float) -> tuple[list[float], int]:
+    """Request invoices of new clients until `duration` has elapsed, returning the latencies and the error count."""
+    session = requests.Session()
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        token = {'sub': 'benchmark', 'cid': str(uuid.uuid4()), 'role': 'admin', 'aud': 'admin'}
+        headers = {'X-Apigateway-Api-Userinfo': base64.urlsafe_b64encode(json.dumps(token).encode()).decode()}
+        start = time.perf_counter()
+        try:
+            ok = session.get(url, headers=headers, timeout=30).ok
+        except requests.RequestException:
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        errors += not ok
+
+    return latencies, errors
+
+
+def benchmark(workers: int, threads: int, args: argparse.Namespace, upstream: str, directory: str) -> None:
+    port = args.port
+    proc = start_service(workers, threads, port, upstream, directory)
+    try:
+        url = f'http://127.0.0.1:{port}/api/v1/invoice'
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.starmap(run_client, [(url, args.duration)] * args.clients)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    latencies = sorted(latency for client_latencies, _ in results for latency in client_latencies)
+    errors = sum(client_errors for _, client_errors in results)
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+    print(
+        f'{workers:>7} {threads:>7} {len(latencies) / args.duration:>9.1f} '
+        f'{statistics.median(latencies) * 1000 if latencies else 0.0:>8.1f} {p95 * 1000:>8.1f} {errors:>7}',
+        flush=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--combos', default='1x8,2x4,4x2,2x8,4x4', help='worker x thread combinations to compare')
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds of load for every combination')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent load generator processes')
+    parser.add_argument('--incidents', type=int, default=2000, help='incidents returned for every client')
+    parser.add_argument('--upstream-latency', type=float, default=0.02, help='seconds the stand-in services wait')
+    parser.add_argument('--port', type=int, default=18080)
+    args = parser.parse_args()
+
+    upstream = start_upstream(args.incidents, args.upstream_latency)
+    upstream_url = f'http://127.0.0.1:{upstream.server_address[1]}'
+
+    print(f'{os.cpu_count()} CPUs, Python {sys.version.split()[0]}, {args.clients} clients, {args.incidents} incidents')
+    print(f'{"workers":>7} {"threads":>7} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"errors":>7}')
+    with tempfile.TemporaryDirectory() as directory:
+        for combo in args.combos.split(','):
+            workers, threads = (int(value) for value in combo.split('x'))
+            benchmark(workers, threads, args, upstream_url, directory)
+
+
+if __name__ == '__main__':
+    main()
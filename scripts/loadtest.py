@@ -0,0 +1,318 @@
+# ruff: noqa: INP001, T201
+"""
+Drives load against a running instance of the service and reports throughput and latency percentiles as JSON.
+
+Closed loop runs a fixed number of concurrent users that send a request as soon as the previous one completes, so the
+level is a concurrency. Open loop sends requests at a fixed arrival rate regardless of how fast they are answered, so
+the level is in requests per second and the latency is measured from the time a request was due, not sent, which
+keeps a saturated server from hiding its queueing delay.
+
+Requests carry a token in the format of the API gateway and either read the invoice of a client whose invoice was
+already generated (primed before the sweep) or generate the invoice of a client never requested before. The clients
+are either the ids of a file, e.g. the clients of a demo dataset, or random ids for a stand-in that knows every client.
+
+    python -m demo clients > clients.txt
+    python scripts/loadtest.py --url http://127.0.0.1:8080 --client-ids clients.txt --mode closed --levels 1,4,16,64
+    python scripts/loadtest.py --url http://127.0.0.1:8080 --mode open --levels 50,100,200 --output build-a.json
+    python scripts/loadtest.py --url http://127.0.0.1:8080 --mode open --levels 50,100,200 --baseline build-a.json
+
+The mix of requests and the open loop arrivals are drawn from the seed, so runs with the same arguments against
+different builds send the same schedule and their reports can be compared level by level.
+"""
+
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import requests
+
+KINDS = ('cached', 'first')
+ROUTE = '/api/v1/invoice'
+
+
+@dataclass(frozen=True)
+class Settings:
+    url: str
+    mode: str
+    duration: float
+    warmup: float
+    first_ratio: float
+    seed: int
+    timeout: float
+    max_inflight: int
+    warm_clients: tuple[str, ...]
+
+
+# (kind, latency in seconds, status code or 0 when the request failed)
+Sample = tuple[str, float, int]
+
+
+def token_header(client_id: str) -> dict[str, str]:
+    """Encode a token with the fields `requires_token` checks, as the API gateway forwards it."""
+    token = {'sub': 'loadtest', 'cid': client_id, 'role': 'admin', 'aud': 'admin'}
+    return {'X-Apigateway-Api-Userinfo': base64.urlsafe_b64encode(json.dumps(token).encode()).decode()}
+
+
+class ClientPicker:
+    """Hands out clients, the warm ones at random and the fresh ones once each, shared by the processes of a run."""
+
+    def __init__(self, warm: tuple[str, ...], fresh: list[str] | None, counter: Any, rng: random.Random) -> None:  # noqa: ANN401
+        self.warm = warm
+        self.fresh = fresh
+        self.counter = counter
+        self.rng = rng
+        self.exhausted = 0
+
+    def pick(self, kind: str) -> tuple[str, str]:
+        if kind == 'first':
+            if self.fresh is None:
+                return kind, str(uuid.uuid4())
+
+            with self.counter.get_lock():
+                index = self.counter.value
+                self.counter.value += 1
+            if index < len(self.fresh):
+                return kind, self.fresh[index]
+
+            # Every client of the file has an invoice by now, the request is a cached read
+            self.exhausted += 1
+
+        return 'cached', self.rng.choice(self.warm)
+
+
+worker_state: dict[str, Any] = {}
+
+
+def init_worker(fresh: list[str] | None, counter: Any) -> None:  # noqa: ANN401
+    worker_state['fresh'] = fresh
+    worker_state['counter'] = counter
+
+
+def send(settings: Settings, session: requests.Session, client_id: str) -> int:
+    try:
+        return session.get(settings.url + ROUTE, headers=token_header(client_id), timeout=settings.timeout).status_code
+    except requests.RequestException:
+        return 0
+
+
+class Worker:
+    """Applies a load generator process' share of a level, keeping the samples of the requests due after the warmup."""
+
+    def __init__(self, settings: Settings, level: float, worker: int, workers: int) -> None:
+        self.settings = settings
+        self.level = level
+        self.worker = worker
+        self.workers = workers
+        self.rng = random.Random(f'{settings.seed}:{level}:{worker}')  # noqa: S311
+        self.picker = ClientPicker(settings.warm_clients, worker_state['fresh'], worker_state['counter'], self.rng)
+        self.sessions = threading.local()
+        self.samples: list[Sample] = []
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.measured_from = self.start + settings.warmup
+        self.end = self.start + settings.duration
+
+    def request(self, due: float, kind: str, client_id: str) -> None:
+        if not hasattr(self.sessions, 'session'):
+            self.sessions.session = requests.Session()
+        status = send(self.settings, self.sessions.session, client_id)
+        if due >= self.measured_from:
+            with self.lock:
+                self.samples.append((kind, time.perf_counter() - due, status))
+
+    def next_request(self) -> tuple[str, str]:
+        with self.lock:
+            return self.picker.pick('first' if self.rng.random() < self.settings.first_ratio else 'cached')
+
+    def user(self) -> None:
+        while (due := time.perf_counter()) < self.end:
+            self.request(due, *self.next_request())
+
+    def run_closed(self) -> None:
+        users = int(self.level) // self.workers + (self.worker < int(self.level) % self.workers)
+        threads = [threading.Thread(target=self.user) for _ in range(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_open(self) -> None:
+        # Poisson arrivals at this process' share of the rate, each request is due at its arrival time
+        rate = self.level / self.workers
+        with ThreadPoolExecutor(max_workers=max(1, self.settings.max_inflight // self.workers)) as executor:
+            due = self.start + self.rng.expovariate(rate)
+            while due < self.end:
+                kind, client_id = self.next_request()
+                time.sleep(max(0.0, due - time.perf_counter()))
+                executor.submit(self.request, due, kind, client_id)
+                due += self.rng.expovariate(rate)
+
+
+def run_worker(settings: Settings, level: float, worker: int, workers: int) -> tuple[list[Sample], int]:
+    runner = Worker(settings, level, worker, workers)
+    if settings.mode == 'closed':
+        runner.run_closed()
+    else:
+        runner.run_open()
+
+    return runner.samples, runner.picker.exhausted
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Nearest rank percentile of sorted values."""
+    if not values:
+        return 0.0
+
+    return values[min(len(values) - 1, max(0, int(len(values) * fraction + 0.5) - 1))]
+
+
+def summarize(samples: list[Sample], window: float) -> dict[str, Any]:
+    latencies = sorted(latency for _, latency, _ in samples)
+    statuses = Counter(status for _, _, status in samples)
+    errors = sum(count for status, count in statuses.items() if not 200 <= status < 300)  # noqa: PLR2004
+    return {
+        'requests': len(samples),
+        'throughput': round((len(samples) - errors) / window, 2),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.5) * 1000, 2),
+            'p95': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99': round(percentile(latencies, 0.99) * 1000, 2),
+            'max': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            'mean': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        },
+    }
+
+
+def run_level(settings: Settings, level: float, processes: int, pool: Any) -> dict[str, Any]:  # noqa: ANN401
+    workers = max(1, min(processes, int(level))) if settings.mode == 'closed' else processes
+    results = pool.starmap(run_worker, [(settings, level, worker, workers) for worker in range(workers)])
+    samples = [sample for worker_samples, _ in results for sample in worker_samples]
+    window = settings.duration - settings.warmup
+    return {
+        'level': level,
+        **summarize(samples, window),
+        'by_kind': {kind: summarize([sample for sample in samples if sample[0] == kind], window) for kind in KINDS},
+        'fresh_clients_exhausted': sum(exhausted for _, exhausted in results),
+    }
+
+
+def prime(settings: Settings) -> None:
+    """Request the invoice of every warm client once, so their requests during the sweep are cached reads."""
+    session = requests.Session()
+    failed = sum(not 200 <= send(settings, session, client_id) < 300 for client_id in settings.warm_clients)  # noqa: PLR2004
+    if failed:
+        print(f'{failed} of {len(settings.warm_clients)} warm clients could not be primed', file=sys.stderr)
+
+
+def print_row(result: dict[str, Any], baseline: dict[float, dict[str, Any]]) -> None:
+    latency = result['latency_ms']
+    row = (
+        f'{result["level"]:>8g} {result["throughput"]:>9.1f} {latency["p50"]:>8.1f} {latency["p95"]:>8.1f} '
+        f'{latency["p99"]:>8.1f} {latency["max"]:>8.1f} {result["error_rate"]:>7.2%}'
+    )
+    previous = baseline.get(result['level'])
+    if previous is not None:
+        throughput_change = result['throughput'] / previous['throughput'] - 1 if previous['throughput'] else 0.0
+        p95_change = latency['p95'] / previous['latency_ms']['p95'] - 1 if previous['latency_ms']['p95'] else 0.0
+        row += f'  req/s {throughput_change:+.1%} p95 {p95_change:+.1%}'
+    print(row, file=sys.stderr, flush=True)
+
+
+def read_client_ids(path: str | None) -> list[str] | None:
+    if path is None:
+        return None
+
+    return [line.strip() for line in Path(path).read_text(encoding='utf-8').splitlines() if line.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help='base url of the service')
+    parser.add_argument('--mode', choices=('closed', 'open'), default='closed')
+    parser.add_argument('--levels', default='1,2,4,8,16,32', help='concurrencies (closed) or requests per second (open)')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of load at every level')
+    parser.add_argument('--warmup', type=float, default=5.0, help='seconds at the start of every level left out')
+    parser.add_argument('--first-ratio', type=float, default=0.1, help='fraction of requests generating an invoice')
+    parser.add_argument('--client-ids', help='file with a client id per line, random ids are used otherwise')
+    parser.add_argument('--warm-clients', type=int, default=100, help='clients primed for the cached reads')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='load generator processes')
+    parser.add_argument('--max-inflight', type=int, default=512, help='concurrent requests of the open loop')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--label', default='', help='name of the build under test, stored in the report')
+    parser.add_argument('--output', help='write the report to this file instead of stdout')
+    parser.add_argument('--baseline', help='report of a previous run to compare every level with')
+    args = parser.parse_args()
+
+    client_ids = read_client_ids(args.client_ids)
+    if client_ids is None:
+        warm = tuple(
+            str(uuid.uuid5(uuid.NAMESPACE_URL, f'loadtest:{args.seed}:{index}')) for index in range(args.warm_clients)
+        )
+        fresh = None
+    else:
+        warm, fresh = tuple(client_ids[: args.warm_clients]), client_ids[args.warm_clients :]
+
+    settings = Settings(
+        url=args.url.rstrip('/'),
+        mode=args.mode,
+        duration=args.duration,
+        warmup=args.warmup,
+        first_ratio=args.first_ratio,
+        seed=args.seed,
+        timeout=args.timeout,
+        max_inflight=args.max_inflight,
+        warm_clients=warm,
+    )
+    baseline: dict[float, dict[str, Any]] = {}
+    if args.baseline:
+        baseline = {result['level']: result for result in json.loads(Path(args.baseline).read_text('utf-8'))['results']}
+
+    started_at = datetime.now(UTC).isoformat()
+    prime(settings)
+    unit = 'users' if args.mode == 'closed' else 'req/s'
+    print(f'{unit:>8} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"max ms":>8} {"errors":>7}', file=sys.stderr)
+    counter = multiprocessing.Value('q', 0)
+    results = []
+    with multiprocessing.Pool(args.processes, initializer=init_worker, initargs=(fresh, counter)) as pool:
+        for level in (float(value) for value in args.levels.split(',')):
+            result = run_level(settings, level, args.processes, pool)
+            results.append(result)
+            print_row(result, baseline)
+
+    report = {
+        'meta': {
+            'label': args.label,
+            'started_at': started_at,
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            **{key: value for key, value in vars(args).items() if key not in {'output', 'baseline', 'label'}},
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# ruff: noqa: INP001, T201
+"""
+Rebuilds the revenue rollups of the stored invoices, e.g. to backfill them or after a write-behind log was replayed.
+
+    python -m scripts.rebuild_revenue
+    STORAGE_BACKEND=sqlite python -m scripts.rebuild_revenue --from 2024-01 --to 2024-12
+
+Invoices, rates and rollups are read and written through the backends configured in the environment, as in the
+service. Without a range every period is rebuilt and rollups of periods without invoices are removed, with a range
+only the rollups of its periods are replaced.
+"""
+
+import argparse
+import json
+import logging
+from datetime import UTC, datetime
+
+from app import load_config
+from blueprints.usage import from_period, to_period
+from containers import Container
+from revenue import rebuild_rollups
+
+
+def parse_period(value: str) -> int:
+    try:
+        parsed = datetime.strptime(value, '%Y-%m').replace(tzinfo=UTC)
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected YYYY-MM') from None
+    return to_period(parsed.year, parsed.month)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--from', dest='first', type=parse_period, help='first billing period as YYYY-MM')
+    parser.add_argument('--to', dest='last', type=parse_period, help='last billing period as YYYY-MM')
+    parser.add_argument('--batch-size', type=int, default=500, help='invoices whose rates are read together')
+    args = parser.parse_args()
+
+    if (args.first is None) != (args.last is None):
+        parser.error('--from and --to must be given together')
+    if args.first is not None and args.first > args.last:
+        parser.error('--from must not be after --to')
+
+    logging.basicConfig(level=logging.INFO)
+    container = Container()
+    load_config(container)
+
+    periods = None if args.first is None else [from_period(period) for period in range(args.first, args.last + 1)]
+    report = rebuild_rollups(
+        invoice_repo=container.invoice_repo(),
+        rate_repo=container.rate_repo(),
+        revenue_repo=container.revenue_repo(),
+        periods=periods,
+        batch_size=args.batch_size,
+    )
+    print(json.dumps(report.to_dict(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
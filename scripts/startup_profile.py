@@ -0,0 +1,56 @@
+# ruff: noqa: INP001, T201, S603
+"""
+Reports where the service spends its cold start time.
+
+Runs a fresh interpreter with `-X importtime`, builds the app, serves one health check request and prints the
+import time aggregated by top level package, followed by the time it took to answer the health check.
+"""
+
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import time
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+created = time.perf_counter()
+resp = app.test_client().get('/api/v1/health/invoice')
+served = time.perf_counter()
+print(f'create_app: {(created - start) * 1000:.1f} ms', flush=True)
+print(f'first health check ({resp.status_code}): {(served - created) * 1000:.1f} ms', flush=True)
+"""
+
+
+def main() -> None:
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    self_time_by_package: dict[str, int] = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        self_us, _, module = line.removeprefix('import time:').split('|')
+        self_time_by_package[module.strip().split('.')[0]] += int(self_us)
+
+    total = sum(self_time_by_package.values())
+    print(f'{"package":<40} {"ms":>8} {"share":>7}')
+    for package, package_us in sorted(self_time_by_package.items(), key=lambda item: item[1], reverse=True)[:25]:
+        print(f'{package:<40} {package_us / 1000:>8.1f} {package_us / total:>7.1%}')
+    print(f'{"total":<40} {total / 1000:>8.1f}')
+    print()
+    print(proc.stdout, end='')
+
+
+if __name__ == '__main__':
+    main()
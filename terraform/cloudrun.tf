@@ -27,6 +27,11 @@ resource "google_cloud_run_v2_service" "default" {
         value = "1"
       }
 
+      env {
+        name = "FAST_STARTUP"
+        value = "1"
+      }
+
       env {
         name = "ENABLE_CLOUD_TRACE"
         value = "1"
@@ -37,6 +42,16 @@ resource "google_cloud_run_v2_service" "default" {
         value = google_firestore_database.default.name
       }
 
+      env {
+        name = "ENABLE_WARMUP"
+        value = "1"
+      }
+
+      env {
+        name = "WARMUP_PRELOAD_RATES"
+        value = "1000"
+      }
+
       env {
         name = "USE_CLOUD_TOKEN_PROVIDER"
         value = "1"
@@ -52,10 +67,13 @@ resource "google_cloud_run_v2_service" "default" {
         value = "https://incidentquery-${data.google_project.default.number}.${local.region}.run.app"
       }
 
+      # Traffic is only routed to the instance once the warm-up has finished
       startup_probe {
         http_get {
-          path = "/api/v1/health/${local.service_name}"
+          path = "/api/v1/health/${local.service_name}/ready"
         }
+        period_seconds = 1
+        failure_threshold = 30
       }
 
       liveness_probe {
@@ -90,6 +108,7 @@ data "google_iam_policy" "default" {
     members = [
       data.google_service_account.apigateway.member,
       data.google_service_account.backup.member,
+      google_service_account.pubsub.member,
     ]
   }
 }
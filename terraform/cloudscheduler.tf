@@ -50,3 +50,28 @@ resource "google_cloud_scheduler_job" "backup" {
 
   depends_on = [ google_project_service.cloudscheduler ]
 }
+
+# Creates a Cloud Scheduler job, that recounts the incidents of last month's invoices daily and updates the invoices
+# whose counts changed because incidents were backdated into the month after it was billed.
+resource "google_cloud_scheduler_job" "reconcile" {
+  name             = "reconcile-${local.service_name}"
+  region           = local.region
+  schedule         = "0 8 * * *"
+  time_zone        = "Etc/UTC"
+  attempt_deadline = "1800s"
+
+  retry_config {
+    retry_count = 1
+  }
+
+  http_target {
+    http_method = "POST"
+    uri         = "https://${local.service_name}-${data.google_project.default.number}.${local.region}.run.app/api/v1/reconcile/${local.service_name}"
+    oidc_token {
+      service_account_email = data.google_service_account.backup.email
+      audience = "https://${local.service_name}-${data.google_project.default.number}.${local.region}.run.app"
+    }
+  }
+
+  depends_on = [ google_project_service.cloudscheduler ]
+}
@@ -0,0 +1,46 @@
+# Enables the Pub/Sub API for the project.
+resource "google_project_service" "pubsub" {
+  service = "pubsub.googleapis.com"
+
+  # Prevents the API from being disabled when the resource is destroyed.
+  disable_on_destroy = false
+}
+
+# Retrieves the topic where client changes are published.
+# This is defined as part of the client microservice.
+data "google_pubsub_topic" "client_events" {
+  name = "client-events"
+
+  depends_on = [ google_project_service.pubsub ]
+}
+
+# Creates a service account used by Pub/Sub to authenticate the push requests to this microservice.
+resource "google_service_account" "pubsub" {
+  account_id   = "${local.service_name}-pubsub"
+  display_name = "Service Account ${local.service_name} Pub/Sub push"
+
+  depends_on = [ google_project_service.iam ]
+}
+
+# Pushes client events to this microservice, which evicts the cached data of the client.
+resource "google_pubsub_subscription" "client_events" {
+  name  = "${local.service_name}-client-events"
+  topic = data.google_pubsub_topic.client_events.id
+
+  ack_deadline_seconds = 10
+
+  push_config {
+    push_endpoint = "https://${local.service_name}-${data.google_project.default.number}.${local.region}.run.app/api/v1/events/${local.service_name}"
+    oidc_token {
+      service_account_email = google_service_account.pubsub.email
+      audience = "https://${local.service_name}-${data.google_project.default.number}.${local.region}.run.app"
+    }
+  }
+
+  retry_policy {
+    minimum_backoff = "1s"
+    maximum_backoff = "60s"
+  }
+
+  depends_on = [ google_project_service.pubsub ]
+}
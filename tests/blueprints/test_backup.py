@@ -1,11 +1,11 @@
-import json
-from typing import cast
+from typing import Any, cast
 from unittest import TestCase
 
-import responses
 from faker import Faker
 
 from app import create_app
+from backup import FAILED, SUCCEEDED
+from tests.test_backup import serve_export_api, wait_finished
 
 
 class TestBackup(TestCase):
@@ -20,32 +20,69 @@ class TestBackup(TestCase):
 
         self.app.container.config.project_id.override(self.project_id)
         self.app.container.config.firestore.database.override(self.database)
+        self.app.container.config.backup.poll_interval.override(0.01)
+        self.app.container.config.backup.max_poll_interval.override(0.01)
         self.app.container.access_token.override(self.access_token)
 
     def tearDown(self) -> None:
+        self.app.container.backup_manager().stop()
         self.app.container.unwire()
 
     def test_backup_success(self) -> None:
-        with responses.RequestsMock() as rsps:
-            rsps.post(
-                f'https://firestore.googleapis.com/v1/projects/{self.project_id}/databases/{self.database}:exportDocuments',
-                status=200,
-            )
+        url, requests_received = serve_export_api(self, polls_until_done=2)
+        self.app.container.config.backup.api_url.override(url)
+
+        with self.assertLogs(level='INFO'):
             resp = self.client.post('/api/v1/backup/user')
-            self.assertEqual(rsps.calls[0].request.headers['Authorization'], f'Bearer {self.access_token}')
-            req_json = json.loads(cast(str, rsps.calls[0].request.body))
-            self.assertTrue(
-                cast(str, req_json['outputUriPrefix']).startswith(f'gs://{self.project_id}-backup/firestore/{self.database}/')
+            retried = self.client.post('/api/v1/backup/user')
+            operation = self.app.container.backup_manager().operations[cast(dict[str, Any], resp.json)['operation']['id']]
+            wait_finished(operation)
+
+        self.assertEqual(resp.status_code, 202)
+        data = cast(dict[str, Any], resp.json)
+        self.assertTrue(data['started'])
+        self.assertEqual(resp.headers['Location'], f'/api/v1/backup/user/operations/{operation.id}')
+        self.assertFalse(cast(dict[str, Any], retried.json)['started'])
+        self.assertEqual(cast(dict[str, Any], retried.json)['operation']['id'], operation.id)
+        self.assertEqual(len(requests_received), 1)
+        self.assertEqual(requests_received[0]['headers']['Authorization'], f'Bearer {self.access_token}')
+        self.assertTrue(
+            cast(str, requests_received[0]['body']['outputUriPrefix']).startswith(
+                f'gs://{self.project_id}-backup/firestore/{self.database}/'
             )
-        self.assertEqual(resp.status_code, 200)
+        )
+
+        status = self.client.get(resp.headers['Location'])
+
+        self.assertEqual(status.status_code, 200)
+        self.assertEqual(cast(dict[str, Any], status.json)['state'], SUCCEEDED)
 
     def test_backup_failure(self) -> None:
-        with responses.RequestsMock() as rsps, self.assertLogs(level='ERROR'):
-            rsps.post(
-                f'https://firestore.googleapis.com/v1/projects/{self.project_id}/databases/{self.database}:exportDocuments',
-                status=500,
-                json={'error': {'message': 'Internal Server Error'}},
-            )
+        url, _ = serve_export_api(self, rejected=True)
+        self.app.container.config.backup.api_url.override(url)
+
+        with self.assertLogs(level='ERROR'):
             resp = self.client.post('/api/v1/backup/user')
+            operation = self.app.container.backup_manager().operations[cast(dict[str, Any], resp.json)['operation']['id']]
+            wait_finished(operation)
+
+        status = self.client.get(resp.headers['Location'])
+
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(cast(dict[str, Any], status.json)['state'], FAILED)
+
+    def test_status_not_found(self) -> None:
+        url, _ = serve_export_api(self)
+        self.app.container.config.backup.api_url.override(url)
+
+        resp = self.client.get('/api/v1/backup/user/operations/unknown')
+
+        self.assertEqual(resp.status_code, 404)
+
+    def test_status_lookup_failure(self) -> None:
+        self.app.container.config.backup.api_url.override('http://127.0.0.1:1')
+
+        with self.assertLogs(level='ERROR'):
+            resp = self.client.get('/api/v1/backup/user/operations/20261019T070000Z')
 
-        self.assertEqual(resp.status_code, 500)
+        self.assertEqual(resp.status_code, 502)
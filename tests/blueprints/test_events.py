@@ -0,0 +1,82 @@
+import base64
+import json
+from typing import Any, cast
+from unittest.mock import Mock
+
+from faker import Faker
+from unittest_parametrize import ParametrizedTestCase, parametrize
+
+from app import create_app
+from blueprints.invoice import get_billing_period, invoice_cache_key
+from models import Client, Plan, Rate
+from repositories import RateRepository
+
+
+class TestEvents(ParametrizedTestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.app = create_app()
+        self.client = self.app.test_client()
+
+        self.customer = Client(id=cast(str, self.faker.uuid4()), name=self.faker.company(), plan=Plan.EMPRESARIO)
+        self.rate = Rate(
+            id=cast(str, self.faker.uuid4()),
+            plan=Plan.EMPRESARIO,
+            client_id=self.customer.id,
+            fixed_cost=6.0,
+            cost_per_incident_web=0.13,
+            cost_per_incident_mobile=0.08,
+            cost_per_incident_email=0.06,
+        )
+        billing_month, billing_year = get_billing_period()
+        self.invoice_key = invoice_cache_key(self.customer.id, billing_month, billing_year)
+
+        self.app.container.firestore_rate_repo.override(Mock(RateRepository))
+        self.app.container.client_cache().set(self.customer.id, self.customer)
+        self.app.container.rate_repo().preload([self.rate])
+        self.app.container.invoice_cache().set(self.invoice_key, {'client_id': self.customer.id})
+
+    def tearDown(self) -> None:
+        self.app.container.unwire()
+
+    def push(self, event: Any) -> dict[str, Any]:  # noqa: ANN401
+        data = base64.b64encode(json.dumps(event).encode()).decode()
+        return {'message': {'data': data, 'messageId': '1'}, 'subscription': 'projects/test/subscriptions/invoice'}
+
+    @parametrize('event', [('client-updated',), ('plan-changed',)])
+    def test_client_event(self, event: str) -> None:
+        with self.assertLogs(level='INFO'):
+            resp = self.client.post('/api/v1/events/invoice', json=self.push({'event': event, 'client_id': self.customer.id}))
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertIsNone(self.app.container.client_cache().get(self.customer.id))
+        self.assertIsNone(self.app.container.invoice_cache().get(self.invoice_key))
+        rate_cache = self.app.container.rate_cache()
+        self.assertIsNone(rate_cache.get(f'client:{self.customer.id}:{self.rate.plan}'))
+        self.assertEqual(rate_cache.get(f'id:{self.rate.id}'), self.rate)
+
+    def test_other_event(self) -> None:
+        resp = self.client.post('/api/v1/events/invoice', json=self.push({'event': 'client-created', 'client_id': 'x'}))
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()['status'], 'Ignored')
+        self.assertEqual(self.app.container.client_cache().get(self.customer.id), self.customer)
+
+    @parametrize(
+        'body',
+        [
+            ({'message': {'data': 'not base64!'}},),
+            ({'message': {'data': base64.b64encode(b'not json').decode()}},),
+            ({'subscription': 'projects/test/subscriptions/invoice'},),
+            ([],),
+        ],
+    )
+    def test_invalid(self, body: Any) -> None:  # noqa: ANN401
+        resp = self.client.post('/api/v1/events/invoice', json=body)
+
+        self.assertEqual(resp.status_code, 400)
+
+    def test_missing_client_id(self) -> None:
+        resp = self.client.post('/api/v1/events/invoice', json=self.push({'event': 'plan-changed'}))
+
+        self.assertEqual(resp.status_code, 400)
@@ -1,14 +1,30 @@
 from unittest import TestCase
 
 from app import create_app
+from warmup import WarmUp
 
 
 class TestHealth(TestCase):
     def setUp(self) -> None:
-        app = create_app()
-        self.client = app.test_client()
+        self.app = create_app()
+        self.client = self.app.test_client()
+
+    def tearDown(self) -> None:
+        self.app.container.unwire()
 
     def test_health(self) -> None:
         resp = self.client.get('/api/v1/health/invoice')
 
         self.assertEqual(resp.status_code, 200)
+
+    def test_ready(self) -> None:
+        resp = self.client.get('/api/v1/health/invoice/ready')
+
+        self.assertEqual(resp.status_code, 200)
+
+    def test_ready_warming_up(self) -> None:
+        with self.app.container.warmup.override(WarmUp()):
+            resp = self.client.get('/api/v1/health/invoice/ready')
+
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.get_json()['status'], 'Warming up')
@@ -4,20 +4,23 @@ from datetime import UTC, datetime
 from typing import Any, cast
 from unittest.mock import MagicMock, Mock, patch
 
+import msgpack  # type: ignore[import-untyped]
 import responses
 from faker import Faker
 from unittest_parametrize import ParametrizedTestCase, parametrize
 
+from admission import AdmissionPool, AdmissionRejectedError
 from app import create_app
 from blueprints.invoice import (
     create_invoice,
     create_rate,
     get_billing_period,
     get_incidents_by_client_and_month,
+    invoice_id,
     invoice_result_to_dict,
 )
-from models import Channel, Client, Incident, Invoice, Month, Plan, Rate, Role
-from repositories import ClientRepository, IncidentRepository, InvoiceRepository, RateRepository
+from models import Channel, Client, Incident, IncidentBatch, Invoice, Month, Plan, Rate, RevenueRollup, Role
+from repositories import ClientRepository, IncidentRepository, InvoiceRepository, RateRepository, UnitOfWork
 
 
 class TestInvoice(ParametrizedTestCase):
@@ -30,6 +33,7 @@ class TestInvoice(ParametrizedTestCase):
         self.incident_repo = MagicMock(spec=IncidentRepository)
         self.invoice_repo = MagicMock(spec=InvoiceRepository)
         self.rate_repo = MagicMock(spec=RateRepository)
+        self.unit_of_work = MagicMock(spec=UnitOfWork)
 
         self.client_id = self.faker.uuid4()
         self.rate = Rate(
@@ -74,35 +78,45 @@ class TestInvoice(ParametrizedTestCase):
     )
     def test_create_rate(self, *, plan: str, expect_error: bool) -> None:
         self.client.plan = cast(Plan, plan)
-        self.rate_repo.create = MagicMock()
 
         if expect_error:
             with self.assertRaises(ValueError):
-                create_rate(self.client, self.rate_repo)
+                create_rate(self.client, self.unit_of_work)
         else:
-            rate = create_rate(self.client, self.rate_repo)
+            rate = create_rate(self.client, self.unit_of_work)
 
             self.assertEqual(rate.client_id, self.client.id)
             self.assertEqual(rate.plan, self.client.plan)
-            self.rate_repo.create.assert_called_once_with(rate)
+            self.unit_of_work.create_rate.assert_called_once_with(rate)
 
     def test_get_incidents_by_client_and_month(self) -> None:
-        mock_incident = MagicMock(spec=Incident)
-        mock_incident.history = [MagicMock(date=datetime(2024, 11, 1, tzinfo=UTC))]
-        self.incident_repo.get_incidents_by_client_id.return_value = [mock_incident]
+        incidents = [
+            Incident(
+                id=str(self.faker.uuid4()),
+                channel=Channel.WEB,
+                name=self.faker.sentence(),
+                reported_by=str(self.faker.uuid4()),
+                created_by=str(self.faker.uuid4()),
+                assigned_to=str(self.faker.uuid4()),
+                history=[MagicMock(date=date)],
+            )
+            for date in (datetime(2024, 10, 31, 23, 59, tzinfo=UTC), datetime(2024, 11, 1, tzinfo=UTC))
+        ]
+        self.incident_repo.get_incident_batch_by_client_id.return_value = IncidentBatch.from_incidents(
+            incidents, history_loader={incident.id: incident.history for incident in incidents}.__getitem__
+        )
 
-        incidents = get_incidents_by_client_and_month(
+        batch = get_incidents_by_client_and_month(
             client_id=str(self.client_id),
             month=Month.NOVEMBER,
             year=2024,
             incident_repo=self.incident_repo,
         )
 
-        self.assertEqual(len(incidents), 1)
-        self.assertEqual(incidents[0], mock_incident)
+        self.assertEqual(batch.ids, [incidents[1].id])
+        self.assertEqual(batch.history(0), incidents[1].history)
 
     def test_create_invoice(self) -> None:
-        self.invoice_repo.create = MagicMock()
         month_year = (Month.NOVEMBER, 2024)
 
         history_date = datetime(2024, 11, 15, tzinfo=UTC)
@@ -128,21 +142,23 @@ class TestInvoice(ParametrizedTestCase):
             ),
         ]
 
-        self.incident_repo.get_incidents_by_client_id.return_value = incidents
+        self.incident_repo.get_incident_batch_by_client_id.return_value = IncidentBatch.from_incidents(incidents)
 
         invoice = create_invoice(
             month_year=month_year,
             client_id=str(self.client_id),
             rate=self.rate,
             incident_repo=self.incident_repo,
-            invoice_repo=self.invoice_repo,
+            unit_of_work=self.unit_of_work,
         )
 
         self.assertEqual(invoice.billing_month, Month.NOVEMBER)
         self.assertEqual(invoice.billing_year, 2024)
         self.assertEqual(invoice.total_incidents_web, 1)
         self.assertEqual(invoice.total_incidents_mobile, 1)
-        self.invoice_repo.create.assert_called_once_with(invoice)
+        self.assertEqual(invoice.id, invoice_id(str(self.client_id), Month.NOVEMBER, 2024))
+        self.unit_of_work.create_invoice.assert_called_once_with(invoice)
+        self.unit_of_work.add_revenue.assert_called_once_with(RevenueRollup.of_invoice(invoice, self.rate))
 
     def test_invoice_result_to_dict(self) -> None:
         invoice = Invoice(
@@ -177,7 +193,7 @@ class TestInvoice(ParametrizedTestCase):
         mock_client_repo.get.return_value = self.client
         mock_rate_repo.get_by_client_and_plan.return_value = self.rate
         mock_invoice_repo.get_by_client_and_month.return_value = None
-        mock_incidentquery_repo.get_incidents_by_client_id.return_value = []
+        mock_incidentquery_repo.get_incident_batch_by_client_id.return_value = IncidentBatch()
 
         token = {'sub': 'uuid-del-usuario', 'cid': str(self.client_id), 'role': 'admin', 'aud': 'admin'}
         token_encoded = base64.urlsafe_b64encode(json.dumps(token).encode()).decode()
@@ -187,12 +203,212 @@ class TestInvoice(ParametrizedTestCase):
             self.app.container.rate_repo.override(mock_rate_repo),
             self.app.container.invoice_repo.override(mock_invoice_repo),
             self.app.container.incidentquery_repo.override(mock_incidentquery_repo),
+            self.app.container.unit_of_work.override(self.unit_of_work),
             self.app.test_client() as client,
         ):
             resp = client.get('/api/v1/invoice', headers={'X-Apigateway-Api-Userinfo': token_encoded})
 
             self.assertEqual(resp.status_code, 200)
 
+        self.unit_of_work.create_rate.assert_not_called()
+        self.unit_of_work.create_invoice.assert_called_once()
+        self.unit_of_work.commit.assert_called_once()
+
+    def test_get_invoice_new_client(self) -> None:
+        self.client_repo.get.return_value = self.client
+        self.rate_repo.get_by_client_and_plan.return_value = None
+        self.invoice_repo.get_by_client_and_month.return_value = None
+        self.incident_repo.get_incident_batch_by_client_id.return_value = IncidentBatch()
+
+        token = self.gen_token_employee(role=Role.ADMIN, client_id=str(self.client_id), assigned=True)
+
+        with (
+            self.app.container.client_repo.override(self.client_repo),
+            self.app.container.rate_repo.override(self.rate_repo),
+            self.app.container.invoice_repo.override(self.invoice_repo),
+            self.app.container.incidentquery_repo.override(self.incident_repo),
+            self.app.container.unit_of_work.override(self.unit_of_work),
+        ):
+            resp = self.test_client.get('/api/v1/invoice', headers={'X-Apigateway-Api-Userinfo': self.encode_token(token)})
+
+        self.assertEqual(resp.status_code, 200)
+        rate = self.unit_of_work.create_rate.call_args.args[0]
+        invoice = self.unit_of_work.create_invoice.call_args.args[0]
+        self.assertEqual(invoice.rate_id, rate.id)
+        self.unit_of_work.commit.assert_called_once()
+        self.rate_repo.create.assert_not_called()
+        self.invoice_repo.create.assert_not_called()
+        self.rate_repo.get_by_id.assert_not_called()
+
+    def test_get_invoice_busy(self) -> None:
+        self.client_repo.get.return_value = self.client
+        self.rate_repo.get_by_client_and_plan.return_value = self.rate
+        self.invoice_repo.get_by_client_and_month.return_value = None
+        generation_pool = MagicMock(spec=AdmissionPool)
+        generation_pool.slot.side_effect = AdmissionRejectedError('generation', 5)
+
+        token = self.gen_token_employee(role=Role.ADMIN, client_id=str(self.client_id), assigned=True)
+
+        with (
+            self.app.container.client_repo.override(self.client_repo),
+            self.app.container.rate_repo.override(self.rate_repo),
+            self.app.container.invoice_repo.override(self.invoice_repo),
+            self.app.container.incidentquery_repo.override(self.incident_repo),
+            self.app.container.unit_of_work.override(self.unit_of_work),
+            self.app.container.generation_pool.override(generation_pool),
+        ):
+            resp = self.test_client.get('/api/v1/invoice', headers={'X-Apigateway-Api-Userinfo': self.encode_token(token)})
+
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.headers['Retry-After'], '5')
+        self.incident_repo.get_incident_batch_by_client_id.assert_not_called()
+        self.unit_of_work.commit.assert_not_called()
+
+    def test_invoice_id(self) -> None:
+        client_id = str(self.client_id)
+
+        self.assertEqual(invoice_id(client_id, Month.NOVEMBER, 2024), invoice_id(client_id, Month.NOVEMBER, 2024))
+        self.assertNotEqual(invoice_id(client_id, Month.NOVEMBER, 2024), invoice_id(client_id, Month.DECEMBER, 2024))
+        self.assertNotEqual(invoice_id(client_id, Month.NOVEMBER, 2024), invoice_id(client_id, Month.NOVEMBER, 2023))
+
+    def test_get_invoice_generated_concurrently(self) -> None:
+        billing_month, billing_year = get_billing_period()
+        stored = Invoice(
+            id=invoice_id(str(self.client_id), billing_month, billing_year),
+            client_id=str(self.client_id),
+            rate_id=self.rate.id,
+            generation_date=datetime.now(UTC),
+            billing_month=billing_month,
+            billing_year=billing_year,
+            payment_due_date=datetime(2024, 12, 15, tzinfo=UTC),
+            total_incidents_web=1,
+            total_incidents_mobile=2,
+            total_incidents_email=3,
+        )
+        self.client_repo.get.return_value = self.client
+        self.rate_repo.get_by_client_and_plan.return_value = None
+        self.rate_repo.get_by_id.return_value = self.rate
+        self.invoice_repo.get_by_client_and_month.return_value = None
+        self.invoice_repo.get.return_value = stored
+        self.incident_repo.get_incident_batch_by_client_id.return_value = IncidentBatch()
+        self.unit_of_work.commit.side_effect = ValueError('Invoice already exists')
+
+        token = self.gen_token_employee(role=Role.ADMIN, client_id=str(self.client_id), assigned=True)
+
+        with (
+            self.app.container.client_repo.override(self.client_repo),
+            self.app.container.rate_repo.override(self.rate_repo),
+            self.app.container.invoice_repo.override(self.invoice_repo),
+            self.app.container.incidentquery_repo.override(self.incident_repo),
+            self.app.container.unit_of_work.override(self.unit_of_work),
+        ):
+            resp = self.test_client.get('/api/v1/invoice', headers={'X-Apigateway-Api-Userinfo': self.encode_token(token)})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()['total_incidents'], {'web': 1, 'mobile': 2, 'email': 3})
+        self.invoice_repo.get.assert_called_once_with(stored.id)
+        self.rate_repo.get_by_id.assert_called_once_with(self.rate.id)
+
+    @parametrize(('same_rate',), [(True,), (False,)])
+    def test_get_invoice_existing(self, *, same_rate: bool) -> None:
+        invoice = Invoice(
+            id=str(self.faker.uuid4()),
+            client_id=str(self.client_id),
+            rate_id=self.rate.id if same_rate else str(self.faker.uuid4()),
+            generation_date=datetime.now(UTC),
+            billing_month=Month.NOVEMBER,
+            billing_year=2024,
+            payment_due_date=datetime(2024, 12, 15, tzinfo=UTC),
+            total_incidents_web=1,
+            total_incidents_mobile=2,
+            total_incidents_email=3,
+        )
+        self.client_repo.get.return_value = self.client
+        self.rate_repo.get_by_client_and_plan.return_value = self.rate
+        self.rate_repo.get_by_id.return_value = self.rate
+        self.invoice_repo.get_by_client_and_month.return_value = invoice
+
+        token = self.gen_token_employee(role=Role.ADMIN, client_id=str(self.client_id), assigned=True)
+
+        with (
+            self.app.container.client_repo.override(self.client_repo),
+            self.app.container.rate_repo.override(self.rate_repo),
+            self.app.container.invoice_repo.override(self.invoice_repo),
+            self.app.container.incidentquery_repo.override(self.incident_repo),
+            self.app.container.unit_of_work.override(self.unit_of_work),
+        ):
+            resp = self.test_client.get('/api/v1/invoice', headers={'X-Apigateway-Api-Userinfo': self.encode_token(token)})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.rate_repo.get_by_id.call_count, 0 if same_rate else 1)
+        self.unit_of_work.commit.assert_not_called()
+
+    def test_get_invoice_cached(self) -> None:
+        self.client_repo.get.return_value = self.client
+        self.rate_repo.get_by_client_and_plan.return_value = self.rate
+        self.invoice_repo.get_by_client_and_month.return_value = None
+        self.incident_repo.get_incident_batch_by_client_id.return_value = IncidentBatch()
+
+        token = self.gen_token_employee(role=Role.ADMIN, client_id=str(self.client_id), assigned=True)
+
+        with (
+            self.app.container.client_repo.override(self.client_repo),
+            self.app.container.rate_repo.override(self.rate_repo),
+            self.app.container.invoice_repo.override(self.invoice_repo),
+            self.app.container.incidentquery_repo.override(self.incident_repo),
+            self.app.container.unit_of_work.override(self.unit_of_work),
+        ):
+            first = self.test_client.get('/api/v1/invoice', headers={'X-Apigateway-Api-Userinfo': self.encode_token(token)})
+            second = self.test_client.get('/api/v1/invoice', headers={'X-Apigateway-Api-Userinfo': self.encode_token(token)})
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.get_json(), first.get_json())
+        self.client_repo.get.assert_called_once()
+        self.invoice_repo.get_by_client_and_month.assert_called_once()
+        self.unit_of_work.commit.assert_called_once()
+
+    @parametrize(
+        ('accept', 'mimetype'),
+        [
+            ('application/msgpack', 'application/msgpack'),
+            ('application/x-msgpack', 'application/x-msgpack'),
+            ('application/msgpack, application/json;q=0.5', 'application/msgpack'),
+            ('application/json, application/msgpack;q=0.5', 'application/json'),
+            ('*/*', 'application/json'),
+            ('text/html', 'application/json'),
+        ],
+    )
+    def test_get_invoice_negotiated(self, *, accept: str, mimetype: str) -> None:
+        self.client_repo.get.return_value = self.client
+        self.rate_repo.get_by_client_and_plan.return_value = self.rate
+        self.invoice_repo.get_by_client_and_month.return_value = None
+        self.incident_repo.get_incident_batch_by_client_id.return_value = IncidentBatch()
+
+        token = self.gen_token_employee(role=Role.ADMIN, client_id=str(self.client_id), assigned=True)
+        userinfo = self.encode_token(token)
+
+        with (
+            self.app.container.client_repo.override(self.client_repo),
+            self.app.container.rate_repo.override(self.rate_repo),
+            self.app.container.invoice_repo.override(self.invoice_repo),
+            self.app.container.incidentquery_repo.override(self.incident_repo),
+            self.app.container.unit_of_work.override(self.unit_of_work),
+        ):
+            generated = self.test_client.get(
+                '/api/v1/invoice', headers={'X-Apigateway-Api-Userinfo': userinfo, 'Accept': accept}
+            )
+            cached = self.test_client.get('/api/v1/invoice', headers={'X-Apigateway-Api-Userinfo': userinfo, 'Accept': accept})
+            expected = self.test_client.get('/api/v1/invoice', headers={'X-Apigateway-Api-Userinfo': userinfo}).get_json()
+
+        for resp in (generated, cached):
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.mimetype, mimetype)
+            self.assertIn('Accept', resp.vary)
+            if mimetype == 'application/json':
+                self.assertEqual(resp.get_json(), expected)
+            else:
+                self.assertEqual(msgpack.unpackb(resp.data), expected)
+
     @responses.activate
     def test_get_invoice_failure(self) -> None:
         mock_client_repo = Mock()
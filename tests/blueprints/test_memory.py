@@ -0,0 +1,19 @@
+from unittest import TestCase
+
+from app import create_app
+
+
+class TestMemory(TestCase):
+    def setUp(self) -> None:
+        self.app = create_app()
+        self.client = self.app.test_client()
+
+    def tearDown(self) -> None:
+        self.app.container.unwire()
+
+    def test_memory(self) -> None:
+        resp = self.client.get('/api/v1/memory/invoice')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertGreater(resp.get_json()['current']['rss_bytes'], 0)
+        self.assertEqual(resp.get_json()['history'], [])
@@ -0,0 +1,20 @@
+from unittest import TestCase
+
+from app import create_app
+
+
+class TestMetrics(TestCase):
+    def setUp(self) -> None:
+        self.app = create_app()
+        self.client = self.app.test_client()
+
+    def tearDown(self) -> None:
+        self.app.container.unwire()
+
+    def test_metrics(self) -> None:
+        self.app.container.metrics().increment('test')
+
+        resp = self.client.get('/api/v1/metrics/invoice')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()['counters']['test'], 1)
@@ -0,0 +1,69 @@
+import tempfile
+from unittest import TestCase
+
+from app import create_app
+from profiling import RequestProfiler
+
+
+class TestProfiling(TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.profiler = RequestProfiler(directory=self.tmpdir.name, token=None, sample_rate=0.0, max_profiles=5)
+        self.app = create_app()
+        self.app.container.config.profiling.enabled.override(True)  # noqa: FBT003
+        self.client = self.app.test_client()
+
+    def tearDown(self) -> None:
+        self.app.container.unwire()
+        self.tmpdir.cleanup()
+
+    def save_profile(self) -> str:
+        profile = self.profiler.start()
+        assert profile is not None  # noqa: S101
+        with self.assertLogs(level='INFO'):
+            return self.profiler.stop(profile, 'Invoice.GetInvoice')
+
+    def test_list(self) -> None:
+        name = self.save_profile()
+
+        with self.app.container.profiler.override(self.profiler):
+            resp = self.client.get('/api/v1/profiles/invoice')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([info['name'] for info in resp.get_json()['profiles']], [name])
+
+    def test_get(self) -> None:
+        name = self.save_profile()
+
+        with self.app.container.profiler.override(self.profiler):
+            # The profile is streamed from its file, which stays open until the response is closed
+            with self.client.get(f'/api/v1/profiles/invoice/{name}') as resp:
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(resp.mimetype, 'application/octet-stream')
+            text = self.client.get(f'/api/v1/profiles/invoice/{name}?format=text')
+
+        self.assertEqual(text.status_code, 200)
+        self.assertIn('function calls', text.get_data(as_text=True))
+
+    def test_get_not_found(self) -> None:
+        with self.app.container.profiler.override(self.profiler):
+            resp = self.client.get('/api/v1/profiles/invoice/1-Invoice.GetInvoice-0123abcd.prof')
+
+        self.assertEqual(resp.status_code, 404)
+
+    def test_get_invalid(self) -> None:
+        with self.app.container.profiler.override(self.profiler):
+            resp = self.client.get('/api/v1/profiles/invoice/secret.txt')
+
+        self.assertEqual(resp.status_code, 400)
+
+    def test_disabled(self) -> None:
+        name = self.save_profile()
+        self.app.container.config.profiling.enabled.override(False)  # noqa: FBT003
+
+        with self.app.container.profiler.override(self.profiler):
+            listed = self.client.get('/api/v1/profiles/invoice')
+            fetched = self.client.get(f'/api/v1/profiles/invoice/{name}')
+
+        self.assertEqual(listed.status_code, 404)
+        self.assertEqual(fetched.status_code, 404)
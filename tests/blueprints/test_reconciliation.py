@@ -0,0 +1,56 @@
+from collections.abc import Callable
+from typing import Any, cast
+from unittest import TestCase
+from unittest.mock import Mock
+
+from faker import Faker
+
+from app import create_app
+from blueprints.invoice import get_billing_period, invoice_cache_key
+from models import Invoice, Month
+from reconciliation import InvoiceReconciler, ReconciliationReport
+from tests.repositories.contracts import random_invoice
+
+
+class TestReconciliation(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.reconciler = Mock(InvoiceReconciler)
+        self.app.container.invoice_reconciler.override(self.reconciler)
+        self.invoice = random_invoice(self.faker)
+
+        def reconcile(month: Month, year: int, on_update: Callable[[Invoice], None]) -> ReconciliationReport:
+            on_update(self.invoice)
+            return ReconciliationReport(billing_month=month.value, billing_year=year, invoices=3, changed=1)
+
+        self.reconciler.reconcile.side_effect = reconcile
+
+    def tearDown(self) -> None:
+        self.app.container.unwire()
+
+    def test_reconcile_last_period(self) -> None:
+        billing_month, billing_year = get_billing_period()
+        key = invoice_cache_key(self.invoice.client_id, billing_month, billing_year)
+        self.app.container.invoice_cache().set(key, {'client_id': self.invoice.client_id})
+
+        resp = self.client.post('/api/v1/reconcile/invoice')
+
+        self.assertEqual(resp.status_code, 200)
+        data = cast(dict[str, Any], resp.json)
+        self.assertEqual((data['billing_month'], data['billing_year']), (billing_month.value, billing_year))
+        self.assertEqual((data['invoices'], data['changed'], data['failed']), (3, 1, 0))
+        self.assertIsNone(self.app.container.invoice_cache().get(key))
+
+    def test_reconcile_period(self) -> None:
+        resp = self.client.post('/api/v1/reconcile/invoice?period=2024-02')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.reconciler.reconcile.call_args.args, (Month.FEBRUARY, 2024))
+
+    def test_invalid_period(self) -> None:
+        resp = self.client.post('/api/v1/reconcile/invoice?period=february')
+
+        self.assertEqual(resp.status_code, 400)
+        self.reconciler.reconcile.assert_not_called()
@@ -3,7 +3,8 @@ from unittest.mock import Mock
 from unittest_parametrize import ParametrizedTestCase, parametrize
 
 from app import create_app
-from repositories import InvoiceRepository
+from cache import Cache
+from repositories import InvoiceRepository, RevenueRepository
 
 
 class TestReset(ParametrizedTestCase):
@@ -27,10 +28,34 @@ class TestReset(ParametrizedTestCase):
     )
     def test_reset(self, arg: str | None) -> None:
         invoice_repo_mock = Mock(InvoiceRepository)
-
-        with self.app.container.invoice_repo.override(invoice_repo_mock):
+        revenue_repo_mock = Mock(RevenueRepository)
+        caches = {name: Mock(Cache) for name in ('invoice_cache', 'client_cache', 'rate_cache')}
+
+        with (
+            self.app.container.invoice_repo.override(invoice_repo_mock),
+            self.app.container.revenue_repo.override(revenue_repo_mock),
+            self.app.container.invoice_cache.override(caches['invoice_cache']),
+            self.app.container.client_cache.override(caches['client_cache']),
+            self.app.container.rate_cache.override(caches['rate_cache']),
+        ):
             resp = self.client.post(self.API_ENDPOINT + (f'?demo={arg}' if arg is not None else ''))
 
         invoice_repo_mock.delete_all.assert_called_once()
+        revenue_repo_mock.delete_all.assert_called_once()
+        for cache in caches.values():
+            cache.clear.assert_called_once()
+
+        self.assertEqual(resp.status_code, 200)
+
+    def test_reset_clears_cached_invoices(self) -> None:
+        invoice_cache = self.app.container.invoice_cache()
+        invoice_cache.set('client:2024-11', {'id': 'deleted'})
+
+        with (
+            self.app.container.invoice_repo.override(Mock(InvoiceRepository)),
+            self.app.container.revenue_repo.override(Mock(RevenueRepository)),
+        ):
+            resp = self.client.post(self.API_ENDPOINT)
 
         self.assertEqual(resp.status_code, 200)
+        self.assertIsNone(invoice_cache.get('client:2024-11'))
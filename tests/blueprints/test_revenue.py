@@ -0,0 +1,67 @@
+from typing import cast
+from unittest.mock import Mock
+
+from unittest_parametrize import ParametrizedTestCase, parametrize
+
+from app import create_app
+from models import Month, Plan, RevenueRollup
+from repositories import RevenueRepository
+
+
+class TestRevenue(ParametrizedTestCase):
+    API_ENDPOINT = '/api/v1/revenue/invoice'
+
+    def setUp(self) -> None:
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.revenue_repo = Mock(RevenueRepository)
+
+    def tearDown(self) -> None:
+        self.app.container.unwire()
+
+    def test_get_revenue(self) -> None:
+        cast(Mock, self.revenue_repo.get_range).return_value = [
+            RevenueRollup(2024, Month.DECEMBER.value, Plan.EMPRENDEDOR, 2, 1, 2, 3, 200.0, 50.0),
+        ]
+
+        with self.app.container.revenue_repo.override(self.revenue_repo):
+            resp = self.client.get(f'{self.API_ENDPOINT}?from=2024-11&to=2025-01')
+
+        self.assertEqual(resp.status_code, 200)
+        cast(Mock, self.revenue_repo.get_range).assert_called_once_with('2024-11', '2025-01')
+        data = resp.get_json()
+        self.assertEqual(
+            [(period['billing_month'], period['billing_year']) for period in data['periods']],
+            [
+                (Month.NOVEMBER, 2024),
+                (Month.DECEMBER, 2024),
+                (Month.JANUARY, 2025),
+            ],
+        )
+        self.assertEqual(data['periods'][1]['plans'][Plan.EMPRENDEDOR.value]['total_revenue'], 250.0)
+        self.assertEqual((data['invoices'], data['total_revenue']), (2, 250.0))
+
+    def test_get_revenue_default_period(self) -> None:
+        cast(Mock, self.revenue_repo.get_range).return_value = []
+
+        with self.app.container.revenue_repo.override(self.revenue_repo):
+            resp = self.client.get(self.API_ENDPOINT)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.get_json()['periods']), 12)
+
+    @parametrize(
+        'query',
+        [
+            ('?from=2024-13',),
+            ('?to=foo',),
+            ('?from=2024-06&to=2024-05',),
+            ('?from=2000-01&to=2024-12',),
+        ],
+    )
+    def test_get_revenue_invalid_period(self, query: str) -> None:
+        with self.app.container.revenue_repo.override(self.revenue_repo):
+            resp = self.client.get(self.API_ENDPOINT + query)
+
+        self.assertEqual(resp.status_code, 400)
+        cast(Mock, self.revenue_repo.get_range).assert_not_called()
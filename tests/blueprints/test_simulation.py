@@ -0,0 +1,181 @@
+import base64
+import json
+from datetime import UTC, datetime
+from typing import Any, cast
+from unittest.mock import Mock, patch
+
+from faker import Faker
+from unittest_parametrize import ParametrizedTestCase, parametrize
+
+from admission import AdmissionPool
+from app import create_app
+from blueprints.simulation import cheapest_plan, simulate_plans
+from models import Action, Channel, Client, HistoryEntry, Incident, Invoice, Month, Plan, Role
+from repositories import ClientRepository, IncidentRepository, InvoiceRepository
+
+
+class TestSimulation(ParametrizedTestCase):
+    CLIENT_ENDPOINT = '/api/v1/invoice/simulation'
+    ALL_CLIENTS_ENDPOINT = '/api/v1/simulation/invoice'
+
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.app = create_app()
+        self.test_client = self.app.test_client()
+
+        self.client = Client(id=cast(str, self.faker.uuid4()), name=self.faker.company(), plan=Plan.EMPRENDEDOR)
+
+        self.client_repo = Mock(ClientRepository)
+        self.invoice_repo = Mock(InvoiceRepository)
+        self.incident_repo = Mock(IncidentRepository)
+        cast(Mock, self.client_repo.get).return_value = self.client
+
+    def tearDown(self) -> None:
+        self.app.container.unwire()
+
+    def gen_invoice(self, client_id: str, month: Month, year: int, counts: tuple[int, int, int]) -> Invoice:
+        return Invoice(
+            id=cast(str, self.faker.uuid4()),
+            client_id=client_id,
+            rate_id=cast(str, self.faker.uuid4()),
+            generation_date=datetime.now(UTC),
+            billing_month=month,
+            billing_year=year,
+            payment_due_date=datetime.now(UTC),
+            total_incidents_web=counts[0],
+            total_incidents_mobile=counts[1],
+            total_incidents_email=counts[2],
+        )
+
+    def gen_incident(self, channel: Channel, created: datetime) -> Incident:
+        return Incident(
+            id=cast(str, self.faker.uuid4()),
+            name=self.faker.sentence(),
+            channel=channel,
+            reported_by=cast(str, self.faker.uuid4()),
+            created_by=cast(str, self.faker.uuid4()),
+            assigned_to=cast(str, self.faker.uuid4()),
+            history=[HistoryEntry(seq=0, date=created, action=Action.CREATED, description=self.faker.sentence())],
+        )
+
+    def call_endpoint(self, url: str, role: Role = Role.ADMIN) -> Any:  # noqa: ANN401
+        token = {'sub': cast(str, self.faker.uuid4()), 'cid': self.client.id, 'role': role.value, 'aud': role.value}
+        headers = {'X-Apigateway-Api-Userinfo': base64.urlsafe_b64encode(json.dumps(token).encode()).decode()}
+
+        with (
+            self.app.container.client_repo.override(self.client_repo),
+            self.app.container.invoice_repo.override(self.invoice_repo),
+            self.app.container.incidentquery_repo.override(self.incident_repo),
+        ):
+            return self.test_client.get(url, headers=headers)
+
+    def test_simulate_plans(self) -> None:
+        costs = simulate_plans([[0, 0, 0], [100, 0, 0]])
+
+        self.assertEqual(costs[0], [5.0, 6.0, 8.0])
+        self.assertEqual([round(cost, 2) for cost in costs[1]], [20.0, 19.0, 18.0])
+        self.assertEqual(cheapest_plan(costs[0]), Plan.EMPRENDEDOR)
+        self.assertEqual(cheapest_plan(costs[1]), Plan.EMPRESARIO_PLUS)
+
+    @patch('blueprints.simulation.get_billing_period', return_value=(Month.MARCH, 2024))
+    def test_simulation(self, _: Mock) -> None:
+        cast(Mock, self.invoice_repo.get_by_client).return_value = [
+            self.gen_invoice(self.client.id, Month.MARCH, 2024, (100, 0, 0)),
+            self.gen_invoice(self.client.id, Month.DECEMBER, 2023, (1, 0, 0)),
+        ]
+        cast(Mock, self.incident_repo.get_incidents_by_client_id).return_value = [
+            self.gen_incident(Channel.WEB, datetime(2024, 2, 10, tzinfo=UTC)),
+            # Already billed, the stored invoice counts win
+            self.gen_incident(Channel.EMAIL, datetime(2024, 3, 10, tzinfo=UTC)),
+        ]
+
+        resp = self.call_endpoint(self.CLIENT_ENDPOINT + '?periods=3')
+
+        self.assertEqual(resp.status_code, 200)
+        data = resp.get_json()
+        self.assertEqual([period['source'] for period in data['periods']], ['incidents', 'incidents', 'invoice'])
+        self.assertEqual(data['periods'][0]['billing_month'], Month.JANUARY)
+        self.assertEqual(data['periods'][1]['total_incidents'], {'web': 1, 'mobile': 0, 'email': 0})
+        self.assertEqual(data['periods'][2]['total_incidents'], {'web': 100, 'mobile': 0, 'email': 0})
+        self.assertEqual(data['periods'][2]['cheapest_plan'], Plan.EMPRESARIO_PLUS)
+        self.assertEqual(data['cheapest_plan'], Plan.EMPRENDEDOR)
+
+    @patch('blueprints.simulation.get_billing_period', return_value=(Month.MARCH, 2024))
+    def test_simulation_only_invoices(self, _: Mock) -> None:
+        cast(Mock, self.invoice_repo.get_by_client).return_value = [
+            self.gen_invoice(self.client.id, Month.MARCH, 2024, (100, 0, 0)),
+        ]
+
+        resp = self.call_endpoint(self.CLIENT_ENDPOINT + '?periods=1')
+
+        self.assertEqual(resp.status_code, 200)
+        cast(Mock, self.incident_repo.get_incidents_by_client_id).assert_not_called()
+
+    @parametrize('periods', [('0',), ('foo',), ('1000',)])
+    def test_simulation_invalid_periods(self, periods: str) -> None:
+        resp = self.call_endpoint(self.CLIENT_ENDPOINT + f'?periods={periods}')
+
+        self.assertEqual(resp.status_code, 400)
+
+    def test_simulation_forbidden(self) -> None:
+        resp = self.call_endpoint(self.CLIENT_ENDPOINT, role=Role.ANALYST)
+
+        self.assertEqual(resp.status_code, 403)
+
+    def test_simulation_client_not_found(self) -> None:
+        cast(Mock, self.client_repo.get).return_value = None
+
+        resp = self.call_endpoint(self.CLIENT_ENDPOINT)
+
+        self.assertEqual(resp.status_code, 404)
+
+    @patch('blueprints.simulation.get_billing_period', return_value=(Month.MARCH, 2024))
+    def test_simulation_all_clients(self, _: Mock) -> None:
+        other_client_id = cast(str, self.faker.uuid4())
+        invoices = {
+            (Month.MARCH, 2024): [
+                self.gen_invoice(self.client.id, Month.MARCH, 2024, (0, 0, 0)),
+                self.gen_invoice(other_client_id, Month.MARCH, 2024, (100, 0, 0)),
+            ],
+            (Month.FEBRUARY, 2024): [self.gen_invoice(other_client_id, Month.FEBRUARY, 2024, (100, 0, 0))],
+        }
+        cast(Mock, self.invoice_repo.get_by_month).side_effect = lambda month, year: iter(invoices.get((month, year), []))
+        # Only the client with an uninvoiced period has its incidents counted
+        cast(Mock, self.incident_repo.get_incidents_by_client_id).return_value = [
+            self.gen_incident(Channel.WEB, datetime(2024, 2, 10, tzinfo=UTC)) for _ in range(120)
+        ]
+
+        resp = self.call_endpoint(self.ALL_CLIENTS_ENDPOINT + '?periods=2')
+
+        self.assertEqual(resp.status_code, 200)
+        data = resp.get_json()
+        clients = {client['client_id']: client for client in data['clients']}
+        self.assertEqual(clients[self.client.id]['cheapest_plan'], Plan.EMPRESARIO)
+        self.assertEqual((clients[self.client.id]['periods'], clients[self.client.id]['invoiced_periods']), (2, 1))
+        self.assertEqual(clients[other_client_id]['cheapest_plan'], Plan.EMPRESARIO_PLUS)
+        self.assertEqual((clients[other_client_id]['periods'], clients[other_client_id]['invoiced_periods']), (2, 2))
+        self.assertEqual(data['cheapest_plan_count'], {'emprendedor': 0, 'empresario': 1, 'empresario_plus': 1})
+        self.assertEqual(data['first_period'], {'billing_month': 'February', 'billing_year': 2024})
+        self.assertEqual(
+            [call.args for call in cast(Mock, self.invoice_repo.get_by_month).call_args_list],
+            [(Month.FEBRUARY, 2024), (Month.MARCH, 2024)],
+        )
+        cast(Mock, self.invoice_repo.get_all).assert_not_called()
+        cast(Mock, self.incident_repo.get_incidents_by_client_id).assert_called_once()
+
+    @patch('blueprints.simulation.get_billing_period', return_value=(Month.MARCH, 2024))
+    def test_simulation_all_clients_outside_admission(self, _: Mock) -> None:
+        invoices = [self.gen_invoice(cast(str, self.faker.uuid4()), Month.FEBRUARY, 2024, (0, 0, 0)) for _ in range(3)]
+        cast(Mock, self.invoice_repo.get_by_month).side_effect = lambda month, _: iter(
+            invoices if month == Month.FEBRUARY else []
+        )
+        cast(Mock, self.incident_repo.get_incidents_by_client_id).return_value = []
+        generation_pool = Mock(AdmissionPool)
+
+        with self.app.container.generation_pool.override(generation_pool):
+            resp = self.call_endpoint(self.ALL_CLIENTS_ENDPOINT + '?periods=2')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([client['client_id'] for client in resp.get_json()['clients']], [i.client_id for i in invoices])
+        self.assertEqual(cast(Mock, self.incident_repo.get_incidents_by_client_id).call_count, 3)
+        cast(Mock, generation_pool.slot).assert_not_called()
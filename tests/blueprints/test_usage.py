@@ -0,0 +1,196 @@
+import base64
+import json
+from datetime import UTC, datetime
+from typing import Any, cast
+from unittest.mock import Mock
+
+from faker import Faker
+from unittest_parametrize import ParametrizedTestCase, parametrize
+
+from app import create_app
+from blueprints.usage import count_by_period_and_channel, from_period, summaries_to_arrays, to_period, usage_report
+from models import Action, Channel, Client, HistoryEntry, Incident, IncidentSummary, Month, Plan, Rate, Role
+from repositories import ClientRepository, IncidentRepository, RateRepository
+
+
+class TestUsage(ParametrizedTestCase):
+    API_ENDPOINT = '/api/v1/invoice/usage'
+    CURRENT_ENDPOINT = '/api/v1/invoice/usage/current'
+
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.app = create_app()
+        self.test_client = self.app.test_client()
+
+        self.client = Client(id=cast(str, self.faker.uuid4()), name=self.faker.company(), plan=Plan.EMPRENDEDOR)
+        self.rate = Rate(
+            id=cast(str, self.faker.uuid4()),
+            plan=Plan.EMPRENDEDOR,
+            client_id=self.client.id,
+            fixed_cost=100.0,
+            cost_per_incident_web=10.0,
+            cost_per_incident_mobile=15.0,
+            cost_per_incident_email=5.0,
+        )
+
+        self.client_repo = Mock(ClientRepository)
+        self.rate_repo = Mock(RateRepository)
+        self.incident_repo = Mock(IncidentRepository)
+        cast(Mock, self.client_repo.get).return_value = self.client
+        cast(Mock, self.rate_repo.get_by_client_and_plan).return_value = self.rate
+
+    def tearDown(self) -> None:
+        self.app.container.unwire()
+
+    def gen_incident(self, channel: Channel, created: datetime) -> Incident:
+        return Incident(
+            id=cast(str, self.faker.uuid4()),
+            name=self.faker.sentence(),
+            channel=channel,
+            reported_by=cast(str, self.faker.uuid4()),
+            created_by=cast(str, self.faker.uuid4()),
+            assigned_to=cast(str, self.faker.uuid4()),
+            history=[HistoryEntry(seq=0, date=created, action=Action.CREATED, description=self.faker.sentence())],
+        )
+
+    def gen_summary(self, channel: Channel, created: datetime) -> IncidentSummary:
+        return IncidentSummary(id=cast(str, self.faker.uuid4()), channel=channel, created=created)
+
+    def call_endpoint(self, role: Role = Role.ADMIN, query: str = '', endpoint: str = API_ENDPOINT) -> Any:  # noqa: ANN401
+        token = {'sub': cast(str, self.faker.uuid4()), 'cid': self.client.id, 'role': role.value, 'aud': role.value}
+        headers = {'X-Apigateway-Api-Userinfo': base64.urlsafe_b64encode(json.dumps(token).encode()).decode()}
+
+        with (
+            self.app.container.client_repo.override(self.client_repo),
+            self.app.container.rate_repo.override(self.rate_repo),
+            self.app.container.incidentquery_repo.override(self.incident_repo),
+        ):
+            return self.test_client.get(endpoint + query, headers=headers)
+
+    def test_periods(self) -> None:
+        period = to_period(2024, 12)
+
+        self.assertEqual(period + 1, to_period(2025, 1))
+        self.assertEqual(from_period(period), (Month.DECEMBER, 2024))
+        self.assertEqual(from_period(period + 1), (Month.JANUARY, 2025))
+
+    def test_count_by_period_and_channel(self) -> None:
+        incidents = [
+            self.gen_summary(Channel.WEB, datetime(2024, 1, 5, tzinfo=UTC)),
+            self.gen_summary(Channel.WEB, datetime(2024, 1, 31, tzinfo=UTC)),
+            self.gen_summary(Channel.EMAIL, datetime(2024, 3, 1, tzinfo=UTC)),
+            self.gen_summary(Channel.MOBILE, datetime(2023, 12, 31, tzinfo=UTC)),
+            self.gen_summary(Channel.MOBILE, datetime(2024, 4, 1, tzinfo=UTC)),
+        ]
+
+        periods, channels = summaries_to_arrays(incidents)
+        counts = count_by_period_and_channel(periods, channels, to_period(2024, 1), to_period(2024, 3))
+
+        self.assertEqual(counts, [[2, 0, 0], [0, 0, 0], [0, 0, 1]])
+
+    def test_usage_report(self) -> None:
+        incidents = [
+            self.gen_summary(Channel.WEB, datetime(2024, 1, 5, tzinfo=UTC)),
+            self.gen_summary(Channel.MOBILE, datetime(2024, 2, 5, tzinfo=UTC)),
+        ]
+
+        report = usage_report(incidents, self.rate, to_period(2024, 1), to_period(2024, 2))
+
+        self.assertEqual(len(report['periods']), 2)
+        self.assertEqual(report['periods'][0]['billing_month'], Month.JANUARY)
+        self.assertEqual(report['periods'][0]['total_cost'], 110.0)
+        self.assertEqual(report['periods'][1]['total_cost_per_incident'], {'web': 0.0, 'mobile': 15.0, 'email': 0.0})
+        self.assertEqual(report['total_incidents'], {'web': 1, 'mobile': 1, 'email': 0})
+        self.assertEqual(report['total_cost'], 225.0)
+
+    def test_get_usage(self) -> None:
+        cast(Mock, self.incident_repo.get_incidents_by_client_id).return_value = [
+            self.gen_incident(Channel.EMAIL, datetime(2024, 6, 5, tzinfo=UTC)),
+        ]
+
+        resp = self.call_endpoint(query='?from=2024-01&to=2024-12')
+
+        self.assertEqual(resp.status_code, 200)
+        data = resp.get_json()
+        self.assertEqual(data['client_id'], self.client.id)
+        self.assertEqual(len(data['periods']), 12)
+        self.assertEqual(data['periods'][5]['total_incidents']['email'], 1)
+        self.assertEqual(data['total_cost'], 12 * 100.0 + 5.0)
+        cast(Mock, self.incident_repo.get_incidents_by_client_id).assert_called_once_with(client_id=self.client.id)
+
+    def test_get_current_usage(self) -> None:
+        now = datetime.now(UTC)
+        first_incident = self.gen_incident(Channel.WEB, now)
+        second_incident = self.gen_incident(Channel.MOBILE, now)
+        cast(Mock, self.incident_repo.get_incidents_by_client_id).side_effect = [[first_incident], [second_incident]]
+
+        first_resp = self.call_endpoint(endpoint=self.CURRENT_ENDPOINT)
+        second_resp = self.call_endpoint(endpoint=self.CURRENT_ENDPOINT)
+
+        self.assertEqual(first_resp.status_code, 200)
+        self.assertEqual(first_resp.get_json()['total_incidents'], {'web': 1, 'mobile': 0, 'email': 0})
+        self.assertEqual(second_resp.get_json()['total_incidents'], {'web': 1, 'mobile': 1, 'email': 0})
+        self.assertEqual(second_resp.get_json()['total_cost'], 125.0)
+        self.assertEqual(second_resp.get_json()['billing_month'], Month.from_int(now.month))
+        cast(Mock, self.incident_repo.get_incidents_by_client_id).assert_called_with(
+            client_id=self.client.id, since=first_incident.history[0].date
+        )
+
+    def test_get_current_usage_forbidden(self) -> None:
+        resp = self.call_endpoint(role=Role.AGENT, endpoint=self.CURRENT_ENDPOINT)
+
+        self.assertEqual(resp.status_code, 403)
+
+    def test_get_current_usage_client_not_found(self) -> None:
+        cast(Mock, self.client_repo.get).return_value = None
+
+        resp = self.call_endpoint(endpoint=self.CURRENT_ENDPOINT)
+
+        self.assertEqual(resp.status_code, 404)
+
+    def test_get_usage_default_period(self) -> None:
+        cast(Mock, self.incident_repo.get_incidents_by_client_id).return_value = []
+
+        resp = self.call_endpoint()
+
+        self.assertEqual(resp.status_code, 200)
+        now = datetime.now(UTC)
+        periods = resp.get_json()['periods']
+        self.assertEqual(len(periods), 12)
+        self.assertEqual((periods[-1]['billing_month'], periods[-1]['billing_year']), (Month.from_int(now.month), now.year))
+
+    def test_get_usage_without_rate(self) -> None:
+        cast(Mock, self.rate_repo.get_by_client_and_plan).return_value = None
+        cast(Mock, self.incident_repo.get_incidents_by_client_id).return_value = []
+
+        resp = self.call_endpoint(query='?from=2024-01&to=2024-01')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()['fixed_cost'], 5.0)
+        cast(Mock, self.rate_repo.create).assert_not_called()
+
+    @parametrize(
+        'query',
+        [
+            ('?from=2024-13',),
+            ('?from=foo',),
+            ('?from=2024-05&to=2024-01',),
+            ('?from=2000-01&to=2024-01',),
+        ],
+    )
+    def test_get_usage_invalid_period(self, query: str) -> None:
+        resp = self.call_endpoint(query=query)
+
+        self.assertEqual(resp.status_code, 400)
+
+    def test_get_usage_forbidden(self) -> None:
+        resp = self.call_endpoint(role=Role.AGENT)
+
+        self.assertEqual(resp.status_code, 403)
+
+    def test_get_usage_client_not_found(self) -> None:
+        cast(Mock, self.client_repo.get).return_value = None
+
+        resp = self.call_endpoint()
+
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,87 @@
+from datetime import UTC, datetime
+from typing import cast
+from unittest import TestCase
+
+from faker import Faker
+
+from cache import Cache, LocalCacheBackend, MsgpackCodec, MsgpackDictCodec
+from models import Client, Invoice, Month, Plan
+
+
+class TestCache(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.backend = LocalCacheBackend(max_entries=100)
+
+    def test_dataclass(self) -> None:
+        cache = Cache(self.backend, MsgpackCodec(Client), namespace='client', version=1, ttl=60)
+        client = Client(id=cast(str, self.faker.uuid4()), name=self.faker.company(), plan=Plan.EMPRESARIO)
+
+        cache.set(client.id, client)
+
+        cached = cache.get(client.id)
+        self.assertEqual(cached, client)
+        self.assertIsInstance(cached.plan if cached else None, Plan)
+        self.assertIsNotNone(self.backend.get(f'client:v1:{client.id}'))
+
+    def test_msgpack_invoice(self) -> None:
+        codec = MsgpackCodec(Invoice)
+        invoice = Invoice(
+            id=cast(str, self.faker.uuid4()),
+            client_id=cast(str, self.faker.uuid4()),
+            rate_id=cast(str, self.faker.uuid4()),
+            generation_date=datetime(2024, 12, 1, 10, 30, 15, 123456, tzinfo=UTC),
+            billing_month=Month.NOVEMBER,
+            billing_year=2024,
+            payment_due_date=datetime(2024, 12, 15, tzinfo=UTC),
+            total_incidents_web=10,
+            total_incidents_mobile=5,
+            total_incidents_email=2,
+        )
+
+        data = codec.encode(invoice)
+        decoded = codec.decode(data)
+
+        self.assertEqual(decoded, invoice)
+        self.assertLess(len(data), 160)
+
+    def test_msgpack_dict(self) -> None:
+        codec = MsgpackDictCodec()
+        rendered = {
+            'billing_month': Month.NOVEMBER,
+            'billing_year': 2024,
+            'client_plan': Plan.EMPRESARIO,
+            'total_cost': 285.5,
+            'total_incidents': {'web': 10, 'mobile': 5, 'email': 2},
+        }
+
+        data = codec.encode(rendered)
+
+        self.assertEqual(codec.decode(data), rendered)
+
+    def test_versions(self) -> None:
+        old = Cache(self.backend, MsgpackDictCodec(), namespace='invoice', version=1, ttl=60)
+        new = Cache(self.backend, MsgpackDictCodec(), namespace='invoice', version=2, ttl=60)
+        old.set('a', {'total_cost': 1.5})
+
+        self.assertIsNone(new.get('a'))
+
+    def test_namespaces(self) -> None:
+        invoices = Cache(self.backend, MsgpackDictCodec(), namespace='invoice', version=1, ttl=60)
+        others = Cache(self.backend, MsgpackDictCodec(), namespace='other', version=1, ttl=60)
+        invoices.set('a', {'total_cost': 1.5})
+        others.set('a', {'total_cost': 2.5})
+
+        invoices.clear()
+
+        self.assertEqual(invoices.get_many(['a']), [None])
+        self.assertEqual(others.get('a'), {'total_cost': 2.5})
+
+    def test_delete(self) -> None:
+        cache = Cache(self.backend, MsgpackDictCodec(), namespace='invoice', version=1, ttl=60)
+        cache.set_many({'a': {}, 'b': {}})
+        cache.set_many({})
+
+        cache.delete('a')
+
+        self.assertEqual(cache.get_many(['a', 'b']), [None, {}])
@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+from cache import LocalCacheBackend
+
+
+class TestLocalCacheBackend(TestCase):
+    def setUp(self) -> None:
+        self.backend = LocalCacheBackend(max_entries=2)
+
+    def test_get_set(self) -> None:
+        self.backend.set('a', b'1', ttl=60)
+
+        self.assertEqual(self.backend.get_many(['a', 'b']), [b'1', None])
+
+    def test_expired(self) -> None:
+        self.backend.set('a', b'1', ttl=-1)
+
+        self.assertIsNone(self.backend.get('a'))
+
+    def test_evicts_least_recently_used(self) -> None:
+        self.backend.set_many({'a': b'1', 'b': b'2'}, ttl=60)
+        self.backend.get('a')
+        self.backend.set('c', b'3', ttl=60)
+
+        self.assertEqual(self.backend.get_many(['a', 'b', 'c']), [b'1', None, b'3'])
+
+    def test_delete(self) -> None:
+        self.backend.set_many({'rate:1': b'1', 'rate:2': b'2'}, ttl=60)
+
+        self.backend.delete('rate:1')
+        self.assertEqual(self.backend.get_many(['rate:1', 'rate:2']), [None, b'2'])
+
+        self.backend.delete_prefix('rate:')
+        self.assertIsNone(self.backend.get('rate:2'))
@@ -0,0 +1,84 @@
+from typing import cast
+from unittest import TestCase
+
+import fakeredis
+
+from cache import LocalCacheBackend, RedisCacheBackend
+
+
+class TestRedisCacheBackend(TestCase):
+    def setUp(self) -> None:
+        self.server = fakeredis.FakeServer()
+        self.fallback = LocalCacheBackend(max_entries=100)
+        self.backend = self.make_backend()
+
+    def make_backend(self) -> RedisCacheBackend:
+        return RedisCacheBackend(
+            url='redis://localhost:6379/0',
+            fallback=self.fallback,
+            retry_interval=30,
+            socket_timeout=0.1,
+            client=fakeredis.FakeRedis(server=self.server),
+        )
+
+    def test_get_set(self) -> None:
+        self.backend.set_many({'a': b'1', 'b': b'2'}, ttl=60)
+
+        self.assertEqual(self.backend.get_many(['a', 'b', 'c']), [b'1', b'2', None])
+        self.assertEqual(self.backend.get_many([]), [])
+        self.assertIsNone(self.fallback.get('a'))
+
+    def test_shared_between_instances(self) -> None:
+        other = self.make_backend()
+
+        self.backend.set('a', b'1', ttl=60)
+
+        self.assertEqual(other.get('a'), b'1')
+
+    def test_ttl(self) -> None:
+        self.backend.set('a', b'1', ttl=60)
+
+        self.assertAlmostEqual(cast(int, self.backend.client.pttl('a')), 60000, delta=1000)
+
+    def test_delete(self) -> None:
+        self.backend.set_many({'rate:v1:1': b'1', 'rate:v1:2': b'2', 'client:v1:1': b'3'}, ttl=60)
+
+        self.backend.delete('rate:v1:1')
+        self.assertEqual(self.backend.get_many(['rate:v1:1', 'rate:v1:2']), [None, b'2'])
+
+        self.backend.delete_prefix('rate:')
+        self.assertEqual(self.backend.get_many(['rate:v1:2', 'client:v1:1']), [None, b'3'])
+
+    def test_fallback(self) -> None:
+        self.server.connected = False
+
+        with self.assertLogs(level='WARNING'):
+            self.backend.set('a', b'1', ttl=60)
+
+        # The server is not retried until the retry interval has passed
+        self.server.connected = True
+        self.assertEqual(self.backend.get('a'), b'1')
+        self.backend.delete('a')
+        self.backend.delete_prefix('a')
+        self.assertIsNone(self.fallback.get('a'))
+
+        self.backend.unavailable_until = 0
+        self.backend.set('b', b'2', ttl=60)
+        self.assertEqual(self.backend.client.get('b'), b'2')
+
+    def test_fallback_on_read(self) -> None:
+        self.fallback.set('a', b'1', ttl=60)
+        self.server.connected = False
+
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(self.backend.get('a'), b'1')
+
+    def test_fallback_on_delete(self) -> None:
+        self.server.connected = False
+
+        with self.assertLogs(level='WARNING'):
+            self.backend.delete('a')
+
+        self.backend.unavailable_until = 0
+        with self.assertLogs(level='WARNING'):
+            self.backend.delete_prefix('a')
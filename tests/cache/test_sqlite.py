@@ -0,0 +1,61 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from cache import SqliteCacheBackend
+
+
+class TestSqliteCacheBackend(TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmpdir.name) / 'cache.db')
+        self.backend = SqliteCacheBackend(self.path, max_entries=2)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_get_set(self) -> None:
+        self.backend.set('a', b'1', ttl=60)
+        self.backend.set('a', b'2', ttl=60)
+
+        self.assertEqual(self.backend.get_many(['a', 'b']), [b'2', None])
+        self.assertEqual(self.backend.get_many([]), [])
+
+    def test_shared_between_workers(self) -> None:
+        other = SqliteCacheBackend(self.path, max_entries=2)
+
+        self.backend.set('a', b'1', ttl=60)
+
+        self.assertEqual(other.get('a'), b'1')
+
+    def test_expired(self) -> None:
+        self.backend.set('a', b'1', ttl=-1)
+
+        self.assertIsNone(self.backend.get('a'))
+
+    def test_delete(self) -> None:
+        self.backend.set_many({'rate:1': b'1', 'rate:2': b'2', 'rates': b'3'}, ttl=60)
+
+        self.backend.delete('rate:1')
+        self.assertEqual(self.backend.get_many(['rate:1', 'rate:2']), [None, b'2'])
+
+        self.backend.delete_prefix('rate:')
+        self.assertEqual(self.backend.get_many(['rate:2', 'rates']), [None, b'3'])
+
+    @patch('cache.sqlite.PRUNE_EVERY', 1)
+    def test_prune(self) -> None:
+        self.backend.set('expired', b'0', ttl=-1)
+        self.backend.set('a', b'1', ttl=10)
+        self.backend.set('b', b'2', ttl=20)
+
+        with self.assertLogs(level='INFO'):
+            self.backend.set('c', b'3', ttl=30)
+
+        self.assertEqual(self.backend.get_many(['a', 'b', 'c']), [None, b'2', b'3'])
+
+    def test_reconnect_after_fork(self) -> None:
+        conn = self.backend.connection()
+
+        with patch('os.getpid', return_value=-1):
+            self.assertIsNot(self.backend.connection(), conn)
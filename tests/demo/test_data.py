@@ -0,0 +1,70 @@
+from datetime import UTC, datetime
+from unittest import TestCase
+
+from demo.data import Dataset, add_months, allocate
+from models import Channel, PlanCost
+
+END = datetime(2026, 10, 1, tzinfo=UTC)
+
+
+class TestDataset(TestCase):
+    def setUp(self) -> None:
+        self.dataset = Dataset(seed=7, client_count=40, incident_count=5000, years=2, end=END)
+
+    def test_allocate(self) -> None:
+        self.assertEqual(allocate(10, [1, 1, 1]), [4, 3, 3])
+        self.assertEqual(sum(allocate(1000, [1 / rank for rank in range(1, 8)])), 1000)
+
+    def test_add_months(self) -> None:
+        self.assertEqual(add_months(END, 3), datetime(2027, 1, 1, tzinfo=UTC))
+        self.assertEqual(add_months(END, -10), datetime(2025, 12, 1, tzinfo=UTC))
+
+    def test_deterministic(self) -> None:
+        other = Dataset(seed=7, client_count=40, incident_count=5000, years=2, end=END)
+        different = Dataset(seed=8, client_count=40, incident_count=5000, years=2, end=END)
+
+        self.assertEqual(self.dataset.clients, other.clients)
+        self.assertEqual(self.dataset.incidents(3), other.incidents(3))
+        self.assertEqual(self.dataset.invoices(3), other.invoices(3))
+        self.assertNotEqual(self.dataset.clients, different.clients)
+
+    def test_incidents(self) -> None:
+        counts = [len(self.dataset.incidents(index)) for index in range(self.dataset.client_count)]
+
+        self.assertEqual(counts, self.dataset.incident_counts)
+        self.assertEqual(sum(counts), 5000)
+        # Skewed, the largest client has many times the incidents of the median one
+        self.assertGreater(max(counts), 10 * sorted(counts)[len(counts) // 2])
+
+        records = self.dataset.incidents(counts.index(max(counts)))
+        created = [record.created for record in records]
+        self.assertEqual(created, sorted(created))
+        self.assertTrue(all(self.dataset.start <= date < END for date in created))
+        self.assertEqual({record.channel for record in records}, set(Channel))
+        history = records[0].data['history']
+        self.assertEqual(history[0]['date'], created[0].isoformat())
+        self.assertEqual([entry['seq'] for entry in history], list(range(len(history))))
+
+    def test_rate(self) -> None:
+        client = self.dataset.clients[0]
+        rate = self.dataset.rate(0)
+
+        self.assertEqual(rate.client_id, client.id)
+        self.assertEqual(rate.plan, client.plan)
+        self.assertEqual(rate.fixed_cost, PlanCost.get_costs(client.plan).fixed_cost)
+
+    def test_invoices(self) -> None:
+        records = self.dataset.incidents(5)
+        invoices = self.dataset.invoices(5, records)
+
+        # Every month but the last one of the history is invoiced
+        self.assertEqual(len(invoices), 23)
+        self.assertEqual((invoices[0].billing_year, invoices[0].billing_month), (2024, 'October'))
+        self.assertEqual((invoices[-1].billing_year, invoices[-1].billing_month), (2026, 'August'))
+        self.assertTrue(all(invoice.rate_id == self.dataset.rate(5).id for invoice in invoices))
+        last_month = sum(1 for record in records if record.created >= datetime(2026, 9, 1, tzinfo=UTC))
+        invoiced = sum(
+            invoice.total_incidents_web + invoice.total_incidents_mobile + invoice.total_incidents_email
+            for invoice in invoices
+        )
+        self.assertEqual(invoiced + last_month, len(records))
@@ -0,0 +1,38 @@
+import tempfile
+from datetime import UTC, datetime
+from pathlib import Path
+from unittest import TestCase
+
+from demo.data import Dataset
+from demo.load import write_documents
+from repositories.sqlite import SqliteDatabase, SqliteInvoiceRepository, SqliteRateRepository, SqliteUnitOfWork
+
+
+class TestWriteDocuments(TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = str(Path(self.tmpdir.name) / 'test.db')
+        self.db = SqliteDatabase(self.path)
+        self.dataset = Dataset(seed=1, client_count=10, incident_count=500, years=1, end=datetime(2026, 10, 1, tzinfo=UTC))
+
+    def test_write_documents(self) -> None:
+        def unit_of_work() -> SqliteUnitOfWork:
+            return SqliteUnitOfWork(self.path, db=self.db)
+
+        written = write_documents(self.dataset, range(10), unit_of_work, batch_writes=7)
+        # Saves can be repeated
+        write_documents(self.dataset, range(3), unit_of_work, batch_writes=7)
+
+        # Every client has a rate and eleven invoices
+        self.assertEqual(written, 120)
+        rate_repo = SqliteRateRepository(self.path, db=self.db)
+        invoice_repo = SqliteInvoiceRepository(self.path, db=self.db)
+        self.assertEqual(len(list(rate_repo.get_all())), 10)
+        rate = self.dataset.rate(4)
+        self.assertEqual(rate_repo.get_by_client_and_plan(rate.client_id, rate.plan), rate)
+        invoices = self.dataset.invoices(4)
+        self.assertEqual(
+            sorted(invoice_repo.get_by_client(rate.client_id), key=lambda invoice: invoice.id),
+            sorted(invoices, key=lambda invoice: invoice.id),
+        )
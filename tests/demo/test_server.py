@@ -0,0 +1,40 @@
+from datetime import UTC, datetime
+from unittest import TestCase
+
+from demo.data import Dataset
+from demo.server import create_server
+from repositories.rest.incident import RestIncidentRepository
+
+
+class TestServer(TestCase):
+    def setUp(self) -> None:
+        self.dataset = Dataset(seed=3, client_count=5, incident_count=200, years=1, end=datetime(2026, 10, 1, tzinfo=UTC))
+        self.client = create_server(self.dataset).test_client()
+
+    def test_health(self) -> None:
+        self.assertEqual(self.client.get('/api/v1/health/client').status_code, 200)
+        self.assertEqual(self.client.get('/api/v1/health/incidentquery').status_code, 200)
+
+    def test_client(self) -> None:
+        client = self.dataset.clients[2]
+
+        resp = self.client.get(f'/api/v1/clients/{client.id}?include_plan=true')
+
+        self.assertEqual(resp.json, {'id': client.id, 'name': client.name, 'plan': client.plan})
+        self.assertEqual(self.client.get('/api/v1/clients/unknown').status_code, 404)
+
+    def test_incidents(self) -> None:
+        client = self.dataset.clients[0]
+        records = self.dataset.incidents(0)
+
+        resp = self.client.get(f'/api/v1/clients/{client.id}/incidents')
+        since = records[len(records) // 2].created
+        resp_since = self.client.get(f'/api/v1/clients/{client.id}/incidents', query_string={'since': since.isoformat()})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json, [record.data for record in records])
+        self.assertEqual(resp_since.json, [record.data for record in records if record.created >= since])
+        # The payload decodes as the service decodes the incidentquery responses
+        incidents = RestIncidentRepository('', None).decode_incidents(resp.json)  # type: ignore[arg-type]
+        self.assertEqual(incidents[0].history[0].date, records[0].created)
+        self.assertEqual(self.client.get(f'/api/v1/clients/{client.id}/incidents?since=yesterday').status_code, 400)
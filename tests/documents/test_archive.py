@@ -0,0 +1,111 @@
+import io
+import json
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import TestCase
+
+import responses
+
+from documents.archive import BucketArchiveStorage, LocalArchiveStorage, ShardedArchive, open_storage
+
+API_URL = 'https://storage.example.com'
+
+
+class TestLocalArchiveStorage(TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = Path(tmpdir.name)
+        self.storage = LocalArchiveStorage(self.root)
+
+    def test_write_read_list(self) -> None:
+        self.assertEqual(self.storage.list('2024-11'), [])
+
+        self.storage.write('2024-11/b.json', b'{}')
+        self.storage.write('2024-11/a.zip', b'zip')
+
+        self.assertEqual(self.storage.list('2024-11'), ['2024-11/a.zip', '2024-11/b.json'])
+        self.assertEqual(self.storage.read('2024-11/a.zip'), b'zip')
+        self.assertEqual(sorted(path.name for path in (self.root / '2024-11').iterdir()), ['a.zip', 'b.json'])
+
+    def test_sharded_archive(self) -> None:
+        archive = ShardedArchive(self.storage, '2024-11')
+        self.assertEqual(archive.completed(), (set(), 0))
+
+        size = archive.write_shard(0, [('a', b'<html>a</html>'), ('b', b'<html>b</html>')])
+        archive.write_shard(1, [('c', b'<html>c</html>')])
+        # A shard whose manifest was never written, as left by an interrupted run
+        self.storage.write('2024-11/shard-00002.zip', b'partial')
+
+        self.assertEqual(archive.completed(), ({'a', 'b', 'c'}, 2))
+        data = self.storage.read('2024-11/shard-00000.zip')
+        self.assertEqual(len(data), size)
+        with zipfile.ZipFile(io.BytesIO(data)) as shard:
+            self.assertEqual(shard.namelist(), ['a.html', 'b.html'])
+            self.assertEqual(shard.read('b.html'), b'<html>b</html>')
+
+
+class TestBucketArchiveStorage(TestCase):
+    def setUp(self) -> None:
+        self.storage = BucketArchiveStorage(API_URL, 'bucket', '/documents/', lambda: 'token')
+
+    def test_list(self) -> None:
+        url = f'{API_URL}/storage/v1/b/bucket/o'
+
+        with responses.RequestsMock() as rsps:
+            rsps.get(
+                url,
+                match=[responses.matchers.query_param_matcher({'pageToken': 'next'}, strict_match=False)],
+                json={'items': [{'name': 'documents/2024-11/shard-00000.json'}]},
+            )
+            rsps.get(
+                url,
+                match=[responses.matchers.query_param_matcher({'prefix': 'documents/2024-11/'}, strict_match=False)],
+                json={'items': [{'name': 'documents/2024-11/shard-00000.zip'}], 'nextPageToken': 'next'},
+            )
+
+            names = self.storage.list('2024-11')
+
+            self.assertEqual(rsps.calls[0].request.headers['Authorization'], 'Bearer token')
+
+        self.assertEqual(names, ['2024-11/shard-00000.json', '2024-11/shard-00000.zip'])
+
+    def test_read_write(self) -> None:
+        with responses.RequestsMock() as rsps:
+            rsps.post(
+                f'{API_URL}/upload/storage/v1/b/bucket/o',
+                match=[responses.matchers.query_param_matcher({'uploadType': 'media', 'name': 'documents/2024-11/a.json'})],
+            )
+            rsps.get(f'{API_URL}/storage/v1/b/bucket/o/documents%2F2024-11%2Fa.json', body=b'{}')
+
+            self.storage.write('2024-11/a.json', b'{}')
+            data = self.storage.read('2024-11/a.json')
+
+            self.assertEqual(rsps.calls[0].request.body, b'{}')
+
+        self.assertEqual(data, b'{}')
+
+    def test_sharded_archive(self) -> None:
+        manifest = {'shard': 4, 'invoices': ['a', 'b']}
+
+        with responses.RequestsMock() as rsps:
+            rsps.get(
+                f'{API_URL}/storage/v1/b/bucket/o',
+                json={
+                    'items': [{'name': 'documents/2024-11/shard-00004.zip'}, {'name': 'documents/2024-11/shard-00004.json'}]
+                },
+            )
+            rsps.get(f'{API_URL}/storage/v1/b/bucket/o/documents%2F2024-11%2Fshard-00004.json', body=json.dumps(manifest))
+
+            completed = ShardedArchive(self.storage, '2024-11').completed()
+
+        self.assertEqual(completed, ({'a', 'b'}, 5))
+
+    def test_open_storage(self) -> None:
+        bucket = open_storage('gs://bucket/documents', API_URL, lambda: 'token')
+        local = open_storage('/tmp/documents', API_URL, lambda: 'token')  # noqa: S108
+
+        self.assertIsInstance(bucket, BucketArchiveStorage)
+        self.assertEqual((bucket.bucket, bucket.prefix), ('bucket', 'documents'))  # type: ignore[attr-defined]
+        self.assertIsInstance(local, LocalArchiveStorage)
@@ -0,0 +1,83 @@
+import io
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import Mock
+
+from faker import Faker
+
+from documents.archive import LocalArchiveStorage, ShardedArchive
+from documents.pipeline import InvoiceDocumentPipeline
+from models import Client, Invoice, Month, Plan
+from repositories import ClientRepository
+from repositories.sqlite import SqliteInvoiceRepository, SqliteRateRepository
+from tests.repositories.contracts import random_invoice, random_rate
+
+
+class TestInvoiceDocumentPipeline(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        db_path = str(Path(tmpdir.name) / 'test.db')
+        self.invoice_repo = SqliteInvoiceRepository(db_path)
+        self.rate_repo = SqliteRateRepository(db_path)
+        self.client_repo = Mock(ClientRepository)
+        self.clients: dict[str, Client] = {}
+        self.client_repo.get.side_effect = self.clients.get
+        self.storage = LocalArchiveStorage(Path(tmpdir.name) / 'documents')
+        self.archive = ShardedArchive(self.storage, '2024-11')
+        self.pipeline = InvoiceDocumentPipeline(
+            self.invoice_repo, self.rate_repo, self.client_repo, processes=1, batch_size=2, shard_size=2, client_workers=2
+        )
+
+    def add_invoice(self, year: int = 2024, *, with_client: bool = True) -> Invoice:
+        client = Client(id=str(self.faker.uuid4()), name=self.faker.company(), plan=Plan.EMPRENDEDOR)
+        rate = random_rate(self.faker, client_id=client.id)
+        invoice = random_invoice(self.faker, client_id=client.id, billing_year=year)
+        invoice.rate_id = rate.id
+        self.rate_repo.create(rate)
+        self.invoice_repo.create(invoice)
+        if with_client:
+            self.clients[client.id] = client
+        return invoice
+
+    def archived_documents(self) -> dict[str, bytes]:
+        documents = {}
+        for name in self.storage.list('2024-11'):
+            if name.endswith('.zip'):
+                with zipfile.ZipFile(io.BytesIO(self.storage.read(name))) as shard:
+                    documents.update({info.filename: shard.read(info) for info in shard.infolist()})
+        return documents
+
+    def test_run(self) -> None:
+        invoices = [self.add_invoice() for _ in range(5)]
+        missing = self.add_invoice(with_client=False)
+        self.add_invoice(year=2023)
+
+        with self.assertLogs('InvoiceDocumentPipeline', level='INFO') as logs:
+            report = self.pipeline.run(self.archive, Month.NOVEMBER, 2024)
+
+        self.assertEqual((report.invoices, report.rendered, report.missing, report.archived), (6, 5, 1, 0))
+        self.assertEqual(report.shards, 3)
+        self.assertGreater(report.throughput, 0)
+        self.assertEqual(logs.records[-1].json_fields['rendered'], 5)  # type: ignore[attr-defined]
+        documents = self.archived_documents()
+        self.assertEqual(set(documents), {f'{invoice.id}.html' for invoice in invoices})
+        self.assertNotIn(f'{missing.id}.html', documents)
+        self.assertIn(self.clients[invoices[0].client_id].name.encode(), documents[f'{invoices[0].id}.html'])
+
+    def test_resume(self) -> None:
+        invoices = [self.add_invoice() for _ in range(5)]
+        first = self.pipeline.run(self.archive, Month.NOVEMBER, 2024)
+        # Lose the last shard, as if the run had been interrupted while writing it
+        last_manifest = self.archive.manifests()[-1]
+        (self.storage.root / self.archive.shard_name(last_manifest['shard'], 'json')).unlink()
+
+        report = self.pipeline.run(self.archive, Month.NOVEMBER, 2024)
+
+        self.assertEqual((report.invoices, report.archived, report.rendered), (5, 5 - len(last_manifest['invoices']), 1))
+        self.assertEqual(report.shards, 1)
+        self.assertEqual(self.archive.completed(), ({invoice.id for invoice in invoices}, first.shards))
+        self.assertEqual(self.pipeline.run(self.archive, Month.NOVEMBER, 2024).rendered, 0)
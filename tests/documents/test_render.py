@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from faker import Faker
+
+from blueprints.invoice import invoice_result_to_dict
+from documents.render import render_batch, render_document
+from models import Client, Plan
+from tests.repositories.contracts import random_invoice, random_rate
+
+
+class TestRender(TestCase):
+    def setUp(self) -> None:
+        faker = Faker()
+        self.client = Client(id=str(faker.uuid4()), name='Ruiz & <Hijos>', plan=Plan.EMPRESARIO)
+        self.invoice = random_invoice(faker, client_id=self.client.id)
+        self.invoice.total_incidents_web, self.invoice.total_incidents_mobile, self.invoice.total_incidents_email = 3, 0, 1
+        self.rate = random_rate(faker, client_id=self.client.id, plan=Plan.EMPRESARIO)
+        self.rate.fixed_cost, self.rate.cost_per_incident_web, self.rate.cost_per_incident_email = 100, 2.5, 1
+        self.result = invoice_result_to_dict(self.invoice, self.rate, self.client)
+
+    def test_render_document(self) -> None:
+        document = render_document(self.invoice.id, self.invoice.generation_date.isoformat(), self.result).decode()
+
+        self.assertIn(self.invoice.id, document)
+        self.assertIn('Ruiz &amp; &lt;Hijos&gt;', document)
+        self.assertIn(f'Factura {self.invoice.billing_month} {self.invoice.billing_year}', document)
+        self.assertIn('<td class="amount">7.50</td>', document)
+        self.assertIn('<td class="amount">108.50</td>', document)
+        self.assertNotIn('<link', document)
+
+    def test_render_batch(self) -> None:
+        documents = render_batch([('a', '2024-11-01', self.result), ('b', '2024-11-02', self.result)])
+
+        self.assertEqual([invoice_id for invoice_id, _ in documents], ['a', 'b'])
+        self.assertIn(b'2024-11-02', documents[1][1])
@@ -0,0 +1,85 @@
+from datetime import UTC, datetime, timedelta, timezone
+from typing import cast
+from unittest import TestCase
+
+from faker import Faker
+
+from models import Action, Channel, HistoryEntry, Incident, IncidentBatch, IncidentSummary
+
+
+class TestIncidentBatch(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+
+    def gen_incident(self, channel: Channel, created: datetime) -> Incident:
+        return Incident(
+            id=cast(str, self.faker.uuid4()),
+            name=self.faker.sentence(),
+            channel=channel,
+            reported_by=cast(str, self.faker.uuid4()),
+            created_by=cast(str, self.faker.uuid4()),
+            assigned_to=cast(str, self.faker.uuid4()),
+            history=[HistoryEntry(seq=0, date=created, action=Action.CREATED, description=self.faker.sentence())],
+        )
+
+    def test_from_incidents(self) -> None:
+        created = datetime(2024, 11, 15, 10, 30, 15, 123456, tzinfo=UTC)
+        incident = self.gen_incident(Channel.EMAIL, created)
+
+        batch = IncidentBatch.from_incidents([incident], history_loader={incident.id: incident.history}.__getitem__)
+
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(batch.ids, [incident.id])
+        self.assertEqual(batch.channel(0), Channel.EMAIL)
+        self.assertEqual(batch.created_at(0), created)
+        self.assertEqual(batch.history(0), incident.history)
+        self.assertEqual(list(batch.summaries()), [IncidentSummary(id=incident.id, channel=Channel.EMAIL, created=created)])
+
+    def test_history_without_loader(self) -> None:
+        # The histories of the incidents are not kept
+        batch = IncidentBatch.from_incidents([self.gen_incident(Channel.WEB, datetime(2024, 11, 15, tzinfo=UTC))])
+
+        with self.assertRaises(LookupError):
+            batch.history(0)
+
+    def test_created_in_month(self) -> None:
+        incidents = [
+            self.gen_incident(Channel.WEB, datetime(2024, 11, 30, 23, 59, 59, 999999, tzinfo=UTC)),
+            self.gen_incident(Channel.WEB, datetime(2024, 12, 1, tzinfo=UTC)),
+            self.gen_incident(Channel.MOBILE, datetime(2024, 12, 31, 23, 59, tzinfo=UTC)),
+            self.gen_incident(Channel.EMAIL, datetime(2025, 1, 1, tzinfo=UTC)),
+        ]
+        batch = IncidentBatch.from_incidents(
+            incidents, history_loader={incident.id: incident.history for incident in incidents}.__getitem__
+        )
+
+        december = batch.created_in_month(12, 2024)
+
+        self.assertEqual(december.ids, [incidents[1].id, incidents[2].id])
+        self.assertEqual(december.history(1), incidents[2].history)
+        self.assertEqual(december.count_by_channel(), {Channel.WEB: 1, Channel.MOBILE: 1, Channel.EMAIL: 0})
+        self.assertEqual(batch.created_in_month(1, 2025).ids, [incidents[3].id])
+
+    def test_created_in_month_local(self) -> None:
+        # Incidents are billed in the month of their own offset, whatever the month in UTC
+        incidents = [
+            self.gen_incident(Channel.WEB, datetime.fromisoformat('2024-05-31T22:30:00-05:00')),
+            self.gen_incident(Channel.MOBILE, datetime.fromisoformat('2024-06-01T01:30:00+03:00')),
+            self.gen_incident(Channel.EMAIL, datetime.fromisoformat('2024-06-01T00:00:00Z')),
+        ]
+        batch = IncidentBatch.from_incidents(incidents)
+
+        self.assertEqual(batch.created_in_month(5, 2024).ids, [incidents[0].id])
+        self.assertEqual(batch.created_in_month(6, 2024).ids, [incidents[1].id, incidents[2].id])
+        self.assertEqual(batch.created_at(0), incidents[0].history[0].date)
+        self.assertEqual(batch.created_at(0).utcoffset(), timedelta(hours=-5))
+        self.assertEqual(batch.created_at(1).tzinfo, timezone(timedelta(hours=3)))
+
+    def test_naive_dates(self) -> None:
+        incident = self.gen_incident(Channel.WEB, datetime.fromisoformat('2024-05-31T23:30:00'))
+
+        batch = IncidentBatch.from_incidents([incident])
+
+        self.assertEqual(batch.created_at(0), datetime(2024, 5, 31, 23, 30, tzinfo=UTC))
+        self.assertEqual(batch.created_in_month(5, 2024).ids, [incident.id])
+        self.assertEqual(len(batch.created_between(datetime(2024, 6, 1, tzinfo=UTC), datetime(2024, 7, 1, tzinfo=UTC))), 0)
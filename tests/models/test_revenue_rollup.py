@@ -0,0 +1,68 @@
+from datetime import UTC
+from unittest import TestCase
+
+from faker import Faker
+
+from models import Month, Plan, RevenueRollup, merge_rollups
+from tests.repositories.contracts import random_invoice, random_rate, random_rollup
+
+
+class TestRevenueRollup(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+
+    def test_of_invoice(self) -> None:
+        rate = random_rate(self.faker, plan=Plan.EMPRESARIO)
+        invoice = random_invoice(self.faker, client_id=rate.client_id, billing_year=2024, tzinfo=UTC)
+        invoice.rate_id = rate.id
+
+        rollup = RevenueRollup.of_invoice(invoice, rate)
+
+        self.assertEqual((rollup.period, rollup.plan, rollup.invoices), ('2024-11', Plan.EMPRESARIO, 1))
+        self.assertEqual(
+            (rollup.total_incidents_web, rollup.total_incidents_mobile, rollup.total_incidents_email),
+            (invoice.total_incidents_web, invoice.total_incidents_mobile, invoice.total_incidents_email),
+        )
+        self.assertEqual(rollup.fixed_revenue, rate.fixed_cost)
+        self.assertEqual(
+            rollup.variable_revenue,
+            rate.cost_per_incident_web * invoice.total_incidents_web
+            + rate.cost_per_incident_mobile * invoice.total_incidents_mobile
+            + rate.cost_per_incident_email * invoice.total_incidents_email,
+        )
+
+    def test_change(self) -> None:
+        rate = random_rate(self.faker)
+        before = random_invoice(self.faker, client_id=rate.client_id, billing_year=2024, tzinfo=UTC)
+        before.total_incidents_web, before.total_incidents_mobile, before.total_incidents_email = 1, 2, 3
+        after = random_invoice(self.faker, client_id=rate.client_id, billing_year=2024, tzinfo=UTC)
+        after.total_incidents_web, after.total_incidents_mobile, after.total_incidents_email = 2, 2, 5
+
+        change = RevenueRollup.change(before, after, rate)
+
+        self.assertEqual(
+            change.counters,
+            {
+                'invoices': 0,
+                'total_incidents_web': 1,
+                'total_incidents_mobile': 0,
+                'total_incidents_email': 2,
+                'fixed_revenue': 0,
+                'variable_revenue': rate.cost_per_incident_web + 2 * rate.cost_per_incident_email,
+            },
+        )
+
+    def test_merge_rollups(self) -> None:
+        first = random_rollup(self.faker, '2024-11', Plan.EMPRENDEDOR)
+        second = random_rollup(self.faker, '2024-11', Plan.EMPRENDEDOR)
+        other_plan = random_rollup(self.faker, '2024-11', Plan.EMPRESARIO)
+        earlier = random_rollup(self.faker, '2024-10', Plan.EMPRENDEDOR)
+
+        merged = merge_rollups([first, other_plan, second, earlier])
+
+        self.assertEqual([rollup.key for rollup in merged], [earlier.key, first.key, other_plan.key])
+        self.assertEqual(merged[1].invoices, first.invoices + second.invoices)
+        self.assertEqual(merged[1].billing_month, Month.NOVEMBER.value)
+        # The rollups given are left untouched
+        self.assertIsNot(merged[0], earlier)
+        self.assertEqual(first.invoices, merged[1].invoices - second.invoices)
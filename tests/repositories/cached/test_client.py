@@ -0,0 +1,36 @@
+from typing import cast
+from unittest import TestCase
+from unittest.mock import Mock
+
+from faker import Faker
+
+from cache import Cache, LocalCacheBackend, MsgpackCodec
+from models import Client, Plan
+from repositories import ClientRepository
+from repositories.cached import CachedClientRepository
+
+
+class TestCachedClientRepository(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.backend = Mock(ClientRepository)
+        cache = Cache(LocalCacheBackend(max_entries=100), MsgpackCodec(Client), namespace='client', version=1, ttl=60)
+        self.repo = CachedClientRepository(self.backend, cache)
+
+    def test_get_cached(self) -> None:
+        client = Client(id=cast(str, self.faker.uuid4()), name=self.faker.company(), plan=Plan.EMPRENDEDOR)
+        cast(Mock, self.backend.get).return_value = client
+
+        self.assertEqual(self.repo.get(client.id), client)
+        self.assertEqual(self.repo.get(client.id), client)
+
+        cast(Mock, self.backend.get).assert_called_once_with(client.id)
+
+    def test_get_missing_not_cached(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        cast(Mock, self.backend.get).return_value = None
+
+        self.assertIsNone(self.repo.get(client_id))
+        self.assertIsNone(self.repo.get(client_id))
+
+        self.assertEqual(cast(Mock, self.backend.get).call_count, 2)
@@ -0,0 +1,117 @@
+from datetime import UTC, datetime, timedelta
+from typing import cast
+from unittest import TestCase
+from unittest.mock import Mock, call
+
+from faker import Faker
+
+from models import Action, Channel, HistoryEntry, Incident
+from repositories import IncidentRepository
+from repositories.cached import IncidentSummaryStore
+
+
+class TestIncidentSummaryStore(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.backend = Mock(IncidentRepository)
+        self.store = IncidentSummaryStore(self.backend, full_resync_interval=3600, max_incidents=2)
+        self.client_id = cast(str, self.faker.uuid4())
+
+    def gen_incident(self, created: datetime) -> Incident:
+        return Incident(
+            id=cast(str, self.faker.uuid4()),
+            name=self.faker.sentence(),
+            channel=Channel.WEB,
+            reported_by=cast(str, self.faker.uuid4()),
+            created_by=cast(str, self.faker.uuid4()),
+            assigned_to=cast(str, self.faker.uuid4()),
+            history=[HistoryEntry(seq=0, date=created, action=Action.CREATED, description=self.faker.sentence())],
+        )
+
+    def test_incremental_sync(self) -> None:
+        now = datetime.now(UTC)
+        old, new = self.gen_incident(now - timedelta(days=1)), self.gen_incident(now)
+        # The server may return incidents already seen, they are merged by id
+        cast(Mock, self.backend.get_incidents_by_client_id).side_effect = [[old, new], [new], []]
+
+        first = self.store.get_summaries(self.client_id)
+        second = self.store.get_summaries(self.client_id)
+        third = self.store.get_summaries(self.client_id)
+
+        self.assertEqual({incident.id for incident in first}, {old.id, new.id})
+        self.assertEqual(second, first)
+        self.assertEqual(third, first)
+        self.assertEqual(
+            cast(Mock, self.backend.get_incidents_by_client_id).call_args_list,
+            [
+                call(client_id=self.client_id),
+                call(client_id=self.client_id, since=now),
+                call(client_id=self.client_id, since=now),
+            ],
+        )
+
+    def test_incremental_sync_failure(self) -> None:
+        incident = self.gen_incident(datetime.now(UTC))
+        cast(Mock, self.backend.get_incidents_by_client_id).side_effect = [[incident], ConnectionError(), []]
+
+        self.store.get_summaries(self.client_id)
+        with self.assertLogs(level='ERROR'):
+            summaries = self.store.get_summaries(self.client_id)
+
+        self.assertEqual(summaries, [])
+        cast(Mock, self.backend.get_incidents_by_client_id).assert_called_with(client_id=self.client_id)
+
+    def test_full_resync_interval(self) -> None:
+        store = IncidentSummaryStore(self.backend, full_resync_interval=-1, max_incidents=2)
+        cast(Mock, self.backend.get_incidents_by_client_id).return_value = [self.gen_incident(datetime.now(UTC))]
+
+        store.get_summaries(self.client_id)
+        store.get_summaries(self.client_id)
+
+        cast(Mock, self.backend.get_incidents_by_client_id).assert_called_with(client_id=self.client_id)
+
+    def test_no_incidents(self) -> None:
+        cast(Mock, self.backend.get_incidents_by_client_id).return_value = None
+
+        self.assertEqual(self.store.get_summaries(self.client_id), [])
+
+    def test_max_incidents(self) -> None:
+        cast(Mock, self.backend.get_incidents_by_client_id).side_effect = lambda **_: [self.gen_incident(datetime.now(UTC))]
+        client_ids = [cast(str, self.faker.uuid4()) for _ in range(3)]
+
+        for client_id in client_ids:
+            self.store.get_summaries(client_id)
+
+        self.assertEqual(list(self.store.clients), client_ids[1:])
+        self.assertEqual(self.store.size, 2)
+
+    def test_max_incidents_keeps_client_synced(self) -> None:
+        now = datetime.now(UTC)
+        cast(Mock, self.backend.get_incidents_by_client_id).side_effect = [
+            [self.gen_incident(now)],
+            [self.gen_incident(now) for _ in range(3)],
+        ]
+        other_client_id = cast(str, self.faker.uuid4())
+
+        self.store.get_summaries(other_client_id)
+        summaries = self.store.get_summaries(self.client_id)
+
+        self.assertEqual(len(summaries), 3)
+        self.assertEqual(list(self.store.clients), [self.client_id])
+        self.assertEqual(self.store.size, 3)
+
+    def test_fully_synced_summaries(self) -> None:
+        incident = self.gen_incident(datetime.now(UTC))
+        cast(Mock, self.backend.get_incidents_by_client_id).return_value = [incident]
+        other_client_id = cast(str, self.faker.uuid4())
+
+        self.assertIsNone(self.store.fully_synced_summaries(self.client_id, max_age=60))
+        self.store.get_summaries(self.client_id)
+        self.store.get_summaries(other_client_id)
+
+        summaries = self.store.fully_synced_summaries(self.client_id, max_age=60)
+        self.assertEqual([summary.id for summary in summaries or []], [incident.id])
+        self.assertIsNone(self.store.fully_synced_summaries(self.client_id, max_age=-1))
+        # Neither synced again nor moved to the most recently used end
+        self.assertEqual(cast(Mock, self.backend.get_incidents_by_client_id).call_count, 2)
+        self.assertEqual(list(self.store.clients), [self.client_id, other_client_id])
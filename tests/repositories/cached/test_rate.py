@@ -0,0 +1,94 @@
+from typing import cast
+from unittest import TestCase
+from unittest.mock import Mock
+
+from faker import Faker
+
+from cache import Cache, LocalCacheBackend, MsgpackCodec
+from models import Plan, Rate
+from repositories import RateRepository
+from repositories.cached import CachedRateRepository
+
+
+class TestCachedRateRepository(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.backend = Mock(RateRepository)
+        self.repo = CachedRateRepository(self.backend, self.rate_cache(ttl=60))
+
+    def rate_cache(self, ttl: float) -> Cache[Rate]:
+        return Cache(LocalCacheBackend(max_entries=100), MsgpackCodec(Rate), namespace='rate', version=1, ttl=ttl)
+
+    def random_rate(self) -> Rate:
+        return Rate(
+            id=cast(str, self.faker.uuid4()),
+            plan=Plan.EMPRESARIO,
+            client_id=cast(str, self.faker.uuid4()),
+            fixed_cost=6.0,
+            cost_per_incident_web=0.13,
+            cost_per_incident_mobile=0.08,
+            cost_per_incident_email=0.06,
+        )
+
+    def test_get_by_id_cached(self) -> None:
+        rate = self.random_rate()
+        cast(Mock, self.backend.get_by_id).return_value = rate
+
+        self.assertEqual(self.repo.get_by_id(rate.id), rate)
+        self.assertEqual(self.repo.get_by_id(rate.id), rate)
+        self.assertEqual(self.repo.get_by_client_and_plan(rate.client_id, rate.plan), rate)
+
+        cast(Mock, self.backend.get_by_id).assert_called_once_with(rate.id)
+        cast(Mock, self.backend.get_by_client_and_plan).assert_not_called()
+
+    def test_get_many(self) -> None:
+        cached, fetched = self.random_rate(), self.random_rate()
+        missing_id = cast(str, self.faker.uuid4())
+        self.repo.preload([cached])
+        cast(Mock, self.backend.get_many).return_value = [fetched, None]
+
+        result = self.repo.get_many([fetched.id, cached.id, missing_id])
+
+        self.assertEqual(result, [fetched, cached, None])
+        cast(Mock, self.backend.get_many).assert_called_once_with([fetched.id, missing_id])
+        self.assertEqual(self.repo.get_by_id(fetched.id), fetched)
+
+    def test_get_by_client_and_plan_missing_not_cached(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        cast(Mock, self.backend.get_by_client_and_plan).return_value = None
+
+        self.assertIsNone(self.repo.get_by_client_and_plan(client_id, Plan.EMPRESARIO))
+        self.assertIsNone(self.repo.get_by_client_and_plan(client_id, Plan.EMPRESARIO))
+
+        self.assertEqual(cast(Mock, self.backend.get_by_client_and_plan).call_count, 2)
+
+    def test_expired(self) -> None:
+        repo = CachedRateRepository(self.backend, self.rate_cache(ttl=-1))
+        rate = self.random_rate()
+        cast(Mock, self.backend.get_by_id).return_value = rate
+
+        repo.create(rate)
+        repo.get_by_id(rate.id)
+
+        cast(Mock, self.backend.create).assert_called_once_with(rate)
+        cast(Mock, self.backend.get_by_id).assert_called_once_with(rate.id)
+
+    def test_preload(self) -> None:
+        rates = [self.random_rate() for _ in range(3)]
+
+        self.assertEqual(self.repo.preload(rates), 3)
+
+        for rate in rates:
+            self.assertEqual(self.repo.get_by_client_and_plan(rate.client_id, rate.plan), rate)
+        cast(Mock, self.backend.get_by_client_and_plan).assert_not_called()
+
+    def test_delete_all(self) -> None:
+        rate = self.random_rate()
+        cast(Mock, self.backend.get_by_id).return_value = None
+        self.repo.update(rate)
+
+        self.repo.delete_all()
+        self.repo.get_by_id(rate.id)
+
+        cast(Mock, self.backend.delete_all).assert_called_once()
+        cast(Mock, self.backend.get_by_id).assert_called_once_with(rate.id)
@@ -0,0 +1,497 @@
+import uuid
+from dataclasses import asdict, replace
+from datetime import UTC, datetime, tzinfo
+from typing import TYPE_CHECKING, Any, cast
+from unittest.mock import patch
+
+from faker import Faker
+
+from models import Invoice, Month, Plan, Rate, RevenueRollup
+from repositories import ConditionalUnitOfWork, InvoiceRepository, RateRepository, RevenueRepository, StaleWriteError
+
+if TYPE_CHECKING:
+    from unittest_parametrize import ParametrizedTestCase
+
+    ContractBase = ParametrizedTestCase
+else:
+    # The contracts are mixed into the test case of every implementation, they are not test cases themselves
+    ContractBase = object
+
+
+def normalize_datetime(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=UTC)
+
+
+def random_rate(faker: Faker, client_id: str | None = None, plan: Plan | None = None) -> Rate:
+    return Rate(
+        id=str(uuid.uuid4()),
+        client_id=client_id or str(uuid.uuid4()),
+        plan=plan or Plan.EMPRENDEDOR,
+        fixed_cost=faker.random_number(),
+        cost_per_incident_web=faker.random_number(),
+        cost_per_incident_mobile=faker.random_number(),
+        cost_per_incident_email=faker.random_number(),
+    )
+
+
+def random_invoice(
+    faker: Faker, client_id: str | None = None, billing_year: int | None = None, tzinfo: tzinfo | None = None
+) -> Invoice:
+    return Invoice(
+        id=str(uuid.uuid4()),
+        client_id=client_id or cast(str, faker.uuid4()),
+        rate_id=cast(str, faker.uuid4()),
+        generation_date=faker.date_time_this_year(tzinfo=tzinfo),
+        billing_month=Month.NOVEMBER.value,
+        billing_year=billing_year or int(faker.year()),
+        payment_due_date=faker.past_datetime(start_date='-30d', tzinfo=UTC),
+        total_incidents_web=faker.random_int(min=0, max=100),
+        total_incidents_mobile=faker.random_int(min=0, max=100),
+        total_incidents_email=faker.random_int(min=0, max=100),
+    )
+
+
+def random_rollup(faker: Faker, period: str = '2024-11', plan: Plan = Plan.EMPRENDEDOR) -> RevenueRollup:
+    year, month = period.split('-')
+    return RevenueRollup(
+        billing_year=int(year),
+        billing_month=Month.from_int(int(month)).value,
+        plan=plan,
+        invoices=faker.random_int(min=1, max=100),
+        total_incidents_web=faker.random_int(min=0, max=100),
+        total_incidents_mobile=faker.random_int(min=0, max=100),
+        total_incidents_email=faker.random_int(min=0, max=100),
+        # Binary fractions, so that sums of them compare equal whatever the order they are added in
+        fixed_revenue=faker.random_int(min=0, max=1000) / 4,
+        variable_revenue=faker.random_int(min=0, max=1000) / 4,
+    )
+
+
+class RateRepositoryContract(ContractBase):
+    """Tests every RateRepository implementation must pass, `store_rate` and `stored_rate` access the storage directly."""
+
+    faker: Faker
+    repo: RateRepository
+    # Module attribute holding the number of ids fetched per request by get_many
+    get_many_chunk_size: str
+
+    def store_rate(self, rate: Rate) -> None:
+        raise NotImplementedError
+
+    def stored_rate(self, rate_id: str) -> dict[str, Any] | None:
+        raise NotImplementedError
+
+    def add_random_rates(self, n: int, client_id: str | None = None, plan: Plan | None = None) -> list[Rate]:
+        rates = []
+        for _ in range(n):
+            rate = random_rate(self.faker, client_id, plan)
+            self.store_rate(rate)
+            rates.append(rate)
+        return rates
+
+    def test_get_by_id(self) -> None:
+        rate = self.add_random_rates(1)[0]
+
+        result = self.repo.get_by_id(rate.id)
+
+        self.assertEqual(result, rate)
+
+    def test_get_by_id_not_found(self) -> None:
+        result = self.repo.get_by_id(str(uuid.uuid4()))
+        self.assertIsNone(result)
+
+    def test_get_many(self) -> None:
+        rates = self.add_random_rates(3)
+        missing_id = str(uuid.uuid4())
+
+        result = self.repo.get_many([rates[2].id, missing_id, rates[0].id, rates[1].id])
+
+        self.assertEqual([rate.id if rate else None for rate in result], [rates[2].id, None, rates[0].id, rates[1].id])
+
+    def test_get_many_chunked(self) -> None:
+        rates = self.add_random_rates(5)
+
+        with patch(self.get_many_chunk_size, 2):
+            result = self.repo.get_many([rate.id for rate in rates])
+
+        self.assertEqual([rate.id if rate else None for rate in result], [rate.id for rate in rates])
+
+    def test_get_by_client_and_plan(self) -> None:
+        client_id = str(uuid.uuid4())
+        rate = self.add_random_rates(1, client_id=client_id, plan=Plan.EMPRENDEDOR)[0]
+
+        result = self.repo.get_by_client_and_plan(client_id, Plan.EMPRENDEDOR)
+
+        self.assertEqual(result, rate)
+
+    def test_get_by_client_and_plan_not_found(self) -> None:
+        result = self.repo.get_by_client_and_plan('nonexistent_client', 'premium')
+        self.assertIsNone(result)
+
+    def test_create(self) -> None:
+        rate = random_rate(self.faker)
+
+        self.repo.create(rate)
+
+        self.assertIsNotNone(self.stored_rate(rate.id))
+
+    def test_update(self) -> None:
+        rate = self.add_random_rates(1)[0]
+        new_fixed_cost = self.faker.random_number()
+        rate.fixed_cost = new_fixed_cost
+
+        self.repo.update(rate)
+
+        stored = self.stored_rate(rate.id)
+        self.assertIsNotNone(stored)
+        self.assertEqual(cast(dict[str, Any], stored)['fixed_cost'], new_fixed_cost)
+
+    def test_multiple_rates_error(self) -> None:
+        client_id = str(uuid.uuid4())
+        self.add_random_rates(2, client_id=client_id, plan=Plan.EMPRENDEDOR)
+
+        result = self.repo.get_by_client_and_plan(client_id, Plan.EMPRENDEDOR)
+        self.assertIsNone(result)
+
+    def test_get_all(self) -> None:
+        rates = self.add_random_rates(3)
+
+        result = list(self.repo.get_all())
+
+        for rate in rates:
+            self.assertIn(rate.id, [r.id for r in result])
+
+
+class InvoiceRepositoryContract(ContractBase):
+    """Tests every InvoiceRepository implementation must pass, `store_invoice` and `stored_invoice` bypass the repository."""
+
+    faker: Faker
+    repo: InvoiceRepository
+    # Module attribute holding the number of clients queried at once by get_by_clients_and_month
+    in_query_chunk_size: str
+
+    def store_invoice(self, invoice: Invoice) -> None:
+        raise NotImplementedError
+
+    def stored_invoice(self, invoice_id: str) -> dict[str, Any] | None:
+        raise NotImplementedError
+
+    def add_random_invoices(self, n: int, client_id: str | None = None, billing_year: int | None = None) -> list[Invoice]:
+        invoices = []
+        for _ in range(n):
+            invoice = random_invoice(self.faker, client_id, billing_year)
+            self.store_invoice(invoice)
+            invoices.append(invoice)
+        return invoices
+
+    def normalize_invoice(self, invoice: Invoice) -> Invoice:
+        invoice.generation_date = normalize_datetime(invoice.generation_date)
+        invoice.payment_due_date = normalize_datetime(invoice.payment_due_date)
+        return invoice
+
+    def test_get_existing_invoice(self) -> None:
+        invoice = self.add_random_invoices(1)[0]
+
+        result = self.repo.get(invoice.id)
+
+        self.assertIsNotNone(result)
+        self.assertEqual(self.normalize_invoice(cast(Invoice, result)), self.normalize_invoice(invoice))
+        self.assertIsInstance(cast(Invoice, result).billing_month, Month)
+
+    def test_get_missing_invoice(self) -> None:
+        result = self.repo.get(str(uuid.uuid4()))
+        self.assertIsNone(result)
+
+    def test_get_by_client_and_month(self) -> None:
+        invoice = self.add_random_invoices(1)[0]
+
+        result = self.repo.get_by_client_and_month(invoice.client_id, Month.NOVEMBER, invoice.billing_year)
+
+        self.assertIsNotNone(result, 'No se encontró el invoice con los datos proporcionados.')
+        self.assertEqual(cast(Invoice, result).id, invoice.id)
+
+    def test_get_many(self) -> None:
+        invoices = self.add_random_invoices(3)
+        missing_id = str(uuid.uuid4())
+
+        result = self.repo.get_many([invoices[1].id, missing_id, invoices[0].id, invoices[2].id])
+
+        self.assertEqual(
+            [invoice.id if invoice else None for invoice in result],
+            [invoices[1].id, None, invoices[0].id, invoices[2].id],
+        )
+
+    def test_get_by_clients_and_month(self) -> None:
+        billing_year = int(self.faker.year())
+        invoices = [self.add_random_invoices(1, billing_year=billing_year)[0] for _ in range(5)]
+        missing_client_id = str(uuid.uuid4())
+        client_ids = [invoice.client_id for invoice in reversed(invoices)] + [missing_client_id]
+
+        with patch(self.in_query_chunk_size, 2):
+            result = self.repo.get_by_clients_and_month(client_ids, Month.NOVEMBER, billing_year)
+
+        self.assertEqual(
+            [invoice.id if invoice else None for invoice in result],
+            [invoice.id for invoice in reversed(invoices)] + [None],
+        )
+
+    def test_get_by_client_and_month_not_found(self) -> None:
+        client_id = str(uuid.uuid4())
+        month = cast(Month, self.faker.random_element(list(Month)))
+        year = int(self.faker.year())
+
+        result = self.repo.get_by_client_and_month(client_id, month, year)
+        self.assertIsNone(result)
+
+    def test_get_by_client(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        invoices = self.add_random_invoices(3, client_id=client_id)
+        self.add_random_invoices(2)
+
+        result = self.repo.get_by_client(client_id)
+
+        self.assertEqual({invoice.id for invoice in result}, {invoice.id for invoice in invoices})
+
+    def test_create_invoice(self) -> None:
+        invoice = random_invoice(self.faker)
+
+        self.repo.create(invoice)
+
+        stored = self.stored_invoice(invoice.id)
+        self.assertIsNotNone(stored)
+        stored = cast(dict[str, Any], stored)
+        stored['generation_date'] = normalize_datetime(stored['generation_date'])
+        stored['payment_due_date'] = normalize_datetime(stored['payment_due_date'])
+
+        invoice_dict = asdict(self.normalize_invoice(invoice))
+        del invoice_dict['id']
+
+        self.assertEqual(stored, invoice_dict)
+
+    def test_update_invoice(self) -> None:
+        invoice = self.add_random_invoices(1)[0]
+
+        invoice.total_incidents_web = self.faker.random_int(min=0, max=100)
+        invoice.total_incidents_mobile = self.faker.random_int(min=0, max=100)
+        invoice.total_incidents_email = self.faker.random_int(min=0, max=100)
+
+        self.repo.update(invoice)
+
+        stored = self.stored_invoice(invoice.id)
+        self.assertIsNotNone(stored)
+        stored = cast(dict[str, Any], stored)
+        self.assertEqual(stored['total_incidents_web'], invoice.total_incidents_web)
+        self.assertEqual(stored['total_incidents_mobile'], invoice.total_incidents_mobile)
+        self.assertEqual(stored['total_incidents_email'], invoice.total_incidents_email)
+
+    def test_get_all_invoices(self) -> None:
+        invoices = [self.normalize_invoice(invoice) for invoice in self.add_random_invoices(5)]
+
+        retrieved_invoices = [self.normalize_invoice(invoice) for invoice in self.repo.get_all()]
+
+        for invoice in invoices:
+            self.assertIn(invoice, retrieved_invoices)
+
+    def test_get_by_month(self) -> None:
+        billing_year = int(self.faker.year())
+        invoices = self.add_random_invoices(3, billing_year=billing_year)
+        other = self.add_random_invoices(1, billing_year=billing_year + 1)[0]
+
+        result = list(self.repo.get_by_month(Month.NOVEMBER, billing_year))
+
+        self.assertTrue({invoice.id for invoice in invoices} <= {invoice.id for invoice in result})
+        self.assertNotIn(other.id, {invoice.id for invoice in result})
+        self.assertTrue(all((invoice.billing_month, invoice.billing_year) == ('November', billing_year) for invoice in result))
+
+    def test_multiple_invoices_error(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        billing_year = int(self.faker.year())
+
+        invoices = self.add_random_invoices(2, client_id=client_id, billing_year=billing_year)
+
+        result = self.repo.get_by_client_and_month(invoices[0].client_id, Month.NOVEMBER, invoices[0].billing_year)
+
+        self.assertIsNone(result)
+
+    def test_delete_all(self) -> None:
+        invoices = self.add_random_invoices(5)
+
+        self.repo.delete_all()
+
+        for invoice in invoices:
+            self.assertIsNone(self.stored_invoice(invoice.id))
+
+
+class UnitOfWorkContract(ContractBase):
+    """Tests every ConditionalUnitOfWork implementation must pass, `create_existing_invoice` stores a conflicting invoice."""
+
+    faker: Faker
+    # Raised by commit when one of the created documents already exists
+    already_exists: type[Exception]
+
+    def unit_of_work(self) -> ConditionalUnitOfWork:
+        raise NotImplementedError
+
+    def rate_exists(self, rate_id: str) -> bool:
+        raise NotImplementedError
+
+    def invoice_exists(self, invoice_id: str) -> bool:
+        raise NotImplementedError
+
+    def create_existing_invoice(self, invoice: Invoice) -> None:
+        raise NotImplementedError
+
+    def revenue_repo(self) -> RevenueRepository:
+        raise NotImplementedError
+
+    def get_rate_and_invoice(self) -> tuple[Rate, Invoice]:
+        rate = random_rate(self.faker)
+        invoice = random_invoice(self.faker, client_id=rate.client_id)
+        invoice.rate_id = rate.id
+        return rate, invoice
+
+    def test_commit(self) -> None:
+        rate, invoice = self.get_rate_and_invoice()
+        unit_of_work = self.unit_of_work()
+
+        unit_of_work.create_rate(rate)
+        unit_of_work.create_invoice(invoice)
+        self.assertFalse(self.rate_exists(rate.id))
+
+        unit_of_work.commit()
+
+        self.assertTrue(self.rate_exists(rate.id))
+        self.assertTrue(self.invoice_exists(invoice.id))
+
+    def test_commit_atomic(self) -> None:
+        rate, invoice = self.get_rate_and_invoice()
+        self.create_existing_invoice(invoice)
+        unit_of_work = self.unit_of_work()
+
+        unit_of_work.create_rate(rate)
+        unit_of_work.create_invoice(invoice)
+
+        with self.assertRaises(self.already_exists):
+            unit_of_work.commit()
+
+        self.assertFalse(self.rate_exists(rate.id))
+
+    def test_commit_save(self) -> None:
+        rate, invoice = self.get_rate_and_invoice()
+        self.create_existing_invoice(invoice)
+        unit_of_work = self.unit_of_work()
+
+        unit_of_work.save_rate(rate)
+        unit_of_work.save_invoice(invoice)
+        unit_of_work.commit()
+        unit_of_work = self.unit_of_work()
+        unit_of_work.save_invoice(invoice)
+        unit_of_work.commit()
+
+        self.assertTrue(self.rate_exists(rate.id))
+        self.assertTrue(self.invoice_exists(invoice.id))
+
+    def test_commit_empty(self) -> None:
+        self.unit_of_work().commit()
+
+    def test_commit_update_invoice(self) -> None:
+        _, invoice = self.get_rate_and_invoice()
+        self.create_existing_invoice(invoice)
+        updated = replace(invoice, total_incidents_web=invoice.total_incidents_web + 1)
+        rollup = random_rollup(self.faker)
+
+        for _ in range(2):
+            unit_of_work = self.unit_of_work()
+            unit_of_work.update_invoice(invoice, updated)
+            unit_of_work.add_revenue(rollup)
+            unit_of_work.commit()
+            # The second time the stored invoice already has the updated counts
+            with self.assertRaises(StaleWriteError):
+                unit_of_work = self.unit_of_work()
+                unit_of_work.update_invoice(invoice, updated)
+                unit_of_work.add_revenue(rollup)
+                unit_of_work.commit()
+            invoice, updated = updated, replace(updated, total_incidents_email=updated.total_incidents_email + 1)
+
+        rollup.add(rollup)
+        self.assertEqual(self.revenue_repo().get_range('2024-11', '2024-11'), [rollup])
+
+    def test_commit_update_missing_invoice(self) -> None:
+        _, invoice = self.get_rate_and_invoice()
+        unit_of_work = self.unit_of_work()
+        unit_of_work.update_invoice(invoice, replace(invoice, total_incidents_web=invoice.total_incidents_web + 1))
+        unit_of_work.add_revenue(random_rollup(self.faker))
+
+        with self.assertRaises(StaleWriteError):
+            unit_of_work.commit()
+
+        self.assertFalse(self.invoice_exists(invoice.id))
+        self.assertEqual(self.revenue_repo().get_range('2024-11', '2024-11'), [])
+
+    def test_commit_revenue(self) -> None:
+        rollup = random_rollup(self.faker)
+        change = random_rollup(self.faker)
+
+        for added in (rollup, change):
+            unit_of_work = self.unit_of_work()
+            unit_of_work.add_revenue(added)
+            unit_of_work.commit()
+
+        rollup.add(change)
+        self.assertEqual(self.revenue_repo().get_range('2024-11', '2024-11'), [rollup])
+
+    def test_commit_revenue_atomic(self) -> None:
+        rate, invoice = self.get_rate_and_invoice()
+        self.create_existing_invoice(invoice)
+        unit_of_work = self.unit_of_work()
+
+        unit_of_work.create_invoice(invoice)
+        unit_of_work.add_revenue(random_rollup(self.faker))
+
+        with self.assertRaises(self.already_exists):
+            unit_of_work.commit()
+
+        self.assertEqual(self.revenue_repo().get_range('2024-11', '2024-11'), [])
+
+
+class RevenueRepositoryContract(ContractBase):
+    """Tests every RevenueRepository implementation must pass."""
+
+    faker: Faker
+    repo: RevenueRepository
+
+    def test_get_range(self) -> None:
+        rollups = [
+            random_rollup(self.faker, '2024-10', Plan.EMPRENDEDOR),
+            random_rollup(self.faker, '2024-11', Plan.EMPRESARIO),
+            random_rollup(self.faker, '2024-11', Plan.EMPRENDEDOR),
+            random_rollup(self.faker, '2024-12', Plan.EMPRENDEDOR),
+        ]
+        self.repo.replace(rollups)
+
+        self.assertEqual(self.repo.get_range('2024-11', '2024-12'), [rollups[2], rollups[1], rollups[3]])
+        self.assertEqual(self.repo.get_range('2025-01', '2025-12'), [])
+
+    def test_replace_range(self) -> None:
+        kept = [random_rollup(self.faker, '2024-10'), random_rollup(self.faker, '2024-12')]
+        self.repo.replace([*kept, random_rollup(self.faker, '2024-11'), random_rollup(self.faker, '2024-11', Plan.EMPRESARIO)])
+        replacement = random_rollup(self.faker, '2024-11')
+
+        self.repo.replace([replacement], '2024-11', '2024-11')
+
+        self.assertEqual(self.repo.get_range('2024-01', '2024-12'), [kept[0], replacement, kept[1]])
+
+    def test_replace_all(self) -> None:
+        self.repo.replace([random_rollup(self.faker, '2024-10'), random_rollup(self.faker, '2024-11')])
+        replacement = random_rollup(self.faker, '2024-12')
+
+        self.repo.replace([replacement])
+
+        self.assertEqual(self.repo.get_range('2024-01', '2024-12'), [replacement])
+
+    def test_delete_all(self) -> None:
+        self.repo.replace([random_rollup(self.faker, '2024-10'), random_rollup(self.faker, '2024-11')])
+
+        self.repo.delete_all()
+
+        self.assertEqual(self.repo.get_range('2024-01', '2024-12'), [])
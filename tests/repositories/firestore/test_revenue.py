@@ -0,0 +1,53 @@
+import os
+from unittest import skipUnless
+
+import requests
+from faker import Faker
+from google.cloud.firestore import Client as FirestoreClient  # type: ignore[import-untyped]
+from unittest_parametrize import ParametrizedTestCase
+
+from repositories.firestore import FirestoreRevenueRepository, FirestoreUnitOfWork
+from repositories.firestore.revenue import COLLECTION, REVENUE_SHARDS
+from tests.repositories.contracts import RevenueRepositoryContract, random_rollup
+
+FIRESTORE_DATABASE = '(default)'
+
+
+@skipUnless('FIRESTORE_EMULATOR_HOST' in os.environ, 'Firestore emulator not available')
+class TestFirestoreRevenueRepository(RevenueRepositoryContract, ParametrizedTestCase):
+    repo: FirestoreRevenueRepository
+
+    def setUp(self) -> None:
+        self.faker = Faker()
+
+        requests.delete(
+            f'http://{os.environ["FIRESTORE_EMULATOR_HOST"]}/emulator/v1/projects/google-cloud-firestore-emulator/databases/{FIRESTORE_DATABASE}/documents',
+            timeout=5,
+        )
+
+        self.repo = FirestoreRevenueRepository(FIRESTORE_DATABASE)
+        self.client = FirestoreClient(database=FIRESTORE_DATABASE)
+
+    def add_revenue(self, n: int) -> None:
+        for _ in range(n):
+            unit_of_work = FirestoreUnitOfWork(FIRESTORE_DATABASE)
+            unit_of_work.add_revenue(random_rollup(self.faker))
+            unit_of_work.commit()
+
+    def test_shards_merged(self) -> None:
+        self.add_revenue(4 * REVENUE_SHARDS)
+
+        [rollup] = self.repo.get_range('2024-11', '2024-11')
+
+        shards = list(self.client.collection(COLLECTION).stream())
+        self.assertGreater(len(shards), 1)
+        self.assertEqual(rollup.invoices, sum(shard.get('invoices') for shard in shards))
+
+    def test_replace_deletes_shards(self) -> None:
+        self.add_revenue(4 * REVENUE_SHARDS)
+        replacement = random_rollup(self.faker)
+
+        self.repo.replace([replacement], '2024-11', '2024-11')
+
+        self.assertEqual(len(list(self.client.collection(COLLECTION).stream())), 1)
+        self.assertEqual(self.repo.get_range('2024-11', '2024-11'), [replacement])
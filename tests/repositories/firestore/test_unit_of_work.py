@@ -0,0 +1,43 @@
+import os
+from dataclasses import asdict
+from unittest import skipUnless
+
+from faker import Faker
+from google.api_core.exceptions import AlreadyExists
+from google.cloud.firestore import Client as FirestoreClient  # type: ignore[import-untyped]
+from unittest_parametrize import ParametrizedTestCase
+
+from models import Invoice
+from repositories import ConditionalUnitOfWork, RevenueRepository
+from repositories.firestore import FirestoreRevenueRepository, FirestoreUnitOfWork
+from tests.repositories.contracts import UnitOfWorkContract
+
+FIRESTORE_DATABASE = '(default)'
+
+
+@skipUnless('FIRESTORE_EMULATOR_HOST' in os.environ, 'Firestore emulator not available')
+class TestFirestoreUnitOfWork(UnitOfWorkContract, ParametrizedTestCase):
+    already_exists = AlreadyExists
+
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.client = FirestoreClient(database=FIRESTORE_DATABASE)
+        # Rollups are shared by the tests, unlike the documents with random ids
+        self.revenue_repo().delete_all()
+
+    def unit_of_work(self) -> ConditionalUnitOfWork:
+        return FirestoreUnitOfWork(FIRESTORE_DATABASE)
+
+    def rate_exists(self, rate_id: str) -> bool:
+        return bool(self.client.collection('rates').document(rate_id).get().exists)
+
+    def invoice_exists(self, invoice_id: str) -> bool:
+        return bool(self.client.collection('invoices').document(invoice_id).get().exists)
+
+    def create_existing_invoice(self, invoice: Invoice) -> None:
+        invoice_dict = asdict(invoice)
+        del invoice_dict['id']
+        self.client.collection('invoices').document(invoice.id).set(invoice_dict)
+
+    def revenue_repo(self) -> RevenueRepository:
+        return FirestoreRevenueRepository(FIRESTORE_DATABASE)
@@ -0,0 +1,24 @@
+from collections.abc import Sequence
+from unittest import TestCase
+
+from repositories.firestore.util import chunked, fetch_chunks
+
+
+class TestUtil(TestCase):
+    def test_chunked(self) -> None:
+        self.assertEqual(chunked([1, 2, 3, 4, 5], 2), [[1, 2], [3, 4], [5]])
+        self.assertEqual(chunked([], 2), [])
+
+    def test_fetch_chunks(self) -> None:
+        calls: list[Sequence[int]] = []
+
+        def fetch(chunk: Sequence[int]) -> list[int]:
+            calls.append(chunk)
+            return [item * 10 for item in chunk]
+
+        self.assertEqual(fetch_chunks(fetch, list(range(7)), 3), [0, 10, 20, 30, 40, 50, 60])
+        self.assertEqual(len(calls), 3)
+
+    def test_fetch_chunks_single(self) -> None:
+        self.assertEqual(fetch_chunks(lambda chunk: list(chunk), [1, 2], 3), [1, 2])
+        self.assertEqual(fetch_chunks(lambda chunk: list(chunk), [], 3), [])
@@ -24,6 +24,12 @@ class TestClient(ParametrizedTestCase):
             repo.authenticated_get(self.base_url)
             self.assertNotIn('Authorization', rsps.calls[0].request.headers)
 
+    def test_warm_up(self) -> None:
+        with responses.RequestsMock() as rsps:
+            rsps.get(f'{self.base_url}/api/v1/health/client', json={'status': 'Ok'})
+            self.repo.warm_up()
+            self.assertEqual(len(rsps.calls), 1)
+
     def test_authenticated_get_with_token_provider(self) -> None:
         token = self.faker.pystr()
         token_provider = Mock(TokenProvider)
@@ -1,5 +1,5 @@
 import uuid
-from datetime import datetime
+from datetime import UTC, datetime
 from typing import cast
 from unittest.mock import Mock
 
@@ -26,6 +26,12 @@ class TestIncident(ParametrizedTestCase):
             repo.authenticated_get(self.base_url)
             self.assertNotIn('Authorization', rsps.calls[0].request.headers)
 
+    def test_warm_up(self) -> None:
+        with responses.RequestsMock() as rsps:
+            rsps.get(f'{self.base_url}/api/v1/health/incidentquery', json={'status': 'Ok'})
+            self.repo.warm_up()
+            self.assertEqual(len(rsps.calls), 1)
+
     def test_authenticated_get_with_token_provider(self) -> None:
         token = self.faker.pystr()
         token_provider = Mock(TokenProvider)
@@ -86,6 +92,112 @@ class TestIncident(ParametrizedTestCase):
 
         self.assertEqual(incidents, [expected_incident])
 
+    def test_get_incident_batch_by_client_id(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        incident_id = str(uuid.uuid4())
+
+        incidents_data = [
+            {
+                'id': incident_id,
+                'name': 'Internet no funciona',
+                'channel': 'mobile',
+                'reported_by': cast(str, self.faker.uuid4()),
+                'created_by': cast(str, self.faker.uuid4()),
+                'assigned_to': cast(str, self.faker.uuid4()),
+                'history': [
+                    {
+                        'seq': 0,
+                        'date': '2024-10-23T22:46:40Z',
+                        'action': 'created',
+                        'description': 'El servicio de Internet está interrumpido.',
+                    }
+                ],
+            }
+        ]
+
+        with responses.RequestsMock() as rsps:
+            rsps.get(f'{self.base_url}/api/v1/clients/{client_id}/incidents', json=incidents_data, status=200)
+
+            batch = self.repo.get_incident_batch_by_client_id(client_id)
+            self.assertEqual(len(rsps.calls), 1)
+
+            # The history is not kept in the batch, the histories are downloaded again once on demand
+            history = batch.history(0)
+            self.assertEqual(len(rsps.calls), 2)
+            self.assertEqual(batch.history(0), history)
+            self.assertEqual(len(rsps.calls), 2)
+
+        self.assertEqual(batch.ids, [incident_id])
+        self.assertEqual(batch.channel(0), Channel.MOBILE)
+        self.assertEqual(batch.created_at(0), datetime.fromisoformat('2024-10-23T22:46:40+00:00'))
+        self.assertEqual(
+            history,
+            [
+                HistoryEntry(
+                    seq=0,
+                    date=datetime.fromisoformat('2024-10-23T22:46:40+00:00'),
+                    action=Action.CREATED,
+                    description='El servicio de Internet está interrumpido.',
+                )
+            ],
+        )
+
+    def test_get_incident_batch_naive_date(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        incidents_data = [
+            {
+                'id': str(uuid.uuid4()),
+                'channel': 'web',
+                'history': [{'seq': 0, 'date': '2024-05-31T23:30:00', 'action': 'created', 'description': 'Caído'}],
+            }
+        ]
+
+        with responses.RequestsMock() as rsps:
+            rsps.get(f'{self.base_url}/api/v1/clients/{client_id}/incidents', json=incidents_data, status=200)
+
+            batch = self.repo.get_incident_batch_by_client_id(client_id)
+
+        # Dates without an offset are taken as UTC
+        self.assertEqual(batch.created_at(0), datetime(2024, 5, 31, 23, 30, tzinfo=UTC))
+        self.assertEqual(len(batch.created_in_month(5, 2024)), 1)
+
+    def test_batch_history_not_found(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        batch_data = [{'id': str(uuid.uuid4()), 'channel': 'web', 'history': [{'date': '2024-05-31T23:30:00Z'}]}]
+
+        with responses.RequestsMock() as rsps:
+            rsps.get(f'{self.base_url}/api/v1/clients/{client_id}/incidents', json=batch_data, status=200)
+            batch = self.repo.get_incident_batch_by_client_id(client_id)
+            rsps.get(f'{self.base_url}/api/v1/clients/{client_id}/incidents', json=[], status=200)
+
+            with self.assertRaises(LookupError):
+                batch.history(0)
+
+    def test_get_incident_history_not_found(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        with responses.RequestsMock() as rsps:
+            rsps.get(f'{self.base_url}/api/v1/clients/{client_id}/incidents', json=[], status=200)
+
+            with self.assertRaises(LookupError):
+                self.repo.get_incident_history(client_id, str(uuid.uuid4()))
+
+    def test_get_incidents_by_client_id_since(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        since = datetime.fromisoformat('2024-10-23T22:46:40+00:00')
+
+        with responses.RequestsMock() as rsps:
+            rsps.get(
+                f'{self.base_url}/api/v1/clients/{client_id}/incidents',
+                match=[responses.matchers.query_param_matcher({'since': since.isoformat()})],
+                json=[],
+                status=200,
+            )
+
+            incidents = self.repo.get_incidents_by_client_id(client_id, since=since)
+
+        self.assertEqual(incidents, [])
+
     def test_get_incidents_by_client_id_not_found(self) -> None:
         client_id = cast(str, self.faker.uuid4())
 
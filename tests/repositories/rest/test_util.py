@@ -0,0 +1,25 @@
+from typing import cast
+from unittest import TestCase
+from unittest.mock import Mock
+
+from faker import Faker
+
+from repositories.rest import LazyTokenProvider, TokenProvider
+
+
+class TestLazyTokenProvider(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+
+    def test_get_token(self) -> None:
+        token = self.faker.pystr()
+        token_provider = Mock(TokenProvider)
+        cast(Mock, token_provider.get_token).return_value = token
+        factory = Mock(return_value=token_provider)
+
+        provider = LazyTokenProvider(factory)
+        factory.assert_not_called()
+
+        self.assertEqual(provider.get_token(), token)
+        self.assertEqual(provider.get_token(), token)
+        factory.assert_called_once()
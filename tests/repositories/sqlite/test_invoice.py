@@ -0,0 +1,81 @@
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from faker import Faker
+from unittest_parametrize import ParametrizedTestCase
+
+from models import Invoice, Month
+from repositories.sqlite import SqliteInvoiceRepository
+from repositories.sqlite.invoice import invoice_to_row
+from tests.repositories.contracts import InvoiceRepositoryContract
+
+
+class TestSqliteInvoiceRepository(InvoiceRepositoryContract, ParametrizedTestCase):
+    repo: SqliteInvoiceRepository
+
+    in_query_chunk_size = 'repositories.sqlite.invoice.IN_QUERY_CHUNK_SIZE'
+
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = str(Path(self.tmpdir.name) / 'test.db')
+        self.repo = SqliteInvoiceRepository(self.path)
+        self.conn = self.repo.db.connection()
+
+    def store_invoice(self, invoice: Invoice) -> None:
+        self.conn.execute('INSERT INTO invoices VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', invoice_to_row(invoice))
+
+    def stored_invoice(self, invoice_id: str) -> dict[str, Any] | None:
+        row = self.conn.execute('SELECT * FROM invoices WHERE id = ?', (invoice_id,)).fetchone()
+        if row is None:
+            return None
+
+        data = dict(row)
+        del data['id']
+        data['generation_date'] = datetime.fromisoformat(data['generation_date'])
+        data['payment_due_date'] = datetime.fromisoformat(data['payment_due_date'])
+        return data
+
+    def test_wal_mode(self) -> None:
+        self.assertEqual(self.conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+    def test_indexes(self) -> None:
+        plan = self.conn.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM invoices WHERE client_id = ? AND billing_year = ? AND billing_month = ?',
+            ('client', 2024, Month.NOVEMBER.value),
+        ).fetchall()
+
+        self.assertIn('invoices_client_id_billing', ' '.join(row['detail'] for row in plan))
+
+    def test_connection_per_thread(self) -> None:
+        connections = []
+        thread = threading.Thread(target=lambda: connections.append(self.repo.db.connection()))
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(connections[0], self.conn)
+        self.assertIs(self.repo.db.connection(), self.conn)
+
+    def test_get_all_streams(self) -> None:
+        self.add_random_invoices(5)
+
+        with patch('repositories.sqlite.db.STREAM_BATCH_SIZE', 2):
+            invoices = self.repo.get_all()
+            first = next(invoices)
+            self.add_random_invoices(1)
+            rest = list(invoices)
+
+        self.assertGreaterEqual(len(rest), 4)
+        self.assertNotIn(first.id, [invoice.id for invoice in rest])
+
+    def test_shared_between_instances(self) -> None:
+        invoice = self.add_random_invoices(1)[0]
+
+        result = SqliteInvoiceRepository(self.path).get(invoice.id)
+
+        self.assertIsNotNone(result)
@@ -0,0 +1,55 @@
+import sqlite3
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Any
+
+from faker import Faker
+from unittest_parametrize import ParametrizedTestCase
+
+from models import Rate
+from repositories.sqlite import SqliteRateRepository
+from repositories.sqlite.rate import rate_to_row
+from tests.repositories.contracts import RateRepositoryContract
+
+
+class TestSqliteRateRepository(RateRepositoryContract, ParametrizedTestCase):
+    repo: SqliteRateRepository
+
+    get_many_chunk_size = 'repositories.sqlite.rate.IN_QUERY_CHUNK_SIZE'
+
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.repo = SqliteRateRepository(str(Path(self.tmpdir.name) / 'test.db'))
+        self.conn = self.repo.db.connection()
+
+    def store_rate(self, rate: Rate) -> None:
+        self.conn.execute('INSERT INTO rates VALUES (?, ?, ?, ?, ?, ?, ?)', rate_to_row(rate))
+
+    def stored_rate(self, rate_id: str) -> dict[str, Any] | None:
+        row = self.conn.execute('SELECT * FROM rates WHERE id = ?', (rate_id,)).fetchone()
+        return None if row is None else dict(row)
+
+    def test_create_existing(self) -> None:
+        rate = self.add_random_rates(1)[0]
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.repo.create(rate)
+
+    def test_update_missing(self) -> None:
+        rate = self.add_random_rates(1)[0]
+        rate.id = str(uuid.uuid4())
+
+        self.repo.update(rate)
+
+        self.assertIsNotNone(self.stored_rate(rate.id))
+
+    def test_delete_all(self) -> None:
+        rates = self.add_random_rates(3)
+
+        self.repo.delete_all()
+
+        for rate in rates:
+            self.assertIsNone(self.stored_rate(rate.id))
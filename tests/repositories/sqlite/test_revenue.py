@@ -0,0 +1,18 @@
+import tempfile
+from pathlib import Path
+
+from faker import Faker
+from unittest_parametrize import ParametrizedTestCase
+
+from repositories.sqlite import SqliteRevenueRepository
+from tests.repositories.contracts import RevenueRepositoryContract
+
+
+class TestSqliteRevenueRepository(RevenueRepositoryContract, ParametrizedTestCase):
+    repo: SqliteRevenueRepository
+
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.repo = SqliteRevenueRepository(str(Path(self.tmpdir.name) / 'test.db'))
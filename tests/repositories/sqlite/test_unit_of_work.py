@@ -0,0 +1,39 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from faker import Faker
+from unittest_parametrize import ParametrizedTestCase
+
+from models import Invoice
+from repositories import ConditionalUnitOfWork, RevenueRepository
+from repositories.sqlite import SqliteDatabase, SqliteRevenueRepository, SqliteUnitOfWork
+from repositories.sqlite.invoice import invoice_to_row
+from tests.repositories.contracts import UnitOfWorkContract
+
+
+class TestSqliteUnitOfWork(UnitOfWorkContract, ParametrizedTestCase):
+    already_exists = sqlite3.IntegrityError
+
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = str(Path(self.tmpdir.name) / 'test.db')
+        self.db = SqliteDatabase(self.path)
+        self.conn = self.db.connection()
+
+    def unit_of_work(self) -> ConditionalUnitOfWork:
+        return SqliteUnitOfWork(self.path, db=self.db)
+
+    def rate_exists(self, rate_id: str) -> bool:
+        return self.conn.execute('SELECT 1 FROM rates WHERE id = ?', (rate_id,)).fetchone() is not None
+
+    def invoice_exists(self, invoice_id: str) -> bool:
+        return self.conn.execute('SELECT 1 FROM invoices WHERE id = ?', (invoice_id,)).fetchone() is not None
+
+    def create_existing_invoice(self, invoice: Invoice) -> None:
+        self.conn.execute('INSERT INTO invoices VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', invoice_to_row(invoice))
+
+    def revenue_repo(self) -> RevenueRepository:
+        return SqliteRevenueRepository(self.path, db=self.db)
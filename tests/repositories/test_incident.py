@@ -0,0 +1,56 @@
+from datetime import UTC, datetime
+from typing import cast
+from unittest import TestCase
+
+from faker import Faker
+
+from models import Action, Channel, HistoryEntry, Incident
+from repositories import IncidentRepository
+
+
+class ListIncidentRepository(IncidentRepository):
+    def __init__(self, incidents: list[Incident]) -> None:
+        self.incidents = incidents
+        self.calls = 0
+
+    def get_incidents_by_client_id(self, client_id: str, since: datetime | None = None) -> list[Incident] | None:  # noqa: ARG002
+        self.calls += 1
+        return self.incidents
+
+
+class TestIncidentRepository(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+
+    def gen_incident(self) -> Incident:
+        created = datetime(2024, 11, 15, tzinfo=UTC)
+        return Incident(
+            id=cast(str, self.faker.uuid4()),
+            name=self.faker.sentence(),
+            channel=Channel.WEB,
+            reported_by=cast(str, self.faker.uuid4()),
+            created_by=cast(str, self.faker.uuid4()),
+            assigned_to=cast(str, self.faker.uuid4()),
+            history=[HistoryEntry(seq=0, date=created, action=Action.CREATED, description=self.faker.sentence())],
+        )
+
+    def test_batch_histories_fetched_on_demand(self) -> None:
+        incidents = [self.gen_incident() for _ in range(2)]
+        repo = ListIncidentRepository(incidents)
+
+        batch = repo.get_incident_batch_by_client_id('client')
+
+        self.assertEqual(batch.ids, [incident.id for incident in incidents])
+        self.assertEqual(batch.history(1), incidents[1].history)
+        self.assertEqual(batch.history(0), incidents[0].history)
+        # Once for the batch, and once for all the histories
+        self.assertEqual(repo.calls, 2)
+
+    def test_batch_history_not_found(self) -> None:
+        incident = self.gen_incident()
+        repo = ListIncidentRepository([incident])
+        batch = repo.get_incident_batch_by_client_id('client')
+        repo.incidents = []
+
+        with self.assertRaises(LookupError):
+            batch.history(0)
@@ -0,0 +1,83 @@
+import tempfile
+from datetime import UTC
+from pathlib import Path
+from unittest import TestCase
+
+from faker import Faker
+
+from repositories.writebehind import WriteBehindLog
+from tests.repositories.contracts import random_invoice, random_rate, random_rollup
+
+
+class TestWriteBehindLog(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.directory = self.tmpdir.name
+
+    def open_log(self, max_bytes: int = 1024 * 1024) -> WriteBehindLog:
+        log = WriteBehindLog(self.directory, max_bytes=max_bytes)
+        self.addCleanup(log.close)
+        return log
+
+    def test_replay(self) -> None:
+        log = self.open_log()
+        rate = random_rate(self.faker)
+        invoice = random_invoice(self.faker, client_id=rate.client_id, tzinfo=UTC)
+        rollup = random_rollup(self.faker)
+        first = log.append([rate], [invoice], [rollup])
+        second = log.append([], [random_invoice(self.faker, tzinfo=UTC)])
+        log.ack([second.seq])
+        log.close()
+
+        replayed = self.open_log()
+
+        self.assertEqual(list(replayed.pending), [first.seq])
+        self.assertEqual(replayed.pending[first.seq].rates, [rate])
+        self.assertEqual(replayed.pending[first.seq].invoices, [invoice])
+        self.assertEqual(replayed.pending[first.seq].revenue, [rollup])
+        self.assertEqual(replayed.append([], []).seq, second.seq + 1)
+
+    def test_truncated_when_nothing_pending(self) -> None:
+        log = self.open_log()
+        write = log.append([random_rate(self.faker)], [])
+
+        log.ack([write.seq])
+
+        self.assertEqual(log.path.stat().st_size, 0)
+
+    def test_torn_record_discarded(self) -> None:
+        log = self.open_log()
+        write = log.append([random_rate(self.faker)], [])
+        log.append([random_rate(self.faker)], [])
+        log.close()
+        size = log.path.stat().st_size
+        with log.path.open('r+b') as file:
+            file.truncate(size - 3)
+
+        with self.assertLogs('WriteBehindLog', level='WARNING'):
+            replayed = self.open_log()
+
+        self.assertEqual(list(replayed.pending), [write.seq])
+
+    def test_compact(self) -> None:
+        log = self.open_log(max_bytes=1)
+        writes = [log.append([random_rate(self.faker)], []) for _ in range(3)]
+
+        log.ack([writes[0].seq])
+        log.ack([writes[1].seq])
+        log.append([random_rate(self.faker)], [])
+        log.close()
+
+        replayed = self.open_log()
+        self.assertEqual(list(replayed.pending), [writes[2].seq, writes[2].seq + 1])
+
+    def test_one_log_per_process(self) -> None:
+        first = self.open_log()
+        second = self.open_log()
+        first.append([random_rate(self.faker)], [])
+
+        self.assertNotEqual(first.path, second.path)
+        self.assertEqual(second.pending, {})
+        self.assertEqual(Path(first.path).parent, Path(self.directory))
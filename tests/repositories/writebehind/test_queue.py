@@ -0,0 +1,174 @@
+import tempfile
+from collections.abc import Callable
+from dataclasses import replace
+from datetime import UTC
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from faker import Faker
+
+from models import Month
+from repositories import UnitOfWork
+from repositories.sqlite import (
+    SqliteDatabase,
+    SqliteInvoiceRepository,
+    SqliteRateRepository,
+    SqliteRevenueRepository,
+    SqliteUnitOfWork,
+)
+from repositories.writebehind import WriteBehindLog, WriteBehindQueue
+from tests.repositories.contracts import random_invoice, random_rate, random_rollup
+
+
+class TestWriteBehindQueue(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db = SqliteDatabase(str(Path(self.tmpdir.name) / 'test.db'))
+        self.rate_repo = SqliteRateRepository(self.db.path, db=self.db)
+        self.invoice_repo = SqliteInvoiceRepository(self.db.path, db=self.db)
+        self.revenue_repo = SqliteRevenueRepository(self.db.path, db=self.db)
+        self.queue = self.create_queue(lambda: SqliteUnitOfWork(self.db.path, db=self.db))
+
+    def create_queue(self, unit_of_work_factory: Callable[[], UnitOfWork]) -> WriteBehindQueue:
+        log = WriteBehindLog(str(Path(self.tmpdir.name) / 'log'), max_bytes=1024 * 1024)
+        self.addCleanup(log.close)
+        return WriteBehindQueue(
+            log,
+            unit_of_work_factory,
+            self.invoice_repo,
+            batch_size=2,
+            flush_interval=0.01,
+            retry_interval=0.01,
+            max_retry_interval=0.01,
+        )
+
+    def test_submit_then_flush(self) -> None:
+        rate = random_rate(self.faker)
+        invoice = random_invoice(self.faker, client_id=rate.client_id, tzinfo=UTC)
+
+        self.queue.submit([rate], [invoice])
+
+        self.assertIsNone(self.invoice_repo.get(invoice.id))
+        self.assertIs(self.queue.rate(rate.id), rate)
+        self.assertIs(self.queue.rate_for(rate.client_id, rate.plan), rate)
+        self.assertIs(self.queue.invoice(invoice.id), invoice)
+        self.assertIs(self.queue.invoice_for(invoice.client_id, Month.NOVEMBER.value, invoice.billing_year), invoice)
+
+        self.assertEqual(self.queue.flush(), 1)
+
+        self.assertEqual(self.rate_repo.get_by_id(rate.id), rate)
+        self.assertIsNotNone(self.invoice_repo.get(invoice.id))
+        self.assertIsNone(self.queue.invoice(invoice.id))
+        self.assertIsNone(self.queue.rate_for(rate.client_id, rate.plan))
+        self.assertEqual(self.queue.pending, 0)
+
+    def test_flush_revenue(self) -> None:
+        rollup = random_rollup(self.faker)
+        self.queue.submit([], [random_invoice(self.faker, tzinfo=UTC)], [rollup])
+        self.queue.submit([], [random_invoice(self.faker, tzinfo=UTC)], [rollup])
+
+        self.assertEqual(self.queue.pending_revenue(), [rollup, rollup])
+
+        self.queue.flush_all()
+
+        expected = replace(rollup)
+        expected.add(rollup)
+        self.assertEqual(self.revenue_repo.get_range('2024-11', '2024-11'), [expected])
+        self.assertEqual(self.queue.pending_revenue(), [])
+
+    def test_flush_batches(self) -> None:
+        for _ in range(5):
+            self.queue.submit([], [random_invoice(self.faker, tzinfo=UTC)])
+
+        self.assertEqual(self.queue.flush(), 2)
+        self.queue.flush_all()
+
+        self.assertEqual(len(list(self.invoice_repo.get_all())), 5)
+
+    def test_failed_flush_kept_pending(self) -> None:
+        unit_of_work = Mock(UnitOfWork)
+        unit_of_work.commit.side_effect = ConnectionError()
+        queue = self.create_queue(Mock(return_value=unit_of_work))
+        invoice = random_invoice(self.faker, tzinfo=UTC)
+        queue.submit([], [invoice])
+
+        with self.assertRaises(ConnectionError):
+            queue.flush()
+
+        self.assertEqual(queue.pending, 1)
+        self.assertIs(queue.invoice(invoice.id), invoice)
+
+    def test_replayed_at_startup(self) -> None:
+        invoice = random_invoice(self.faker, tzinfo=UTC)
+        self.queue.submit([], [invoice])
+        self.queue.log.close()
+
+        queue = self.create_queue(lambda: SqliteUnitOfWork(self.db.path, db=self.db))
+
+        self.assertIs(queue.invoice(invoice.id), queue.log.pending[1].invoices[0])
+        queue.flush_all()
+        self.assertIsNotNone(self.invoice_repo.get(invoice.id))
+
+    def test_replayed_stored_write_skipped(self) -> None:
+        rollup = random_rollup(self.faker)
+        invoice = random_invoice(self.faker, tzinfo=UTC)
+        self.queue.submit([], [invoice], [rollup])
+        # Stored by a process that died before acking it
+        unit_of_work = SqliteUnitOfWork(self.db.path, db=self.db)
+        unit_of_work.save_invoice(invoice)
+        unit_of_work.add_revenue(rollup)
+        unit_of_work.commit()
+        self.queue.log.close()
+
+        queue = self.create_queue(lambda: SqliteUnitOfWork(self.db.path, db=self.db))
+        with self.assertLogs('WriteBehindQueue', level='INFO'):
+            queue.flush_all()
+
+        self.assertEqual(self.revenue_repo.get_range('2024-11', '2024-11'), [rollup])
+        self.assertEqual(queue.pending, 0)
+
+    def test_same_invoice_from_two_processes(self) -> None:
+        rollup = random_rollup(self.faker)
+        invoice = random_invoice(self.faker, tzinfo=UTC)
+        other = self.create_queue(lambda: SqliteUnitOfWork(self.db.path, db=self.db))
+        # Both generated the invoice of the period under its deterministic id
+        self.queue.submit([], [invoice], [rollup])
+        other.submit([], [replace(invoice, total_incidents_web=invoice.total_incidents_web + 1)], [rollup])
+
+        self.queue.flush_all()
+        with self.assertLogs('WriteBehindQueue', level='INFO'):
+            other.flush_all()
+
+        self.assertEqual(list(self.invoice_repo.get_all()), [invoice])
+        self.assertEqual(self.revenue_repo.get_range('2024-11', '2024-11'), [rollup])
+
+    def test_revenue_ack_durable(self) -> None:
+        self.queue.submit([], [random_invoice(self.faker, tzinfo=UTC)])
+        self.queue.submit([], [random_invoice(self.faker, tzinfo=UTC)], [random_rollup(self.faker)])
+
+        with patch('repositories.writebehind.log.os.fsync') as fsync:
+            self.queue.log.ack([1])
+            fsync.assert_not_called()
+            self.queue.flush_all()
+            fsync.assert_called_once()
+
+    def test_flusher_retries(self) -> None:
+        unit_of_work = SqliteUnitOfWork(self.db.path, db=self.db)
+        factory = Mock(side_effect=[ConnectionError(), unit_of_work])
+        queue = self.create_queue(factory)
+        invoice = random_invoice(self.faker, tzinfo=UTC)
+        queue.submit([], [invoice])
+
+        with self.assertLogs('WriteBehindQueue', level='ERROR'):
+            queue.start()
+            for _ in range(100):
+                if queue.pending == 0:
+                    break
+                queue.stopped.wait(0.01)
+        queue.stop(timeout=1)
+
+        self.assertEqual(queue.pending, 0)
+        self.assertIsNotNone(self.invoice_repo.get(invoice.id))
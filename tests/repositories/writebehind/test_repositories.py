@@ -0,0 +1,138 @@
+import tempfile
+from dataclasses import replace
+from datetime import UTC
+from pathlib import Path
+from unittest import TestCase
+
+from faker import Faker
+
+from models import Month, Plan
+from repositories.sqlite import (
+    SqliteDatabase,
+    SqliteInvoiceRepository,
+    SqliteRateRepository,
+    SqliteRevenueRepository,
+    SqliteUnitOfWork,
+)
+from repositories.writebehind import (
+    WriteBehindInvoiceRepository,
+    WriteBehindLog,
+    WriteBehindQueue,
+    WriteBehindRateRepository,
+    WriteBehindRevenueRepository,
+    WriteBehindUnitOfWork,
+)
+from tests.repositories.contracts import random_invoice, random_rate, random_rollup
+
+
+class TestWriteBehindRepositories(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        db = SqliteDatabase(str(Path(tmpdir.name) / 'test.db'))
+        log = WriteBehindLog(str(Path(tmpdir.name) / 'log'), max_bytes=1024 * 1024)
+        self.addCleanup(log.close)
+
+        self.stored_rates = SqliteRateRepository(db.path, db=db)
+        self.stored_invoices = SqliteInvoiceRepository(db.path, db=db)
+        self.stored_revenue = SqliteRevenueRepository(db.path, db=db)
+        self.queue = WriteBehindQueue(
+            log,
+            lambda: SqliteUnitOfWork(db.path, db=db),
+            self.stored_invoices,
+            batch_size=10,
+            flush_interval=1.0,
+            retry_interval=1.0,
+            max_retry_interval=1.0,
+        )
+        self.rate_repo = WriteBehindRateRepository(self.stored_rates, self.queue)
+        self.invoice_repo = WriteBehindInvoiceRepository(self.stored_invoices, self.queue)
+        self.revenue_repo = WriteBehindRevenueRepository(self.stored_revenue, self.queue)
+
+    def test_unit_of_work_commit(self) -> None:
+        rate = random_rate(self.faker)
+        invoice = random_invoice(self.faker, client_id=rate.client_id, tzinfo=UTC)
+        unit_of_work = WriteBehindUnitOfWork(self.queue)
+
+        unit_of_work.create_rate(rate)
+        unit_of_work.create_invoice(invoice)
+        unit_of_work.add_revenue(random_rollup(self.faker))
+        unit_of_work.commit()
+        unit_of_work.commit()
+
+        self.assertEqual(self.queue.pending, 1)
+        self.assertEqual(len(self.queue.pending_revenue()), 1)
+        self.assertIsNone(self.stored_invoices.get(invoice.id))
+
+    def test_reads_pending_first(self) -> None:
+        rate = random_rate(self.faker, plan=Plan.EMPRENDEDOR)
+        invoice = random_invoice(self.faker, client_id=rate.client_id, tzinfo=UTC)
+        stored_invoice = random_invoice(self.faker, client_id=rate.client_id, tzinfo=UTC)
+        stored_invoice.billing_month = Month.OCTOBER.value
+        self.stored_invoices.create(stored_invoice)
+        self.queue.submit([rate], [invoice])
+
+        self.assertIs(self.rate_repo.get_by_id(rate.id), rate)
+        self.assertIs(self.rate_repo.get_by_client_and_plan(rate.client_id, Plan.EMPRENDEDOR), rate)
+        self.assertEqual(self.rate_repo.get_many([rate.id, 'missing']), [rate, None])
+        self.assertIs(self.invoice_repo.get(invoice.id), invoice)
+        self.assertIs(self.invoice_repo.get_by_client_and_month(rate.client_id, Month.NOVEMBER, invoice.billing_year), invoice)
+        self.assertEqual(
+            [found.id if found else None for found in self.invoice_repo.get_many([stored_invoice.id, invoice.id, 'missing'])],
+            [stored_invoice.id, invoice.id, None],
+        )
+        self.assertEqual(
+            self.invoice_repo.get_by_clients_and_month([rate.client_id, 'missing'], Month.NOVEMBER, invoice.billing_year),
+            [invoice, None],
+        )
+        self.assertEqual(
+            {found.id for found in self.invoice_repo.get_by_client(rate.client_id)}, {invoice.id, stored_invoice.id}
+        )
+        self.assertEqual(
+            [found.id for found in self.invoice_repo.get_by_month(Month.NOVEMBER, invoice.billing_year)], [invoice.id]
+        )
+        self.assertEqual(
+            [found.id for found in self.invoice_repo.get_by_month(Month.OCTOBER, stored_invoice.billing_year)],
+            [stored_invoice.id],
+        )
+        self.assertEqual([found.id for found in self.rate_repo.get_all()], [rate.id])
+
+    def test_flushed_reads_store(self) -> None:
+        invoice = random_invoice(self.faker, tzinfo=UTC)
+        self.queue.submit([], [invoice])
+
+        self.queue.flush_all()
+
+        self.assertEqual([found.id for found in self.invoice_repo.get_all()], [invoice.id])
+        found = self.invoice_repo.get_by_client_and_month(invoice.client_id, Month.NOVEMBER, invoice.billing_year)
+        self.assertIsNotNone(found)
+        self.assertIsNot(found, invoice)
+
+    def test_delete_all_flushes_first(self) -> None:
+        self.queue.submit([random_rate(self.faker)], [random_invoice(self.faker, tzinfo=UTC)])
+
+        self.invoice_repo.delete_all()
+
+        self.assertEqual(self.queue.pending, 0)
+        self.assertEqual(list(self.invoice_repo.get_all()), [])
+
+    def test_revenue_adds_pending(self) -> None:
+        stored = random_rollup(self.faker, '2024-11')
+        other_period = random_rollup(self.faker, '2024-12')
+        self.stored_revenue.replace([stored, other_period])
+        pending = random_rollup(self.faker, '2024-11')
+        self.queue.submit([], [random_invoice(self.faker, tzinfo=UTC)], [pending, random_rollup(self.faker, '2025-01')])
+
+        expected = replace(stored)
+        expected.add(pending)
+        self.assertEqual(self.revenue_repo.get_range('2024-11', '2024-12'), [expected, other_period])
+
+    def test_revenue_replace_flushes_first(self) -> None:
+        self.queue.submit([], [random_invoice(self.faker, tzinfo=UTC)], [random_rollup(self.faker)])
+        replacement = random_rollup(self.faker)
+
+        self.revenue_repo.replace([replacement])
+
+        self.assertEqual(self.queue.pending, 0)
+        self.assertEqual(self.revenue_repo.get_range('2024-11', '2024-11'), [replacement])
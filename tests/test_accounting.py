@@ -0,0 +1,113 @@
+from unittest import TestCase
+
+from flask import Flask
+
+from accounting import (
+    OperationAccounting,
+    ReadBudgetExceededError,
+    current_operations,
+    install_operation_accounting,
+    query_reads,
+    record_operations,
+)
+from blueprints.util import read_budget_exceeded_response
+from metrics import Metrics
+
+
+class TestOperationAccounting(TestCase):
+    def setUp(self) -> None:
+        self.metrics = Metrics()
+
+    def test_record_outside_request(self) -> None:
+        record_operations(reads=10, round_trips=1)
+
+        self.assertIsNone(current_operations.get())
+
+    def test_query_reads(self) -> None:
+        self.assertEqual(query_reads(0), 1)
+        self.assertEqual(query_reads(3), 3)
+
+    def test_invalid_budget_mode(self) -> None:
+        with self.assertRaises(ValueError):
+            OperationAccounting(self.metrics, read_budget=10, budget_mode='ignore')
+
+    def test_request(self) -> None:
+        accounting = OperationAccounting(self.metrics, read_budget=0, budget_mode='reject')
+        record = accounting.begin_request('Invoice.GetInvoice')
+
+        record_operations(reads=3, round_trips=2)
+        record_operations(writes=2, round_trips=1)
+        record_operations(reads=1000, deletes=1000, round_trips=1)
+
+        with self.assertLogs('OperationAccounting', level='INFO') as logs:
+            accounting.end_request(record, 200, 'client')
+
+        counters = self.metrics.snapshot()['counters']
+        self.assertEqual(counters['firestore.Invoice.GetInvoice.requests'], 1)
+        self.assertEqual(counters['firestore.Invoice.GetInvoice.reads'], 1003)
+        self.assertEqual(counters['firestore.Invoice.GetInvoice.writes'], 2)
+        self.assertEqual(counters['firestore.Invoice.GetInvoice.deletes'], 1000)
+        self.assertEqual(counters['firestore.Invoice.GetInvoice.round_trips'], 4)
+        fields = logs.records[0].json_fields  # type: ignore[attr-defined]
+        self.assertEqual(fields['client_id'], 'client')
+        self.assertEqual(fields['reads'], 1003)
+        self.assertFalse(fields['over_budget'])
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertIsNone(current_operations.get())
+
+    def test_request_without_operations_not_logged(self) -> None:
+        accounting = OperationAccounting(self.metrics, read_budget=0, budget_mode='log')
+        record = accounting.begin_request('Health.Health')
+
+        with self.assertNoLogs('OperationAccounting'):
+            accounting.end_request(record, 200, None)
+
+        self.assertEqual(self.metrics.snapshot()['counters']['firestore.Health.Health.requests'], 1)
+
+    def test_budget_log(self) -> None:
+        accounting = OperationAccounting(self.metrics, read_budget=5, budget_mode='log')
+        record = accounting.begin_request('Invoice.GetInvoice')
+
+        record_operations(reads=5)
+        self.assertFalse(record.over_budget)
+        record_operations(reads=1)
+        record_operations(reads=10)
+
+        with self.assertLogs('OperationAccounting', level='WARNING') as logs:
+            accounting.end_request(record, 200, 'client')
+
+        self.assertTrue(logs.records[0].json_fields['over_budget'])  # type: ignore[attr-defined]
+        self.assertEqual(self.metrics.snapshot()['counters']['firestore.Invoice.GetInvoice.over_budget'], 1)
+
+    def test_budget_reject(self) -> None:
+        accounting = OperationAccounting(self.metrics, read_budget=5, budget_mode='reject')
+        record = accounting.begin_request('Invoice.GetInvoice')
+
+        record_operations(reads=5)
+        with self.assertRaises(ReadBudgetExceededError) as context:
+            record_operations(reads=1)
+
+        self.assertEqual(context.exception.reads, 6)
+        self.assertEqual(context.exception.budget, 5)
+        with self.assertLogs('OperationAccounting', level='WARNING'):
+            accounting.end_request(record, 500, 'client')
+
+    def test_install(self) -> None:
+        app = Flask(__name__)
+        accounting = OperationAccounting(self.metrics, read_budget=2, budget_mode='reject')
+        install_operation_accounting(app, accounting)
+        app.register_error_handler(ReadBudgetExceededError, read_budget_exceeded_response)
+
+        @app.route('/reads/<int:reads>')
+        def reads(reads: int) -> str:
+            record_operations(reads=reads, round_trips=1)
+            return 'ok'
+
+        with self.assertLogs('OperationAccounting', level='INFO') as logs:
+            ok = app.test_client().get('/reads/2')
+            rejected = app.test_client().get('/reads/3')
+
+        self.assertEqual(ok.status_code, 200)
+        self.assertEqual(rejected.status_code, 500)
+        self.assertEqual([record.json_fields['status'] for record in logs.records], [200, 500])  # type: ignore[attr-defined]
+        self.assertEqual(self.metrics.snapshot()['counters']['firestore.reads.reads'], 5)
@@ -0,0 +1,72 @@
+import threading
+from unittest import TestCase
+
+from admission import AdmissionPool, AdmissionRejectedError
+from metrics import Metrics
+
+
+class TestAdmissionPool(TestCase):
+    def setUp(self) -> None:
+        self.metrics = Metrics()
+
+    def make_pool(self, max_queue: int, queue_timeout: float = 5) -> AdmissionPool:
+        return AdmissionPool(
+            name='test',
+            metrics=self.metrics,
+            max_concurrency=1,
+            max_queue=max_queue,
+            queue_timeout=queue_timeout,
+            retry_after=7,
+        )
+
+    def test_slot(self) -> None:
+        pool = self.make_pool(max_queue=0)
+
+        with pool.slot():
+            self.assertEqual(self.metrics.gauges['admission.test.running'], 1)
+
+        self.assertEqual(self.metrics.gauges['admission.test.running'], 0)
+        self.assertEqual(self.metrics.histograms['admission.test.queue_wait_seconds'].count, 1)
+
+    def test_queue_full(self) -> None:
+        pool = self.make_pool(max_queue=0)
+
+        with pool.slot(), self.assertLogs(level='WARNING'), self.assertRaises(AdmissionRejectedError) as ctx:  # noqa: SIM117
+            with pool.slot():
+                pass  # pragma: no cover
+
+        self.assertEqual(ctx.exception.retry_after, 7)
+        self.assertEqual(self.metrics.counters['admission.test.rejected.queue_full'], 1)
+
+    def test_queue_timeout(self) -> None:
+        pool = self.make_pool(max_queue=1, queue_timeout=0.01)
+
+        with pool.slot(), self.assertLogs(level='WARNING'), self.assertRaises(AdmissionRejectedError):  # noqa: SIM117
+            with pool.slot():
+                pass  # pragma: no cover
+
+        self.assertEqual(self.metrics.counters['admission.test.rejected.queue_timeout'], 1)
+        self.assertEqual(pool.waiting, 0)
+
+    def test_queued(self) -> None:
+        pool = self.make_pool(max_queue=1)
+        entered = threading.Event()
+        release = threading.Event()
+
+        def hold() -> None:
+            with pool.slot():
+                entered.set()
+                release.wait(timeout=5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        entered.wait(timeout=5)
+        threading.Timer(0.05, release.set).start()
+
+        with pool.slot():
+            pass
+
+        thread.join()
+        wait_time = self.metrics.histograms['admission.test.queue_wait_seconds']
+        self.assertEqual(wait_time.count, 2)
+        self.assertGreater(wait_time.max, 0)
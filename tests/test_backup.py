@@ -0,0 +1,161 @@
+import threading
+import time
+from typing import Any
+from unittest import TestCase
+
+from werkzeug.serving import make_server
+
+from backup import FAILED, PENDING, RUNNING, SUCCEEDED, TIMED_OUT, BackupManager, BackupOperation
+from demo.export_api import create_export_api
+
+SNAPSHOT_TIME = '2026-10-19T07:00:00Z'
+
+
+def serve_export_api(test: TestCase, **kwargs: Any) -> tuple[str, list[dict[str, Any]]]:  # noqa: ANN401
+    """Serve a stand-in of the export API for the duration of a test, returning its url and the requests it receives."""
+    app = create_export_api(**kwargs)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    test.addCleanup(server.shutdown)
+    return f'http://127.0.0.1:{server.server_port}', app.config['EXPORT_REQUESTS']
+
+
+def wait_finished(operation: BackupOperation, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not operation.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class TestBackupManager(TestCase):
+    def manager(self, url: str, poll_deadline: float = 5.0) -> BackupManager:
+        manager = BackupManager(
+            api_url=url,
+            project_id='project',
+            database='(default)',
+            access_token=lambda: 'token',
+            poll_interval=0.01,
+            max_poll_interval=0.02,
+            poll_deadline=poll_deadline,
+            max_operations=2,
+        )
+        self.addCleanup(manager.stop)
+        return manager
+
+    def test_backup(self) -> None:
+        url, requests_received = serve_export_api(self, polls_until_done=3)
+        manager = self.manager(url)
+
+        with self.assertLogs('BackupManager', level='INFO'):
+            operation, started = manager.trigger(SNAPSHOT_TIME)
+            self.assertEqual(manager.trigger(SNAPSHOT_TIME), (operation, False))
+            wait_finished(operation)
+
+        self.assertTrue(started)
+        self.assertEqual(operation.id, '20261019T070000Z')
+        self.assertEqual(operation.state, SUCCEEDED)
+        self.assertEqual(operation.polls, 3)
+        self.assertEqual(operation.name, 'projects/project/databases/(default)/operations/op1')
+        self.assertEqual(operation.progress['operationState'], 'SUCCESSFUL')
+        self.assertEqual(len(requests_received), 1)
+        self.assertEqual(requests_received[0]['headers']['Authorization'], 'Bearer token')
+        self.assertEqual(
+            requests_received[0]['body'],
+            {'outputUriPrefix': f'gs://project-backup/firestore/(default)/{SNAPSHOT_TIME}', 'snapshotTime': SNAPSHOT_TIME},
+        )
+        self.assertIs(manager.get(operation.id), operation)
+
+    def test_backup_failure_retriggered(self) -> None:
+        url, requests_received = serve_export_api(self, polls_until_done=1, error='Bucket not found')
+        manager = self.manager(url)
+
+        with self.assertLogs('BackupManager', level='ERROR'):
+            operation, _ = manager.trigger(SNAPSHOT_TIME)
+            wait_finished(operation)
+        with self.assertLogs('BackupManager', level='ERROR'):
+            retried, started = manager.trigger(SNAPSHOT_TIME)
+            wait_finished(retried)
+
+        self.assertEqual((operation.state, operation.error), (FAILED, 'Bucket not found'))
+        self.assertTrue(started)
+        self.assertIsNot(retried, operation)
+        self.assertEqual(len(requests_received), 2)
+
+    def test_export_rejected(self) -> None:
+        url, _ = serve_export_api(self, rejected=True)
+        manager = self.manager(url)
+
+        with self.assertLogs('BackupManager', level='ERROR'):
+            operation, _ = manager.trigger(SNAPSHOT_TIME)
+            wait_finished(operation)
+
+        self.assertEqual(operation.state, FAILED)
+        self.assertIn('Permission denied', operation.error or '')
+        self.assertEqual(operation.polls, 0)
+
+    def test_trigger_returns_at_once(self) -> None:
+        manager = self.manager('http://127.0.0.1:1')
+
+        with self.assertLogs('BackupManager', level='ERROR'):
+            operation, started = manager.trigger(SNAPSHOT_TIME)
+            self.assertEqual((operation.state, operation.name, started), (PENDING, None, True))
+            wait_finished(operation)
+
+        self.assertEqual(operation.state, FAILED)
+
+    def test_poll_deadline(self) -> None:
+        url, _ = serve_export_api(self, polls_until_done=1000)
+        manager = self.manager(url, poll_deadline=0.1)
+
+        with self.assertLogs('BackupManager', level='WARNING'):
+            operation, _ = manager.trigger(SNAPSHOT_TIME)
+            wait_finished(operation)
+
+        self.assertEqual(operation.state, TIMED_OUT)
+        self.assertGreater(operation.polls, 0)
+        # The export may still finish, so it is not started again
+        self.assertEqual(manager.trigger(SNAPSHOT_TIME), (operation, False))
+
+    def test_lookup(self) -> None:
+        url, _ = serve_export_api(self, polls_until_done=10)
+        manager = self.manager(url)
+        other_process = self.manager(url)
+        with self.assertLogs('BackupManager', level='INFO'):
+            operation, _ = manager.trigger(SNAPSHOT_TIME)
+            while operation.name is None:
+                time.sleep(0.01)
+
+        found = other_process.get(operation.id)
+
+        self.assertIsNotNone(found)
+        self.assertEqual(
+            (found.name, found.snapshot_time, found.state) if found else None, (operation.name, SNAPSHOT_TIME, RUNNING)
+        )
+        self.assertIsNone(other_process.get('20261020T070000Z'))
+        self.assertIsNone(other_process.get('../op1'))
+
+    def test_trigger_coalesced_across_processes(self) -> None:
+        url, requests_received = serve_export_api(self, polls_until_done=10)
+        manager = self.manager(url)
+        other_process = self.manager(url)
+        with self.assertLogs('BackupManager', level='INFO'):
+            operation, _ = manager.trigger(SNAPSHOT_TIME)
+            while operation.name is None:
+                time.sleep(0.01)
+
+            found, _ = other_process.trigger(SNAPSHOT_TIME)
+            while found.name is None:
+                time.sleep(0.01)
+
+        self.assertEqual((found.id, found.name), (operation.id, operation.name))
+        self.assertEqual(len(requests_received), 1)
+
+    def test_max_operations(self) -> None:
+        url, _ = serve_export_api(self, polls_until_done=1)
+        manager = self.manager(url)
+
+        with self.assertLogs('BackupManager', level='INFO'):
+            operations = [manager.trigger(f'2026-10-1{day}T07:00:00Z')[0] for day in range(3)]
+            for operation in operations:
+                wait_finished(operation)
+
+        self.assertEqual(list(manager.operations), [operation.id for operation in operations[1:]])
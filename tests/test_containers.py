@@ -0,0 +1,119 @@
+import tempfile
+from pathlib import Path
+from typing import Any, cast
+from unittest import TestCase
+from unittest.mock import patch
+
+from app import create_app
+from cache import LocalCacheBackend, RedisCacheBackend
+from containers import reset_fork_unsafe
+from repositories.sqlite import SqliteInvoiceRepository, SqliteRateRepository, SqliteRevenueRepository, SqliteUnitOfWork
+from repositories.writebehind import (
+    WriteBehindInvoiceRepository,
+    WriteBehindRateRepository,
+    WriteBehindRevenueRepository,
+    WriteBehindUnitOfWork,
+)
+
+
+class TestContainer(TestCase):
+    def setUp(self) -> None:
+        self.app = create_app()
+
+    def tearDown(self) -> None:
+        self.app.container.unwire()
+
+    @patch('google.cloud.firestore_v1.client.Client.__init__', return_value=None)
+    def test_firestore_client_shared(self, mock_client_init: Any) -> None:  # noqa: ANN401
+        mock_client_init.assert_not_called()
+
+        rate_repo = self.app.container.firestore_rate_repo()
+        invoice_repo = self.app.container.invoice_repo()
+
+        self.assertIs(rate_repo.db, invoice_repo.db)
+        mock_client_init.assert_called_once()
+
+    @patch('google.cloud.firestore_v1.client.Client.__init__', return_value=None)
+    def test_reset_fork_unsafe(self, _: Any) -> None:  # noqa: ANN401
+        container = self.app.container
+        firestore_client = container.firestore_client()
+        rate_repo = container.rate_repo()
+        client_repo = container.client_repo()
+        incident_store = container.incident_store()
+        metrics = container.metrics()
+        rate_cache = container.rate_cache()
+
+        reset_fork_unsafe(container)
+
+        self.assertIsNot(container.firestore_client(), firestore_client)
+        self.assertIsNot(container.rate_repo(), rate_repo)
+        self.assertIs(container.rate_repo().repo.db, container.firestore_client())  # type: ignore[attr-defined]
+        self.assertIsNot(container.client_repo(), client_repo)
+        self.assertIsNot(container.incident_store(), incident_store)
+        self.assertIs(container.metrics(), metrics)
+        self.assertIs(container.rate_cache(), rate_cache)
+
+    def test_cache_backend_local(self) -> None:
+        self.assertIsInstance(self.app.container.cache_backend(), LocalCacheBackend)
+
+    def test_cache_backend_redis(self) -> None:
+        self.app.container.config.cache.backend.override('redis')
+
+        backend = self.app.container.cache_backend()
+
+        self.assertIsInstance(backend, RedisCacheBackend)
+        self.assertIs(cast(RedisCacheBackend, backend).fallback, self.app.container.local_cache_backend())
+
+    @patch.dict('os.environ', {'CACHE_BACKEND': 'sqlite'})
+    def test_cache_ttl_not_shared(self) -> None:
+        # Evictions do not reach the caches of the other instances, so entries expire quickly
+        app = create_app(start_background=False)
+        self.addCleanup(app.container.unwire)
+
+        self.assertEqual((app.container.config.cache.client_ttl(), app.container.config.cache.invoice_ttl()), (300.0, 300.0))
+
+    @patch.dict('os.environ', {'CACHE_BACKEND': 'redis'})
+    def test_cache_ttl_shared(self) -> None:
+        app = create_app(start_background=False)
+        self.addCleanup(app.container.unwire)
+
+        self.assertEqual(
+            (app.container.config.cache.client_ttl(), app.container.config.cache.invoice_ttl()), (86400.0, 86400.0)
+        )
+
+    def test_storage_backend_sqlite(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.app.container.config.storage.backend.override('sqlite')
+        self.app.container.config.sqlite.path.override(str(Path(tmpdir.name) / 'invoice.db'))
+
+        rate_repo = self.app.container.rate_repo()
+        invoice_repo = self.app.container.invoice_repo()
+        unit_of_work = self.app.container.unit_of_work()
+
+        self.assertIsInstance(rate_repo.repo, SqliteRateRepository)
+        self.assertIsInstance(invoice_repo, SqliteInvoiceRepository)
+        self.assertIsInstance(unit_of_work, SqliteUnitOfWork)
+        self.assertIs(cast(SqliteInvoiceRepository, invoice_repo).db, cast(SqliteUnitOfWork, unit_of_work).db)
+        self.assertIsInstance(self.app.container.revenue_repo(), SqliteRevenueRepository)
+        self.assertIsNot(unit_of_work, self.app.container.unit_of_work())
+
+    def test_storage_writes_write_behind(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.app.container.config.storage.backend.override('sqlite')
+        self.app.container.config.storage.writes.override('write_behind')
+        self.app.container.config.sqlite.path.override(str(Path(tmpdir.name) / 'invoice.db'))
+        self.app.container.config.write_behind.directory.override(str(Path(tmpdir.name) / 'write-behind'))
+
+        rate_repo = self.app.container.rate_repo()
+        invoice_repo = self.app.container.invoice_repo()
+        queue = self.app.container.write_behind_queue()
+        self.addCleanup(queue.log.close)
+
+        self.assertIsInstance(rate_repo.repo, WriteBehindRateRepository)
+        self.assertIsInstance(invoice_repo, WriteBehindInvoiceRepository)
+        self.assertIsInstance(self.app.container.unit_of_work(), WriteBehindUnitOfWork)
+        self.assertIsInstance(self.app.container.revenue_repo(), WriteBehindRevenueRepository)
+        self.assertIsInstance(queue.unit_of_work_factory(), SqliteUnitOfWork)
+        self.assertIs(cast(WriteBehindInvoiceRepository, invoice_repo).queue, queue)
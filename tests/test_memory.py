@@ -0,0 +1,94 @@
+import tracemalloc
+from unittest import TestCase
+
+from flask import Flask
+
+from memory import MemoryTracer, current_request, install_memory_tracing, memory_stage
+
+
+class TestMemoryTracer(TestCase):
+    def setUp(self) -> None:
+        self.tracer = MemoryTracer(frames=1, snapshot_interval=60, snapshot_history=5, large_request_bytes=1024 * 1024)
+
+    def tearDown(self) -> None:
+        self.tracer.stop()
+
+    def test_stage_outside_request(self) -> None:
+        with memory_stage('decode'):
+            data = [0] * 1000
+
+        self.assertEqual(len(data), 1000)
+        self.assertIsNone(current_request.get())
+
+    def test_request(self) -> None:
+        self.tracer.start()
+        record = self.tracer.begin_request('test')
+        self.assertIsNotNone(record)
+        if record is None:
+            return
+
+        self.assertIsNone(self.tracer.begin_request('concurrent'))
+
+        with memory_stage('decode'):
+            data = [str(i) for i in range(10000)]
+        with memory_stage('filter'):
+            filtered = data[:10]
+
+        with self.assertLogs(level='INFO') as logs:
+            self.tracer.end_request(record, 200, 'client')
+
+        self.assertEqual(len(filtered), 10)
+        self.assertEqual(list(record.stages), ['decode', 'filter'])
+        self.assertGreater(record.stages['decode'].peak_bytes, 10000)
+        self.assertLess(record.stages['filter'].peak_bytes, record.stages['decode'].peak_bytes)
+        self.assertGreaterEqual(record.peak_bytes, record.stages['decode'].peak_bytes)
+        fields = logs.records[0].json_fields  # type: ignore[attr-defined]
+        self.assertEqual(fields['client_id'], 'client')
+        self.assertEqual(fields['stages']['decode']['calls'], 1)
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertIsNone(current_request.get())
+
+    def test_large_request(self) -> None:
+        self.tracer.start()
+        record = self.tracer.begin_request('test')
+        if record is None:
+            self.fail('Request was not traced')
+
+        with memory_stage('decode'):
+            data = bytearray(2 * 1024 * 1024)
+            del data
+
+        with self.assertLogs(level='WARNING'):
+            self.tracer.end_request(record, 200, None)
+
+    def test_snapshot(self) -> None:
+        untraced = self.tracer.snapshot(top_allocations=True)
+        self.tracer.start()
+        traced = self.tracer.snapshot(top_allocations=True)
+
+        self.assertGreater(untraced['rss_bytes'], 0)
+        self.assertNotIn('traced_bytes', untraced)
+        self.assertIn('traced_bytes', traced)
+        self.assertIn('top_allocations', traced)
+
+    def test_install_memory_tracing(self) -> None:
+        app = Flask(__name__)
+
+        def view() -> str:
+            with memory_stage('serialize'):
+                return 'ok' * 1000
+
+        app.add_url_rule('/test', 'test', view)
+        install_memory_tracing(app, self.tracer)
+        self.tracer.start()
+        client = app.test_client()
+
+        with self.assertLogs(level='INFO') as logs:
+            resp = client.get('/test')
+
+        self.assertTrue(tracemalloc.is_tracing())
+        self.assertEqual(resp.status_code, 200)
+        fields = logs.records[0].json_fields  # type: ignore[attr-defined]
+        self.assertEqual(fields['endpoint'], 'test')
+        self.assertEqual(fields['status'], 200)
+        self.assertIn('serialize', fields['stages'])
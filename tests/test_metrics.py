@@ -0,0 +1,23 @@
+from unittest import TestCase
+
+from metrics import Metrics
+
+
+class TestMetrics(TestCase):
+    def test_snapshot(self) -> None:
+        metrics = Metrics()
+
+        metrics.increment('requests')
+        metrics.increment('requests', 2)
+        metrics.set_gauge('running', 3)
+        metrics.observe('latency', 0.002)
+        metrics.observe('latency', 20)
+
+        snapshot = metrics.snapshot()
+
+        self.assertEqual(snapshot['counters'], {'requests': 3})
+        self.assertEqual(snapshot['gauges'], {'running': 3})
+        self.assertEqual(snapshot['histograms']['latency']['count'], 2)
+        self.assertEqual(snapshot['histograms']['latency']['max'], 20)
+        self.assertEqual(snapshot['histograms']['latency']['buckets']['0.005'], 1)
+        self.assertEqual(snapshot['histograms']['latency']['buckets']['inf'], 1)
@@ -0,0 +1,86 @@
+import tempfile
+from unittest import TestCase
+
+from flask import Flask
+
+from profiling import PROFILE_HEADER, RequestProfiler, install_request_profiler
+
+
+class TestRequestProfiler(TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.profiler = RequestProfiler(directory=self.tmpdir.name, token='secret', sample_rate=0.0, max_profiles=2)  # noqa: S106
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_triggered(self) -> None:
+        self.assertTrue(self.profiler.triggered('secret'))
+        self.assertFalse(self.profiler.triggered('other'))
+        self.assertFalse(self.profiler.triggered(None))
+
+    def test_triggered_sample_rate(self) -> None:
+        profiler = RequestProfiler(directory=self.tmpdir.name, token=None, sample_rate=1.0, max_profiles=2)
+
+        self.assertTrue(profiler.triggered(None))
+
+    def test_one_profile_at_a_time(self) -> None:
+        profile = self.profiler.start()
+        self.assertIsNotNone(profile)
+
+        self.assertIsNone(self.profiler.start())
+
+        if profile is not None:
+            self.profiler.stop(profile, 'test')
+        second = self.profiler.start()
+        self.assertIsNotNone(second)
+        if second is not None:
+            self.profiler.stop(second, 'test')
+
+    def test_prune(self) -> None:
+        names = []
+        for _ in range(3):
+            profile = self.profiler.start()
+            if profile is not None:
+                names.append(self.profiler.stop(profile, 'Health Check.HealthCheck'))
+
+        profiles = self.profiler.list()
+
+        self.assertEqual([info.name for info in profiles], sorted(names, reverse=True)[:2])
+        self.assertIn('Health_Check.HealthCheck', profiles[0].name)
+        self.assertIn('function calls', self.profiler.summary(profiles[0].name, 10))
+
+    def test_path_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            self.profiler.path('../secret.prof')
+
+    def test_install_request_profiler(self) -> None:
+        app = Flask(__name__)
+        app.add_url_rule('/test', 'test', lambda: 'ok')
+        install_request_profiler(app, self.profiler)
+        client = app.test_client()
+
+        with self.assertLogs(level='INFO'):
+            resp = client.get('/test', headers={PROFILE_HEADER: 'secret'})
+        not_profiled = client.get('/test')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([info.name for info in self.profiler.list()], [resp.headers['X-Profile-Name']])
+        self.assertNotIn('X-Profile-Name', not_profiled.headers)
+
+    def test_install_request_profiler_error(self) -> None:
+        app = Flask(__name__)
+
+        def fail() -> str:
+            raise RuntimeError
+
+        app.add_url_rule('/test', 'test', fail)
+        install_request_profiler(app, self.profiler)
+        client = app.test_client()
+
+        with self.assertLogs(level='INFO'):
+            resp = client.get('/test', headers={PROFILE_HEADER: 'secret'})
+
+        self.assertEqual(resp.status_code, 500)
+        self.assertEqual(len(self.profiler.list()), 1)
+        self.assertFalse(self.profiler.lock.locked())
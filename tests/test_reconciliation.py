@@ -0,0 +1,196 @@
+import tempfile
+import threading
+from dataclasses import replace
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import cast
+from unittest.mock import Mock
+
+from faker import Faker
+from unittest_parametrize import ParametrizedTestCase, parametrize
+
+from metrics import Metrics
+from models import Channel, IncidentBatch, Invoice, Month, Plan
+from reconciliation import InvoiceReconciler, ReconciliationReport, month_bounds
+from repositories import ConditionalUnitOfWork, IncidentRepository, UnitOfWork
+from repositories.cached import IncidentSummaryStore
+from repositories.sqlite import (
+    SqliteDatabase,
+    SqliteInvoiceRepository,
+    SqliteRateRepository,
+    SqliteRevenueRepository,
+    SqliteUnitOfWork,
+)
+from tests.repositories.contracts import random_invoice, random_rate
+
+NOVEMBER = datetime(2024, 11, 10, tzinfo=UTC)
+
+
+class TestInvoiceReconciler(ParametrizedTestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = str(Path(tmpdir.name) / 'test.db')
+        db = SqliteDatabase(path)
+        self.invoice_repo = SqliteInvoiceRepository(path, db=db)
+        self.rate_repo = SqliteRateRepository(path, db=db)
+        self.revenue_repo = SqliteRevenueRepository(path, db=db)
+        self.incident_repo = Mock(IncidentRepository)
+        self.store = Mock(IncidentSummaryStore)
+        self.store.fully_synced_summaries.return_value = None
+        self.metrics = Metrics()
+        self.reconciler = InvoiceReconciler(
+            self.invoice_repo,
+            self.rate_repo,
+            lambda: SqliteUnitOfWork(path, db=db),
+            self.incident_repo,
+            self.store,
+            self.metrics,
+            batch_size=2,
+            max_workers=2,
+            max_staleness=60,
+        )
+        self.incidents: dict[str, IncidentBatch] = {}
+        self.incident_repo.get_incident_batch_by_client_id.side_effect = lambda client_id, **_: self.incidents[client_id]
+
+    def add_invoice(self, web: int, mobile: int, email: int, year: int = 2024) -> Invoice:
+        invoice = random_invoice(self.faker, billing_year=year, tzinfo=UTC)
+        invoice.total_incidents_web, invoice.total_incidents_mobile, invoice.total_incidents_email = web, mobile, email
+        rate = random_rate(self.faker, client_id=invoice.client_id)
+        invoice.rate_id = rate.id
+        self.rate_repo.create(rate)
+        self.invoice_repo.create(invoice)
+
+        batch = IncidentBatch()
+        for channel, count in ((Channel.WEB, web), (Channel.MOBILE, mobile), (Channel.EMAIL, email)):
+            for _ in range(count):
+                batch.append(cast(str, self.faker.uuid4()), channel, NOVEMBER)
+        self.incidents[invoice.client_id] = batch
+        return invoice
+
+    def test_month_bounds(self) -> None:
+        self.assertEqual(
+            month_bounds(Month.DECEMBER, 2024), (datetime(2024, 12, 1, tzinfo=UTC), datetime(2025, 1, 1, tzinfo=UTC))
+        )
+
+    def test_reconcile(self) -> None:
+        invoices = [self.add_invoice(1, 2, 3) for _ in range(5)]
+        other_year = self.add_invoice(1, 1, 1, year=2023)
+        # Backdated incidents, and one created after the period that must not be counted
+        self.incidents[invoices[1].client_id].append('late-1', Channel.EMAIL, NOVEMBER)
+        self.incidents[invoices[1].client_id].append('late-2', Channel.WEB, NOVEMBER)
+        self.incidents[invoices[3].client_id].append('december', Channel.WEB, datetime(2024, 12, 2, tzinfo=UTC))
+        self.incidents[other_year.client_id].append('late-3', Channel.WEB, NOVEMBER)
+        updated: list[Invoice] = []
+
+        with self.assertLogs('InvoiceReconciler', level='INFO'):
+            report = self.reconciler.reconcile(Month.NOVEMBER, 2024, on_update=updated.append)
+
+        self.assertEqual((report.invoices, report.changed, report.failed), (5, 1, 0))
+        self.assertEqual(report.sources, {'download': 5})
+        self.assertEqual(updated, [replace(invoices[1], total_incidents_web=2, total_incidents_email=4)])
+        stored = self.invoice_repo.get(invoices[1].id)
+        self.assertEqual((stored.total_incidents_web, stored.total_incidents_email) if stored else None, (2, 4))
+        self.assertEqual(self.invoice_repo.get(invoices[0].id), invoices[0])
+        since = {call.kwargs['since'] for call in self.incident_repo.get_incident_batch_by_client_id.call_args_list}
+        self.assertEqual(since, {datetime(2024, 10, 31, 10, tzinfo=UTC)})
+        self.assertEqual(self.metrics.snapshot()['counters']['reconciliation.changed'], 1)
+        # The rollup only gets the change, the invoice was counted when it was created
+        rate = self.rate_repo.get_by_id(invoices[1].rate_id)
+        if rate is None:
+            self.fail('Rate not found')
+        [rollup] = self.revenue_repo.get_range('2024-11', '2024-11')
+        self.assertEqual(
+            (rollup.plan, rollup.invoices, rollup.total_incidents_web, rollup.total_incidents_email, rollup.fixed_revenue),
+            (Plan.EMPRENDEDOR, 0, 1, 1, 0),
+        )
+        self.assertAlmostEqual(rollup.variable_revenue, rate.cost_per_incident_web + rate.cost_per_incident_email)
+
+    @parametrize('from_store', [(False,), (True,)])
+    def test_reconcile_local_month(self, from_store: bool) -> None:  # noqa: FBT001
+        invoice = self.add_invoice(0, 0, 0)
+        batch = self.incidents[invoice.client_id]
+        # November in its own offset, December in UTC, and the other way round
+        batch.append('november', Channel.WEB, datetime.fromisoformat('2024-11-30T22:00:00-05:00'))
+        batch.append('december', Channel.WEB, datetime.fromisoformat('2024-12-01T01:00:00+03:00'))
+        batch.append('october', Channel.WEB, datetime.fromisoformat('2024-10-31T23:00:00-02:00'))
+        if from_store:
+            self.store.fully_synced_summaries.return_value = list(batch.summaries())
+
+        with self.assertLogs('InvoiceReconciler', level='INFO'):
+            report = self.reconciler.reconcile(Month.NOVEMBER, 2024)
+
+        self.assertEqual(report.changed, 1)
+        stored = self.invoice_repo.get(invoice.id)
+        self.assertEqual(stored.total_incidents_web if stored else None, 1)
+
+    def test_reconcile_overlapping(self) -> None:
+        invoice = self.add_invoice(1, 0, 0)
+        self.incidents[invoice.client_id].append('late', Channel.WEB, NOVEMBER)
+        # Read by an overlapping run before this one updated it
+        read_before = list(self.invoice_repo.get_by_month(Month.NOVEMBER, 2024))
+
+        with self.assertLogs('InvoiceReconciler', level='INFO'):
+            self.reconciler.reconcile(Month.NOVEMBER, 2024)
+        report = ReconciliationReport(billing_month=Month.NOVEMBER.value, billing_year=2024)
+        with self.assertLogs('InvoiceReconciler', level='WARNING'):
+            self.reconciler.reconcile_batch(read_before, report, threading.Lock(), None)
+
+        self.assertEqual((report.changed, report.failed), (0, 1))
+        [rollup] = self.revenue_repo.get_range('2024-11', '2024-11')
+        self.assertEqual(rollup.total_incidents_web, 1)
+
+    def test_reconcile_requires_conditional_updates(self) -> None:
+        self.add_invoice(1, 0, 0)
+        reconciler = InvoiceReconciler(
+            self.invoice_repo,
+            self.rate_repo,
+            lambda: cast(ConditionalUnitOfWork, Mock(UnitOfWork)),
+            self.incident_repo,
+            self.store,
+            self.metrics,
+            batch_size=2,
+            max_workers=2,
+            max_staleness=60,
+        )
+
+        with self.assertRaises(TypeError):
+            reconciler.reconcile(Month.NOVEMBER, 2024)
+
+        self.incident_repo.get_incident_batch_by_client_id.assert_not_called()
+
+    def test_reconcile_from_store(self) -> None:
+        invoice = self.add_invoice(0, 1, 0)
+        self.store.fully_synced_summaries.return_value = list(self.incidents[invoice.client_id].summaries())
+
+        with self.assertLogs('InvoiceReconciler', level='INFO'):
+            report = self.reconciler.reconcile(Month.NOVEMBER, 2024)
+
+        self.assertEqual((report.invoices, report.changed), (1, 0))
+        self.assertEqual(report.sources, {'store': 1})
+        self.incident_repo.get_incident_batch_by_client_id.assert_not_called()
+
+    def test_reconcile_failure(self) -> None:
+        self.add_invoice(1, 0, 0)
+        failing = self.add_invoice(1, 0, 0)
+        del self.incidents[failing.client_id]
+
+        with self.assertLogs('InvoiceReconciler', level='INFO') as logs:
+            report = self.reconciler.reconcile(Month.NOVEMBER, 2024)
+
+        self.assertEqual((report.invoices, report.changed, report.failed), (2, 0, 1))
+        self.assertEqual(logs.records[0].levelname, 'ERROR')
+
+    def test_reconcile_rate_not_found(self) -> None:
+        invoice = self.add_invoice(1, 0, 0)
+        self.incidents[invoice.client_id].append('late', Channel.WEB, NOVEMBER)
+        with self.invoice_repo.db.transaction() as conn:
+            conn.execute('DELETE FROM rates')
+
+        with self.assertLogs('InvoiceReconciler', level='INFO'):
+            report = self.reconciler.reconcile(Month.NOVEMBER, 2024)
+
+        self.assertEqual((report.changed, report.failed), (0, 1))
+        self.assertEqual(self.invoice_repo.get(invoice.id), invoice)
+        self.assertEqual(self.revenue_repo.get_range('2024-11', '2024-11'), [])
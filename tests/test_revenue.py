@@ -0,0 +1,94 @@
+import tempfile
+from datetime import UTC
+from pathlib import Path
+from unittest import TestCase
+
+from faker import Faker
+
+from models import Month, Plan, RevenueRollup, merge_rollups
+from repositories.sqlite import SqliteDatabase, SqliteInvoiceRepository, SqliteRateRepository, SqliteRevenueRepository
+from revenue import rebuild_rollups, revenue_report
+from tests.repositories.contracts import random_invoice, random_rate, random_rollup
+
+
+class TestRebuildRollups(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = str(Path(tmpdir.name) / 'test.db')
+        db = SqliteDatabase(path)
+        self.invoice_repo = SqliteInvoiceRepository(path, db=db)
+        self.rate_repo = SqliteRateRepository(path, db=db)
+        self.revenue_repo = SqliteRevenueRepository(path, db=db)
+
+    def add_invoice(self, month: Month, year: int, plan: Plan) -> RevenueRollup:
+        rate = random_rate(self.faker, plan=plan)
+        invoice = random_invoice(self.faker, client_id=rate.client_id, billing_year=year, tzinfo=UTC)
+        invoice.rate_id = rate.id
+        invoice.billing_month = month.value
+        self.rate_repo.create(rate)
+        self.invoice_repo.create(invoice)
+        return RevenueRollup.of_invoice(invoice, rate)
+
+    def test_rebuild_all(self) -> None:
+        contributions = [
+            self.add_invoice(Month.OCTOBER, 2024, Plan.EMPRENDEDOR),
+            self.add_invoice(Month.NOVEMBER, 2024, Plan.EMPRENDEDOR),
+            self.add_invoice(Month.NOVEMBER, 2024, Plan.EMPRENDEDOR),
+            self.add_invoice(Month.NOVEMBER, 2024, Plan.EMPRESARIO),
+        ]
+        # A stale rollup of a period without invoices
+        self.revenue_repo.replace([random_rollup(self.faker, '2024-09')])
+
+        report = rebuild_rollups(self.invoice_repo, self.rate_repo, self.revenue_repo, batch_size=3)
+
+        self.assertEqual((report.invoices, report.missing, report.rollups), (4, 0, 3))
+        self.assertEqual(self.revenue_repo.get_range('2024-01', '2024-12'), merge_rollups(contributions))
+
+    def test_rebuild_periods(self) -> None:
+        october = random_rollup(self.faker, '2024-10')
+        self.revenue_repo.replace([october, random_rollup(self.faker, '2024-11')])
+        november = self.add_invoice(Month.NOVEMBER, 2024, Plan.EMPRENDEDOR)
+        self.add_invoice(Month.OCTOBER, 2024, Plan.EMPRENDEDOR)
+
+        report = rebuild_rollups(self.invoice_repo, self.rate_repo, self.revenue_repo, periods=[(Month.NOVEMBER, 2024)])
+
+        self.assertEqual((report.invoices, report.rollups), (1, 1))
+        self.assertEqual(self.revenue_repo.get_range('2024-01', '2024-12'), [october, november])
+
+    def test_rebuild_rate_not_found(self) -> None:
+        self.invoice_repo.create(random_invoice(self.faker, billing_year=2024, tzinfo=UTC))
+
+        report = rebuild_rollups(self.invoice_repo, self.rate_repo, self.revenue_repo)
+
+        self.assertEqual((report.invoices, report.missing, report.rollups), (1, 1, 0))
+
+
+class TestRevenueReport(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+
+    def test_revenue_report(self) -> None:
+        emprendedor = RevenueRollup(2024, Month.NOVEMBER.value, Plan.EMPRENDEDOR, 2, 3, 4, 5, 100.0, 20.0)
+        empresario = RevenueRollup(2024, Month.NOVEMBER.value, Plan.EMPRESARIO, 1, 1, 0, 0, 200.0, 10.0)
+
+        report = revenue_report([emprendedor, empresario], [(Month.OCTOBER, 2024), (Month.NOVEMBER, 2024)])
+
+        october, november = report['periods']
+        self.assertEqual((october['billing_month'], october['billing_year']), (Month.OCTOBER, 2024))
+        self.assertEqual(october['plans'], {})
+        self.assertEqual((october['invoices'], october['total_revenue']), (0, 0))
+        self.assertEqual(
+            november['plans'][Plan.EMPRENDEDOR.value],
+            {
+                'invoices': 2,
+                'total_incidents': {'web': 3, 'mobile': 4, 'email': 5},
+                'fixed_revenue': 100.0,
+                'variable_revenue': 20.0,
+                'total_revenue': 120.0,
+            },
+        )
+        self.assertEqual(november['total_incidents'], {'web': 4, 'mobile': 4, 'email': 5})
+        self.assertEqual((november['invoices'], november['total_revenue']), (3, 330.0))
+        self.assertEqual((report['invoices'], report['fixed_revenue'], report['total_revenue']), (3, 300.0, 330.0))
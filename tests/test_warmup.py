@@ -0,0 +1,46 @@
+from unittest import TestCase
+from unittest.mock import Mock
+
+from warmup import WarmUp
+
+
+class TestWarmUp(TestCase):
+    def test_run(self) -> None:
+        step = Mock()
+        warmup = WarmUp()
+
+        self.assertFalse(warmup.ready)
+        warmup.run({'step': step})
+
+        step.assert_called_once()
+        self.assertTrue(warmup.ready)
+        self.assertIn('step', warmup.durations)
+        self.assertEqual(warmup.failed, [])
+
+    def test_run_failing_step(self) -> None:
+        failing_step = Mock(side_effect=ConnectionError())
+        next_step = Mock()
+        warmup = WarmUp()
+
+        with self.assertLogs(level='ERROR'):
+            warmup.run({'failing': failing_step, 'next': next_step})
+
+        next_step.assert_called_once()
+        self.assertTrue(warmup.ready)
+        self.assertEqual(warmup.failed, ['failing'])
+
+    def test_start_without_steps(self) -> None:
+        warmup = WarmUp()
+
+        warmup.start({})
+
+        self.assertTrue(warmup.ready)
+
+    def test_start(self) -> None:
+        step = Mock()
+        warmup = WarmUp()
+
+        warmup.start({'step': step})
+
+        self.assertTrue(warmup.finished.wait(timeout=5))
+        step.assert_called_once()
@@ -0,0 +1,79 @@
+import logging
+import threading
+import time
+from collections.abc import Callable, Mapping
+from itertools import islice
+from typing import TYPE_CHECKING
+
+from repositories.cached import CachedRateRepository
+
+if TYPE_CHECKING:
+    from containers import Container
+
+
+class WarmUp:
+    """
+    Runs the warm-up steps of a new instance in the background and tracks whether they have finished.
+
+    A failing step is logged and skipped: a cold connection is slower, not broken, so it must not keep the instance
+    from becoming ready.
+    """
+
+    def __init__(self) -> None:
+        self.finished = threading.Event()
+        self.durations: dict[str, float] = {}
+        self.failed: list[str] = []
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @property
+    def ready(self) -> bool:
+        return self.finished.is_set()
+
+    def run(self, steps: Mapping[str, Callable[[], object]]) -> None:
+        try:
+            for name, step in steps.items():
+                start = time.perf_counter()
+                try:
+                    step()
+                except Exception:
+                    self.logger.exception('Warm-up step %s failed', name)
+                    self.failed.append(name)
+                self.durations[name] = time.perf_counter() - start
+
+            self.logger.info('Warm-up finished: %s', {name: round(duration, 3) for name, duration in self.durations.items()})
+        finally:
+            self.finished.set()
+
+    def start(self, steps: Mapping[str, Callable[[], object]]) -> None:
+        if not steps:
+            self.finished.set()
+            return
+
+        threading.Thread(target=self.run, args=(steps,), name='warmup', daemon=True).start()
+
+
+def warmup_steps(container: 'Container', preload_rates: int) -> dict[str, Callable[[], object]]:
+    steps: dict[str, Callable[[], object]] = {}
+
+    if container.config.storage.backend() == 'firestore':
+        # Opening the gRPC channel (and the TLS handshake behind it) happens on the first RPC, not when the client is built.
+        steps['firestore'] = lambda: container.firestore_client().collection('rates').limit(1).get()
+    else:
+        steps['sqlite'] = container.sqlite_db
+
+    if container.config.svc.client.url() is not None:
+        steps['client_svc'] = lambda: container.rest_client_repo().warm_up()
+
+    if container.config.svc.incidentquery.url() is not None:
+        steps['incidentquery_svc'] = lambda: container.incidentquery_repo().warm_up()
+
+    if preload_rates > 0:
+
+        def preload() -> None:
+            rate_repo = container.rate_repo()
+            if isinstance(rate_repo, CachedRateRepository):
+                rate_repo.preload(islice(rate_repo.get_all(), preload_rates))
+
+        steps['rates'] = preload
+
+    return steps